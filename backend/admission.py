@@ -0,0 +1,261 @@
+"""
+Cost-based admission control for the SEO Analyzer.
+
+Each request's cost is estimated up front from its length, sentence count
+and the number of reference candidates it will be compared against.
+Every worker process keeps a cost budget: requests that fit run at once,
+others wait in a bounded queue, and requests are rejected with 429 when
+the queue is full or 503 when they waited too long. Waiters are admitted
+first-fit in arrival order, so one huge paste cannot hold back every
+smaller request queued behind it. A draining worker (see watermark.py)
+rejects new requests with 503 while it finishes the admitted ones.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional, Tuple
+
+# Cost units are roughly milliseconds of single-core analysis time
+COST_BASE = 1.0
+COST_PER_CHAR = 0.01
+COST_PER_SENTENCE_PAIR = 0.25
+
+# Whole-document sequence matching, per input character and reference document
+COST_PER_SEQUENCE_CHAR = 0.002
+
+# Copied-run detection (one suffix-automaton pass), per input character
+COST_PER_COPY_CHAR = 0.0005
+
+# Paraphrase detection: hashing and sketching per input sentence, and one
+# sketch comparison per input and reference sentence pair
+COST_PER_PARAPHRASE_SENTENCE = 0.25
+COST_PER_SKETCH_PAIR = 0.0002
+
+# Average sentence length assumed when only the length is known
+AVERAGE_SENTENCE_CHARS = 100
+
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+def count_sentences(text: str) -> int:
+    """Cheap upper-bound sentence count (number of terminators, at least 1)"""
+    return max(1, text.count('.') + text.count('!') + text.count('?'))
+
+
+def estimate_cost(chars: int, sentences: Optional[int], candidates: int) -> float:
+    """
+    Estimate the cost of analyzing a document.
+
+    Linear stages scale with the length; sentence matching compares every
+    input sentence with every candidate reference sentence.
+
+    Args:
+        chars: Length of the text in characters
+        sentences: Number of input sentences (estimated from `chars` if None)
+        candidates: Number of reference sentences compared against
+
+    Returns:
+        float: Estimated cost in budget units (about one millisecond each)
+    """
+    if sentences is None:
+        sentences = max(1, chars // AVERAGE_SENTENCE_CHARS)
+
+    return round(
+        COST_BASE
+        + chars * COST_PER_CHAR
+        + sentences * candidates * COST_PER_SENTENCE_PAIR,
+        2
+    )
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: Optional[int] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Per-worker cost budget with a bounded first-fit waiting queue.
+
+    Args:
+        budget: Total cost allowed in flight at once
+        max_queue: Maximum number of waiting requests (429 beyond it)
+        queue_timeout: Seconds a request may wait before a 503
+        max_request_cost: Requests costing more are rejected with 413;
+            when None they are admitted alone (cost clamped to the budget)
+    """
+
+    def __init__(
+        self,
+        budget: float = 2000.0,
+        max_queue: int = 32,
+        queue_timeout: float = 10.0,
+        max_request_cost: Optional[float] = None
+    ):
+        self.budget = budget
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_request_cost = max_request_cost
+
+        self.in_use = 0.0
+        self.in_flight = 0
+        self.draining = False
+        self._waiters: Deque[Tuple[float, asyncio.Future]] = deque()
+
+        self.admitted = 0
+        self.queued = 0
+        self.rejected: Dict[str, int] = {'queue_full': 0, 'queue_timeout': 0, 'too_expensive': 0, 'draining': 0}
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @classmethod
+    def from_env(cls) -> 'AdmissionController':
+        """Create a controller configured from ADMISSION_* environment variables"""
+        return cls(
+            budget=_env_float('ADMISSION_COST_BUDGET', 2000.0),
+            max_queue=int(_env_float('ADMISSION_MAX_QUEUE', 32)),
+            queue_timeout=_env_float('ADMISSION_QUEUE_TIMEOUT', 10.0),
+            max_request_cost=_env_float('ADMISSION_MAX_REQUEST_COST', None)
+        )
+
+    @asynccontextmanager
+    async def admit(self, cost: float):
+        """
+        Hold `cost` units of the budget for the duration of the block.
+
+        Args:
+            cost: Estimated request cost
+
+        Raises:
+            AdmissionRejected: If the worker is draining, the request is too
+                expensive, the queue is full, or the request waited longer
+                than `queue_timeout`
+        """
+        granted = await self.acquire(cost)
+        try:
+            yield granted
+        finally:
+            self.release(granted)
+
+    async def acquire(self, cost: float) -> float:
+        """
+        Wait until `cost` fits in the budget and reserve it.
+
+        Returns:
+            float: Reserved cost, to be passed to `release`
+        """
+        if self.draining:
+            self.rejected['draining'] += 1
+            raise AdmissionRejected(503, "Worker is restarting, retry the request", retry_after=1)
+
+        if self.max_request_cost is not None and cost > self.max_request_cost:
+            self.rejected['too_expensive'] += 1
+            raise AdmissionRejected(
+                413,
+                f"Request too expensive to analyze (estimated cost {cost:.0f}, limit {self.max_request_cost:.0f})"
+            )
+
+        cost = min(cost, self.budget)
+
+        if self.in_use + cost <= self.budget:
+            self._grant(cost)
+            return cost
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected['queue_full'] += 1
+            raise AdmissionRejected(429, "Server is busy, too many queued requests", retry_after=1)
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (cost, future)
+        self._waiters.append(waiter)
+        self.queued += 1
+        started = time.monotonic()
+
+        try:
+            done, _ = await asyncio.wait({future}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # Client went away while queued: give back anything already granted
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                self._dispatch()
+            elif future.done() and not future.cancelled():
+                self.release(cost)
+            raise
+
+        if not done:
+            self._waiters.remove(waiter)
+            future.cancel()
+            self.rejected['queue_timeout'] += 1
+            # A waiter leaving the queue may let smaller ones behind it in
+            self._dispatch()
+            raise AdmissionRejected(
+                503, "Server is overloaded, request waited too long", retry_after=int(self.queue_timeout) or 1
+            )
+
+        wait = time.monotonic() - started
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        return cost
+
+    @property
+    def pending(self) -> int:
+        """Admitted and queued requests"""
+        return self.in_flight + len(self._waiters)
+
+    def drain(self) -> None:
+        """Stop admitting new requests; admitted and queued ones still run"""
+        self.draining = True
+
+    def release(self, cost: float) -> None:
+        """Return reserved cost to the budget and admit waiters that now fit"""
+        self.in_use = max(0.0, self.in_use - cost)
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _grant(self, cost: float) -> None:
+        self.in_use += cost
+        self.in_flight += 1
+        self.admitted += 1
+
+    def _dispatch(self) -> None:
+        for waiter in list(self._waiters):
+            cost, future = waiter
+            if self.in_use + cost > self.budget:
+                continue
+            self._waiters.remove(waiter)
+            if not future.done():
+                self._grant(cost)
+                future.set_result(cost)
+
+    def snapshot(self) -> dict:
+        """
+        Report the current admission state.
+
+        Returns:
+            dict: Budget usage, queue state and admission counters
+        """
+        return {
+            'budget': self.budget,
+            'draining': self.draining,
+            'in_use': round(self.in_use, 2),
+            'in_flight': self.in_flight,
+            'queue_depth': len(self._waiters),
+            'queued_cost': round(sum(cost for cost, _ in self._waiters), 2),
+            'max_queue': self.max_queue,
+            'admitted': self.admitted,
+            'queued': self.queued,
+            'rejected': dict(self.rejected),
+            'avg_wait_ms': round(self.total_wait / self.queued * 1000, 2) if self.queued else 0.0,
+            'max_wait_ms': round(self.max_wait * 1000, 2),
+        }
@@ -0,0 +1,241 @@
+"""
+Blocked Bloom filter over reference hashes for the SEO Analyzer.
+
+Most submissions are original: almost none of their 5-gram shingles or
+sentences occur in any reference document. A Bloom filter of every
+reference shingle and sentence hash answers "definitely not in the
+reference" for such inputs with a few vectorized lookups, so
+check_plagiarism can skip the expensive sequence and sentence tiers when
+the share of hits stays below a threshold.
+
+The fast path is opt-in (PLAGIARISM_BLOOM_MIN_HIT_RATE). The filter only
+knows exact shingles and sentences, so closely reworded text misses it
+just like original text does, and skipping the fuzzy sentence and
+sequence tiers scores such near-copies as original.
+
+The filter is blocked: all bits of a key fall into one 512-bit block (a
+cache line), so each lookup touches one block of memory. Uneven block
+loads raise the false-positive rate over a classic Bloom filter of the
+same size, so the filter is sized for the blocked rate.
+"""
+
+import hashlib
+import math
+import os
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+# Bits per block and 64-bit words per block
+BLOCK_BITS = 512
+_BLOCK_WORDS = BLOCK_BITS // 64
+
+# Target false-positive rate when none is configured
+DEFAULT_FALSE_POSITIVE_RATE = 0.001
+
+# Share of input hashes found in the filter above which the full check runs;
+# 0 (the default) always runs the full check
+DEFAULT_MIN_HIT_RATE = 0.0
+
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+def mix64(hashes: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer: spreads structured hashes over all 64 bits"""
+    z = hashes + _GOLDEN
+    z = (z ^ (z >> np.uint64(30))) * _MIX1
+    z = (z ^ (z >> np.uint64(27))) * _MIX2
+    return z ^ (z >> np.uint64(31))
+
+
+def sentence_hashes(sentences: Iterable[str]) -> np.ndarray:
+    """
+    Hash cleaned sentences into the key space of shingle hashes.
+
+    Args:
+        sentences: Cleaned, lowercased sentences
+
+    Returns:
+        np.ndarray: One uint64 hash per sentence
+    """
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'little') for s in sentences),
+        dtype=np.uint64
+    )
+
+
+def blocked_false_positive_rate(keys: int, n_blocks: int, n_hashes: int) -> float:
+    """
+    Expected false-positive rate of a blocked Bloom filter.
+
+    Block loads follow a Poisson distribution around keys / n_blocks; a
+    block holding j keys answers falsely with probability
+    (1 - (1 - 1/512) ** (j * n_hashes)) ** n_hashes.
+    """
+    load = keys / n_blocks
+    rate = 0.0
+    probability = math.exp(-load)
+    for j in range(int(load + 10 * math.sqrt(load) + 10)):
+        rate += probability * (1 - (1 - 1 / BLOCK_BITS) ** (j * n_hashes)) ** n_hashes
+        probability *= load / (j + 1)
+    return rate
+
+
+class BlockedBloomFilter:
+    """
+    Bloom filter of uint64 keys with all of a key's bits in one block.
+
+    Args:
+        capacity: Expected number of keys
+        false_positive_rate: Target false-positive rate; lower rates cost
+            more bits per key (about 1.44 * log2(1 / rate))
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float = DEFAULT_FALSE_POSITIVE_RATE):
+        if not 0 < false_positive_rate < 1:
+            raise ValueError(f"false_positive_rate must be between 0 and 1, got {false_positive_rate}")
+
+        capacity = max(1, capacity)
+        bits_per_key = -math.log(false_positive_rate) / math.log(2) ** 2
+        self.n_hashes = max(1, round(bits_per_key * math.log(2)))
+        self.n_blocks = math.ceil(capacity * bits_per_key / BLOCK_BITS)
+        # Grow past the classic size until the blocked rate meets the target
+        while blocked_false_positive_rate(capacity, self.n_blocks, self.n_hashes) > false_positive_rate:
+            self.n_blocks = math.ceil(self.n_blocks * 1.05)
+        self.false_positive_rate = false_positive_rate
+        self.keys = 0
+        self._bits = np.zeros((self.n_blocks, _BLOCK_WORDS), dtype=np.uint64)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._bits.nbytes
+
+    def _positions(self, keys: np.ndarray):
+        """Block of each key and its (word, bit) pairs, one row per probe"""
+        mixed = mix64(np.asarray(keys, dtype=np.uint64))
+        blocks = (mixed % np.uint64(self.n_blocks)).astype(np.int64)
+
+        # Independent bit per probe inside the block (double hashing
+        # correlates probes too much within 512 bits)
+        probes = np.arange(1, self.n_hashes + 1, dtype=np.uint64)[:, None] * _GOLDEN
+        bits = mix64(mixed[None, :] + probes) & np.uint64(BLOCK_BITS - 1)
+        return blocks, (bits >> np.uint64(6)).astype(np.int64), np.uint64(1) << (bits & np.uint64(63))
+
+    def add(self, keys: np.ndarray) -> None:
+        """Insert uint64 keys"""
+        keys = np.asarray(keys, dtype=np.uint64)
+        if not len(keys):
+            return
+        blocks, words, masks = self._positions(keys)
+        np.bitwise_or.at(self._bits, (np.broadcast_to(blocks, words.shape), words), masks)
+        self.keys += len(keys)
+
+    def contains(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Look up uint64 keys.
+
+        Returns:
+            np.ndarray: Boolean per key; False means certainly absent
+        """
+        keys = np.asarray(keys, dtype=np.uint64)
+        if not len(keys):
+            return np.zeros(0, dtype=bool)
+        blocks, words, masks = self._positions(keys)
+        return np.all(self._bits[blocks, words] & masks != 0, axis=0)
+
+    def estimated_false_positive_rate(self) -> float:
+        """False-positive rate implied by the share of bits set in each block"""
+        fill = np.unpackbits(self._bits.view(np.uint8), axis=1).mean(axis=1)
+        return float(np.mean(fill ** self.n_hashes))
+
+
+class ReferenceFilter:
+    """
+    Negative fast path for plagiarism checks.
+
+    Holds a BlockedBloomFilter of reference shingle and sentence hashes and
+    decides whether an input is so unlike the references that the full
+    plagiarism check can be skipped.
+
+    Args:
+        keys: Reference shingle and sentence hashes
+        false_positive_rate: Target false-positive rate of the filter
+        min_hit_rate: Inputs with a larger share of hashes found in the
+            filter get the full check; 0 (default) disables the fast path
+    """
+
+    def __init__(
+        self,
+        keys: np.ndarray,
+        false_positive_rate: float = DEFAULT_FALSE_POSITIVE_RATE,
+        min_hit_rate: float = DEFAULT_MIN_HIT_RATE
+    ):
+        keys = np.unique(np.asarray(keys, dtype=np.uint64))
+        self.filter = BlockedBloomFilter(len(keys), false_positive_rate)
+        self.filter.add(keys)
+        self.min_hit_rate = min_hit_rate
+        self.queries = 0
+        self.fast_path = 0
+
+    @classmethod
+    def from_env(cls, keys: np.ndarray) -> 'ReferenceFilter':
+        """
+        Build the filter configured by the environment.
+
+        PLAGIARISM_BLOOM_FPR sets the target false-positive rate and
+        PLAGIARISM_BLOOM_MIN_HIT_RATE the hit rate above which the full
+        check runs (unset: the fast path is off).
+        """
+        return cls(
+            keys,
+            false_positive_rate=_env_float('PLAGIARISM_BLOOM_FPR', DEFAULT_FALSE_POSITIVE_RATE),
+            min_hit_rate=_env_float('PLAGIARISM_BLOOM_MIN_HIT_RATE', DEFAULT_MIN_HIT_RATE)
+        )
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the fast path is on (callers skip the lookups otherwise)"""
+        return self.min_hit_rate > 0
+
+    def count_hits(self, keys: np.ndarray) -> int:
+        """Number of `keys` (possibly) present in the reference"""
+        return int(np.count_nonzero(self.filter.contains(keys)))
+
+    def is_original(self, hits: int, total: int) -> bool:
+        """
+        Decide whether the full plagiarism check can be skipped.
+
+        Args:
+            hits: Input shingle and sentence hashes found by `count_hits`
+            total: Input shingle and sentence hashes looked up
+
+        Returns:
+            bool: True when the hit rate is below `min_hit_rate`
+        """
+        self.queries += 1
+        if self.min_hit_rate <= 0 or not total:
+            return False
+        if hits / total < self.min_hit_rate:
+            self.fast_path += 1
+            return True
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Filter size, accuracy and fast-path counters for /metrics"""
+        return {
+            'keys': self.filter.keys,
+            'memory_bytes': self.filter.memory_bytes,
+            'hashes': self.filter.n_hashes,
+            'target_false_positive_rate': self.filter.false_positive_rate,
+            'estimated_false_positive_rate': round(self.filter.estimated_false_positive_rate(), 6),
+            'min_hit_rate': self.min_hit_rate,
+            'queries': self.queries,
+            'fast_path': self.fast_path,
+        }
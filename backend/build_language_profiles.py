@@ -0,0 +1,306 @@
+"""
+Build the character n-gram language profiles shipped with the backend.
+
+Run this script after changing the training texts below or adding a
+language; it rewrites language_profiles.json next to this file.
+The profiles are ranked n-gram lists (Cavnar & Trenkle), small enough to
+ship in the repository and load at runtime without any downloads.
+
+The built-in texts cover web content, technology, business and everyday
+topics. Larger corpora can be added with --corpus DIR, where DIR holds
+one folder per language code with plain-text files (e.g. DIR/en/*.txt).
+
+Command line usage:
+    python build_language_profiles.py [--corpus DIR]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from language import NGRAM_RANGE, PROFILE_SIZE, ngram_profile
+
+OUTPUT_PATH = Path(__file__).resolve().parent / 'language_profiles.json'
+
+TRAINING_TEXTS = {
+    "en": """
+    Search engine optimization is the practice of improving a website so that it
+    appears higher in search results. Good content answers the questions people
+    are asking, and it should be easy to read on any device. Writers often start
+    with keyword research to learn which words their audience uses, and then they
+    build an outline with clear headings. The best articles are written for
+    readers first and for search engines second. When the page loads quickly and
+    the information is useful, visitors stay longer and are more likely to share
+    it with their friends. There is no single trick that works forever, because
+    the way people search keeps changing over the years. What matters is that the
+    text is honest, well structured and regularly updated with fresh information.
+    We should also think about the title, the description and the links between
+    pages, since they help both people and machines understand what the site is
+    about and why it deserves their attention.
+    Information technology teams manage cloud computing infrastructure, software
+    development and deployment pipelines for the whole organization. Engineers
+    automate testing, monitoring and configuration management, so that new
+    features reach customers faster and with fewer errors. Data analysis and
+    machine learning models help managers make better decisions about budgets,
+    security and performance. A successful project needs clear requirements,
+    regular communication between departments and a realistic schedule. Many
+    companies now offer consulting services, training programs and technical
+    support to small businesses that want to improve their digital marketing
+    strategy and online presence.
+    On weekends my family likes to cook dinner together. We buy fresh vegetables,
+    bread and cheese at the local market, and sometimes we order pizza, pasta or
+    a strong espresso at the small restaurant around the corner. The weather was
+    warm yesterday, so the children played in the garden while their grandparents
+    watched from the kitchen window. Scientists say that people who walk every day
+    and sleep well are healthier and happier. The government announced a new plan
+    for schools, hospitals and public transport, which will be discussed by the
+    council next month.
+    """,
+    "es": """
+    La optimización para motores de búsqueda es la práctica de mejorar un sitio web
+    para que aparezca más arriba en los resultados. Un buen contenido responde a las
+    preguntas que las personas se hacen y debe ser fácil de leer en cualquier
+    dispositivo. Los redactores suelen empezar con una investigación de palabras
+    clave para saber qué términos utiliza su público, y después construyen un
+    esquema con encabezados claros. Los mejores artículos se escriben primero para
+    los lectores y después para los buscadores. Cuando la página carga rápido y la
+    información es útil, los visitantes se quedan más tiempo y es más probable que
+    la compartan con sus amigos. No existe un truco que funcione para siempre,
+    porque la forma en que la gente busca cambia con los años. Lo que importa es
+    que el texto sea honesto, esté bien estructurado y se actualice con
+    regularidad. También debemos pensar en el título, la descripción y los enlaces
+    entre las páginas, ya que ayudan a las personas y a las máquinas a entender de
+    qué trata el sitio.
+    Los equipos de tecnología de la información gestionan la infraestructura en la
+    nube, el desarrollo de software y los procesos de despliegue de toda la
+    organización. Los ingenieros automatizan las pruebas, la supervisión y la
+    gestión de la configuración, para que las nuevas funciones lleguen antes a los
+    clientes y con menos errores. El análisis de datos ayuda a los directivos a
+    tomar mejores decisiones sobre presupuestos, seguridad y rendimiento. Muchas
+    empresas ofrecen servicios de consultoría, formación y soporte técnico a las
+    pequeñas empresas que quieren mejorar su estrategia de marketing digital.
+    Los fines de semana a mi familia le gusta cocinar junta. Compramos verduras
+    frescas, pan y queso en el mercado del barrio, y a veces pedimos una pizza en
+    el pequeño restaurante de la esquina. Ayer hacía calor, así que los niños
+    jugaron en el jardín mientras sus abuelos los miraban desde la ventana de la
+    cocina. Los científicos dicen que las personas que caminan todos los días y
+    duermen bien están más sanas. El gobierno anunció un nuevo plan para las
+    escuelas, los hospitales y el transporte público, que el ayuntamiento
+    discutirá el mes que viene.
+    """,
+    "fr": """
+    L'optimisation pour les moteurs de recherche consiste à améliorer un site web
+    afin qu'il apparaisse plus haut dans les résultats. Un bon contenu répond aux
+    questions que les gens se posent et doit être facile à lire sur tous les
+    appareils. Les rédacteurs commencent souvent par une recherche de mots clés
+    pour savoir quels termes leur public utilise, puis ils construisent un plan
+    avec des titres clairs. Les meilleurs articles sont écrits d'abord pour les
+    lecteurs et ensuite pour les moteurs de recherche. Lorsque la page se charge
+    rapidement et que l'information est utile, les visiteurs restent plus
+    longtemps et sont plus enclins à la partager avec leurs amis. Il n'existe
+    aucune astuce qui fonctionne pour toujours, car la manière dont les gens
+    cherchent change au fil des années. Ce qui compte, c'est que le texte soit
+    honnête, bien structuré et mis à jour régulièrement. Nous devons aussi penser
+    au titre, à la description et aux liens entre les pages, puisqu'ils aident les
+    personnes et les machines à comprendre le sujet du site.
+    Les équipes informatiques gèrent l'infrastructure dans le nuage, le
+    développement des logiciels et les chaînes de déploiement de toute
+    l'entreprise. Les ingénieurs automatisent les tests, la surveillance et la
+    gestion de la configuration, afin que les nouvelles fonctionnalités arrivent
+    plus vite chez les clients et avec moins d'erreurs. L'analyse des données aide
+    les responsables à prendre de meilleures décisions sur les budgets, la sécurité
+    et les performances. Beaucoup de sociétés proposent des services de conseil,
+    de formation et d'assistance technique aux petites entreprises qui veulent
+    améliorer leur stratégie de marketing numérique.
+    Le week-end, ma famille aime cuisiner ensemble. Nous achetons des légumes
+    frais, du pain et du fromage au marché du quartier, et parfois nous commandons
+    une pizza au petit restaurant du coin. Hier il faisait chaud, alors les enfants
+    ont joué dans le jardin pendant que leurs grands-parents les regardaient par la
+    fenêtre de la cuisine. Les chercheurs disent que les personnes qui marchent
+    chaque jour et dorment bien sont en meilleure santé. Le gouvernement a annoncé
+    un nouveau plan pour les écoles, les hôpitaux et les transports publics, qui
+    sera discuté par le conseil le mois prochain.
+    """,
+    "de": """
+    Suchmaschinenoptimierung ist die Praxis, eine Website so zu verbessern, dass
+    sie in den Suchergebnissen weiter oben erscheint. Guter Inhalt beantwortet die
+    Fragen, die sich die Menschen stellen, und sollte auf jedem Gerät leicht zu
+    lesen sein. Autoren beginnen oft mit einer Keyword-Recherche, um zu erfahren,
+    welche Begriffe ihr Publikum verwendet, und erstellen dann eine Gliederung mit
+    klaren Überschriften. Die besten Artikel werden zuerst für die Leser und erst
+    danach für die Suchmaschinen geschrieben. Wenn die Seite schnell lädt und die
+    Informationen nützlich sind, bleiben die Besucher länger und teilen sie eher
+    mit ihren Freunden. Es gibt keinen Trick, der für immer funktioniert, weil sich
+    die Art und Weise, wie Menschen suchen, im Laufe der Jahre ändert. Wichtig ist,
+    dass der Text ehrlich, gut strukturiert und regelmäßig aktualisiert ist. Wir
+    sollten auch an den Titel, die Beschreibung und die Verweise zwischen den
+    Seiten denken, weil sie Menschen und Maschinen helfen zu verstehen, worum es
+    auf der Website geht.
+    Die IT-Abteilungen verwalten die Cloud-Infrastruktur, die Softwareentwicklung
+    und die Bereitstellung für das ganze Unternehmen. Ingenieure automatisieren
+    Tests, Überwachung und Konfigurationsverwaltung, damit neue Funktionen
+    schneller und mit weniger Fehlern bei den Kunden ankommen. Die Auswertung von
+    Daten hilft den Führungskräften, bessere Entscheidungen über Budgets,
+    Sicherheit und Leistung zu treffen. Viele Firmen bieten Beratung, Schulungen
+    und technische Unterstützung für kleine Betriebe an, die ihre Strategie im
+    digitalen Marketing verbessern wollen.
+    Am Wochenende kocht meine Familie gern zusammen. Wir kaufen frisches Gemüse,
+    Brot und Käse auf dem Markt in unserem Viertel, und manchmal bestellen wir
+    eine Pizza in dem kleinen Restaurant um die Ecke. Gestern war es warm, deshalb
+    spielten die Kinder im Garten, während die Großeltern ihnen vom Küchenfenster
+    aus zusahen. Forscher sagen, dass Menschen, die jeden Tag spazieren gehen und
+    gut schlafen, gesünder sind. Die Regierung hat einen neuen Plan für Schulen,
+    Krankenhäuser und den öffentlichen Verkehr angekündigt, über den der Rat im
+    nächsten Monat beraten wird.
+    """,
+    "it": """
+    L'ottimizzazione per i motori di ricerca è la pratica di migliorare un sito web
+    affinché compaia più in alto nei risultati. Un buon contenuto risponde alle
+    domande che le persone si pongono e deve essere facile da leggere su qualsiasi
+    dispositivo. Gli autori iniziano spesso con una ricerca delle parole chiave per
+    capire quali termini usa il loro pubblico, e poi costruiscono una scaletta con
+    titoli chiari. Gli articoli migliori sono scritti prima per i lettori e poi per
+    i motori di ricerca. Quando la pagina si carica velocemente e le informazioni
+    sono utili, i visitatori restano più a lungo ed è più probabile che la
+    condividano con i loro amici. Non esiste un trucco che funzioni per sempre,
+    perché il modo in cui la gente cerca cambia nel corso degli anni. Ciò che conta
+    è che il testo sia onesto, ben strutturato e aggiornato con regolarità.
+    Dobbiamo anche pensare al titolo, alla descrizione e ai collegamenti tra le
+    pagine, perché aiutano le persone e le macchine a capire di che cosa parla il
+    sito.
+    I reparti informatici gestiscono l'infrastruttura cloud, lo sviluppo del
+    software e i processi di rilascio di tutta l'azienda. Gli ingegneri
+    automatizzano i test, il monitoraggio e la gestione della configurazione,
+    perché le nuove funzioni arrivino ai clienti più in fretta e con meno errori.
+    L'analisi dei dati aiuta i dirigenti a prendere decisioni migliori su bilanci,
+    sicurezza e prestazioni. Molte società offrono servizi di consulenza,
+    formazione e assistenza tecnica alle piccole imprese che vogliono migliorare
+    la loro strategia di marketing digitale.
+    Nel fine settimana alla mia famiglia piace cucinare insieme. Compriamo verdure
+    fresche, pane e formaggio al mercato del quartiere, e a volte ordiniamo una
+    pizza nella piccola trattoria all'angolo. Ieri faceva caldo, così i bambini
+    hanno giocato in giardino mentre i nonni li guardavano dalla finestra della
+    cucina. Gli scienziati dicono che le persone che camminano ogni giorno e
+    dormono bene sono più sane. Il governo ha annunciato un nuovo piano per le
+    scuole, gli ospedali e i trasporti pubblici, che il consiglio discuterà il
+    mese prossimo.
+    """,
+    "pt": """
+    A otimização para motores de busca é a prática de melhorar um site para que ele
+    apareça mais acima nos resultados. Um bom conteúdo responde às perguntas que as
+    pessoas fazem e deve ser fácil de ler em qualquer dispositivo. Os redatores
+    costumam começar com uma pesquisa de palavras-chave para saber quais termos o
+    seu público utiliza, e depois constroem um esboço com títulos claros. Os
+    melhores artigos são escritos primeiro para os leitores e depois para os
+    buscadores. Quando a página carrega rapidamente e a informação é útil, os
+    visitantes ficam mais tempo e é mais provável que a compartilhem com os seus
+    amigos. Não existe um truque que funcione para sempre, porque a maneira como as
+    pessoas pesquisam muda ao longo dos anos. O que importa é que o texto seja
+    honesto, bem estruturado e atualizado com regularidade. Também devemos pensar
+    no título, na descrição e nas ligações entre as páginas, já que elas ajudam as
+    pessoas e as máquinas a entender do que se trata o site.
+    As equipas de informática gerem a infraestrutura na nuvem, o desenvolvimento
+    de software e os processos de implementação de toda a organização. Os
+    engenheiros automatizam os testes, a monitorização e a gestão da configuração,
+    para que as novas funcionalidades cheguem mais depressa aos clientes e com
+    menos erros. A análise de dados ajuda os gestores a tomar melhores decisões
+    sobre orçamentos, segurança e desempenho. Muitas empresas oferecem serviços de
+    consultoria, formação e apoio técnico às pequenas empresas que querem melhorar
+    a sua estratégia de marketing digital.
+    Aos fins de semana a minha família gosta de cozinhar em conjunto. Compramos
+    legumes frescos, pão e queijo no mercado do bairro, e às vezes pedimos uma
+    pizza no pequeno restaurante da esquina. Ontem estava calor, por isso as
+    crianças brincaram no jardim enquanto os avós as observavam da janela da
+    cozinha. Os cientistas dizem que as pessoas que caminham todos os dias e
+    dormem bem são mais saudáveis. O governo anunciou um novo plano para as
+    escolas, os hospitais e os transportes públicos, que será discutido pela
+    câmara no próximo mês.
+    """,
+    "nl": """
+    Zoekmachineoptimalisatie is het verbeteren van een website zodat deze hoger in
+    de zoekresultaten verschijnt. Goede inhoud beantwoordt de vragen die mensen
+    zich stellen en moet op elk apparaat gemakkelijk te lezen zijn. Schrijvers
+    beginnen vaak met zoekwoordonderzoek om te ontdekken welke woorden hun publiek
+    gebruikt, en daarna maken ze een opzet met duidelijke koppen. De beste artikelen
+    worden eerst voor de lezers geschreven en pas daarna voor de zoekmachines.
+    Wanneer de pagina snel laadt en de informatie nuttig is, blijven bezoekers
+    langer en delen ze het eerder met hun vrienden. Er bestaat geen truc die voor
+    altijd werkt, omdat de manier waarop mensen zoeken in de loop van de jaren
+    verandert. Het belangrijkste is dat de tekst eerlijk, goed gestructureerd en
+    regelmatig bijgewerkt is. We moeten ook nadenken over de titel, de beschrijving
+    en de links tussen de pagina's, want die helpen mensen en machines te begrijpen
+    waar de website over gaat.
+    De IT-afdelingen beheren de cloudinfrastructuur, de softwareontwikkeling en
+    de uitrol voor de hele organisatie. Ingenieurs automatiseren het testen, de
+    bewaking en het configuratiebeheer, zodat nieuwe functies sneller en met
+    minder fouten bij de klanten terechtkomen. Gegevensanalyse helpt managers om
+    betere beslissingen te nemen over budgetten, beveiliging en prestaties. Veel
+    bedrijven bieden advies, opleidingen en technische ondersteuning aan kleine
+    ondernemingen die hun strategie voor digitale marketing willen verbeteren.
+    In het weekend kookt mijn familie graag samen. We kopen verse groenten, brood
+    en kaas op de markt in onze wijk, en soms bestellen we een pizza bij het kleine
+    restaurant om de hoek. Gisteren was het warm, dus speelden de kinderen in de
+    tuin terwijl hun grootouders vanuit het keukenraam toekeken. Onderzoekers
+    zeggen dat mensen die elke dag wandelen en goed slapen gezonder zijn. De
+    regering heeft een nieuw plan aangekondigd voor scholen, ziekenhuizen en het
+    openbaar vervoer, dat de gemeenteraad volgende maand zal bespreken.
+    """,
+}
+
+
+def load_corpus(directory: Path) -> Dict[str, str]:
+    """
+    Read additional training text per language from a corpus directory.
+
+    Args:
+        directory: Folder with one sub-folder of .txt files per language code
+
+    Returns:
+        dict: Language code to concatenated corpus text
+    """
+    corpus = {}
+    for language in TRAINING_TEXTS:
+        files = sorted((directory / language).glob('*.txt'))
+        if files:
+            corpus[language] = "\n".join(path.read_text(encoding='utf-8') for path in files)
+    return corpus
+
+
+def build_profiles(corpus: Optional[Dict[str, str]] = None) -> dict:
+    """
+    Build ranked n-gram profiles for every training text.
+
+    Args:
+        corpus: Optional extra training text per language
+
+    Returns:
+        dict: Serializable profile model
+    """
+    corpus = corpus or {}
+    return {
+        "ngram_range": list(NGRAM_RANGE),
+        "profile_size": PROFILE_SIZE,
+        "profiles": {
+            language: ngram_profile(text + "\n" + corpus.get(language, ""))
+            for language, text in TRAINING_TEXTS.items()
+        },
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Build the profiles and write language_profiles.json"""
+    parser = argparse.ArgumentParser(description="Build the character n-gram language profiles.")
+    parser.add_argument('--corpus', type=Path, default=None,
+                        help="Directory with extra training text, one folder of .txt files per language")
+    args = parser.parse_args(argv)
+
+    model = build_profiles(load_corpus(args.corpus) if args.corpus else None)
+    OUTPUT_PATH.write_text(json.dumps(model, ensure_ascii=False, separators=(',', ':')), encoding='utf-8')
+    print(f"Wrote {len(model['profiles'])} language profiles to {OUTPUT_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Response compression for the SEO Analyzer.
+
+JSON responses above a size threshold are compressed with brotli when the
+client accepts it and the optional `brotli` package is installed, and with
+gzip otherwise. Analysis and audit payloads are repetitive text (keyword
+lists, suggestion and SERP issue strings) and shrink several times over.
+
+Streamed responses (job progress streams, NDJSON) are passed through
+unchanged so every line still reaches the client as soon as it is sent,
+and so are responses that already carry a Content-Encoding.
+"""
+
+import gzip
+import os
+from typing import List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Optional dependency
+    brotli = None
+
+# Smallest body (bytes) worth compressing; smaller ones fit a packet anyway
+DEFAULT_MINIMUM_SIZE = 1024
+
+# Media types that compress well
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/')
+
+
+def _accepted_encodings(accept_encoding: str) -> List[Tuple[str, float]]:
+    """Parse Accept-Encoding into (coding, q) pairs"""
+    encodings = []
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        encodings.append((coding.strip().lower(), q))
+    return encodings
+
+
+def choose_encoding(accept_encoding: Optional[str], brotli_available: Optional[bool] = None) -> Optional[str]:
+    """
+    Pick the response content coding for an Accept-Encoding header.
+
+    Args:
+        accept_encoding: Header value (None when absent)
+        brotli_available: Whether brotli can be used (default: installed)
+
+    Returns:
+        'br', 'gzip' or None for an uncompressed response
+    """
+    if not accept_encoding:
+        return None
+    if brotli_available is None:
+        brotli_available = brotli is not None
+
+    weights = {}
+    for coding, q in _accepted_encodings(accept_encoding):
+        weights[coding] = q
+    wildcard = weights.get('*', 0.0)
+
+    candidates = ['br', 'gzip'] if brotli_available else ['gzip']
+    best, best_q = None, 0.0
+    for coding in candidates:
+        q = weights.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 5) -> bytes:
+    """Compress a body with the given content coding"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=brotli_quality)
+    # mtime=0 keeps the output deterministic for equal bodies
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing complete, compressible responses.
+
+    Args:
+        app: ASGI application
+        minimum_size: Smallest body compressed, in bytes (default:
+            COMPRESS_MIN_BYTES or 1024)
+        gzip_level: gzip compression level
+        brotli_quality: brotli quality (0-11); mid levels keep latency low
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: Optional[int] = None,
+        gzip_level: int = 6,
+        brotli_quality: int = 5
+    ):
+        self.app = app
+        if minimum_size is None:
+            minimum_size = int(os.environ.get('COMPRESS_MIN_BYTES') or DEFAULT_MINIMUM_SIZE)
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get('accept-encoding'))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough
+
+            if passthrough:
+                await send(message)
+                return
+
+            if message['type'] == 'http.response.start':
+                start = message
+                return
+
+            # First body message: compress only complete bodies
+            headers = MutableHeaders(raw=start['headers'])
+            body = message.get('body', b'')
+            if message.get('more_body', False) or not self._compressible(start['status'], headers):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            headers.add_vary_header('Accept-Encoding')
+            if len(body) >= self.minimum_size:
+                body = compress(body, encoding, self.gzip_level, self.brotli_quality)
+                headers['Content-Encoding'] = encoding
+                headers['Content-Length'] = str(len(body))
+            passthrough = True
+            await send(start)
+            await send({'type': 'http.response.body', 'body': body})
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _compressible(status: int, headers: MutableHeaders) -> bool:
+        if status < 200 or status in (204, 304) or 'content-encoding' in headers:
+            return False
+        content_type = headers.get('content-type', '')
+        return content_type.startswith(COMPRESSIBLE_TYPES)
@@ -0,0 +1,61 @@
+"""
+Conditional responses for the SEO Analyzer.
+
+Analysis results are a pure function of the request and the scoring code,
+so a request's ETag can be computed from the request alone, before any
+work is done. Clients that re-send unchanged text with If-None-Match get
+a 304 Not Modified instead of a fresh analysis and a full payload.
+
+ETags are weak: semantically equal responses can differ in incidental
+bytes (timings in the coverage block, the content encoding).
+"""
+
+import hashlib
+import json
+from typing import Any, Optional
+
+from fastapi import Response
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Compute a weak ETag from JSON-serializable parts.
+
+    Args:
+        *parts: Values the response depends on (scoring version, request
+            fields); dicts are hashed with sorted keys
+
+    Returns:
+        str: ETag header value, e.g. W/"3f2a..."
+    """
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    digest = hashlib.blake2b(payload.encode('utf-8', 'surrogatepass'), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag (weak comparison).
+
+    Args:
+        if_none_match: Header value: a comma-separated list of ETags or "*"
+        etag: Current ETag of the response
+
+    Returns:
+        bool: True when the client's copy is current
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+
+    opaque = etag.removeprefix('W/')
+    return any(
+        candidate.strip().removeprefix('W/') == opaque
+        for candidate in if_none_match.split(',')
+    )
+
+
+def not_modified(etag: str) -> Response:
+    """304 Not Modified response carrying the current ETag"""
+    return Response(status_code=304, headers={'ETag': etag})
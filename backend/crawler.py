@@ -0,0 +1,502 @@
+"""
+Concurrent sitemap crawler for the SEO Analyzer.
+
+Pages listed in a sitemap.xml (or given as a URL list) are fetched with a
+single pooled httpx.AsyncClient, which keeps one set of keep-alive
+connections per host. Each host also has its own concurrency limit, so a
+crawl never opens more parallel requests to a site than it allows.
+
+Conditional GETs (If-None-Match / If-Modified-Since) are sent with the
+validators of the previous crawl, and unchanged pages answered with 304
+are skipped. Bodies are never buffered: they are decoded and handed to the
+analysis callback chunk by chunk as they arrive.
+
+Every request, including each redirect hop, is checked before it is sent:
+only http(s) URLs whose host resolves to public addresses are fetched, so
+a crawl cannot reach loopback, private or link-local services unless
+CRAWL_ALLOW_PRIVATE is set (or --allow-private is given on the command
+line). Sitemaps are size-limited before and after gzip decompression.
+
+Command line usage:
+    python crawler.py SITEMAP_OR_URL_FILE [--per-host 4] [--max-pages 500] [--state state.json] [--allow-private]
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import json
+import os
+import socket
+import sys
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+import httpx
+
+from streaming import aiter_decoded_chunks
+
+SITEMAP_NAMESPACE = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+
+# Nested sitemap indexes deeper than this are ignored
+MAX_SITEMAP_DEPTH = 3
+
+# Pages larger than this are not analyzed past the limit; sitemaps larger
+# than this (compressed or decompressed) are rejected
+MAX_PAGE_BYTES = 10 * 1024 * 1024
+
+# Validators kept by a ValidatorStore; the least recently updated go first
+MAX_VALIDATORS = 10000
+
+USER_AGENT = 'SEO-Analyzer-Crawler/1.0'
+
+CONTENT_FORMATS = {
+    'text/html': 'html',
+    'application/xhtml+xml': 'html',
+    'text/markdown': 'markdown',
+    'text/x-markdown': 'markdown',
+    'text/plain': 'text',
+}
+
+
+class BlockedURL(ValueError):
+    """Raised for URLs the crawler refuses to fetch (non-http(s) or non-public hosts)"""
+
+
+class SitemapTooLarge(ValueError):
+    """Raised when a sitemap exceeds the size limit, compressed or decompressed"""
+
+
+@dataclass
+class FetchedPage:
+    """A page whose body is being streamed to the analysis callback"""
+    url: str
+    document_format: str  # 'html', 'markdown' or 'text'
+    content_length: Optional[int]
+    chunks: AsyncIterator[str]
+
+
+@dataclass
+class PageResult:
+    """Outcome of crawling one page"""
+    url: str
+    status: str  # 'analyzed', 'not_modified', 'skipped' or 'error'
+    http_status: Optional[int] = None
+    detail: Optional[str] = None
+    analysis: Any = None  # Value returned by the analysis callback
+    elapsed_ms: float = 0.0
+
+
+@dataclass
+class CrawlStats:
+    """Counters of a crawl"""
+    pages: int = 0
+    analyzed: int = 0
+    not_modified: int = 0
+    skipped: int = 0
+    errors: int = 0
+    bytes_received: int = 0
+    max_in_flight: Dict[str, int] = field(default_factory=dict)
+
+
+class ValidatorStore:
+    """
+    ETag / Last-Modified validators of previously crawled pages.
+
+    Validators are kept in memory and optionally persisted as JSON, so a
+    later crawl can send conditional requests. At most `max_entries` pages
+    are remembered; the least recently updated are forgotten first.
+
+    Args:
+        path: Optional JSON file to load from and save to
+        max_entries: Maximum number of pages with validators
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_entries: int = MAX_VALIDATORS):
+        self.path = path
+        self.max_entries = max_entries
+        self._validators: 'OrderedDict[str, Dict[str, str]]' = OrderedDict()
+        if path is not None and path.exists():
+            self._validators.update(json.loads(path.read_text(encoding='utf-8')))
+            self._evict()
+
+    def __len__(self) -> int:
+        return len(self._validators)
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Request headers that make a GET conditional on the stored validators"""
+        validators = self._validators.get(url, {})
+        headers = {}
+        if 'etag' in validators:
+            headers['If-None-Match'] = validators['etag']
+        if 'last_modified' in validators:
+            headers['If-Modified-Since'] = validators['last_modified']
+        return headers
+
+    def update(self, url: str, response: httpx.Response) -> None:
+        """Remember the validators of a successful response"""
+        validators = {}
+        if response.headers.get('etag'):
+            validators['etag'] = response.headers['etag']
+        if response.headers.get('last-modified'):
+            validators['last_modified'] = response.headers['last-modified']
+        if validators:
+            self._validators[url] = validators
+            self._validators.move_to_end(url)
+            self._evict()
+        else:
+            self._validators.pop(url, None)
+
+    def _evict(self) -> None:
+        while len(self._validators) > self.max_entries:
+            self._validators.popitem(last=False)
+
+    def save(self) -> None:
+        """Write the validators to `path`, if one was given"""
+        if self.path is not None:
+            self.path.write_text(json.dumps(self._validators, indent=2), encoding='utf-8')
+
+
+def page_format(content_type: str) -> Optional[str]:
+    """Document format of a Content-Type, or None for unsupported types"""
+    media_type = content_type.split(';', 1)[0].strip().lower()
+    return CONTENT_FORMATS.get(media_type)
+
+
+def private_hosts_allowed() -> bool:
+    """Whether crawls may reach loopback, private and link-local hosts (CRAWL_ALLOW_PRIVATE)"""
+    return os.environ.get('CRAWL_ALLOW_PRIVATE', '').lower() in ('1', 'true', 'yes')
+
+
+async def check_public_url(url: str) -> None:
+    """
+    Reject URLs the crawler must not fetch.
+
+    The host is resolved and every address it resolves to must be globally
+    routable: loopback, private, link-local, multicast, reserved and
+    unspecified addresses are refused.
+
+    Args:
+        url: URL about to be requested
+
+    Raises:
+        BlockedURL: If the scheme is not http(s), the host does not resolve,
+            or it resolves to a non-public address
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise BlockedURL(f"Only http(s) URLs can be crawled: {url}")
+
+    loop = asyncio.get_running_loop()
+    try:
+        infos = await loop.getaddrinfo(parts.hostname, parts.port or 0, type=socket.SOCK_STREAM)
+    except socket.gaierror as exc:
+        raise BlockedURL(f"Cannot resolve {parts.hostname}: {exc}") from exc
+
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split('%', 1)[0])
+        if not address.is_global or address.is_multicast:
+            raise BlockedURL(f"{parts.hostname} resolves to non-public address {address}")
+
+
+def parse_sitemap(data: bytes, max_bytes: int = MAX_PAGE_BYTES) -> Tuple[List[str], List[str]]:
+    """
+    Parse a sitemap or sitemap index, gzip-compressed or not.
+
+    Args:
+        data: Sitemap document
+        max_bytes: Largest accepted size, compressed and decompressed
+
+    Returns:
+        Tuple of (page URLs, nested sitemap URLs)
+
+    Raises:
+        SitemapTooLarge: If the document or its decompressed form exceeds `max_bytes`
+        xml.etree.ElementTree.ParseError: If the document is not well-formed XML
+    """
+    if len(data) > max_bytes:
+        raise SitemapTooLarge(f"Sitemap exceeds {max_bytes} bytes")
+    if data[:2] == b'\x1f\x8b':
+        # Decompress at most one byte past the limit, so a gzip bomb never inflates in full
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            data = decompressor.decompress(data, max_bytes + 1)
+        except zlib.error as exc:
+            raise ParseError(f"Invalid gzip sitemap: {exc}") from exc
+        if len(data) > max_bytes:
+            raise SitemapTooLarge(f"Decompressed sitemap exceeds {max_bytes} bytes")
+
+    pages, sitemaps = [], []
+    parser = XMLPullParser(events=('end',))
+    parser.feed(data)
+    for _, element in parser.read_events():
+        tag = element.tag.replace(SITEMAP_NAMESPACE, '')
+        if tag not in ('url', 'sitemap'):
+            continue
+        # <url> entries are pages, <sitemap> entries are nested sitemaps
+        loc = element.findtext(f'{SITEMAP_NAMESPACE}loc') or element.findtext('loc')
+        if loc and loc.strip():
+            (pages if tag == 'url' else sitemaps).append(loc.strip())
+        element.clear()
+    parser.close()
+    return pages, sitemaps
+
+
+class Crawler:
+    """
+    Fetch pages concurrently and stream them into an analysis callback.
+
+    Args:
+        analyze: Async callback receiving a FetchedPage; its return value is
+            stored in the page result
+        per_host: Maximum concurrent requests (and pooled connections) per host
+        max_connections: Maximum connections across all hosts
+        timeout: Per-request timeout in seconds
+        validators: Validator store for conditional GETs
+        max_page_bytes: Bodies are cut off after this many bytes; larger
+            sitemaps are rejected
+        allow_private: Also fetch hosts with loopback, private or link-local
+            addresses (only for trusted, operator-run crawls)
+        transport: Optional httpx transport (used by tests)
+    """
+
+    def __init__(
+        self,
+        analyze: Callable[[FetchedPage], Awaitable[Any]],
+        per_host: int = 4,
+        max_connections: int = 64,
+        timeout: float = 20.0,
+        validators: Optional[ValidatorStore] = None,
+        max_page_bytes: int = MAX_PAGE_BYTES,
+        allow_private: bool = False,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.analyze = analyze
+        self.per_host = per_host
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.validators = validators if validators is not None else ValidatorStore()
+        self.max_page_bytes = max_page_bytes
+        self.allow_private = allow_private
+        self.transport = transport
+        self.stats = CrawlStats()
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight: Dict[str, int] = {}
+
+    def _client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections
+            ),
+            timeout=self.timeout,
+            follow_redirects=True,
+            headers={'User-Agent': USER_AGENT},
+            # Runs before the first request and before every redirect hop
+            event_hooks={'request': [] if self.allow_private else [self._check_request]},
+            transport=self.transport
+        )
+
+    async def _check_request(self, request: httpx.Request) -> None:
+        await check_public_url(str(request.url))
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        return self._host_limits[host]
+
+    async def discover(self, sitemap_url: str, client: httpx.AsyncClient, max_pages: Optional[int] = None) -> List[str]:
+        """
+        Collect page URLs from a sitemap, following nested sitemap indexes.
+
+        Args:
+            sitemap_url: URL of sitemap.xml (or a sitemap index)
+            client: HTTP client to fetch with
+            max_pages: Stop after this many URLs
+
+        Returns:
+            De-duplicated page URLs in sitemap order
+        """
+        seen, pages = set(), []
+        queue = [(sitemap_url, 0)]
+        while queue and (max_pages is None or len(pages) < max_pages):
+            url, depth = queue.pop(0)
+            async with self._host_limit(url):
+                data = await self._read_sitemap(url, client)
+
+            page_urls, nested = parse_sitemap(data, self.max_page_bytes)
+            for page_url in page_urls:
+                page_url = urljoin(url, page_url)
+                if page_url not in seen:
+                    seen.add(page_url)
+                    pages.append(page_url)
+            if depth < MAX_SITEMAP_DEPTH:
+                queue.extend((urljoin(url, nested_url), depth + 1) for nested_url in nested)
+
+        return pages[:max_pages] if max_pages is not None else pages
+
+    async def _read_sitemap(self, url: str, client: httpx.AsyncClient) -> bytes:
+        async with client.stream('GET', url) as response:
+            response.raise_for_status()
+            data = bytearray()
+            async for chunk in response.aiter_bytes():
+                data += chunk
+                if len(data) > self.max_page_bytes:
+                    raise SitemapTooLarge(f"Sitemap exceeds {self.max_page_bytes} bytes")
+        return bytes(data)
+
+    async def fetch(self, url: str, client: httpx.AsyncClient) -> PageResult:
+        """
+        Fetch one page and stream it into the analysis callback.
+
+        Returns:
+            PageResult of the page
+        """
+        host = urlsplit(url).netloc
+        started = time.monotonic()
+
+        async with self._host_limit(url):
+            self._in_flight[host] = self._in_flight.get(host, 0) + 1
+            self.stats.max_in_flight[host] = max(self.stats.max_in_flight.get(host, 0), self._in_flight[host])
+            try:
+                result = await self._fetch(url, client)
+            except Exception as exc:
+                # A failing page (network error, rejected analysis) does not abort the crawl
+                result = PageResult(url=url, status='error', detail=f"{type(exc).__name__}: {exc}")
+            finally:
+                self._in_flight[host] -= 1
+
+        result.elapsed_ms = round((time.monotonic() - started) * 1000, 2)
+        self.stats.pages += 1
+        if result.status == 'error':
+            self.stats.errors += 1
+        else:
+            setattr(self.stats, result.status, getattr(self.stats, result.status) + 1)
+        return result
+
+    async def _fetch(self, url: str, client: httpx.AsyncClient) -> PageResult:
+        headers = self.validators.conditional_headers(url)
+
+        async with client.stream('GET', url, headers=headers) as response:
+            if response.status_code == 304:
+                return PageResult(url=url, status='not_modified', http_status=304)
+            if response.status_code != 200:
+                return PageResult(
+                    url=url, status='error', http_status=response.status_code,
+                    detail=f"HTTP {response.status_code}"
+                )
+
+            document_format = page_format(response.headers.get('content-type', 'text/html'))
+            if document_format is None:
+                return PageResult(
+                    url=url, status='skipped', http_status=200,
+                    detail=f"Unsupported content type {response.headers.get('content-type')}"
+                )
+
+            content_length = response.headers.get('content-length')
+            page = FetchedPage(
+                url=url,
+                document_format=document_format,
+                content_length=int(content_length) if content_length and content_length.isdigit() else None,
+                chunks=aiter_decoded_chunks(
+                    self._limited_bytes(response),
+                    encoding=response.charset_encoding or 'utf-8'
+                )
+            )
+            analysis = await self.analyze(page)
+
+        self.validators.update(url, response)
+        return PageResult(url=url, status='analyzed', http_status=200, analysis=analysis)
+
+    async def _limited_bytes(self, response: httpx.Response) -> AsyncIterator[bytes]:
+        received = 0
+        async for chunk in response.aiter_bytes():
+            chunk = chunk[:self.max_page_bytes - received]
+            received += len(chunk)
+            self.stats.bytes_received += len(chunk)
+            if chunk:
+                yield chunk
+            if received >= self.max_page_bytes:
+                break
+
+    async def crawl(
+        self,
+        urls: Optional[List[str]] = None,
+        sitemap_url: Optional[str] = None,
+        max_pages: Optional[int] = None
+    ) -> List[PageResult]:
+        """
+        Crawl a URL list and/or the pages of a sitemap.
+
+        Args:
+            urls: Page URLs to crawl
+            sitemap_url: Sitemap whose pages are crawled as well
+            max_pages: Maximum number of pages
+
+        Returns:
+            List of PageResult in input order
+        """
+        async with self._client() as client:
+            pages = list(dict.fromkeys(urls or []))
+            if sitemap_url:
+                for url in await self.discover(sitemap_url, client, max_pages):
+                    if url not in pages:
+                        pages.append(url)
+            if max_pages is not None:
+                pages = pages[:max_pages]
+
+            results = await asyncio.gather(*(self.fetch(url, client) for url in pages))
+
+        self.validators.save()
+        return list(results)
+
+
+def load_url_list(path: Path) -> List[str]:
+    """Read page URLs from a text file, one per line ('#' starts a comment)"""
+    lines = path.read_text(encoding='utf-8').splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.lstrip().startswith('#')]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Crawl from the command line and print one JSON summary per page"""
+    parser = argparse.ArgumentParser(description="Crawl a sitemap or URL list and analyze every page.")
+    parser.add_argument('source', help="sitemap.xml URL, or a text file with one URL per line")
+    parser.add_argument('--per-host', type=int, default=4, help="Concurrent requests per host")
+    parser.add_argument('--max-pages', type=int, default=None, help="Maximum number of pages")
+    parser.add_argument('--state', type=Path, default=None, help="JSON file keeping ETag/Last-Modified validators")
+    parser.add_argument('--allow-private', action='store_true',
+                        help="Also crawl loopback, private and link-local hosts")
+    args = parser.parse_args(argv)
+
+    # Imported here so the module itself stays free of the API's startup cost
+    from main import analyze_fetched_page
+
+    async def analyze(page: FetchedPage):
+        response = await analyze_fetched_page(page)
+        return {'final_score': response.final_score, 'title': response.serp_preview.meta_title}
+
+    crawler = Crawler(
+        analyze,
+        per_host=args.per_host,
+        validators=ValidatorStore(args.state),
+        allow_private=args.allow_private or private_hosts_allowed()
+    )
+    if args.source.startswith(('http://', 'https://')):
+        results = asyncio.run(crawler.crawl(sitemap_url=args.source, max_pages=args.max_pages))
+    else:
+        results = asyncio.run(crawler.crawl(urls=load_url_list(Path(args.source)), max_pages=args.max_pages))
+
+    for result in results:
+        print(json.dumps(asdict(result), ensure_ascii=False))
+    print(json.dumps(asdict(crawler.stats)), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
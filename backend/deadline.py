@@ -0,0 +1,84 @@
+"""
+Request deadlines for the SEO Analyzer.
+
+A deadline is a latency budget that starts when the request arrives.
+Expensive stages check it before they start and are skipped (or replaced
+by a cheaper approximation) when their estimated cost no longer fits, so
+a request close to its budget gets a partial answer instead of a timeout.
+"""
+
+import os
+import time
+from typing import Optional
+
+# Header an upstream proxy or client can use to pass its remaining budget
+DEADLINE_HEADER = 'X-Deadline-Ms'
+
+
+def default_deadline_ms() -> Optional[float]:
+    """Server default deadline from ANALYZE_DEADLINE_MS (None means no deadline)"""
+    value = os.environ.get('ANALYZE_DEADLINE_MS')
+    return float(value) if value else None
+
+
+class Deadline:
+    """
+    Latency budget measured from the moment the deadline is created.
+
+    Args:
+        budget_ms: Milliseconds available for the whole request
+    """
+
+    def __init__(self, budget_ms: float):
+        self.budget_ms = max(0.0, budget_ms)
+        self.started = time.monotonic()
+
+    @classmethod
+    def from_sources(
+        cls,
+        header_ms: Optional[float] = None,
+        query_ms: Optional[float] = None,
+        default_ms: Optional[float] = None
+    ) -> Optional['Deadline']:
+        """
+        Pick the deadline of a request.
+
+        The tightest of the header and query parameter wins; the server
+        default applies only when the request sets neither.
+
+        Args:
+            header_ms: Budget from the X-Deadline-Ms header
+            query_ms: Budget from the `deadline_ms` query parameter
+            default_ms: Server default budget
+
+        Returns:
+            Deadline, or None when no budget applies
+        """
+        explicit = [value for value in (header_ms, query_ms) if value is not None]
+        budget_ms = min(explicit) if explicit else default_ms
+
+        return cls(budget_ms) if budget_ms is not None else None
+
+    def elapsed_ms(self) -> float:
+        """Milliseconds since the deadline started"""
+        return (time.monotonic() - self.started) * 1000
+
+    def remaining_ms(self) -> float:
+        """Milliseconds left before the deadline (never negative)"""
+        return max(0.0, self.budget_ms - self.elapsed_ms())
+
+    def expired(self) -> bool:
+        """Whether the budget is used up"""
+        return self.remaining_ms() <= 0
+
+    def allows(self, cost_ms: float) -> bool:
+        """
+        Check whether a stage of the given estimated cost still fits.
+
+        Args:
+            cost_ms: Estimated duration of the stage in milliseconds
+
+        Returns:
+            bool: True if the stage can finish before the deadline
+        """
+        return cost_ms <= self.remaining_ms()
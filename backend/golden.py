@@ -0,0 +1,446 @@
+"""
+Golden-equivalence harness for optimized analysis engines.
+
+Editors rely on the scores the analyzer has always produced, so a faster
+engine must reproduce them. This harness runs each engine's reference
+implementation and its optimized candidate side by side over a corpus of
+fixture texts, edge cases and generated documents. For every result field
+it reports the largest and mean difference against a configurable
+tolerance, and it times both sides to record the speedup.
+
+Engines and their references:
+    ngram        joined-string n-gram sets    vs calculate_ngram_similarity
+    sentence     pairwise sentence matching   vs calculate_sentence_similarity
+    readability  textstat.flesch_reading_ease vs calc_readability
+    serp         simulate_serp                vs simulate_serp (replace with
+                 --candidate serp=module:function to check a new engine)
+
+Any candidate can be replaced the same way, so a new engine ships with a
+report proving it matches.
+
+Command line usage:
+    python golden.py [--documents 300] [--seed 0] [--corpus PATH]
+                     [--engine ngram ...] [--tolerance readability.score=0.01 ...]
+                     [--candidate sentence=module:function ...] [--repeat 3]
+
+The report is printed as JSON; the exit status is 1 when any field
+exceeds its tolerance.
+"""
+
+import argparse
+import importlib
+import json
+import math
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass, field, is_dataclass
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+try:
+    import textstat
+except ImportError:  # Optional dependency
+    textstat = None
+
+# Allowed absolute difference of numeric fields without a configured
+# tolerance; other fields must be equal
+DEFAULT_TOLERANCE = 1e-9
+
+# Inputs the analyzer special-cases (empty, very short, very long, no
+# sentence breaks, markup, symbols)
+EDGE_CASES = [
+    "",
+    "   \n\t  ",
+    "Too short",
+    "SEO",
+    "ALL CAPS HEADLINE ABOUT SEARCH ENGINES\nThe body follows in normal case. It has two sentences.",
+    "# Markdown Title With **Bold** Words\n\nA paragraph with [a link](https://example.com) and `code`.",
+    "no punctuation at all just a long run of lowercase words about content marketing and rankings " * 4,
+    "Émojis 🚀 and accents: café, naïve, jalapeño! Does the preview cope? Yes... mostly.",
+    "Numbers 1, 2.5 and 3,000 appear here. Version 2.0 shipped in 2024! Prices: $9.99 (USD).",
+    "Short. Sentences. Only. Here. Again. And again. Done.",
+    ("A very long document sentence about search engine optimization strategy and planning. " * 150).strip(),
+]
+
+_PUNCTUATION_ENDINGS = ['.', '.', '.', '.', '!', '?', '...']
+_EXTRA_TOKENS = [
+    '2024', '10', '3.5', '100%', 'e-commerce', "don't", "it's", 'SEO', 'CTR',
+    'café', 'naïve', '🚀', '✅', '(beta)', '[guide]', '|', '-', 'A/B', 'co-op',
+]
+
+
+def reference_ngram_similarity(text1: str, text2: str, n: int = 5) -> float:
+    """Jaccard similarity of joined-string word n-gram sets (the original implementation)"""
+    words1 = text1.split()
+    words2 = text2.split()
+
+    if len(words1) < n or len(words2) < n:
+        return 0.0
+
+    ngrams1 = set(' '.join(words1[i:i + n]) for i in range(len(words1) - n + 1))
+    ngrams2 = set(' '.join(words2[i:i + n]) for i in range(len(words2) - n + 1))
+    union = len(ngrams1 | ngrams2)
+    return len(ngrams1 & ngrams2) / union if union > 0 else 0.0
+
+
+def reference_sentence_similarity(sentences1: List[str], sentences2: List[str]) -> float:
+    """Sentence-level similarity comparing every sentence pair (the original implementation)"""
+    from main import clean_text
+
+    if not sentences1 or not sentences2:
+        return 0.0
+
+    max_similarities = []
+    for sent1 in sentences1:
+        cleaned_sent1 = clean_text(sent1.lower())
+        if len(cleaned_sent1.split()) < 3:
+            continue
+
+        best_match = 0.0
+        for sent2 in sentences2:
+            cleaned_sent2 = clean_text(sent2.lower())
+            if len(cleaned_sent2.split()) < 3:
+                continue
+            best_match = max(best_match, SequenceMatcher(None, cleaned_sent1, cleaned_sent2).ratio())
+
+        if best_match > 0.5:
+            max_similarities.append(best_match)
+
+    return sum(max_similarities) / len(sentences1) if max_similarities else 0.0
+
+
+def reference_readability(text: str) -> float:
+    """Flesch Reading Ease computed by textstat, clamped like calc_readability"""
+    try:
+        score = textstat.flesch_reading_ease(text)
+        return max(0.0, min(100.0, float(score)))
+    except Exception:
+        return 50.0
+
+
+@dataclass
+class Engine:
+    """An optimized engine and the reference it must reproduce"""
+    name: str
+    reference: Callable[..., Any]
+    candidate: Callable[..., Any]
+    cases: Callable[[Sequence[str]], List[tuple]]  # Corpus -> argument tuples
+    reset: Optional[Callable[[], None]] = None  # Clears candidate caches before a timed run
+
+
+@dataclass
+class FieldReport:
+    """Differences of one result field over all cases"""
+    name: str
+    tolerance: float
+    max_delta: float = 0.0
+    mean_delta: float = 0.0
+    failures: int = 0
+    worst_case: Optional[int] = None  # Index of the case with the largest delta
+
+    @property
+    def passed(self) -> bool:
+        return self.failures == 0
+
+
+@dataclass
+class EngineReport:
+    """Equivalence and speed of one engine"""
+    engine: str
+    cases: int
+    reference_seconds: float
+    candidate_seconds: float
+    fields: List[FieldReport] = field(default_factory=list)
+
+    @property
+    def speedup(self) -> float:
+        if self.candidate_seconds <= 0:
+            return math.inf
+        return self.reference_seconds / self.candidate_seconds
+
+    @property
+    def passed(self) -> bool:
+        return all(report.passed for report in self.fields)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'engine': self.engine,
+            'cases': self.cases,
+            'passed': self.passed,
+            'reference_seconds': round(self.reference_seconds, 4),
+            'candidate_seconds': round(self.candidate_seconds, 4),
+            'speedup': round(self.speedup, 2) if math.isfinite(self.speedup) else None,
+            'fields': [dict(asdict(report), passed=report.passed) for report in self.fields],
+        }
+
+
+def result_fields(result: Any) -> Dict[str, Any]:
+    """Fields of an engine result: a dataclass's fields, else a single 'score'"""
+    if is_dataclass(result):
+        return asdict(result)
+    return {'score': result}
+
+
+def field_delta(expected: Any, actual: Any) -> float:
+    """Absolute difference of numbers; 0 or infinity for other values"""
+    numbers = (int, float)
+    if isinstance(expected, numbers) and isinstance(actual, numbers) \
+            and not isinstance(expected, bool) and not isinstance(actual, bool):
+        return abs(float(expected) - float(actual))
+    return 0.0 if type(expected) is type(actual) and expected == actual else math.inf
+
+
+def default_engines() -> Dict[str, Engine]:
+    """The optimized engines of the analyzer with their references"""
+    from main import (
+        SAMPLE_TEXTS, calc_readability, calculate_ngram_similarity,
+        calculate_sentence_similarity, clean_text, simulate_serp
+    )
+    from memo import get_stage_cache
+
+    samples = list(SAMPLE_TEXTS.values())
+
+    def split_sentences(text: str) -> List[str]:
+        return [s.strip() for s in text.split('.') if s.strip()]
+
+    def ngram_cases(corpus: Sequence[str]) -> List[tuple]:
+        cleaned = [clean_text(text.lower()) for text in corpus]
+        references = [clean_text(sample.lower()) for sample in samples]
+        cases = [(text, reference) for text in cleaned for reference in references]
+        # Generated documents against each other, not only against the samples
+        cases.extend(zip(cleaned, cleaned[1:]))
+        return cases
+
+    def sentence_cases(corpus: Sequence[str]) -> List[tuple]:
+        return [
+            (split_sentences(text), split_sentences(sample))
+            for text in corpus for sample in samples
+        ]
+
+    engines = {
+        'ngram': Engine('ngram', reference_ngram_similarity, calculate_ngram_similarity, ngram_cases),
+        'sentence': Engine('sentence', reference_sentence_similarity, calculate_sentence_similarity, sentence_cases),
+        'serp': Engine('serp', simulate_serp, simulate_serp, lambda corpus: [(text,) for text in corpus]),
+    }
+    if textstat is not None:
+        engines['readability'] = Engine(
+            'readability', reference_readability, calc_readability,
+            lambda corpus: [(text,) for text in corpus],
+            reset=get_stage_cache('readability').clear
+        )
+    return engines
+
+
+def generate_corpus(sources: Sequence[str], n_documents: int, seed: int = 0) -> List[str]:
+    """
+    Generate documents resembling real input from the words of `sources`.
+
+    Documents mix new sentences, sentences copied from the sources and
+    lightly edited copies (so similarity engines see every score range),
+    with titles, markdown, numbers, symbols and uneven paragraphs.
+
+    Args:
+        sources: Texts supplying vocabulary and copied sentences
+        n_documents: Number of documents
+        seed: Random seed; the same seed gives the same corpus
+
+    Returns:
+        List of document texts
+    """
+    rng = random.Random(seed)
+    words = [word for text in sources for word in text.split()] + _EXTRA_TOKENS
+    source_sentences = [
+        sentence.strip() for text in sources for sentence in text.split('.')
+        if len(sentence.split()) >= 3
+    ]
+
+    def new_sentence() -> str:
+        tokens = rng.choices(words, k=rng.randint(2, 28))
+        tokens[0] = tokens[0].capitalize()
+        return ' '.join(tokens) + rng.choice(_PUNCTUATION_ENDINGS)
+
+    def edited_copy() -> str:
+        tokens = rng.choice(source_sentences).split()
+        for _ in range(rng.randint(1, 3)):
+            tokens[rng.randrange(len(tokens))] = rng.choice(words)
+        return ' '.join(tokens) + '.'
+
+    documents = []
+    for _ in range(n_documents):
+        lines = []
+        heading = rng.random()
+        if heading < 0.3:
+            lines.append(' '.join(rng.choices(words, k=rng.randint(3, 12))).title())
+        elif heading < 0.4:
+            lines.append('# ' + ' '.join(rng.choices(words, k=rng.randint(2, 9))))
+        elif heading < 0.45:
+            lines.append(' '.join(rng.choices(words, k=rng.randint(2, 6))).upper())
+
+        for _ in range(rng.randint(1, 6)):
+            sentences = []
+            for _ in range(rng.randint(1, 8)):
+                kind = rng.random()
+                if kind < 0.15:
+                    sentences.append(rng.choice(source_sentences) + '.')
+                elif kind < 0.3:
+                    sentences.append(edited_copy())
+                else:
+                    sentences.append(new_sentence())
+            lines.append(' '.join(sentences))
+
+        documents.append(rng.choice(['\n\n', '\n', ' ']).join(lines))
+    return documents
+
+
+def build_corpus(n_documents: int, seed: int = 0, paths: Sequence[Path] = ()) -> List[str]:
+    """
+    Fixture texts, edge cases, pages from `paths` and generated documents.
+
+    Args:
+        n_documents: Number of generated documents
+        seed: Random seed of the generated documents
+        paths: Corpora in site_audit.load_pages format
+
+    Returns:
+        List of document texts
+    """
+    from main import SAMPLE_TEXTS
+    from site_audit import load_pages
+
+    corpus = list(SAMPLE_TEXTS.values()) + EDGE_CASES
+    for path in paths:
+        corpus.extend(text for _, text in load_pages(path))
+    corpus.extend(generate_corpus(list(SAMPLE_TEXTS.values()), n_documents, seed))
+    return corpus
+
+
+def tolerance_for(tolerances: Dict[str, float], engine: str, name: str) -> float:
+    """Tolerance of a field, configured as 'engine.field', 'engine' or the default"""
+    for key in (f'{engine}.{name}', engine):
+        if key in tolerances:
+            return tolerances[key]
+    return DEFAULT_TOLERANCE
+
+
+def _timed(func: Callable[..., Any], cases: List[tuple], reset: Optional[Callable[[], None]]) -> tuple:
+    if reset is not None:
+        reset()
+    started = time.perf_counter()
+    results = [func(*case) for case in cases]
+    return results, time.perf_counter() - started
+
+
+def compare(
+    engine: Engine,
+    corpus: Sequence[str],
+    tolerances: Optional[Dict[str, float]] = None,
+    repeat: int = 1
+) -> EngineReport:
+    """
+    Run an engine and its reference over a corpus and compare every field.
+
+    Args:
+        engine: Engine to check
+        corpus: Document texts
+        tolerances: Allowed absolute deltas by 'engine.field' or 'engine'
+        repeat: Timed runs per side; the fastest run is reported
+
+    Returns:
+        EngineReport with per-field deltas and the speedup
+    """
+    tolerances = tolerances or {}
+    cases = engine.cases(corpus)
+
+    reference_seconds = candidate_seconds = math.inf
+    for _ in range(max(1, repeat)):
+        expected, seconds = _timed(engine.reference, cases, None)
+        reference_seconds = min(reference_seconds, seconds)
+        actual, seconds = _timed(engine.candidate, cases, engine.reset)
+        candidate_seconds = min(candidate_seconds, seconds)
+
+    reports: Dict[str, FieldReport] = {}
+    totals: Dict[str, float] = {}
+    for index, (reference_result, candidate_result) in enumerate(zip(expected, actual)):
+        candidate_fields = result_fields(candidate_result)
+        for name, value in result_fields(reference_result).items():
+            report = reports.get(name)
+            if report is None:
+                report = reports[name] = FieldReport(name, tolerance_for(tolerances, engine.name, name))
+                totals[name] = 0.0
+
+            delta = field_delta(value, candidate_fields.get(name))
+            totals[name] += delta
+            if delta > report.tolerance:
+                report.failures += 1
+            if report.worst_case is None or delta > report.max_delta:
+                report.max_delta = delta
+                report.worst_case = index
+
+    for name, report in reports.items():
+        report.mean_delta = totals[name] / len(cases) if cases else 0.0
+        if report.max_delta == 0.0:
+            report.worst_case = None
+
+    return EngineReport(
+        engine=engine.name,
+        cases=len(cases),
+        reference_seconds=reference_seconds,
+        candidate_seconds=candidate_seconds,
+        fields=list(reports.values())
+    )
+
+
+def _parse_assignments(values: Sequence[str], option: str) -> Dict[str, str]:
+    assignments = {}
+    for value in values:
+        key, separator, setting = value.partition('=')
+        if not separator:
+            raise SystemExit(f"{option} expects NAME=VALUE, got {value!r}")
+        assignments[key] = setting
+    return assignments
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the harness from the command line"""
+    parser = argparse.ArgumentParser(description="Check optimized engines against their reference implementations.")
+    parser.add_argument('--documents', type=int, default=300, help="Number of generated documents")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the generated documents")
+    parser.add_argument('--corpus', type=Path, action='append', default=[],
+                        help="Extra fixture corpus: directory of .txt/.md files or JSONL of {url, text}")
+    parser.add_argument('--engine', action='append', help="Engine to check (default: all)")
+    parser.add_argument('--tolerance', action='append', default=[],
+                        help="Allowed absolute delta as ENGINE.FIELD=VALUE or ENGINE=VALUE")
+    parser.add_argument('--candidate', action='append', default=[],
+                        help="Replace an engine's candidate as ENGINE=module:function")
+    parser.add_argument('--repeat', type=int, default=1, help="Timed runs per side (fastest is reported)")
+    args = parser.parse_args(argv)
+
+    engines = default_engines()
+    for name, reference in _parse_assignments(args.candidate, '--candidate').items():
+        if name not in engines:
+            raise SystemExit(f"Unknown engine {name!r}")
+        module_name, attribute = reference.split(':')
+        engines[name].candidate = getattr(importlib.import_module(module_name), attribute)
+
+    selected = args.engine or list(engines)
+    unknown = [name for name in selected if name not in engines]
+    if unknown:
+        raise SystemExit(f"Unknown engine(s): {', '.join(unknown)} (available: {', '.join(engines)})")
+
+    tolerances = {key: float(value) for key, value in _parse_assignments(args.tolerance, '--tolerance').items()}
+    corpus = build_corpus(args.documents, args.seed, args.corpus)
+    reports = [compare(engines[name], corpus, tolerances, args.repeat) for name in selected]
+
+    json.dump({
+        'documents': len(corpus),
+        'passed': all(report.passed for report in reports),
+        'engines': [report.to_dict() for report in reports],
+    }, sys.stdout, indent=2, ensure_ascii=False)
+    print()
+    return 0 if all(report.passed for report in reports) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
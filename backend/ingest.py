@@ -0,0 +1,396 @@
+"""
+Streaming HTML and Markdown ingestion for the SEO Analyzer.
+
+Raw pages are parsed incrementally in a single pass: the extractors are fed
+chunks as they arrive and emit plain body text as they go, while collecting
+the document outline (title, meta description, headings and link counts).
+No DOM is built, so memory does not grow with the page beyond the outline
+and the text that has not been taken yet.
+
+Block boundaries (paragraphs, headings, list items) become blank lines in
+the body text, which is the paragraph separator of the analysis stages.
+"""
+
+import re
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+
+FORMATS = ('text', 'html', 'markdown')
+
+PARAGRAPH_BREAK = '\n\n'
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Elements whose content is not page text
+_SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'iframe', 'object', 'canvas'}
+
+# Elements that start a new paragraph of body text
+_BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'dd', 'div', 'dl', 'dt', 'fieldset',
+    'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header',
+    'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'td', 'th', 'tr', 'ul',
+}
+
+_HEADING_TAGS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+
+
+@dataclass
+class DocumentOutline:
+    """Structure extracted from a page alongside its body text"""
+    title: Optional[str] = None
+    meta_description: Optional[str] = None
+    headings: List[Tuple[int, str]] = field(default_factory=list)
+    internal_links: int = 0
+    external_links: int = 0
+
+    @property
+    def links(self) -> int:
+        return self.internal_links + self.external_links
+
+    @property
+    def serp_title(self) -> Optional[str]:
+        """Title shown in search results: <title>, else the first H1"""
+        if self.title:
+            return self.title
+        return next((text for level, text in self.headings if level == 1), None)
+
+    def add_link(self, href: str) -> None:
+        """Count a link target; in-page anchors and non-web schemes are ignored"""
+        href = href.strip()
+        lowered = href.lower()
+        if not href or href.startswith('#') or lowered.startswith(('mailto:', 'tel:', 'javascript:', 'data:')):
+            return
+        if lowered.startswith(('http://', 'https://', '//')):
+            self.external_links += 1
+        else:
+            self.internal_links += 1
+
+
+def _collapse(text: str) -> str:
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+class _TextBuffer:
+    """
+    Body text emitted so far.
+
+    Separators between pieces (space, line break, paragraph break) are
+    held back until more text follows, and the strongest one wins.
+    """
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._started = False
+        self._separator = ''
+
+    def write(self, text: str) -> None:
+        if not text.strip():
+            if text:
+                self._separate(' ')
+            return
+        if self._separator:
+            self._parts.append(self._separator)
+            text = text.lstrip()
+            self._separator = ''
+        self._parts.append(text)
+        self._started = True
+
+    def line_break(self) -> None:
+        self._separate('\n')
+
+    def paragraph_break(self) -> None:
+        self._separate(PARAGRAPH_BREAK)
+
+    def _separate(self, separator: str) -> None:
+        if self._started and len(separator) > len(self._separator):
+            self._separator = separator
+
+    def take(self) -> str:
+        text = ''.join(self._parts)
+        self._parts = []
+        return text
+
+
+class HtmlExtractor(HTMLParser):
+    """
+    Incremental HTML extractor.
+
+    Feed markup chunks with `feed`, collect body text with `take_text`, and
+    call `close` at the end of the document; the outline is complete then.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.outline = DocumentOutline()
+        self._text = _TextBuffer()
+        self._skip_depth = 0
+        self._title_parts: Optional[List[str]] = None
+        self._heading: Optional[Tuple[int, List[str]]] = None
+        self._og_description: Optional[str] = None
+
+    def take_text(self) -> str:
+        """Return the body text extracted since the previous call"""
+        return self._text.take()
+
+    def close(self) -> None:
+        """Finish parsing; buffered markup is processed"""
+        super().close()
+        if self.outline.meta_description is None and self._og_description:
+            self.outline.meta_description = self._og_description
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+            return
+        if tag == 'title' and self.outline.title is None:
+            self._title_parts = []
+            return
+        if tag == 'meta':
+            self._handle_meta(dict(attrs))
+            return
+        if tag == 'a':
+            href = dict(attrs).get('href')
+            if href is not None:
+                self.outline.add_link(href)
+        elif tag == 'br':
+            self._text.write(' ')
+
+        if tag in _BLOCK_TAGS:
+            self._text.paragraph_break()
+        if tag in _HEADING_TAGS:
+            self._heading = (_HEADING_TAGS[tag], [])
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+        if tag == 'title' and self._title_parts is not None:
+            self.outline.title = _collapse(''.join(self._title_parts)) or None
+            self._title_parts = None
+            return
+        if tag in _HEADING_TAGS and self._heading is not None:
+            level, parts = self._heading
+            text = _collapse(''.join(parts))
+            if text:
+                self.outline.headings.append((level, text))
+            self._heading = None
+        if tag in _BLOCK_TAGS:
+            self._text.paragraph_break()
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+            return
+        if self._heading is not None:
+            self._heading[1].append(data)
+        self._text.write(_WHITESPACE_RE.sub(' ', data))
+
+    def _handle_meta(self, attrs: dict) -> None:
+        name = (attrs.get('name') or attrs.get('property') or '').lower()
+        content = _collapse(attrs.get('content') or '')
+        if not content:
+            return
+        if name == 'description' and self.outline.meta_description is None:
+            self.outline.meta_description = content
+        elif name == 'og:description' and self._og_description is None:
+            self._og_description = content
+
+
+# Markdown line patterns
+_ATX_HEADING_RE = re.compile(r'^ {0,3}(#{1,6})(?:\s+(.*?))?(?:\s+#+)?\s*$')
+_SETEXT_RE = re.compile(r'^ {0,3}(=+|-+)\s*$')
+_FENCE_RE = re.compile(r'^ {0,3}(```|~~~)')
+_RULE_RE = re.compile(r'^ {0,3}([-*_])(?:\s*\1){2,}\s*$')
+_LIST_MARKER_RE = re.compile(r'^\s*(?:[-*+]|\d{1,9}[.)])\s+')
+_QUOTE_RE = re.compile(r'^\s*(?:>\s?)+')
+_FRONT_MATTER_RE = re.compile(r'^(\w+)\s*:\s*(.*?)\s*$')
+
+# Markdown inline patterns
+_IMAGE_RE = re.compile(r'!\[([^\]]*)\]\([^)]*\)')
+_LINK_RE = re.compile(r'\[([^\]]+)\]\(\s*<?([^)\s>]*)>?(?:\s+"[^"]*")?\s*\)')
+_REFERENCE_LINK_RE = re.compile(r'\[([^\]]+)\]\[[^\]]*\]')
+_AUTOLINK_RE = re.compile(r'<((?:https?|ftp)://[^>\s]+)>')
+_INLINE_HTML_RE = re.compile(r'</?[A-Za-z][^>]*>')
+_EMPHASIS_RE = re.compile(r'[*`~]+|(?<!\w)_+|_+(?!\w)')
+_REFERENCE_DEFINITION_RE = re.compile(r'^ {0,3}\[[^\]]+\]:\s*\S+')
+
+
+class MarkdownExtractor:
+    """
+    Incremental, line-based Markdown extractor.
+
+    Handles YAML front matter (title, description), ATX and setext
+    headings, fenced code (skipped), lists, block quotes, links and
+    emphasis. Feed chunks with `feed`, collect body text with `take_text`,
+    and call `close` at the end of the document.
+    """
+
+    def __init__(self):
+        self.outline = DocumentOutline()
+        self._text = _TextBuffer()
+        self._partial_line = ''
+        self._pending_line: Optional[str] = None
+        self._line_number = 0
+        self._in_front_matter = False
+        self._fence: Optional[str] = None
+
+    def feed(self, data: str) -> None:
+        """Parse a chunk of Markdown"""
+        lines = (self._partial_line + data).split('\n')
+        self._partial_line = lines.pop()
+        for line in lines:
+            self._handle_line(line.rstrip('\r'))
+
+    def take_text(self) -> str:
+        """Return the body text extracted since the previous call"""
+        return self._text.take()
+
+    def close(self) -> None:
+        """Finish parsing the document"""
+        if self._partial_line:
+            self._handle_line(self._partial_line)
+            self._partial_line = ''
+        self._flush_pending()
+
+    def _handle_line(self, line: str) -> None:
+        first_line = self._line_number == 0
+        self._line_number += 1
+
+        if first_line and line.strip() == '---':
+            self._in_front_matter = True
+            return
+        if self._in_front_matter:
+            self._handle_front_matter(line)
+            return
+
+        fence = _FENCE_RE.match(line)
+        if self._fence is not None:
+            if fence and fence.group(1) == self._fence:
+                self._fence = None
+            return
+        if fence:
+            self._flush_pending()
+            self._text.paragraph_break()
+            self._fence = fence.group(1)
+            return
+
+        setext = _SETEXT_RE.match(line)
+        if setext and self._pending_line is not None:
+            level = 1 if setext.group(1)[0] == '=' else 2
+            self._add_heading(level, self._pending_line)
+            self._pending_line = None
+            return
+
+        self._flush_pending()
+
+        if not line.strip():
+            self._text.paragraph_break()
+            return
+        if _RULE_RE.match(line) or _REFERENCE_DEFINITION_RE.match(line):
+            self._text.paragraph_break()
+            return
+
+        heading = _ATX_HEADING_RE.match(line)
+        if heading:
+            self._add_heading(len(heading.group(1)), heading.group(2) or '')
+            return
+
+        if _LIST_MARKER_RE.match(line):
+            # Every list item is a block of its own
+            self._text.paragraph_break()
+            line = _LIST_MARKER_RE.sub('', line, count=1)
+        line = _QUOTE_RE.sub('', line)
+
+        # Keep the line until the next one shows whether it is a setext heading
+        self._pending_line = line
+
+    def _flush_pending(self) -> None:
+        if self._pending_line is not None:
+            text = self._inline_text(self._pending_line)
+            if text:
+                self._text.write(text)
+                self._text.line_break()
+            self._pending_line = None
+
+    def _add_heading(self, level: int, raw: str) -> None:
+        text = _collapse(self._inline_text(raw))
+        self._text.paragraph_break()
+        if text:
+            self.outline.headings.append((level, text))
+            self._text.write(text)
+        self._text.paragraph_break()
+
+    def _handle_front_matter(self, line: str) -> None:
+        if line.strip() in ('---', '...'):
+            self._in_front_matter = False
+            return
+        match = _FRONT_MATTER_RE.match(line)
+        if not match:
+            return
+        key, value = match.group(1).lower(), match.group(2).strip('\'"')
+        if key == 'title' and value:
+            self.outline.title = value
+        elif key == 'description' and value:
+            self.outline.meta_description = value
+
+    def _inline_text(self, line: str) -> str:
+        line = _IMAGE_RE.sub('', line)
+
+        def link(match):
+            self.outline.add_link(match.group(2))
+            return match.group(1)
+
+        def autolink(match):
+            self.outline.add_link(match.group(1))
+            return match.group(1)
+
+        line = _LINK_RE.sub(link, line)
+        line = _AUTOLINK_RE.sub(autolink, line)
+        line = _REFERENCE_LINK_RE.sub(r'\1', line)
+        line = _INLINE_HTML_RE.sub('', line)
+        line = _EMPHASIS_RE.sub('', line)
+        return line.strip()
+
+
+def create_extractor(document_format: str):
+    """
+    Create the incremental extractor of a document format.
+
+    Args:
+        document_format: 'html' or 'markdown'
+
+    Returns:
+        HtmlExtractor or MarkdownExtractor
+
+    Raises:
+        ValueError: If the format has no extractor
+    """
+    if document_format == 'html':
+        return HtmlExtractor()
+    if document_format == 'markdown':
+        return MarkdownExtractor()
+    raise ValueError(f"Unsupported format '{document_format}'. Supported: {', '.join(FORMATS)}")
+
+
+def extract_document(raw: str, document_format: str) -> Tuple[str, Optional[DocumentOutline]]:
+    """
+    Extract the body text and outline of a complete document.
+
+    Args:
+        raw: Document source
+        document_format: 'text', 'html' or 'markdown'
+
+    Returns:
+        Tuple of (body text, outline); plain text is returned unchanged
+        with no outline
+    """
+    if document_format == 'text':
+        return raw, None
+
+    extractor = create_extractor(document_format)
+    extractor.feed(raw)
+    extractor.close()
+    return extractor.take_text(), extractor.outline
@@ -0,0 +1,513 @@
+"""
+Durable asynchronous job queue for the SEO Analyzer.
+
+Large documents and bulk site audits do not fit a synchronous request on
+serverless time limits, so they can be submitted as jobs instead. Jobs are
+stored in a local SQLite database in WAL mode: the API only inserts rows
+and reads results, while worker processes claim queued jobs in batches
+under a lease, run them and store the encoded result.
+
+A worker renews the leases of its batch from a heartbeat thread while a
+handler runs, so a job may take longer than the lease. A worker that
+crashes simply stops renewing its leases; once a lease
+expires the job is claimed again by another worker, up to `max_attempts`
+times. Jobs that raise are failed at once (their error is deterministic).
+Finished jobs are purged after a retention period and beyond a maximum
+count. Throughput scales with the number of worker processes: claims are
+short write transactions, and WAL lets readers proceed during them.
+
+Command line usage:
+    python jobs.py worker [--processes 4] [--batch-size 8] [--db PATH]
+    python jobs.py purge [--db PATH]
+"""
+
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+JOB_KINDS = ('analyze', 'site_audit')
+
+# Import path of the {kind: handler} mapping run by workers
+DEFAULT_HANDLERS = 'main:JOB_HANDLERS'
+
+# Finished jobs of a batch are written at least this often (seconds)
+FLUSH_INTERVAL = 0.25
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    finished REAL,
+    result BLOB,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, created);
+CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished) WHERE finished IS NOT NULL;
+"""
+
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+def default_db_path() -> str:
+    """Job database from JOBS_DB (under /tmp by default, writable on serverless hosts)"""
+    return os.environ.get('JOBS_DB') or '/tmp/seo-analyzer-jobs.sqlite3'
+
+
+@dataclass(slots=True)
+class Job:
+    """A row of the job queue"""
+    id: str
+    kind: str
+    payload: str  # JSON request
+    status: str  # queued, running, done or failed
+    attempts: int
+    max_attempts: int
+    created: float
+    updated: float
+    finished: Optional[float] = None
+    result: Optional[bytes] = None  # Encoded JSON response
+    error: Optional[str] = None
+
+
+class JobStore:
+    """
+    SQLite-backed job queue, safe to share between processes.
+
+    Every process (API worker or job worker) opens its own store on the
+    same file. Connections are per thread.
+
+    Args:
+        path: Database file
+        lease_seconds: How long a claim is valid without being renewed
+        max_attempts: Claims allowed before a job whose worker keeps
+            crashing is failed
+        retention_seconds: Finished jobs older than this are purged
+        max_finished: At most this many finished jobs are kept
+    """
+
+    def __init__(
+        self,
+        path: str,
+        lease_seconds: float = 300.0,
+        max_attempts: int = 3,
+        retention_seconds: float = 24 * 3600,
+        max_finished: int = 10000
+    ):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+        self.max_finished = max_finished
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls, path: Optional[str] = None) -> 'JobStore':
+        """Create a store configured from JOBS_* environment variables"""
+        return cls(
+            path=path or default_db_path(),
+            lease_seconds=_env_float('JOBS_LEASE_SECONDS', 300.0),
+            max_attempts=int(_env_float('JOBS_MAX_ATTEMPTS', 3)),
+            retention_seconds=_env_float('JOBS_RETENTION_SECONDS', 24 * 3600),
+            max_finished=int(_env_float('JOBS_MAX_FINISHED', 10000))
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # Autocommit mode; write transactions are opened explicitly
+            connection = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def _write(self, statements: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run `statements` in an immediate (write-locked) transaction"""
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            result = statements(connection)
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return result
+
+    def submit(self, kind: str, payload: Dict[str, Any]) -> str:
+        """Queue one job and return its id"""
+        return self.submit_many(kind, [payload])[0]
+
+    def submit_many(self, kind: str, payloads: List[Dict[str, Any]]) -> List[str]:
+        """Queue several jobs of one kind in a single transaction"""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind '{kind}'")
+        now = time.time()
+        rows = [
+            (uuid.uuid4().hex, kind, json.dumps(payload), self.max_attempts, now, now)
+            for payload in payloads
+        ]
+        self._write(lambda connection: connection.executemany(
+            "INSERT INTO jobs (id, kind, payload, status, max_attempts, created, updated) "
+            "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+            rows
+        ))
+        return [row[0] for row in rows]
+
+    def claim(self, worker_id: str, batch_size: int = 8) -> List[Job]:
+        """
+        Claim up to `batch_size` jobs for a worker, oldest first.
+
+        Queued jobs and jobs whose lease expired (their worker crashed) are
+        claimable. Expired jobs that used up their attempts are failed
+        instead.
+
+        Args:
+            worker_id: Unique id of the claiming worker
+            batch_size: Maximum jobs claimed
+
+        Returns:
+            Claimed jobs, now running under the worker's lease
+        """
+        def statements(connection):
+            now = time.time()
+            connection.execute(
+                "UPDATE jobs SET status = 'failed', finished = ?, updated = ?, lease_owner = NULL, "
+                "error = 'Worker stopped before finishing (' || attempts || ' attempts)' "
+                "WHERE status = 'running' AND lease_expires < ? AND attempts >= max_attempts",
+                (now, now, now)
+            )
+            rows = connection.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' "
+                "OR (status = 'running' AND lease_expires < ?) "
+                "ORDER BY created, rowid LIMIT ?",
+                (now, batch_size)
+            ).fetchall()
+            ids = [row[0] for row in rows]
+            if not ids:
+                return []
+            placeholders = ','.join('?' * len(ids))
+            connection.execute(
+                f"UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_owner = ?, "
+                f"lease_expires = ?, updated = ? WHERE id IN ({placeholders})",
+                (worker_id, now + self.lease_seconds, now, *ids)
+            )
+            return self._select(connection, ids)
+
+        return self._write(statements)
+
+    def complete(self, job_id: str, worker_id: str, result: bytes) -> bool:
+        """Store a job's result; False if the worker no longer holds the job"""
+        return self.finish_many(worker_id, [(job_id, 'done', result, None)]) == 1
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """Fail a job with an error; False if the worker no longer holds the job"""
+        return self.finish_many(worker_id, [(job_id, 'failed', None, error)]) == 1
+
+    def finish_many(
+        self,
+        worker_id: str,
+        outcomes: List[Tuple[str, str, Optional[bytes], Optional[str]]],
+        renew_ids: Sequence[str] = ()
+    ) -> int:
+        """
+        Record finished jobs and renew the leases of pending ones in one transaction.
+
+        Only jobs the worker still holds are updated, so a worker whose
+        lease expired cannot overwrite the job's new owner.
+
+        Args:
+            worker_id: Lease owner
+            outcomes: (job id, 'done' or 'failed', result, error) per job
+            renew_ids: Jobs of the worker's batch not finished yet
+
+        Returns:
+            int: Number of jobs recorded
+        """
+        def statements(connection):
+            now = time.time()
+            recorded = 0
+            for job_id, status, result, error in outcomes:
+                recorded += connection.execute(
+                    "UPDATE jobs SET status = ?, result = ?, error = ?, finished = ?, updated = ?, "
+                    "lease_owner = NULL, lease_expires = NULL "
+                    "WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                    (status, result, error, now, now, job_id, worker_id)
+                ).rowcount
+            if renew_ids:
+                placeholders = ','.join('?' * len(renew_ids))
+                connection.execute(
+                    f"UPDATE jobs SET lease_expires = ?, updated = ? "
+                    f"WHERE lease_owner = ? AND status = 'running' AND id IN ({placeholders})",
+                    (now + self.lease_seconds, now, worker_id, *renew_ids)
+                )
+            return recorded
+
+        return self._write(statements)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """A job by id, or None if unknown or purged"""
+        jobs = self._select(self._connect(), [job_id])
+        return jobs[0] if jobs else None
+
+    def _select(self, connection: sqlite3.Connection, ids: List[str]) -> List[Job]:
+        placeholders = ','.join('?' * len(ids))
+        rows = connection.execute(
+            f"SELECT id, kind, payload, status, attempts, max_attempts, created, updated, "
+            f"finished, result, error FROM jobs WHERE id IN ({placeholders}) ORDER BY created, rowid",
+            ids
+        ).fetchall()
+        return [Job(*row) for row in rows]
+
+    def purge(self) -> int:
+        """
+        Delete finished jobs past the retention period or the count limit.
+
+        Returns:
+            int: Number of jobs deleted
+        """
+        def statements(connection):
+            deleted = connection.execute(
+                "DELETE FROM jobs WHERE finished IS NOT NULL AND finished < ?",
+                (time.time() - self.retention_seconds,)
+            ).rowcount
+            deleted += connection.execute(
+                "DELETE FROM jobs WHERE id IN (SELECT id FROM jobs WHERE finished IS NOT NULL "
+                "ORDER BY finished DESC LIMIT -1 OFFSET ?)",
+                (self.max_finished,)
+            ).rowcount
+            return deleted
+
+        return self._write(statements)
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status"""
+        rows = self._connect().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {'queued': 0, 'running': 0, 'done': 0, 'failed': 0}
+        counts.update(dict(rows))
+        return counts
+
+
+# Global variable to cache the API process's job store
+_job_store_cache = None
+
+
+def get_job_store() -> JobStore:
+    """
+    Get the job store of this process, configured from the environment.
+    Caches the store for subsequent calls.
+
+    Returns:
+        JobStore: Store on JOBS_DB
+    """
+    global _job_store_cache
+    if _job_store_cache is None:
+        _job_store_cache = JobStore.from_env()
+    return _job_store_cache
+
+
+def load_handlers(reference: str) -> Dict[str, Callable[[Dict[str, Any]], bytes]]:
+    """Import a {kind: handler} mapping given as 'module:attribute'"""
+    module_name, attribute = reference.split(':')
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+class LeaseHeartbeat:
+    """
+    Renew a worker's leases from a background thread while its jobs run.
+
+    Leases are renewed every `interval` seconds until the heartbeat is
+    stopped, so a handler that runs longer than the lease is not taken for
+    a crashed worker. Renewal only touches jobs still running under the
+    worker's lease; finished and reclaimed jobs are left alone.
+
+    Args:
+        store: Job store
+        worker_id: Lease owner
+        job_ids: Jobs whose leases are kept alive
+        interval: Seconds between renewals
+    """
+
+    def __init__(self, store: 'JobStore', worker_id: str, job_ids: Sequence[str], interval: float):
+        self.store = store
+        self.worker_id = worker_id
+        self.job_ids = list(job_ids)
+        self.interval = interval
+        self.renewals = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='lease-heartbeat', daemon=True)
+
+    def __enter__(self) -> 'LeaseHeartbeat':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.store.finish_many(self.worker_id, [], self.job_ids)
+                self.renewals += 1
+            except sqlite3.Error:
+                # A busy database delays this renewal; the next beat retries
+                pass
+
+
+def run_worker(
+    store: JobStore,
+    handlers: Dict[str, Callable[[Dict[str, Any]], bytes]],
+    batch_size: int = 8,
+    poll_interval: float = 0.5,
+    purge_interval: float = 60.0,
+    drain: bool = False,
+    stop: Optional[threading.Event] = None,
+    worker_id: Optional[str] = None,
+    heartbeat_interval: Optional[float] = None
+) -> int:
+    """
+    Claim and run jobs until stopped.
+
+    Each handler takes the job's JSON payload and returns the encoded JSON
+    result. Results are flushed at the end of the batch, or every
+    FLUSH_INTERVAL seconds during a long one; each flush also renews the
+    leases on the rest of the batch. While the batch runs, a LeaseHeartbeat
+    renews the leases of the running job and the rest of the batch, so a
+    handler outliving the lease is not mistaken for a crashed worker.
+
+    Args:
+        store: Job store
+        handlers: Handler per job kind
+        batch_size: Jobs claimed per transaction
+        poll_interval: Seconds to sleep when the queue is empty
+        purge_interval: Seconds between retention purges
+        drain: Return as soon as the queue is empty
+        stop: Event that stops the worker after its current job
+        worker_id: Lease owner id (unique per worker by default)
+        heartbeat_interval: Seconds between lease renewals while a job
+            runs (a third of the store's lease by default)
+
+    Returns:
+        int: Number of jobs processed
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    heartbeat_interval = heartbeat_interval or max(store.lease_seconds / 3, 0.01)
+    processed = 0
+    last_purge = 0.0
+
+    while stop is None or not stop.is_set():
+        if time.monotonic() - last_purge >= purge_interval:
+            store.purge()
+            last_purge = time.monotonic()
+
+        batch = store.claim(worker_id, batch_size)
+        if not batch:
+            if drain:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        # Outcomes are written together (one transaction per flush, not per
+        # job) along with the lease renewal of the rest of the batch
+        outcomes = []
+        last_flush = time.monotonic()
+        with LeaseHeartbeat(store, worker_id, [job.id for job in batch], heartbeat_interval):
+            for position, job in enumerate(batch):
+                try:
+                    outcomes.append((job.id, 'done', handlers[job.kind](json.loads(job.payload)), None))
+                except Exception as exc:
+                    outcomes.append((job.id, 'failed', None, str(exc) or type(exc).__name__))
+                processed += 1
+
+                pending = batch[position + 1:]
+                if not pending or time.monotonic() - last_flush >= FLUSH_INTERVAL:
+                    store.finish_many(worker_id, outcomes, [job.id for job in pending])
+                    outcomes = []
+                    last_flush = time.monotonic()
+
+    return processed
+
+
+def worker_main(db_path: str, handlers_ref: str, batch_size: int, drain: bool) -> None:
+    """Entry point of a worker process"""
+    run_worker(JobStore.from_env(db_path), load_handlers(handlers_ref), batch_size=batch_size, drain=drain)
+
+
+def start_workers(
+    processes: int,
+    db_path: Optional[str] = None,
+    handlers_ref: str = DEFAULT_HANDLERS,
+    batch_size: int = 8,
+    drain: bool = False
+) -> List[multiprocessing.Process]:
+    """
+    Start a pool of worker processes on one job database.
+
+    Processes are spawned (not forked), so each imports the handlers fresh.
+
+    Returns:
+        The started processes
+    """
+    context = multiprocessing.get_context('spawn')
+    workers = [
+        context.Process(
+            target=worker_main,
+            args=(db_path or default_db_path(), handlers_ref, batch_size, drain),
+            daemon=True
+        )
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run job workers or a retention purge from the command line"""
+    parser = argparse.ArgumentParser(description="Run SEO Analyzer job workers.")
+    parser.add_argument('command', choices=('worker', 'purge'))
+    parser.add_argument('--db', default=None, help="Job database (JOBS_DB by default)")
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument('--batch-size', type=int, default=8, help="Jobs claimed at once")
+    parser.add_argument('--drain', action='store_true', help="Exit once the queue is empty")
+    args = parser.parse_args(argv)
+
+    if args.command == 'purge':
+        store = JobStore.from_env(args.db)
+        print(json.dumps({'deleted': store.purge(), **store.counts()}))
+        return 0
+
+    workers = start_workers(args.processes, args.db, batch_size=args.batch_size, drain=args.drain)
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""
+Language detection and per-language resources for the SEO Analyzer.
+
+Detection compares the character n-gram profile of a text with compact
+ranked profiles shipped in language_profiles.json (Cavnar & Trenkle
+out-of-place distance). Short or low-confidence texts keep the default
+language rather than switching on a small n-gram difference. Stopwords, syllable dictionaries and readability
+formulas are loaded lazily the first time a language is used and cached
+per language, so cold start does not grow with the number of languages
+and a mixed-language batch never reloads anything.
+"""
+
+import json
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List
+
+import nltk
+from pyphen import Pyphen
+
+from readability import FLESCH_READING_EASE, ReadabilityFormula
+
+PROFILES_PATH = Path(__file__).resolve().parent / 'language_profiles.json'
+
+DEFAULT_LANGUAGE = 'en'
+
+# Character n-gram sizes and number of ranked n-grams kept per profile
+NGRAM_RANGE = (1, 3)
+PROFILE_SIZE = 300
+
+# Leading characters of a text used for detection
+DETECTION_CHARS = 4000
+
+# Detection only moves away from the default language for texts with at
+# least this many letters, whose closest profile is nearer than the
+# default's by this fraction of the default's distance
+MIN_SWITCH_LETTERS = 40
+SWITCH_MARGIN = 0.1
+
+_LETTERS_RE = re.compile(r'[^\W\d_]+')
+
+LANGUAGES = {
+    'en': {
+        'name': 'english',
+        'hyphenation': 'en_US',
+        'readability': FLESCH_READING_EASE,
+    },
+    'es': {
+        'name': 'spanish',
+        'hyphenation': 'es',
+        'readability': ReadabilityFormula('Fernandez Huerta', 206.84, 1.02, 0.6, syllable_interval=100),
+    },
+    'fr': {
+        'name': 'french',
+        'hyphenation': 'fr',
+        'readability': ReadabilityFormula('Kandel & Moles', 207.0, 1.015, 73.6),
+    },
+    'de': {
+        'name': 'german',
+        'hyphenation': 'de_DE',
+        'readability': ReadabilityFormula('Amstad', 180.0, 1.0, 58.5),
+    },
+    'it': {
+        'name': 'italian',
+        'hyphenation': 'it_IT',
+        'readability': ReadabilityFormula('Flesch-Vacca', 217.0, 1.3, 0.6, syllable_interval=100),
+    },
+    'pt': {
+        'name': 'portuguese',
+        'hyphenation': 'pt_PT',
+        'readability': ReadabilityFormula('Martins', 248.835, 1.015, 84.6),
+    },
+    'nl': {
+        'name': 'dutch',
+        'hyphenation': 'nl_NL',
+        'readability': ReadabilityFormula('Flesch-Douma', 206.835, 0.93, 77.0),
+    },
+}
+
+# Bundled minimal stopword lists, used when the NLTK corpus is unavailable
+FALLBACK_STOPWORDS = {
+    'en': {
+        'a','about','above','after','again','against','all','am','an','and','any','are','as','at',
+        'be','because','been','before','being','below','between','both','but','by','could','did',
+        'do','does','doing','down','during','each','few','for','from','further','had','has','have',
+        'having','he','her','here','hers','herself','him','himself','his','how','i','if','in','into',
+        'is','it','its','itself','me','more','most','my','myself','no','nor','not','of','off','on','once',
+        'only','or','other','our','ours','ourselves','out','over','own','same','she','should','so','some',
+        'such','than','that','the','their','theirs','them','themselves','then','there','these','they','this',
+        'those','through','to','too','under','until','up','very','was','we','were','what','when','where','which',
+        'while','who','whom','why','with','would','you','your','yours','yourself','yourselves'
+    },
+    'es': {
+        'a','al','algo','algunos','ante','antes','como','con','contra','cual','cuando','de','del','desde',
+        'donde','durante','e','el','ella','ellas','ellos','en','entre','era','es','esa','ese','eso','esta',
+        'este','esto','estos','fue','ha','hay','la','las','le','les','lo','los','mas','más','me','mi','muy',
+        'no','nos','o','para','pero','por','porque','que','qué','se','sea','ser','si','sin','sobre','son',
+        'su','sus','también','te','tu','un','una','uno','unos','y','ya','yo'
+    },
+    'fr': {
+        'a','à','au','aux','avec','ce','ces','cette','dans','de','des','du','elle','en','est','et','eux',
+        'il','ils','je','la','le','les','leur','lui','ma','mais','me','même','mes','moi','mon','ne','nos',
+        'notre','nous','on','ou','où','par','pas','pour','qu','que','qui','sa','se','ses','son','sont',
+        'sur','ta','te','tes','toi','ton','tu','un','une','vos','votre','vous','été','être','aussi','plus'
+    },
+    'de': {
+        'aber','als','am','an','auch','auf','aus','bei','bin','bis','da','damit','dann','das','dass',
+        'dem','den','der','des','die','dies','diese','doch','du','durch','ein','eine','einem','einen',
+        'einer','er','es','für','hat','hatte','ich','ihr','im','in','ist','ja','kein','man','mit','nach',
+        'nicht','noch','nur','oder','sich','sie','sind','so','um','und','uns','von','vor','war','was',
+        'weil','wenn','wer','wie','wir','wird','zu','zum','zur','über'
+    },
+    'it': {
+        'a','ad','al','alla','alle','anche','che','chi','ci','come','con','da','dal','dalla','dei','del',
+        'della','delle','di','e','è','ed','gli','ha','hanno','i','il','in','io','la','le','lo','loro',
+        'ma','mi','nei','nel','nella','non','noi','o','per','più','perché','quale','quando','questo',
+        'se','si','sia','sono','su','sul','sulla','tra','un','una','uno','voi'
+    },
+    'pt': {
+        'a','ao','aos','as','às','com','como','da','das','de','do','dos','e','é','ela','elas','ele',
+        'eles','em','entre','era','essa','esse','esta','este','eu','foi','há','isso','já','mais','mas',
+        'me','muito','na','nas','nem','no','nos','não','o','os','ou','para','pela','pelo','por','que',
+        'se','sem','ser','seu','sua','são','também','um','uma'
+    },
+    'nl': {
+        'aan','al','als','bij','dan','dat','de','die','dit','door','een','en','er','ge','geen','had',
+        'heb','hem','het','hier','hij','hoe','ik','in','is','ja','je','kan','maar','me','met','mij',
+        'na','naar','niet','nog','nu','of','om','omdat','ons','ook','op','over','te','tot','uit','van',
+        'veel','voor','want','was','wat','we','wel','wie','wij','wordt','zal','ze','zich','zij','zijn','zo'
+    },
+}
+
+
+def ngram_profile(text: str, size: int = PROFILE_SIZE) -> List[str]:
+    """
+    Build a ranked character n-gram profile of a text.
+
+    Words are lowercased letter runs padded with '_' on both sides, so
+    word beginnings and endings become part of the profile.
+
+    Args:
+        text: Text to profile
+        size: Number of most frequent n-grams to keep
+
+    Returns:
+        List of n-grams, most frequent first
+    """
+    counts = Counter()
+    low, high = NGRAM_RANGE
+
+    for word in _LETTERS_RE.findall(text.lower()):
+        padded = f'_{word}_'
+        for n in range(low, high + 1):
+            for i in range(len(padded) - n + 1):
+                counts[padded[i:i + n]] += 1
+
+    ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    return [ngram for ngram, _ in ranked[:size]]
+
+
+class LanguageResources:
+    """
+    Stopwords, syllable dictionary and readability formula of one language.
+
+    The stopword set and hyphenation dictionary are loaded on first access.
+
+    Args:
+        code: ISO 639-1 language code (a key of LANGUAGES)
+    """
+
+    def __init__(self, code: str):
+        config = LANGUAGES[code]
+        self.code = code
+        self.name = config['name']
+        self.readability: ReadabilityFormula = config['readability']
+        self._hyphenation = config['hyphenation']
+        self._stopwords = None
+        self._pyphen = None
+
+    @property
+    def stopwords(self) -> set:
+        """Stopword set from NLTK, or the bundled fallback list"""
+        if self._stopwords is None:
+            try:
+                self._stopwords = set(nltk.corpus.stopwords.words(self.name))
+            except LookupError:
+                print(f"NLTK stopwords not found for '{self.name}'; using bundled fallback stopwords list")
+                self._stopwords = FALLBACK_STOPWORDS[self.code]
+        return self._stopwords
+
+    @property
+    def pyphen(self) -> Pyphen:
+        """Hyphenation dictionary used for syllable counts"""
+        if self._pyphen is None:
+            self._pyphen = Pyphen(lang=self._hyphenation)
+        return self._pyphen
+
+
+# Per-language resource cache, filled lazily
+_resources_cache: Dict[str, LanguageResources] = {}
+_resources_lock = threading.Lock()
+
+# Global variable to cache the detection profiles
+_profiles_cache = None
+
+
+def get_language_resources(code: str = DEFAULT_LANGUAGE) -> LanguageResources:
+    """
+    Get the resources of a language, creating them on first use.
+
+    Args:
+        code: ISO 639-1 language code
+
+    Returns:
+        LanguageResources: Cached resources for the language
+
+    Raises:
+        ValueError: If the language is not supported
+    """
+    resources = _resources_cache.get(code)
+    if resources is not None:
+        return resources
+
+    if code not in LANGUAGES:
+        raise ValueError(f"Unsupported language '{code}'. Supported: {', '.join(sorted(LANGUAGES))}")
+
+    with _resources_lock:
+        resources = _resources_cache.get(code)
+        if resources is None:
+            resources = LanguageResources(code)
+            _resources_cache[code] = resources
+    return resources
+
+
+def get_profiles() -> Dict[str, Dict[str, int]]:
+    """
+    Load the shipped language profiles as n-gram to rank mappings.
+    Caches the profiles for subsequent calls.
+
+    Returns:
+        dict: Mapping of language code to {n-gram: rank}
+    """
+    global _profiles_cache
+
+    if _profiles_cache is None:
+        model = json.loads(PROFILES_PATH.read_text(encoding='utf-8'))
+        _profiles_cache = {
+            code: {ngram: rank for rank, ngram in enumerate(profile)}
+            for code, profile in model['profiles'].items()
+            if code in LANGUAGES
+        }
+
+    return _profiles_cache
+
+
+def detect_language(text: str, default: str = DEFAULT_LANGUAGE) -> str:
+    """
+    Detect the language of a text from its character n-gram profile.
+
+    Short texts such as titles and keyword lists carry little evidence, and
+    technical vocabulary shares many n-grams across languages, so the
+    default language is kept unless the text has MIN_SWITCH_LETTERS
+    letters, the closest profile beats the default's by SWITCH_MARGIN, and
+    the text uses at least one function word of that language.
+
+    Args:
+        text: Text to classify (only the leading DETECTION_CHARS are used)
+        default: Language returned when the text has too few letters or the
+            evidence for another language is weak
+
+    Returns:
+        str: ISO 639-1 code of the detected language
+    """
+    sample = text[:DETECTION_CHARS]
+    words = _LETTERS_RE.findall(sample.lower())
+    letters = sum(len(word) for word in words)
+    if letters < 20:
+        return default
+
+    document_profile = ngram_profile(sample)
+    distances = {}
+
+    for code, ranks in get_profiles().items():
+        max_penalty = len(ranks)
+        distance = 0
+        for rank, ngram in enumerate(document_profile):
+            language_rank = ranks.get(ngram)
+            distance += abs(rank - language_rank) if language_rank is not None else max_penalty
+        distances[code] = distance
+
+    best_code = min(distances, key=distances.get)
+    if best_code == default or default not in distances:
+        return best_code
+
+    if letters < MIN_SWITCH_LETTERS:
+        return default
+    if distances[best_code] > distances[default] * (1 - SWITCH_MARGIN):
+        return default
+
+    function_words = FALLBACK_STOPWORDS[best_code] - FALLBACK_STOPWORDS.get(default, set())
+    if not function_words.intersection(words):
+        return default
+
+    return best_code
@@ -5,8 +5,13 @@ This API analyzes text content for SEO metrics including readability,
 keyword density, plagiarism detection, and generates an overall score.
 """
 
+import asyncio
+import json
 import os
+import threading
+from dataclasses import asdict
 from pathlib import Path
+from types import SimpleNamespace
 
 # Set environment variables for Vercel serverless (read-only filesystem workaround)
 # CRITICAL: Must be set BEFORE importing textstat or any other libraries that might write to home
@@ -34,17 +39,52 @@ os.makedirs('/tmp/.cache', exist_ok=True)
 TMP_NLTK_DIR.mkdir(parents=True, exist_ok=True)
 
 # Now import other modules AFTER environment is set
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Dict, Tuple
+from typing import Annotated, Any, AsyncIterable, List, Dict, Optional, Tuple, Union
 import re
 import string
 from collections import Counter
-import textstat
 import nltk
 from difflib import SequenceMatcher
+from xml.etree.ElementTree import ParseError
+import httpx
 import uvicorn
+import numpy as np
+from passages import PassageIndex
+from shingles import ShingleEngine, TokenVocabulary, jaccard_similarity, rolling_hashes
+from bloom import sentence_hashes
+from suffix import CopyDetector, copied_text_weight
+from semantic import SemanticIndex, paraphrase_weight
+from admission import (
+    COST_PER_COPY_CHAR, COST_PER_PARAPHRASE_SENTENCE, COST_PER_SENTENCE_PAIR, COST_PER_SEQUENCE_CHAR,
+    COST_PER_SKETCH_PAIR,
+    AdmissionController, AdmissionRejected, count_sentences, estimate_cost
+)
+from deadline import DEADLINE_HEADER, Deadline, default_deadline_ms
+from language import DEFAULT_LANGUAGE, LANGUAGES, detect_language, get_language_resources
+from watermark import MemoryWatermarks
+from memo import content_key, get_stage_cache, memo_stats, split_paragraphs
+from readability import ReadabilityTally, readability_breakdown
+from streaming import StreamingAnalyzer, StreamingReference, StreamingResult, aiter_decoded_chunks
+from site_audit import audit_site
+from ingest import FORMATS, DocumentOutline, create_extractor, extract_document
+from crawler import BlockedURL, Crawler, FetchedPage, SitemapTooLarge, ValidatorStore, private_hosts_allowed
+from profiling import RequestProfiler, profile_stage
+from passages import PassageMatch
+from results import (
+    AnalysisResult, CoverageResult, ParagraphReadabilityResult, ReadabilityDetailsResult,
+    SentenceReadabilityResult, SerpResult, StructureResult
+)
+from serialization import dump_json, get_encoder, json_response
+from jobs import Job, get_job_store
+from shards import ShardCoordinator
+from conditional import etag_matches, make_etag, not_modified
+from compression import CompressionMiddleware
+from singleflight import CancelToken, RevisionTracker, SingleFlight, Superseded, cancellable, check_cancelled
 
 nltk_paths = []
 if LOCAL_NLTK_DIR.exists():
@@ -83,6 +123,20 @@ async def startup_event():
             except Exception as exc:  # pragma: no cover - diagnostics only
                 print(f"Warning: unable to obtain NLTK resource '{resource}': {exc}")
 
+    global _memory_watermark_task
+    if memory_watermarks.enabled:
+        _memory_watermark_task = asyncio.create_task(memory_watermarks.run(lambda: admission_controller.pending))
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the memory watermark checks and the plagiarism shard processes, if any were started."""
+
+    if _memory_watermark_task is not None:
+        _memory_watermark_task.cancel()
+    if _shard_coordinator_cache is not None:
+        _shard_coordinator_cache.close()
+
 # Add CORS middleware to allow frontend requests
 app.add_middleware(
     CORSMiddleware,
@@ -97,8 +151,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allow all methods (GET, POST, etc.)
     allow_headers=["*"],  # Allow all headers
+    expose_headers=["ETag"],  # Let the frontend revalidate analyses
 )
 
+# Compress JSON responses above COMPRESS_MIN_BYTES (brotli when installed, else gzip)
+app.add_middleware(CompressionMiddleware)
+
 # Sample texts for plagiarism comparison
 SAMPLE_TEXTS = {
     "article1": """
@@ -124,13 +182,136 @@ SAMPLE_TEXTS = {
     """
 }
 
-# Global variable to cache stopwords
-_stopwords_cache = None
+# Token vocabulary shared by every shingle index over SAMPLE_TEXTS
+_shingle_vocabulary = TokenVocabulary()
+
+# Global variable to cache the 5-gram shingle sets of SAMPLE_TEXTS
+_reference_shingles_cache = None
+
+# Global variable to cache the passage index over SAMPLE_TEXTS
+_passage_index_cache = None
+
+# Global variable to cache SAMPLE_TEXTS preprocessed for streaming analysis
+_streaming_reference_cache = None
+
+# Size of the chunks the streaming pipeline works on
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Global variable to cache the cleaned sentences of SAMPLE_TEXTS
+_reference_sentences_cache = None
+
+# Global variable to cache the number of sentences in SAMPLE_TEXTS
+_reference_sentence_count_cache = None
+
+# Global variable to cache the suffix-automaton index of copied passages
+_copy_detector_cache = None
+
+# Global variable to cache the sentence and document sketches for paraphrase detection
+_semantic_index_cache = None
+
+# Global variable to cache the coordinator of the sharded plagiarism index
+_shard_coordinator_cache = None
+
+# Held while the first request starts the shard processes, so concurrent
+# first requests do not each start (and leak) a set of shards
+_shard_coordinator_lock = threading.Lock()
+
+# Version of the scores for given input; part of every analysis ETag, so
+# bump it whenever scoring, weights or the reference texts change
+SCORING_VERSION = "3"
+
+# Sentences listed as hardest in readability details, and the score they must fall below
+HARDEST_SENTENCES = 5
+HARD_SENTENCE_READABILITY = 60.0
+
+# Per-worker cost budget for incoming analysis requests
+admission_controller = AdmissionController.from_env()
+
+# RSS watermarks: a worker over them stops admitting work and restarts
+memory_watermarks = MemoryWatermarks.from_env(drain=admission_controller.drain)
+_memory_watermark_task = None
+
+# Identical in-flight analyses share one computation
+analysis_flights = SingleFlight()
+
+# Latest draft revision per client session; older in-flight revisions are dropped
+session_revisions = RevisionTracker()
+
+# Opt-in profiler of sampled and slow /analyze requests
+request_profiler = RequestProfiler.from_env()
+
+# Seconds between job state polls of a job stream
+JOB_POLL_INTERVAL = 0.25
+
+# ETag / Last-Modified validators of crawled pages, for conditional GETs of
+# crawls that opt in; bounded by the store's max_entries
+crawl_validators = ValidatorStore()
+
+# Most pages a single /crawl request may fetch
+MAX_CRAWL_PAGES = 1000
+
+# Plagiarism techniques in order of increasing cost, with their weights
+PLAGIARISM_TIERS = {
+    'ngram': 0.5,
+    'sequence': 0.2,
+    'sentence': 0.3,
+}
 
 
 class AnalyzeRequest(BaseModel):
     """Request model for text analysis"""
     text: str
+    detailed_plagiarism: bool = False  # Include copied passages in the response
+    language: Optional[str] = None  # ISO 639-1 code; detected when omitted
+    format: str = "text"  # "text", "html" or "markdown"
+    readability_details: bool = False  # Include per-sentence and per-paragraph readability
+    paraphrase: bool = False  # Include reworded-sentence similarity (always computed when weighted)
+
+
+class PlagiarismMatch(BaseModel):
+    """A copied passage with character offsets in the input and the source"""
+    source: str
+    input_start: int
+    input_end: int
+    source_start: int
+    source_end: int
+    matched_tokens: int
+    strength: float  # Share of the passage span that matches exactly (0-1)
+
+
+class PlagiarismReport(BaseModel):
+    """Detailed plagiarism result: the overall score plus matched passages"""
+    score: float
+    matches: List[PlagiarismMatch]
+
+
+class SitePage(BaseModel):
+    """A page of a site audit"""
+    url: str
+    text: str
+
+
+class SiteAuditRequest(BaseModel):
+    """Request model for a site-wide keyword cannibalization audit"""
+    pages: List[SitePage]
+    top_k: int = 50  # Number of competing page pairs to report
+    min_similarity: float = 0.2  # Minimum cosine similarity of a reported pair
+    language: Optional[str] = None  # ISO 639-1 code; detected per page when omitted
+
+
+class CannibalizationPair(BaseModel):
+    """Two pages competing for the same keywords"""
+    page_a: str
+    page_b: str
+    similarity: float  # Cosine similarity of the pages' TF-IDF keyword vectors (0-1)
+    shared_keywords: List[str]
+
+
+class SiteAuditResponse(BaseModel):
+    """Response model for a site audit"""
+    pages: int
+    terms: int  # Distinct keywords used in the comparison
+    pairs: List[CannibalizationPair]
 
 
 class SerpPreview(BaseModel):
@@ -145,6 +326,78 @@ class SerpPreview(BaseModel):
     description_issues: List[str]
 
 
+class DocumentHeading(BaseModel):
+    """A heading of an HTML or Markdown page"""
+    level: int
+    text: str
+
+
+class DocumentStructure(BaseModel):
+    """Structure extracted from HTML or Markdown input"""
+    title: Optional[str] = None  # <title> or front matter title
+    meta_description: Optional[str] = None
+    headings: List[DocumentHeading]
+    internal_links: int
+    external_links: int
+
+
+class AnalysisCoverage(BaseModel):
+    """Which parts of the analysis were computed before the deadline"""
+    complete: bool
+    plagiarism_tiers: List[str]  # Plagiarism techniques that were computed
+    approximated: List[str] = []  # Response fields computed from partial data
+    skipped: List[str] = []  # Requested response fields left out
+    deadline_ms: Optional[float] = None
+    elapsed_ms: Optional[float] = None
+
+
+class SentenceReadability(BaseModel):
+    """Readability of one sentence, with character offsets in the input"""
+    start: int
+    end: int
+    paragraph: int  # Index into ReadabilityDetails.paragraphs
+    words: int
+    syllables: int
+    syllables_per_word: float
+    readability: float  # Flesch Reading Ease (0-100)
+
+
+class ParagraphReadability(BaseModel):
+    """Readability of one paragraph, with character offsets in the input"""
+    start: int
+    end: int
+    sentences: int  # Sentences of more than two words
+    words: int
+    sentence_length: float  # Average words per sentence
+    syllables_per_word: float
+    readability: float  # Flesch Reading Ease (0-100)
+
+
+class CopiedRuns(BaseModel):
+    """Verbatim runs of reference text in the input, counted in words"""
+    longest_run: int
+    longest_run_source: Optional[str] = None  # Reference document of the longest run
+    copied_tokens: int  # Words inside copied runs of at least COPY_MIN_RUN words
+    input_tokens: int
+    copied_fraction: float  # copied_tokens / input_tokens (0-1)
+
+
+class ParaphraseMatches(BaseModel):
+    """Reworded overlap of the input with the reference texts"""
+    max_similarity: float  # Sketch cosine with the closest reference document (0-1)
+    closest_source: Optional[str] = None  # Closest reference document
+    paraphrased_sentences: int  # Sentences close to a reference sentence, reworded or not
+    compared_sentences: int  # Sentences of at least three words
+    paraphrased_fraction: float  # paraphrased_sentences / compared_sentences (0-1)
+
+
+class ReadabilityDetails(BaseModel):
+    """Per-sentence and per-paragraph readability heatmap"""
+    sentences: List[SentenceReadability]
+    paragraphs: List[ParagraphReadability]
+    hardest_sentences: List[int]  # Indexes into sentences, hardest first
+
+
 class AnalyzeResponse(BaseModel):
     """Response model for text analysis results"""
     readability: float
@@ -154,41 +407,170 @@ class AnalyzeResponse(BaseModel):
     final_score: float
     suggestions: List[str]  # AI-powered improvement suggestions
     serp_preview: SerpPreview  # Google SERP preview and CTR prediction
+    plagiarism_matches: Optional[List[PlagiarismMatch]] = None  # Only in detailed mode
+    language: str = DEFAULT_LANGUAGE  # Language used for stopwords and readability
+    coverage: Optional[AnalysisCoverage] = None  # What was computed within the deadline
+    structure: Optional[DocumentStructure] = None  # Only for HTML and Markdown input
+    readability_details: Optional[ReadabilityDetails] = None  # Only when requested
+    copied_text: Optional[CopiedRuns] = None  # Longest and total verbatim copied runs
+    paraphrase: Optional[ParaphraseMatches] = None  # Reworded overlap with the reference texts
+
+
+class CrawlRequest(BaseModel):
+    """Request model for crawling and analyzing a site"""
+    sitemap_url: Optional[str] = None
+    urls: List[str] = []
+    max_pages: int = 100  # At most MAX_CRAWL_PAGES
+    per_host_concurrency: int = 4
+    language: Optional[str] = None  # Detected per page when omitted
+    conditional: bool = False  # Skip pages unchanged since an earlier conditional crawl
+
+
+class CrawledPage(BaseModel):
+    """Outcome of crawling one page"""
+    url: str
+    status: str  # analyzed, not_modified, skipped or error
+    http_status: Optional[int] = None
+    detail: Optional[str] = None
+    elapsed_ms: float
+    analysis: Optional[AnalyzeResponse] = None  # Only for analyzed pages
+
 
+class CrawlResponse(BaseModel):
+    """Response model for a crawl"""
+    pages: List[CrawledPage]
+    analyzed: int
+    not_modified: int  # Unchanged since the last crawl (HTTP 304)
+    skipped: int
+    errors: int
 
-def get_stopwords() -> set:
+
+class JobRequest(BaseModel):
+    """Request model for submitting asynchronous jobs"""
+    documents: List[AnalyzeRequest] = []  # One analysis job per document
+    site_audit: Optional[SiteAuditRequest] = None  # One site audit job
+
+
+class JobInfo(BaseModel):
+    """State of an asynchronous job"""
+    id: str
+    kind: str  # analyze or site_audit
+    status: str  # queued, running, done or failed
+    attempts: int  # Times a worker claimed the job
+    created: float  # Unix timestamps
+    updated: float
+    finished: Optional[float] = None
+    error: Optional[str] = None
+    result: Optional[Union[AnalyzeResponse, SiteAuditResponse]] = None  # Once done
+
+
+class JobsSubmitted(BaseModel):
+    """Response model for submitted jobs"""
+    jobs: List[JobInfo]
+
+
+def get_stopwords(language: str = DEFAULT_LANGUAGE) -> set:
     """
-    Load NLTK stopwords, downloading if necessary.
-    Caches the stopwords for subsequent calls.
+    Load NLTK stopwords for a language, falling back to a bundled list.
+    Stopwords are cached per language for subsequent calls.
+    
+    Args:
+        language: ISO 639-1 language code (default English)
     
     Returns:
-        set: Set of English stopwords
+        set: Set of stopwords for the language
+    """
+    return get_language_resources(language).stopwords
+
+
+def get_reference_shingles() -> Dict[str, np.ndarray]:
     """
-    global _stopwords_cache
+    Build the 5-gram shingle sets of SAMPLE_TEXTS.
+    Caches the shingle sets for subsequent calls.
     
-    if _stopwords_cache is not None:
-        return _stopwords_cache
+    Returns:
+        dict: Mapping of sample name to sorted uint64 shingle hashes
+    """
+    global _reference_shingles_cache
     
-    try:
-        stopwords_set = set(nltk.corpus.stopwords.words('english'))
-    except LookupError:
-        # Fallback: use a bundled minimal stopwords list to avoid runtime downloads
-        print("NLTK stopwords not found; using bundled fallback stopwords list")
-        fallback_stopwords = {
-            'a','about','above','after','again','against','all','am','an','and','any','are','as','at',
-            'be','because','been','before','being','below','between','both','but','by','could','did',
-            'do','does','doing','down','during','each','few','for','from','further','had','has','have',
-            'having','he','her','here','hers','herself','him','himself','his','how','i','if','in','into',
-            'is','it','its','itself','me','more','most','my','myself','no','nor','not','of','off','on','once',
-            'only','or','other','our','ours','ourselves','out','over','own','same','she','should','so','some',
-            'such','than','that','the','their','theirs','them','themselves','then','there','these','they','this',
-            'those','through','to','too','under','until','up','very','was','we','were','what','when','where','which',
-            'while','who','whom','why','with','would','you','your','yours','yourself','yourselves'
+    if _reference_shingles_cache is None:
+        engine = ShingleEngine(n=5, vocabulary=_shingle_vocabulary)
+        _reference_shingles_cache = {
+            name: engine.shingles(clean_text(sample_text).split(), grow=True)
+            for name, sample_text in SAMPLE_TEXTS.items()
         }
-        stopwords_set = fallback_stopwords
     
-    _stopwords_cache = stopwords_set
-    return stopwords_set
+    return _reference_shingles_cache
+
+
+def get_passage_index() -> PassageIndex:
+    """
+    Build the shingle index over SAMPLE_TEXTS used for passage matching.
+    Caches the index for subsequent calls.
+    
+    Returns:
+        PassageIndex: Index of 5-word shingles in the sample texts
+    """
+    global _passage_index_cache
+    
+    if _passage_index_cache is None:
+        _passage_index_cache = PassageIndex(SAMPLE_TEXTS, n=5, vocabulary=_shingle_vocabulary)
+    
+    return _passage_index_cache
+
+
+def get_streaming_reference() -> StreamingReference:
+    """
+    Preprocess SAMPLE_TEXTS for streaming plagiarism checks.
+    Caches the reference data for subsequent calls.
+    
+    Returns:
+        StreamingReference: Cleaned texts, shingle hashes and sentences
+    """
+    global _streaming_reference_cache
+    
+    if _streaming_reference_cache is None:
+        _streaming_reference_cache = StreamingReference(SAMPLE_TEXTS, n=5, vocabulary=_shingle_vocabulary)
+    
+    return _streaming_reference_cache
+
+
+def get_reference_sentence_count() -> int:
+    """
+    Count the SAMPLE_TEXTS sentences each input sentence is compared with.
+    Caches the count for subsequent calls.
+    
+    Returns:
+        int: Number of reference sentences (plagiarism candidates)
+    """
+    global _reference_sentence_count_cache
+    
+    if _reference_sentence_count_cache is None:
+        _reference_sentence_count_cache = sum(
+            len([s for s in sample_text.split('.') if s.strip()])
+            for sample_text in SAMPLE_TEXTS.values()
+        )
+    
+    return _reference_sentence_count_cache
+
+
+def get_reference_sentences() -> Dict[str, List[str]]:
+    """
+    Clean the SAMPLE_TEXTS sentences used for sentence matching.
+    Caches the sentences for subsequent calls.
+    
+    Returns:
+        dict: Mapping of sample name to its cleaned sentences of 3+ words
+    """
+    global _reference_sentences_cache
+    
+    if _reference_sentences_cache is None:
+        _reference_sentences_cache = {}
+        for name, sample_text in SAMPLE_TEXTS.items():
+            cleaned = [clean_text(s.strip().lower()) for s in sample_text.split('.') if s.strip()]
+            _reference_sentences_cache[name] = [s for s in cleaned if len(s.split()) >= 3]
+    
+    return _reference_sentences_cache
 
 
 def clean_text(text: str) -> str:
@@ -214,37 +596,80 @@ def clean_text(text: str) -> str:
     return text
 
 
-def calculate_keyword_stats(text: str, top_n: int = 10) -> Tuple[List[Tuple[str, int]], Dict[str, float]]:
+def count_keywords(text: str, language: str = DEFAULT_LANGUAGE) -> Counter:
     """
-    Calculate keyword statistics including top keywords and their density.
+    Count the keyword candidates of a text.
     
     Args:
-        text: Input text to analyze
-        top_n: Number of top keywords to return
+        text: Input text
+        language: ISO 639-1 language code used to pick stopwords
         
     Returns:
-        Tuple containing:
-            - List of (word, count) tuples for top keywords
-            - Dictionary mapping words to their density percentage
+        Counter: Frequency of each word that is not a stopword
     """
     # Clean the text
     cleaned = clean_text(text)
     
     # Get stopwords
-    stopwords = get_stopwords()
+    stopwords = get_stopwords(language)
     
     # Tokenize and filter stopwords
     words = cleaned.split()
     filtered_words = [word for word in words if word and word not in stopwords and len(word) > 2]
     
+    return Counter(filtered_words)
+
+
+def count_document_keywords(text: str, language: str = DEFAULT_LANGUAGE) -> Counter:
+    """
+    Count the keyword candidates of a document paragraph by paragraph.
+    
+    Repeated paragraphs reuse their memoized counts. Merging in document
+    order keeps the first-occurrence order that breaks ties in most_common.
+    
+    Args:
+        text: Input text
+        language: ISO 639-1 language code used to pick stopwords
+        
+    Returns:
+        Counter: Frequency of each word that is not a stopword
+    """
+    cache = get_stage_cache('keywords')
+    word_counts = Counter()
+    for paragraph in split_paragraphs(text):
+        word_counts.update(cache.get_or_compute(
+            (language, content_key(paragraph)),
+            lambda: count_keywords(paragraph, language)
+        ))
+    return word_counts
+
+
+def calculate_keyword_stats(
+    text: str,
+    top_n: int = 10,
+    language: str = DEFAULT_LANGUAGE
+) -> Tuple[List[Tuple[str, int]], Dict[str, float]]:
+    """
+    Calculate keyword statistics including top keywords and their density.
+    
+    Args:
+        text: Input text to analyze
+        top_n: Number of top keywords to return
+        language: ISO 639-1 language code used to pick stopwords
+        
+    Returns:
+        Tuple containing:
+            - List of (word, count) tuples for top keywords
+            - Dictionary mapping words to their density percentage
+    """
     # Count word frequencies
-    word_counts = Counter(filtered_words)
+    word_counts = count_document_keywords(text, language)
     
     # Get top N keywords
     top_keywords = word_counts.most_common(top_n)
     
     # Calculate keyword density (percentage of total words)
-    total_words = len(filtered_words)
+    total_words = sum(word_counts.values())
     keyword_density = {}
     
     if total_words > 0:
@@ -255,7 +680,7 @@ def calculate_keyword_stats(text: str, top_n: int = 10) -> Tuple[List[Tuple[str,
     return top_keywords, keyword_density
 
 
-def simulate_serp(content: str) -> SerpPreview:
+def simulate_serp(content: str, title: Optional[str] = None, description: Optional[str] = None) -> SerpResult:
     """
     Simulate Google SERP preview and predict CTR (Click-Through Rate).
     
@@ -271,13 +696,17 @@ def simulate_serp(content: str) -> SerpPreview:
     
     Args:
         content: Full text content to analyze
+        title: Title extracted from the page markup (<title> or first H1);
+            guessed from title-like lines when None
+        description: Meta description extracted from the page markup;
+            built from the first sentences when None
         
     Returns:
-        SerpPreview: SERP preview with CTR prediction and optimization feedback
+        SerpResult: SERP preview with CTR prediction and optimization feedback
     """
     # Edge case: Handle empty or very short content
     if not content or len(content.strip()) < 10:
-        return SerpPreview(
+        return SerpResult(
             meta_title="Untitled Content",
             meta_description="No content provided for analysis.",
             url_slug="untitled-content",
@@ -300,16 +729,21 @@ def simulate_serp(content: str) -> SerpPreview:
     lines = [line.strip() for line in content_to_process.split('\n') if line.strip()]
     
     # 1. EXTRACT META TITLE
-    # Try to find a title-like line (short, at beginning, or in title case)
-    meta_title = ""
-    for i, line in enumerate(lines[:5]):  # Check first 5 lines instead of 3
-        # Clean line
-        clean_line = re.sub(r'[#*_`\[\]]', '', line).strip()
-        
-        # Title heuristics: 10-100 chars, starts with capital, not all caps
-        if 10 <= len(clean_line) <= 100 and clean_line[0].isupper() and not clean_line.isupper():
-            meta_title = clean_line
-            break
+    # Use the page's own title, else find a title-like line (short, at
+    # beginning, or in title case)
+    page_title = re.sub(r'\s+', ' ', title).strip() if title else ""
+    page_description = re.sub(r'\s+', ' ', description).strip() if description else ""
+    
+    meta_title = page_title
+    if not meta_title:
+        for i, line in enumerate(lines[:5]):  # Check first 5 lines instead of 3
+            # Clean line
+            clean_line = re.sub(r'[#*_`\[\]]', '', line).strip()
+            
+            # Title heuristics: 10-100 chars, starts with capital, not all caps
+            if 10 <= len(clean_line) <= 100 and clean_line[0].isupper() and not clean_line.isupper():
+                meta_title = clean_line
+                break
     
     # Fallback: use first sentence if no title found
     if not meta_title:
@@ -332,15 +766,15 @@ def simulate_serp(content: str) -> SerpPreview:
         meta_title = meta_title[:57] + "..."
         title_length = 60  # Display length after truncation
     
-    # Edge case: Title too short
-    if title_length < 10:
+    # Edge case: Title too short (a page's own title is reported as is)
+    if title_length < 10 and not page_title:
         meta_title = (meta_title + " - SEO Content Analysis")[:60]
         title_length = len(meta_title)
     
     # 2. EXTRACT META DESCRIPTION
-    # Use first 2-3 sentences as description
-    sentences = re.split(r'(?<=[.!?])\s+', clean_content)
-    description_sentences = []
+    # Use the page's meta description, else the first 2-3 sentences
+    sentences = re.split(r'(?<=[.!?])\s+', clean_content) if not page_description else []
+    description_sentences = [page_description] if page_description else []
     char_count = 0
     
     # Skip title sentence if it matches
@@ -372,7 +806,7 @@ def simulate_serp(content: str) -> SerpPreview:
     meta_description = ' '.join(description_sentences)
     
     # Fallback if no good description (edge case)
-    if not meta_description or len(meta_description) < 50:
+    if not page_description and (not meta_description or len(meta_description) < 50):
         # Try to extract from beginning of content, skip title
         start_pos = len(lines[0]) if lines else 0
         fallback_text = content_to_process[start_pos:start_pos + 155].strip()
@@ -479,7 +913,7 @@ def simulate_serp(content: str) -> SerpPreview:
     ctr_score = min(100.0, max(0.0, ctr_score))
     ctr_score = round(ctr_score, 1)
     
-    return SerpPreview(
+    return SerpResult(
         meta_title=meta_title,
         meta_description=meta_description,
         url_slug=url_slug,
@@ -491,10 +925,31 @@ def simulate_serp(content: str) -> SerpPreview:
     )
 
 
-def calc_readability(text: str) -> float:
+def tally_readability(text: str, pyphen=None) -> ReadabilityTally:
+    """
+    Count the words, sentences and syllables of a text.
+    
+    Args:
+        text: Input text
+        pyphen: Hyphenation dictionary for syllable counts (en_US by default)
+        
+    Returns:
+        ReadabilityTally: Counts of the text
+    """
+    tally = ReadabilityTally(pyphen)
+    for token in text.split():
+        tally.add_token(token)
+    return tally
+
+
+def calc_readability(text: str, language: str = DEFAULT_LANGUAGE) -> float:
     """
     Calculate readability score using Flesch Reading Ease.
     
+    Counts follow textstat's rules exactly. Non-English text uses the
+    language's variant of the formula (Amstad, Fernandez Huerta, Kandel &
+    Moles, ...) and its hyphenation dictionary.
+    
     Score interpretation:
     - 90-100: Very Easy (5th grade)
     - 80-89: Easy (6th grade)
@@ -506,12 +961,23 @@ def calc_readability(text: str) -> float:
     
     Args:
         text: Input text to analyze
+        language: ISO 639-1 language code
         
     Returns:
         float: Flesch Reading Ease score (0-100, higher is easier)
     """
     try:
-        score = textstat.flesch_reading_ease(text)
+        resources = get_language_resources(language)
+        cache = get_stage_cache('readability')
+        
+        # Word, sentence and syllable tallies are memoized per paragraph
+        tally = ReadabilityTally(resources.pyphen)
+        for paragraph in split_paragraphs(text):
+            tally.merge(cache.get_or_compute(
+                (language, content_key(paragraph)),
+                lambda: tally_readability(paragraph, resources.pyphen)
+            ))
+        score = tally.flesch_reading_ease(resources.readability)
         # Ensure score is within valid range
         return max(0.0, min(100.0, float(score)))
     except Exception as e:
@@ -519,168 +985,555 @@ def calc_readability(text: str) -> float:
         return 50.0  # Return neutral score on error
 
 
-def check_plagiarism(text: str) -> float:
+def calc_readability_details(text: str, language: str = DEFAULT_LANGUAGE) -> Tuple[float, ReadabilityDetailsResult]:
     """
-    Check text for potential plagiarism using multiple techniques:
-    1. N-gram similarity detection (5-gram overlaps)
-    2. Sentence-level similarity comparison
-    3. Common phrase detection
+    Calculate the readability score together with a per-sentence heatmap.
+    
+    Words and syllables are counted once per token; sentence and paragraph
+    scores are segmented sums over those counts, so the details cost about
+    as much as the score alone. The score equals `calc_readability`.
     
     Args:
-        text: Input text to check for plagiarism
+        text: Input text to analyze
+        language: ISO 639-1 language code
         
     Returns:
-        float: Plagiarism score (0-100, higher means more similar/plagiarized)
+        Tuple of (Flesch Reading Ease score, per-sentence and per-paragraph
+        readability with the hardest sentences)
     """
-    if not text or len(text.strip()) < 10:
-        return 0.0
-    
-    # Clean and normalize input text
-    cleaned_input = clean_text(text.lower())
-    input_sentences = [s.strip() for s in text.split('.') if s.strip()]
-    
-    max_similarity = 0.0
-    
-    # Compare with each sample text using multiple techniques
-    for sample_name, sample_text in SAMPLE_TEXTS.items():
-        cleaned_sample = clean_text(sample_text.lower())
-        sample_sentences = [s.strip() for s in sample_text.split('.') if s.strip()]
-        
-        # Technique 1: N-gram similarity (5-grams)
-        ngram_similarity = calculate_ngram_similarity(cleaned_input, cleaned_sample, n=5)
-        
-        # Technique 2: Sentence-level similarity
-        sentence_similarity = calculate_sentence_similarity(input_sentences, sample_sentences)
-        
-        # Technique 3: Overall sequence similarity
-        sequence_similarity = SequenceMatcher(None, cleaned_input, cleaned_sample).ratio()
-        
-        # Weighted combination (n-grams are most reliable)
-        combined_similarity = (
-            ngram_similarity * 0.5 +
-            sentence_similarity * 0.3 +
-            sequence_similarity * 0.2
+    resources = get_language_resources(language)
+    formula = resources.readability
+    breakdown = readability_breakdown(text, resources.pyphen)
+    score = max(0.0, min(100.0, float(breakdown.tally.flesch_reading_ease(formula))))
+    
+    sentence_scores = breakdown.sentence_scores(formula)
+    sentences = [
+        SentenceReadabilityResult(
+            start=start,
+            end=end,
+            paragraph=paragraph,
+            words=words,
+            syllables=syllables,
+            syllables_per_word=round(syllables / words, 2) if words else 0.0,
+            readability=readability
         )
-        
-        max_similarity = max(max_similarity, combined_similarity)
-    
-    # Convert to percentage
-    plagiarism_score = max_similarity * 100
+        for start, end, paragraph, words, syllables, readability in zip(
+            breakdown.sentence_starts.tolist(), breakdown.sentence_ends.tolist(),
+            breakdown.sentence_paragraphs.tolist(), breakdown.sentence_words.tolist(),
+            breakdown.sentence_syllables.tolist(), sentence_scores.tolist()
+        )
+    ]
+    paragraphs = [
+        ParagraphReadabilityResult(
+            start=start,
+            end=end,
+            sentences=count,
+            words=words,
+            sentence_length=round(words / max(1, count), 2),
+            syllables_per_word=round(syllables / words, 2) if words else 0.0,
+            readability=readability
+        )
+        for start, end, count, words, syllables, readability in zip(
+            breakdown.paragraph_starts.tolist(), breakdown.paragraph_ends.tolist(),
+            breakdown.paragraph_sentences.tolist(), breakdown.paragraph_words.tolist(),
+            breakdown.paragraph_syllables.tolist(), breakdown.paragraph_scores(formula).tolist()
+        )
+    ]
+    hardest = breakdown.hardest_sentences(sentence_scores, HARDEST_SENTENCES, HARD_SENTENCE_READABILITY)
     
-    return round(plagiarism_score, 2)
+    return score, ReadabilityDetailsResult(sentences=sentences, paragraphs=paragraphs, hardest_sentences=hardest)
 
 
-def calculate_ngram_similarity(text1: str, text2: str, n: int = 5) -> float:
+def paragraph_shingles(paragraph: str, n: int = 5) -> Tuple[np.ndarray, np.ndarray]:
     """
-    Calculate similarity based on n-gram overlap.
-    This detects copied phrases even if words are reordered.
+    Encode a paragraph and hash its n-grams.
     
     Args:
-        text1: First text
-        text2: Second text
-        n: Size of n-grams (default 5 words)
+        paragraph: Paragraph of input text
+        n: Shingle size
         
     Returns:
-        float: Similarity score (0-1)
+        Tuple of (token IDs, sorted unique hashes of the paragraph's n-grams)
     """
-    words1 = text1.split()
-    words2 = text2.split()
+    ids = _shingle_vocabulary.encode(clean_text(paragraph.lower()).split())
+    return ids, np.unique(rolling_hashes(ids, n))
+
+
+def input_shingle_set(text: str, n: int = 5) -> np.ndarray:
+    """
+    Build the n-gram shingle set of an input text.
     
-    if len(words1) < n or len(words2) < n:
-        return 0.0
+    Shingles inside a paragraph are memoized by paragraph hash; only the
+    few shingles crossing paragraph boundaries are hashed per request.
+    Entries are keyed by the vocabulary size, since growing the vocabulary
+    changes token IDs.
     
-    # Create n-grams
-    ngrams1 = set(' '.join(words1[i:i+n]) for i in range(len(words1) - n + 1))
-    ngrams2 = set(' '.join(words2[i:i+n]) for i in range(len(words2) - n + 1))
+    Args:
+        text: Input text
+        n: Shingle size
+        
+    Returns:
+        np.ndarray: Sorted uint64 shingle hashes, equal to hashing the
+        cleaned text as a whole
+    """
+    cache = get_stage_cache('shingles')
+    version = len(_shingle_vocabulary)
+    
+    paragraph_ids = []
+    parts = []
+    for paragraph in split_paragraphs(text):
+        ids, shingles = cache.get_or_compute(
+            (n, version, content_key(paragraph)),
+            lambda: paragraph_shingles(paragraph, n)
+        )
+        paragraph_ids.append(ids)
+        parts.append(shingles)
     
-    if not ngrams1 or not ngrams2:
-        return 0.0
+    if len(parts) == 1:
+        return parts[0]
     
-    # Calculate Jaccard similarity
-    intersection = len(ngrams1.intersection(ngrams2))
-    union = len(ngrams1.union(ngrams2))
+    # Shingles spanning a boundary start in the n-1 words before it
+    all_ids = np.concatenate(paragraph_ids)
+    boundary = 0
+    for ids in paragraph_ids[:-1]:
+        boundary += len(ids)
+        if 0 < boundary < len(all_ids):
+            parts.append(rolling_hashes(all_ids[max(0, boundary - n + 1):boundary + n - 1], n))
     
-    return intersection / union if union > 0 else 0.0
+    return np.unique(np.concatenate(parts))
 
 
-def calculate_sentence_similarity(sentences1: List[str], sentences2: List[str]) -> float:
+def best_sentence_matches(sentence: str) -> Dict[str, float]:
     """
-    Calculate similarity at sentence level.
-    Detects if entire sentences are copied.
+    Find the best-matching sample sentence for an input sentence.
+    Results are memoized by the cleaned sentence.
     
     Args:
-        sentences1: List of sentences from first text
-        sentences2: List of sentences from second text
+        sentence: Input sentence
         
     Returns:
-        float: Similarity score (0-1)
+        dict: Best similarity (0-1) per sample text; empty for sentences
+        too short to compare
     """
-    if not sentences1 or not sentences2:
-        return 0.0
-    
-    max_similarities = []
-    
-    # For each sentence in input, find best match in sample
-    for sent1 in sentences1:
-        cleaned_sent1 = clean_text(sent1.lower())
-        if len(cleaned_sent1.split()) < 3:  # Skip very short sentences
-            continue
-            
-        best_match = 0.0
-        for sent2 in sentences2:
-            cleaned_sent2 = clean_text(sent2.lower())
-            if len(cleaned_sent2.split()) < 3:
-                continue
-                
-            similarity = SequenceMatcher(None, cleaned_sent1, cleaned_sent2).ratio()
-            best_match = max(best_match, similarity)
-        
-        if best_match > 0.5:  # Only count significant matches
-            max_similarities.append(best_match)
-    
-    # Return average of high similarity matches
-    if max_similarities:
-        return sum(max_similarities) / len(sentences1)
+    cleaned_sentence = clean_text(sentence.lower())
+    if len(cleaned_sentence.split()) < 3:  # Skip very short sentences
+        return {}
+    
+    def compute() -> Dict[str, float]:
+        return {
+            sample_name: max(
+                (SequenceMatcher(None, cleaned_sentence, sample_sentence).ratio()
+                 for sample_sentence in sample_sentences),
+                default=0.0
+            )
+            for sample_name, sample_sentences in get_reference_sentences().items()
+        }
     
-    return 0.0
+    return get_stage_cache('sentence_matches').get_or_compute(content_key(cleaned_sentence), compute)
 
 
-def compute_final_score(
-    readability: float,
-    plagiarism: float,
-    keyword_stats: Tuple[List[Tuple[str, int]], Dict[str, float]]
-) -> float:
+def check_plagiarism_tiers(text: str, deadline: Optional[Deadline] = None) -> Tuple[float, List[str]]:
     """
-    Compute final SEO score based on multiple factors.
+    Check text for potential plagiarism using multiple techniques, run as
+    tiers of increasing cost:
+    1. N-gram similarity detection (5-gram overlaps)
+    2. Overall sequence similarity
+    3. Sentence-level similarity comparison
     
-    Formula:
-    - Readability contributes 40% (normalized to 0-100)
-    - Originality (100 - plagiarism) contributes 30%
-    - Keyword diversity contributes 30% (based on number and distribution)
+    The n-gram tier always runs. With a deadline, each later tier runs only
+    if its estimated cost still fits; the score is then the weighted
+    combination of the tiers that ran. With PLAGIARISM_BLOOM_MIN_HIT_RATE
+    set, text whose shingles and sentences (almost) never hit the
+    reference Bloom filter skips the later tiers and scores on n-grams
+    alone; this misses close rewordings, so it is off by default (see
+    bloom.py).
     
     Args:
-        readability: Flesch Reading Ease score
-        plagiarism: Plagiarism score (0-100)
-        keyword_stats: Tuple of (top_keywords, keyword_density)
+        text: Input text to check for plagiarism
+        deadline: Optional request deadline
         
     Returns:
-        float: Final SEO score (0-100, higher is better)
+        Tuple of (plagiarism score 0-100, names of the computed tiers)
     """
-    # Readability component (40% weight)
-    # Optimal readability is 60-70 (standard), normalize around that
-    readability_score = readability
-    if readability < 30:
-        readability_normalized = readability / 30 * 50  # Too difficult
-    elif readability > 90:
-        readability_normalized = (100 - readability) / 10 * 50 + 50  # Too easy
-    else:
-        # Ideal range gets full points
-        readability_normalized = 100
+    if not text or len(text.strip()) < 10:
+        return 0.0, list(PLAGIARISM_TIERS)
     
-    readability_component = readability_normalized * 0.4
+    # Clean and normalize input text
+    cleaned_input = clean_text(text.lower())
+    input_sentences = [s.strip() for s in text.split('.') if s.strip()]
+    
+    # Tier 1: N-gram similarity (5-grams); sample shingle sets are cached.
+    # The reference is built first so the shared vocabulary is complete
+    # before the input is encoded.
+    reference_shingles = get_reference_shingles()
+    input_shingles = input_shingle_set(text, n=5)
+    
+    tier_scores = {
+        'ngram': {
+            sample_name: jaccard_similarity(input_shingles, reference_shingles[sample_name])
+            for sample_name in SAMPLE_TEXTS
+        }
+    }
+    
+    # Original text: when almost none of the input's shingles and sentences
+    # can be in the references, the costlier tiers would add next to nothing.
+    # The score is then approximated, so only the n-gram tier is reported.
+    reference_filter = get_streaming_reference().filter
+    if reference_filter.enabled:
+        input_keys = np.concatenate((
+            input_shingles,
+            sentence_hashes(clean_text(sentence.lower()) for sentence in input_sentences)
+        ))
+        if reference_filter.is_original(reference_filter.count_hits(input_keys), len(input_keys)):
+            total_weight = sum(PLAGIARISM_TIERS.values())
+            ngram_similarity = max(tier_scores['ngram'].values(), default=0.0)
+            return round(ngram_similarity * PLAGIARISM_TIERS['ngram'] / total_weight * 100, 2), ['ngram']
+    
+    # Tier 2: Overall sequence similarity
+    check_cancelled()
+    sequence_cost = len(cleaned_input) * len(SAMPLE_TEXTS) * COST_PER_SEQUENCE_CHAR
+    if deadline is None or deadline.allows(sequence_cost):
+        tier_scores['sequence'] = {
+            sample_name: SequenceMatcher(None, cleaned_input, clean_text(sample_text.lower())).ratio()
+            for sample_name, sample_text in SAMPLE_TEXTS.items()
+        }
+    
+    # Tier 3: Sentence-level similarity
+    check_cancelled()
+    sentence_cost = len(input_sentences) * get_reference_sentence_count() * COST_PER_SENTENCE_PAIR
+    if deadline is None or deadline.allows(sentence_cost):
+        # Best matches are memoized per sentence, so repeated sentences are free
+        best_matches = [best_sentence_matches(sentence) for sentence in input_sentences]
+        tier_scores['sentence'] = {}
+        for sample_name in SAMPLE_TEXTS:
+            # Same rules as calculate_sentence_similarity
+            significant = [
+                matches[sample_name] for matches in best_matches
+                if matches and matches[sample_name] > 0.5
+            ]
+            tier_scores['sentence'][sample_name] = (
+                sum(significant) / len(input_sentences) if significant else 0.0
+            )
+    
+    max_similarity = 0.0
+    total_weight = sum(PLAGIARISM_TIERS[tier] for tier in tier_scores)
+    
+    for sample_name in SAMPLE_TEXTS:
+        # Weighted combination (n-grams are most reliable), renormalized
+        # over the tiers that were computed
+        combined_similarity = 0.0
+        for tier in ('ngram', 'sentence', 'sequence'):
+            if tier in tier_scores:
+                combined_similarity += tier_scores[tier][sample_name] * PLAGIARISM_TIERS[tier]
+        
+        max_similarity = max(max_similarity, combined_similarity / total_weight)
+    
+    # Convert to percentage
+    plagiarism_score = max_similarity * 100
+    
+    computed = [tier for tier in PLAGIARISM_TIERS if tier in tier_scores]
+    return round(plagiarism_score, 2), computed
+
+
+def get_copy_detector() -> CopyDetector:
+    """
+    Build the suffix-automaton index of SAMPLE_TEXTS, or load the one saved
+    at COPY_INDEX.
+    Caches the index for subsequent calls.
+    
+    Returns:
+        CopyDetector: Index of verbatim copied token runs
+    """
+    global _copy_detector_cache
+    
+    if _copy_detector_cache is None:
+        _copy_detector_cache = CopyDetector.from_env(SAMPLE_TEXTS)
+    
+    return _copy_detector_cache
+
+
+def get_semantic_index() -> SemanticIndex:
+    """
+    Sketch the sentences and documents of SAMPLE_TEXTS, or load the index
+    saved at SEMANTIC_INDEX.
+    Caches the index for subsequent calls.
+    
+    Returns:
+        SemanticIndex: Reference sketches for paraphrase detection
+    """
+    global _semantic_index_cache
+    
+    if _semantic_index_cache is None:
+        _semantic_index_cache = SemanticIndex.from_env(SAMPLE_TEXTS)
+    
+    return _semantic_index_cache
+
+
+def get_shard_coordinator() -> Optional[ShardCoordinator]:
+    """
+    Start the sharded plagiarism index when PLAGIARISM_SHARDS is set.
+    Caches the coordinator for subsequent calls.
+    
+    Returns:
+        ShardCoordinator over SAMPLE_TEXTS (or PLAGIARISM_CORPUS), or None
+        when the index is kept in this process
+    """
+    global _shard_coordinator_cache
+    
+    if _shard_coordinator_cache is None:
+        with _shard_coordinator_lock:
+            if _shard_coordinator_cache is None:
+                _shard_coordinator_cache = ShardCoordinator.from_env(SAMPLE_TEXTS)
+    
+    return _shard_coordinator_cache
+
+
+def check_plagiarism_sharded(
+    coordinator: ShardCoordinator,
+    text: str,
+    deadline: Optional[Deadline] = None
+) -> Tuple[float, List[str], List[int]]:
+    """
+    Check text for plagiarism against the sharded reference index.
+    
+    Every shard scores its documents with the same tiers as
+    check_plagiarism_tiers and the per-document maxima are merged. Shards
+    run in parallel, so tier costs are estimated for the largest shard.
+    Shards that do not answer within the deadline (or the coordinator's
+    default timeout) are left out, and the score is a lower bound.
+    
+    Args:
+        coordinator: Coordinator of the shard processes
+        text: Input text to check for plagiarism
+        deadline: Optional request deadline
+        
+    Returns:
+        Tuple of (plagiarism score 0-100, names of the computed tiers,
+        indexes of the shards missing from the score)
+    """
+    if not text or len(text.strip()) < 10:
+        return 0.0, list(PLAGIARISM_TIERS), []
+    
+    stats = coordinator.stats()
+    tiers = ['ngram']
+    if deadline is None or deadline.allows(len(text) * stats['max_shard_documents'] * COST_PER_SEQUENCE_CHAR):
+        tiers.append('sequence')
+    input_sentences = len([s for s in text.split('.') if s.strip()])
+    if deadline is None or deadline.allows(input_sentences * stats['max_shard_sentences'] * COST_PER_SENTENCE_PAIR):
+        tiers.append('sentence')
+    
+    timeout = None
+    if deadline is not None:
+        timeout = max(deadline.remaining_ms(), 0.0) / 1000
+    
+    result = coordinator.query(
+        text,
+        weights={tier: PLAGIARISM_TIERS[tier] for tier in PLAGIARISM_TIERS if tier in tiers},
+        top_k=1,
+        timeout=timeout
+    )
+    return round(result.max_similarity * 100, 2), [tier for tier in PLAGIARISM_TIERS if tier in tiers], result.missing
+
+
+def check_plagiarism(text: str) -> float:
+    """
+    Check text for potential plagiarism using all techniques.
+    
+    Args:
+        text: Input text to check for plagiarism
+        
+    Returns:
+        float: Plagiarism score (0-100, higher means more similar/plagiarized)
+    """
+    coordinator = get_shard_coordinator()
+    if coordinator is not None:
+        score, _, _ = check_plagiarism_sharded(coordinator, text)
+        return score
+    
+    score, _ = check_plagiarism_tiers(text)
+    return score
+
+
+# Backwards-compatible name used by earlier versions of the API and tests
+mock_plagiarism = check_plagiarism
+
+
+def check_plagiarism_report(text: str) -> PlagiarismReport:
+    """
+    Check text for plagiarism and report which passages were copied.
+    
+    Passages are found by seed-and-extend alignment from shared 5-gram
+    shingles, so the report costs about the same as the score itself.
+    
+    Args:
+        text: Input text to check for plagiarism
+        
+    Returns:
+        PlagiarismReport: Plagiarism score plus matched passages, each with
+        the source document, character offsets and match strength
+    """
+    return PlagiarismReport(
+        score=check_plagiarism(text),
+        matches=[PlagiarismMatch(**asdict(passage)) for passage in find_plagiarism_matches(text)]
+    )
+
+
+def find_plagiarism_matches(text: str) -> List[PassageMatch]:
+    """
+    Find the passages of `text` copied from the sample texts.
+    
+    Args:
+        text: Input text to check for plagiarism
+        
+    Returns:
+        List of matched passages
+    """
+    if not text or len(text.strip()) < 10:
+        return []
+    
+    return get_passage_index().find_passages(text)
+
+
+def calculate_ngram_similarity(text1: str, text2: str, n: int = 5) -> float:
+    """
+    Calculate similarity based on n-gram overlap.
+    This detects copied phrases even if words are reordered.
+    
+    N-grams are rolling hashes over token IDs, compared as sorted
+    uint64 arrays instead of sets of joined strings.
+    
+    Args:
+        text1: First text
+        text2: Second text
+        n: Size of n-grams (default 5 words)
+        
+    Returns:
+        float: Similarity score (0-1)
+    """
+    words1 = text1.split()
+    words2 = text2.split()
+    
+    if len(words1) < n or len(words2) < n:
+        return 0.0
+    
+    # Create n-gram hash sets and calculate Jaccard similarity
+    engine = ShingleEngine(n=n, vocabulary=_shingle_vocabulary)
+    return jaccard_similarity(engine.shingles(words1), engine.shingles(words2))
+
+
+def calculate_sentence_similarity(sentences1: List[str], sentences2: List[str]) -> float:
+    """
+    Calculate similarity at sentence level.
+    Detects if entire sentences are copied.
+    
+    Each candidate sentence is cleaned and indexed by SequenceMatcher once
+    and compared with every distinct input sentence; comparisons whose
+    quick upper bounds cannot beat the best match so far (or the 0.5
+    threshold) are skipped, which leaves the result unchanged.
+    
+    Args:
+        sentences1: List of sentences from first text
+        sentences2: List of sentences from second text
+        
+    Returns:
+        float: Similarity score (0-1)
+    """
+    if not sentences1 or not sentences2:
+        return 0.0
+    
+    # Skip very short sentences
+    inputs = [clean_text(sent1.lower()) for sent1 in sentences1]
+    inputs = [sent1 for sent1 in inputs if len(sent1.split()) >= 3]
+    candidates = [clean_text(sent2.lower()) for sent2 in sentences2]
+    candidates = [sent2 for sent2 in candidates if len(sent2.split()) >= 3]
+    
+    # For each sentence in input, find best match in sample
+    best_matches = dict.fromkeys(inputs, 0.0)
+    matcher = SequenceMatcher(None)
+    for sent2 in candidates:
+        matcher.set_seq2(sent2)
+        for sent1, best_match in best_matches.items():
+            floor = max(best_match, 0.5)
+            matcher.set_seq1(sent1)
+            if matcher.real_quick_ratio() <= floor or matcher.quick_ratio() <= floor:
+                continue
+            best_matches[sent1] = max(best_match, matcher.ratio())
+    
+    # Only count significant matches
+    max_similarities = [best_matches[sent1] for sent1 in inputs if best_matches[sent1] > 0.5]
+    
+    # Return average of high similarity matches
+    if max_similarities:
+        return sum(max_similarities) / len(sentences1)
+    
+    return 0.0
+
+
+def compute_final_score(
+    readability: float,
+    plagiarism: float,
+    keyword_stats: Tuple[List[Tuple[str, int]], Dict[str, float]],
+    copied_fraction: Optional[float] = None,
+    copied_weight: Optional[float] = None,
+    paraphrased_fraction: Optional[float] = None,
+    paraphrase_share: Optional[float] = None
+) -> float:
+    """
+    Compute final SEO score based on multiple factors.
+    
+    Formula:
+    - Readability contributes 40% (normalized to 0-100)
+    - Originality (100 - plagiarism) contributes 30%
+    - Keyword diversity contributes 30% (based on number and distribution)
+    
+    A `copied_weight` share of the originality component can score the
+    share of verbatim copied text instead, so one long copied passage in
+    a long original article still costs points. Likewise a
+    `paraphrase_share` of it can score the share of reworded sentences,
+    which the exact plagiarism tiers miss.
+    
+    Args:
+        readability: Flesch Reading Ease score
+        plagiarism: Plagiarism score (0-100)
+        keyword_stats: Tuple of (top_keywords, keyword_density)
+        copied_fraction: Share of the input inside copied runs (0-1), if measured
+        copied_weight: Share of originality scored by `copied_fraction`
+            (default: COPIED_TEXT_WEIGHT, 0 unless set)
+        paraphrased_fraction: Share of sentences close to a reference
+            sentence (0-1), if measured
+        paraphrase_share: Share of originality scored by `paraphrased_fraction`
+            (default: PARAPHRASE_WEIGHT, 0 unless set)
+        
+    Returns:
+        float: Final SEO score (0-100, higher is better)
+    """
+    # Readability component (40% weight)
+    # Optimal readability is 60-70 (standard), normalize around that
+    readability_score = readability
+    if readability < 30:
+        readability_normalized = readability / 30 * 50  # Too difficult
+    elif readability > 90:
+        readability_normalized = (100 - readability) / 10 * 50 + 50  # Too easy
+    else:
+        # Ideal range gets full points
+        readability_normalized = 100
+    
+    readability_component = readability_normalized * 0.4
     
     # Originality component (30% weight)
     originality_score = 100 - plagiarism
+    if copied_fraction is not None:
+        if copied_weight is None:
+            copied_weight = copied_text_weight()
+        if copied_weight:
+            originality_score = (1 - copied_weight) * originality_score + copied_weight * (1 - copied_fraction) * 100
+    if paraphrased_fraction is not None:
+        if paraphrase_share is None:
+            paraphrase_share = paraphrase_weight()
+        if paraphrase_share:
+            originality_score = (
+                (1 - paraphrase_share) * originality_score + paraphrase_share * (1 - paraphrased_fraction) * 100
+            )
     originality_component = originality_score * 0.3
     
     # Keyword diversity component (30% weight)
@@ -719,7 +1572,9 @@ def generate_suggestions(
     readability: float,
     plagiarism: float,
     keyword_stats: Tuple[List[Tuple[str, int]], Dict[str, float]],
-    final_score: float
+    final_score: float,
+    word_count: Optional[int] = None,
+    has_paragraph_breaks: Optional[bool] = None
 ) -> List[str]:
     """
     Generate AI-powered improvement suggestions based on analysis.
@@ -730,6 +1585,10 @@ def generate_suggestions(
         plagiarism: Plagiarism score
         keyword_stats: Keyword statistics
         final_score: Overall score
+        word_count: Word count of the full text, when `text` is only a part
+            of it (streaming mode)
+        has_paragraph_breaks: Whether the full text has paragraph breaks,
+            when `text` is only a part of it (streaming mode)
         
     Returns:
         List of actionable suggestions
@@ -772,7 +1631,8 @@ def generate_suggestions(
             suggestions.append("💭 Your keywords have very low density. Try emphasizing key terms more throughout your content.")
     
     # Content length suggestions
-    word_count = len(text.split())
+    if word_count is None:
+        word_count = len(text.split())
     if word_count < 300:
         suggestions.append(f"📝 Your content is quite short ({word_count} words). Aim for 500-1000 words for better SEO performance.")
     elif word_count > 2000:
@@ -789,7 +1649,9 @@ def generate_suggestions(
         suggestions.append("🔧 Your content needs significant SEO improvements. Focus on readability, originality, and keyword optimization.")
     
     # Structure suggestions
-    if "\n\n" not in text:
+    if has_paragraph_breaks is None:
+        has_paragraph_breaks = "\n\n" in text
+    if not has_paragraph_breaks:
         suggestions.append("📋 Add paragraph breaks to improve content structure and readability.")
     
     return suggestions
@@ -797,7 +1659,12 @@ def generate_suggestions(
 
 @app.get("/")
 async def root():
-    """Health check endpoint"""
+    """Health check endpoint; 503 while the worker drains before a restart"""
+    if memory_watermarks.draining:
+        return JSONResponse(
+            status_code=503,
+            content={"message": "Writesonic SEO Analyzer API", "status": "draining", "version": "1.0.0"}
+        )
     return {
         "message": "Writesonic SEO Analyzer API",
         "status": "active",
@@ -805,21 +1672,206 @@ async def root():
     }
 
 
-@app.post("/analyze", response_model=AnalyzeResponse)
-async def analyze_text(request: AnalyzeRequest):
+def build_document_structure(outline: Optional[DocumentOutline]) -> Optional[StructureResult]:
+    """Convert an extracted outline into the structure reported in responses"""
+    if outline is None:
+        return None
+    
+    return StructureResult(
+        title=outline.title,
+        meta_description=outline.meta_description,
+        headings=list(outline.headings),
+        internal_links=outline.internal_links,
+        external_links=outline.external_links
+    )
+
+
+def run_analysis(
+    text: str,
+    language: str,
+    detailed_plagiarism: bool = False,
+    deadline: Optional[Deadline] = None,
+    outline: Optional[DocumentOutline] = None,
+    readability_details: bool = False,
+    paraphrase_details: bool = False
+) -> AnalysisResult:
     """
-    Analyze text content for SEO metrics.
+    Run the full analysis pipeline on validated text.
+    
+    Readability, keywords and the SERP preview are cheap and always
+    computed. Plagiarism runs in tiers of increasing cost and stops adding
+    tiers once the deadline no longer allows them, and copied-run detection
+    is skipped when its estimated cost no longer fits; the response's
+    coverage lists what was computed and which fields are approximated or
+    skipped. Paraphrase detection only runs when PARAPHRASE_WEIGHT scores
+    it or the caller asked for it, and is gated on the deadline the same way.
     
     Args:
-        request: AnalyzeRequest containing the text to analyze
+        text: Text to analyze
+        language: ISO 639-1 language code
+        detailed_plagiarism: Include matched passages in the response
+        deadline: Optional request deadline
+        outline: Structure extracted from HTML or Markdown input; its
+            title and meta description are used for the SERP preview
+        readability_details: Include per-sentence and per-paragraph readability
+        paraphrase_details: Include the paraphrase similarity even when it
+            is not weighted in the score
         
     Returns:
-        AnalyzeResponse with analysis results
+        AnalysisResult with analysis results
+    """
+    # Calculate readability, with its heatmap when requested
+    details = None
+    with profile_stage('readability'):
+        if readability_details:
+            readability, details = calc_readability_details(text, language)
+        else:
+            readability = calc_readability(text, language)
+    
+    # Stop here if no client waits for this analysis any more
+    check_cancelled()
+    
+    # Calculate keyword statistics
+    with profile_stage('keywords'):
+        keyword_stats = calculate_keyword_stats(text, top_n=10, language=language)
+    top_keywords, keyword_density = keyword_stats
+    
+    # Calculate plagiarism score using real detection, as far as the deadline allows
+    check_cancelled()
+    with profile_stage('plagiarism'):
+        coordinator = get_shard_coordinator()
+        if coordinator is not None:
+            plagiarism_score, plagiarism_tiers, missing_shards = check_plagiarism_sharded(coordinator, text, deadline)
+        else:
+            plagiarism_score, plagiarism_tiers = check_plagiarism_tiers(text, deadline)
+            missing_shards = []
+    approximated = []
+    skipped = []
+    if len(plagiarism_tiers) < len(PLAGIARISM_TIERS) or missing_shards:
+        approximated = ['plagiarism_score', 'final_score', 'suggestions']
+    
+    # Longest and total verbatim copied runs (one pass over the input)
+    copied_text = None
+    if deadline is None or deadline.allows(len(text) * COST_PER_COPY_CHAR):
+        check_cancelled()
+        with profile_stage('copied_text'):
+            copied_text = get_copy_detector().detect(text)
+    else:
+        skipped.append('copied_text')
+        # The copied share only moves the final score when it is weighted
+        if copied_text_weight():
+            approximated += ['final_score', 'suggestions']
+    
+    # Reworded overlap: sentence sketches against the reference sketches
+    paraphrase = None
+    weighted = paraphrase_weight() > 0
+    if weighted or paraphrase_details:
+        index = get_semantic_index()
+        paraphrase_cost = count_sentences(text) * (
+            COST_PER_PARAPHRASE_SENTENCE + len(index.sentence_owners) * COST_PER_SKETCH_PAIR
+        )
+        if deadline is None or deadline.allows(paraphrase_cost):
+            check_cancelled()
+            with profile_stage('paraphrase'):
+                paraphrase = index.detect(text)
+        else:
+            skipped.append('paraphrase')
+            if weighted:
+                approximated += ['final_score', 'suggestions']
+    
+    plagiarism_matches = None
+    if detailed_plagiarism:
+        if deadline is None or not deadline.expired():
+            check_cancelled()
+            with profile_stage('plagiarism_matches'):
+                plagiarism_matches = find_plagiarism_matches(text)
+        else:
+            skipped.append('plagiarism_matches')
+    
+    with profile_stage('scoring'):
+        # Compute final score
+        final_score = compute_final_score(
+            readability, plagiarism_score, keyword_stats,
+            copied_text.copied_fraction if copied_text is not None else None,
+            paraphrased_fraction=paraphrase.paraphrased_fraction if paraphrase is not None else None
+        )
+        
+        # Generate improvement suggestions
+        suggestions = generate_suggestions(text, readability, plagiarism_score, keyword_stats, final_score)
+    
+    # Simulate SERP preview and CTR prediction
+    with profile_stage('serp'):
+        if outline is not None:
+            serp_preview = simulate_serp(text, outline.serp_title, outline.meta_description)
+        else:
+            serp_preview = simulate_serp(text)
+    
+    return AnalysisResult(
+        readability=readability,
+        top_keywords=top_keywords,
+        keyword_density=keyword_density,
+        plagiarism_score=plagiarism_score,
+        final_score=final_score,
+        suggestions=suggestions,
+        serp_preview=serp_preview,
+        plagiarism_matches=plagiarism_matches,
+        language=language,
+        coverage=CoverageResult(
+            complete=not approximated and not skipped,
+            plagiarism_tiers=plagiarism_tiers,
+            approximated=list(dict.fromkeys(approximated)),
+            skipped=skipped,
+            deadline_ms=deadline.budget_ms if deadline is not None else None,
+            elapsed_ms=round(deadline.elapsed_ms(), 2) if deadline is not None else None
+        ),
+        structure=build_document_structure(outline),
+        readability_details=details,
+        copied_text=copied_text,
+        paraphrase=paraphrase
+    )
+
+
+def estimate_analysis_cost(text: str) -> float:
+    """
+    Estimate the cost of analyzing `text` for admission control.
+    
+    Args:
+        text: Text to analyze
+        
+    Returns:
+        float: Estimated cost in admission budget units
+    """
+    return estimate_cost(len(text), count_sentences(text), get_reference_sentence_count())
+
+
+def admission_error(exc: AdmissionRejected) -> HTTPException:
+    """Convert an admission rejection into an HTTP error with Retry-After"""
+    headers = {"Retry-After": str(exc.retry_after)} if exc.retry_after else None
+    return HTTPException(status_code=exc.status_code, detail=exc.detail, headers=headers)
+
+
+def prepare_analysis(request: AnalyzeRequest) -> Tuple[str, Optional[DocumentOutline], str]:
+    """
+    Validate an analysis request and extract the text to analyze.
+    
+    Args:
+        request: AnalyzeRequest to validate
+        
+    Returns:
+        Tuple of (body text, outline for HTML and Markdown input, language)
         
     Raises:
-        HTTPException: If text is empty or invalid
+        HTTPException: If the format or language is unsupported or the
+            text is too short
     """
-    text = request.text
+    if request.format not in FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format '{request.format}'. Supported: {', '.join(FORMATS)}"
+        )
+    
+    # HTML and Markdown are parsed once; later stages use the body text
+    text, outline = extract_document(request.text, request.format)
     
     # Validate input
     if not text or len(text.strip()) < 10:
@@ -828,41 +1880,818 @@ async def analyze_text(request: AnalyzeRequest):
             detail="Text must be at least 10 characters long"
         )
     
-    try:
-        # Calculate readability
-        readability = calc_readability(text)
-        
-        # Calculate keyword statistics
-        keyword_stats = calculate_keyword_stats(text, top_n=10)
-        top_keywords, keyword_density = keyword_stats
-        
-        # Calculate plagiarism score using real detection
-        plagiarism_score = check_plagiarism(text)
-        
-        # Compute final score
-        final_score = compute_final_score(readability, plagiarism_score, keyword_stats)
+    language = request.language or detect_language(text)
+    if language not in LANGUAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported language '{language}'. Supported: {', '.join(sorted(LANGUAGES))}"
+        )
+    
+    return text, outline, language
+
+
+@app.post("/analyze", response_model=AnalyzeResponse)
+async def analyze_text(
+    request: AnalyzeRequest,
+    deadline_ms: Annotated[Optional[float], Query(ge=0)] = None,
+    x_deadline_ms: Annotated[Optional[float], Header(alias=DEADLINE_HEADER, ge=0)] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+    x_session_id: Annotated[Optional[str], Header(max_length=200)] = None,
+    x_revision: Annotated[Optional[int], Header(ge=0)] = None
+):
+    """
+    Analyze text content for SEO metrics.
+    
+    The request is admitted against the worker's cost budget first; the
+    analysis itself runs in the threadpool so queued requests stay
+    responsive.
+    
+    A latency budget can be set with the X-Deadline-Ms header or the
+    `deadline_ms` query parameter (the tighter one wins), otherwise the
+    server default ANALYZE_DEADLINE_MS applies. Time spent queued counts
+    against it; expensive plagiarism tiers are skipped when they no longer
+    fit, and the response's coverage marks the approximated fields.
+    
+    The result is encoded straight to JSON against the AnalyzeResponse
+    schema without being validated again (see serialization.py).
+    
+    Complete results carry an ETag derived from the request and
+    SCORING_VERSION. A request whose If-None-Match matches it gets a 304
+    before any extraction or analysis runs.
+    
+    Identical requests (same ETag and latency budget) arriving while one
+    is being analyzed wait for that analysis instead of running their own.
+    Editors can tag requests with X-Session-Id and X-Revision: a newer
+    revision answers the session's older in-flight requests with 409, and
+    their analysis is cancelled unless another client waits for it too.
+    
+    Args:
+        request: AnalyzeRequest containing the text to analyze
+        deadline_ms: Optional latency budget in milliseconds
+        x_deadline_ms: Optional latency budget from the X-Deadline-Ms header
+        if_none_match: ETag of an analysis the client already has
+        x_session_id: Optional editor session ID
+        x_revision: Optional revision of the session's draft (newer is larger)
         
-        # Generate improvement suggestions
-        suggestions = generate_suggestions(text, readability, plagiarism_score, keyword_stats, final_score)
+    Returns:
+        AnalyzeResponse with analysis results, or 304 Not Modified
         
-        # Simulate SERP preview and CTR prediction
-        serp_preview = simulate_serp(text)
-        
-        return AnalyzeResponse(
-            readability=readability,
-            top_keywords=top_keywords,
-            keyword_density=keyword_density,
-            plagiarism_score=plagiarism_score,
-            final_score=final_score,
-            suggestions=suggestions,
-            serp_preview=serp_preview
-        )
+    Raises:
+        HTTPException: If text is empty or invalid, the request is
+            rejected by admission control (413, 429, 503), or a newer
+            revision of the session superseded it (409)
+    """
+    etag = make_etag(SCORING_VERSION, "analyze", request.model_dump())
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
     
-    except Exception as e:
-        raise HTTPException(
+    deadline = Deadline.from_sources(x_deadline_ms, deadline_ms, default_deadline_ms())
+    
+    text, outline, language = prepare_analysis(request)
+    
+    # Runs the analysis under the profiler when this request is sampled or watched
+    runner = request_profiler.runner(text, endpoint="/analyze", language=language, format=request.format)
+    
+    async def analyze(token) -> AnalysisResult:
+        async with admission_controller.admit(estimate_analysis_cost(text)):
+            return await run_in_threadpool(
+                cancellable(token, runner), run_analysis, text, language, request.detailed_plagiarism, deadline, outline,
+                request.readability_details, request.paraphrase
+            )
+    
+    ticket = None
+    try:
+        if x_session_id is not None:
+            ticket = session_revisions.begin(x_session_id, x_revision)
+        key = (etag, deadline.budget_ms if deadline is not None else None)
+        result = await analysis_flights.run(key, analyze, ticket)
+        # Results approximated under a deadline must not be revalidated later
+        headers = {"ETag": etag} if result.coverage.complete else None
+        return json_response(AnalyzeResponse, result, headers=headers)
+    
+    except AdmissionRejected as e:
+        raise admission_error(e)
+    
+    except Superseded as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error analyzing text: {str(e)}"
+        )
+    
+    finally:
+        if ticket is not None:
+            session_revisions.end(ticket)
+
+
+def site_keyword_counts(texts: List[str], language: Optional[str] = None) -> List[Counter]:
+    """
+    Count the keywords of every page of a site with the keyword pipeline.
+    
+    Args:
+        texts: Page texts
+        language: ISO 639-1 code for all pages; detected per page when None
+        
+    Returns:
+        List of keyword counters, one per page
+    """
+    return [count_document_keywords(text, language or detect_language(text)) for text in texts]
+
+
+def run_site_audit(request: SiteAuditRequest) -> SiteAuditResponse:
+    """
+    Run a keyword cannibalization audit over the pages of a request.
+    
+    Args:
+        request: Validated SiteAuditRequest
+        
+    Returns:
+        SiteAuditResponse with the most similar page pairs
+    """
+    counts = site_keyword_counts([page.text for page in request.pages], request.language)
+    matrix, pairs = audit_site(
+        [(page.url, page_counts) for page, page_counts in zip(request.pages, counts)],
+        top_k=request.top_k,
+        min_similarity=request.min_similarity
+    )
+    
+    return SiteAuditResponse(
+        pages=matrix.n_pages,
+        terms=len(matrix.terms),
+        pairs=[CannibalizationPair(**vars(pair)) for pair in pairs]
+    )
+
+
+def validate_site_audit(request: SiteAuditRequest) -> None:
+    """
+    Validate a site audit request.
+    
+    Raises:
+        HTTPException: If fewer than two pages are given or the options
+            are invalid
+    """
+    if len(request.pages) < 2:
+        raise HTTPException(
+            status_code=400,
+            detail="A site audit needs at least two pages"
+        )
+    
+    if request.top_k < 1 or not 0 <= request.min_similarity <= 1:
+        raise HTTPException(
+            status_code=400,
+            detail="top_k must be positive and min_similarity between 0 and 1"
+        )
+    
+    if request.language is not None and request.language not in LANGUAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported language '{request.language}'. Supported: {', '.join(sorted(LANGUAGES))}"
+        )
+
+
+@app.post("/site-audit", response_model=SiteAuditResponse)
+async def site_audit(
+    request: SiteAuditRequest,
+    response: Response,
+    if_none_match: Annotated[Optional[str], Header()] = None
+):
+    """
+    Find pages of a site that compete for the same keywords.
+    
+    Every page goes through the keyword pipeline; pages are compared as
+    sparse TF-IDF vectors and the top-k most similar pairs are returned
+    with the keywords they share. Like /analyze, results carry an ETag and
+    unchanged audits are answered with 304 before any work is done.
+    
+    Args:
+        request: SiteAuditRequest with the site's pages
+        response: Response whose headers receive the ETag
+        if_none_match: ETag of an audit the client already has
+        
+    Returns:
+        SiteAuditResponse with the most similar page pairs, or 304 Not Modified
+        
+    Raises:
+        HTTPException: If fewer than two pages are given, the options are
+            invalid, or the request is rejected by admission control
+    """
+    etag = make_etag(SCORING_VERSION, "site-audit", request.model_dump())
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
+    validate_site_audit(request)
+    
+    # Keyword counting is linear in the text; no sentence matching is done
+    cost = estimate_cost(sum(len(page.text) for page in request.pages), None, 0)
+    
+    try:
+        async with admission_controller.admit(cost):
+            result = await run_in_threadpool(run_site_audit, request)
+        response.headers["ETag"] = etag
+        return result
+    
+    except AdmissionRejected as e:
+        raise admission_error(e)
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error auditing site: {str(e)}"
+        )
+
+
+@app.get("/metrics")
+async def metrics():
+    """Report worker metrics: admission queue state, stage cache hit rates, coalescing and memory"""
+    return {
+        "admission": admission_controller.snapshot(),
+        "memo": memo_stats(),
+        "single_flight": analysis_flights.stats(),
+        "plagiarism_filter": get_streaming_reference().filter.stats(),
+        "memory": memory_watermarks.snapshot()
+    }
+
+
+# Header carrying the token of the admin endpoints
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+
+def require_profiles_admin(token: Optional[str]) -> None:
+    """
+    Guard the /admin/profiles endpoints.
+    
+    They do not exist while profiling is disabled, and otherwise need the
+    PROFILE_ADMIN_TOKEN in the X-Admin-Token header.
+    
+    Raises:
+        HTTPException: 404 while profiling is disabled, 403 for a missing or wrong token
+    """
+    if not request_profiler.enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not request_profiler.authorized(token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+@app.get("/admin/profiles")
+async def list_profiles(x_admin_token: Annotated[Optional[str], Header(alias=ADMIN_TOKEN_HEADER)] = None):
+    """List the kept profiles of sampled and slow requests, newest first"""
+    require_profiles_admin(x_admin_token)
+    return {
+        "profiler": request_profiler.snapshot(),
+        "captures": request_profiler.list_captures()
+    }
+
+
+@app.get("/admin/profiles/{capture_id}")
+async def get_profile(
+    capture_id: int,
+    x_admin_token: Annotated[Optional[str], Header(alias=ADMIN_TOKEN_HEADER)] = None
+):
+    """
+    Get one kept profile: input size, per-stage time and memory peaks, and
+    the hottest functions (cProfile) or stacks (sampler).
+    
+    Memory peaks are process-wide (tracemalloc) and only collected for a
+    sampled request that started alone; see profiling.py.
+    
+    Raises:
+        HTTPException: If the profile is unknown or was evicted, or the
+            caller is not an admin
+    """
+    require_profiles_admin(x_admin_token)
+    record = request_profiler.get_capture(capture_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"No profile {capture_id}")
+    return {key: value for key, value in record.items() if key != "pstats"}
+
+
+@app.get("/admin/profiles/{capture_id}/pstats")
+async def download_profile(
+    capture_id: int,
+    x_admin_token: Annotated[Optional[str], Header(alias=ADMIN_TOKEN_HEADER)] = None
+):
+    """
+    Download the raw cProfile statistics of a sampled request, loadable
+    with pstats.Stats(path) or snakeviz.
+    
+    Raises:
+        HTTPException: If the profile is unknown or has no cProfile data, or
+            the caller is not an admin
+    """
+    require_profiles_admin(x_admin_token)
+    record = request_profiler.get_capture(capture_id)
+    if record is None or "pstats" not in record:
+        raise HTTPException(status_code=404, detail=f"No cProfile data for profile {capture_id}")
+    return Response(
+        content=record["pstats"],
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="profile-{capture_id}.prof"'}
+    )
+
+
+def build_streaming_response(
+    result: StreamingResult,
+    outline: Optional[DocumentOutline] = None,
+    deadline: Optional[Deadline] = None
+) -> AnalysisResult:
+    """
+    Turn the aggregates of a finished streaming analysis into a response.
+    
+    Args:
+        result: StreamingResult returned by StreamingAnalyzer.finish()
+        outline: Structure extracted from HTML or Markdown input
+        deadline: Latency budget the analysis ran under
+        
+    Returns:
+        AnalysisResult with analysis results
+    """
+    readability = max(0.0, min(100.0, result.flesch_reading_ease))
+    
+    top_keywords = result.keyword_counts.most_common(10)
+    keyword_density = {}
+    if result.keyword_total > 0:
+        for word, count in top_keywords:
+            keyword_density[word] = round((count / result.keyword_total) * 100, 2)
+    keyword_stats = (top_keywords, keyword_density)
+    
+    max_similarity = max(result.similarities.values(), default=0.0)
+    plagiarism_score = round(max_similarity * 100, 2)
+    
+    copied_fraction = result.copied_text.copied_fraction if result.copied_text is not None else None
+    paraphrased_fraction = result.paraphrase.paraphrased_fraction if result.paraphrase is not None else None
+    final_score = compute_final_score(
+        readability, plagiarism_score, keyword_stats, copied_fraction, paraphrased_fraction=paraphrased_fraction
+    )
+    suggestions = generate_suggestions(
+        result.head, readability, plagiarism_score, keyword_stats, final_score,
+        word_count=result.word_count,
+        has_paragraph_breaks=result.has_paragraph_breaks
+    )
+    if outline is not None:
+        serp_preview = simulate_serp(result.head, outline.serp_title, outline.meta_description)
+    else:
+        serp_preview = simulate_serp(result.head)
+    
+    # Similarities past the leading window or the distinct-shingle cap are
+    # extrapolated, tiers skipped under the deadline are left out, and
+    # keyword counts past the vocabulary cap are pruned
+    approximated = []
+    if 'keyword_counts' in result.approximated:
+        approximated += ['top_keywords', 'keyword_density']
+    if set(result.approximated) - {'keyword_counts'}:
+        approximated.append('plagiarism_score')
+    if approximated:
+        approximated += ['final_score', 'suggestions']
+    
+    return AnalysisResult(
+        readability=readability,
+        top_keywords=top_keywords,
+        keyword_density=keyword_density,
+        plagiarism_score=plagiarism_score,
+        final_score=final_score,
+        suggestions=suggestions,
+        serp_preview=serp_preview,
+        language=result.language,
+        coverage=CoverageResult(
+            complete=not approximated,
+            plagiarism_tiers=[tier for tier in PLAGIARISM_TIERS if tier in result.tiers],
+            approximated=approximated,
+            deadline_ms=deadline.budget_ms if deadline is not None else None,
+            elapsed_ms=round(deadline.elapsed_ms(), 2) if deadline is not None else None
+        ),
+        structure=build_document_structure(outline),
+        copied_text=result.copied_text,
+        paraphrase=result.paraphrase
+    )
+
+
+async def analyze_chunks(
+    chunks: AsyncIterable[str],
+    content_length: Optional[int],
+    language: Optional[str] = None,
+    document_format: str = "text",
+    paraphrase: bool = False,
+    deadline: Optional[Deadline] = None
+) -> Tuple[StreamingResult, Optional[DocumentOutline]]:
+    """
+    Admit and analyze a document arriving as an async stream of text chunks.
+    
+    Chunks are analyzed in the threadpool, so the event loop keeps serving
+    other requests while a large document is scored.
+    
+    Args:
+        chunks: Decoded text chunks in document order
+        content_length: Body size in bytes when known, admitted up front;
+            bodies of unknown size are admitted chunk by chunk, so a slow
+            upload holds no budget while the next chunk is awaited
+        language: Optional ISO 639-1 code; detected from the leading text
+            when omitted
+        document_format: "text", "html" or "markdown"
+        paraphrase: Measure paraphrased sentences even when they are not
+            weighted in the score
+        deadline: Optional latency budget for the costly similarity tiers
+        
+    Returns:
+        Tuple of (streaming aggregates, outline for HTML and Markdown input)
+        
+    Raises:
+        AdmissionRejected: If the document does not fit the cost budget
+    """
+    paraphrase_matcher = get_semantic_index().matcher() if paraphrase or paraphrase_weight() > 0 else None
+    analyzer = StreamingAnalyzer(
+        get_streaming_reference(), language=language,
+        copy_matcher=get_copy_detector().matcher(), paraphrase_matcher=paraphrase_matcher,
+        deadline=deadline
+    )
+    extractor = create_extractor(document_format) if document_format != "text" else None
+    candidates = get_reference_sentence_count()
+    
+    def feed(chunk: str) -> None:
+        if extractor is not None:
+            extractor.feed(chunk)
+            chunk = extractor.take_text()
+        analyzer.feed(chunk)
+    
+    def finish() -> StreamingResult:
+        if extractor is not None:
+            extractor.close()
+            analyzer.feed(extractor.take_text())
+        return analyzer.finish()
+    
+    token = CancelToken()
+    try:
+        if content_length is not None:
+            cost = estimate_cost(content_length, None, candidates)
+            async with admission_controller.admit(cost):
+                async for chunk in chunks:
+                    await run_in_threadpool(cancellable(token, feed), chunk)
+                result = await run_in_threadpool(cancellable(token, finish))
+        else:
+            # The body may be arbitrarily large and arrive slowly: only the
+            # analysis of each chunk is admitted, not the wait for the next
+            async for chunk in chunks:
+                async with admission_controller.admit(estimate_cost(len(chunk), None, candidates)):
+                    await run_in_threadpool(cancellable(token, feed), chunk)
+            cost = estimate_cost(min(analyzer.char_count, analyzer.sequence_window), 1, candidates)
+            async with admission_controller.admit(cost):
+                result = await run_in_threadpool(cancellable(token, finish))
+    except asyncio.CancelledError:
+        token.cancel()
+        raise
+    
+    return result, extractor.outline if extractor is not None else None
+
+
+@app.post("/analyze/stream", response_model=AnalyzeResponse)
+async def analyze_text_stream(
+    request: Request,
+    language: Optional[str] = None,
+    document_format: Annotated[str, Query(alias="format")] = "text",
+    paraphrase: bool = False,
+    deadline_ms: Annotated[Optional[float], Query(ge=0)] = None,
+    x_deadline_ms: Annotated[Optional[float], Header(alias=DEADLINE_HEADER, ge=0)] = None
+):
+    """
+    Analyze a large request body in streaming mode.
+    
+    The body is sent as raw UTF-8 text, HTML or Markdown (not JSON) and is
+    decoded, parsed and analyzed chunk by chunk as it arrives.
+    
+    A latency budget is set as for /analyze and includes the upload; the
+    sentence and sequence similarity tiers are skipped once they no longer
+    fit, and the response's coverage marks the approximated fields.
+    
+    Args:
+        request: Incoming request whose body is the document to analyze
+        language: Optional ISO 639-1 code (query parameter); detected from
+            the leading text when omitted
+        document_format: "text", "html" or "markdown" (`format` query parameter)
+        paraphrase: Include the paraphrase similarity (query parameter)
+        deadline_ms: Optional latency budget in milliseconds
+        x_deadline_ms: Optional latency budget from the X-Deadline-Ms header
+        
+    Returns:
+        AnalyzeResponse with analysis results
+        
+    Raises:
+        HTTPException: If text is empty or invalid
+    """
+    if language is not None and language not in LANGUAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported language '{language}'. Supported: {', '.join(sorted(LANGUAGES))}"
+        )
+    
+    if document_format not in FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format '{document_format}'. Supported: {', '.join(FORMATS)}"
+        )
+    
+    content_length = request.headers.get("content-length")
+    deadline = Deadline.from_sources(x_deadline_ms, deadline_ms, default_deadline_ms())
+    
+    try:
+        result, outline = await analyze_chunks(
+            aiter_decoded_chunks(request.stream(), chunk_size=STREAM_CHUNK_SIZE),
+            int(content_length) if content_length and content_length.isdigit() else None,
+            language,
+            document_format,
+            paraphrase,
+            deadline
+        )
+    except AdmissionRejected as e:
+        raise admission_error(e)
+    except Exception as e:
+        raise HTTPException(
             status_code=500,
             detail=f"Error analyzing text: {str(e)}"
         )
+    
+    # Validate input
+    if len(result.head.strip()) < 10 and result.char_count == len(result.head):
+        raise HTTPException(
+            status_code=400,
+            detail="Text must be at least 10 characters long"
+        )
+    
+    return json_response(AnalyzeResponse, build_streaming_response(result, outline, deadline))
+
+
+async def analyze_fetched_page(page: FetchedPage, language: Optional[str] = None) -> AnalysisResult:
+    """
+    Analyze a crawled page while its body is still being downloaded.
+    
+    Each page runs under the server default deadline (ANALYZE_DEADLINE_MS).
+    
+    Args:
+        page: FetchedPage streamed by the crawler
+        language: Optional ISO 639-1 code; detected from the page otherwise
+        
+    Returns:
+        AnalysisResult with analysis results
+        
+    Raises:
+        AdmissionRejected: If the page does not fit the cost budget
+        ValueError: If the page has no analyzable text
+    """
+    deadline = Deadline.from_sources(default_ms=default_deadline_ms())
+    result, outline = await analyze_chunks(
+        page.chunks, page.content_length, language, page.document_format, deadline=deadline
+    )
+    if len(result.head.strip()) < 10 and result.char_count == len(result.head):
+        raise ValueError("Page text must be at least 10 characters long")
+    return build_streaming_response(result, outline, deadline)
+
+
+@app.post("/crawl", response_model=CrawlResponse)
+async def crawl_site(request: CrawlRequest):
+    """
+    Crawl a sitemap or URL list and analyze every page.
+    
+    Pages are fetched over pooled keep-alive connections with at most
+    `per_host_concurrency` requests per host, and streamed into the
+    analyzer as they download. With `conditional`, pages unchanged since
+    the last conditional crawl (matching ETag or Last-Modified) are
+    reported as not_modified and not analyzed again. Each page is admitted
+    against the cost budget on its own; a rejected or failing page is
+    reported without failing the crawl.
+    
+    Only public hosts are fetched, on every redirect hop, unless
+    CRAWL_ALLOW_PRIVATE is set.
+    
+    Args:
+        request: CrawlRequest with a sitemap URL and/or page URLs
+        
+    Returns:
+        CrawlResponse with one entry per page
+        
+    Raises:
+        HTTPException: If no source is given, the options are invalid or the
+            sitemap URL is not allowed (400), or the sitemap cannot be read (502)
+    """
+    if not request.sitemap_url and not request.urls:
+        raise HTTPException(
+            status_code=400,
+            detail="Either sitemap_url or urls must be given"
+        )
+    
+    if request.max_pages < 1 or request.per_host_concurrency < 1:
+        raise HTTPException(
+            status_code=400,
+            detail="max_pages and per_host_concurrency must be positive"
+        )
+    
+    if request.max_pages > MAX_CRAWL_PAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"max_pages must be at most {MAX_CRAWL_PAGES}"
+        )
+    
+    if request.language is not None and request.language not in LANGUAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported language '{request.language}'. Supported: {', '.join(sorted(LANGUAGES))}"
+        )
+    
+    crawler = Crawler(
+        lambda page: analyze_fetched_page(page, request.language),
+        per_host=request.per_host_concurrency,
+        validators=crawl_validators if request.conditional else ValidatorStore(),
+        allow_private=private_hosts_allowed()
+    )
+    
+    try:
+        results = await crawler.crawl(request.urls, request.sitemap_url, request.max_pages)
+    except BlockedURL as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Sitemap URL not allowed: {str(e)}"
+        )
+    except (httpx.HTTPError, ParseError, SitemapTooLarge) as e:
+        raise HTTPException(
+            status_code=502,
+            detail=f"Error reading sitemap: {str(e)}"
+        )
+    
+    return json_response(CrawlResponse, SimpleNamespace(
+        pages=results,
+        analyzed=crawler.stats.analyzed,
+        not_modified=crawler.stats.not_modified,
+        skipped=crawler.stats.skipped,
+        errors=crawler.stats.errors
+    ))
+
+
+def run_analysis_job(payload: Dict[str, Any]) -> bytes:
+    """
+    Job handler: analyze one document.
+    
+    Args:
+        payload: AnalyzeRequest fields
+        
+    Returns:
+        bytes: Encoded AnalyzeResponse JSON
+        
+    Raises:
+        ValueError: If the request is invalid
+    """
+    request = AnalyzeRequest(**payload)
+    try:
+        text, outline, language = prepare_analysis(request)
+    except HTTPException as e:
+        raise ValueError(e.detail)
+    
+    result = run_analysis(
+        text, language, request.detailed_plagiarism, None, outline, request.readability_details, request.paraphrase
+    )
+    return dump_json(get_encoder(AnalyzeResponse)(result))
+
+
+def run_site_audit_job(payload: Dict[str, Any]) -> bytes:
+    """
+    Job handler: audit a site for keyword cannibalization.
+    
+    Args:
+        payload: SiteAuditRequest fields
+        
+    Returns:
+        bytes: Encoded SiteAuditResponse JSON
+    """
+    return dump_json(get_encoder(SiteAuditResponse)(run_site_audit(SiteAuditRequest(**payload))))
+
+
+# Handlers run by job workers (see jobs.py), per job kind
+JOB_HANDLERS = {
+    'analyze': run_analysis_job,
+    'site_audit': run_site_audit_job,
+}
+
+
+def job_info(job: Job, include_result: bool = True) -> Dict[str, Any]:
+    """Encode a job's state, with its stored result once it is done"""
+    return get_encoder(JobInfo)(SimpleNamespace(
+        id=job.id,
+        kind=job.kind,
+        status=job.status,
+        attempts=job.attempts,
+        created=job.created,
+        updated=job.updated,
+        finished=job.finished,
+        error=job.error,
+        result=json.loads(job.result) if include_result and job.result is not None else None
+    ))
+
+
+@app.post("/jobs", response_model=JobsSubmitted, status_code=202)
+async def submit_jobs(request: JobRequest):
+    """
+    Queue documents and site audits for asynchronous analysis.
+    
+    Jobs are stored in the durable job queue and run by job workers
+    (`python jobs.py worker`); poll GET /jobs/{id} or follow
+    GET /jobs/{id}/stream for the result. Only cheap checks run here;
+    a document that turns out to be invalid fails its job.
+    
+    Args:
+        request: JobRequest with documents and/or a site audit
+        
+    Returns:
+        JobsSubmitted with one queued job per document and audit
+        
+    Raises:
+        HTTPException: If nothing is submitted or a request is invalid
+    """
+    if not request.documents and request.site_audit is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Submit at least one document or a site audit"
+        )
+    
+    for document in request.documents:
+        if document.format not in FORMATS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported format '{document.format}'. Supported: {', '.join(FORMATS)}"
+            )
+        if document.language is not None and document.language not in LANGUAGES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported language '{document.language}'. Supported: {', '.join(sorted(LANGUAGES))}"
+            )
+    
+    if request.site_audit is not None:
+        validate_site_audit(request.site_audit)
+    
+    def submit() -> List[Job]:
+        store = get_job_store()
+        ids = store.submit_many('analyze', [document.model_dump() for document in request.documents])
+        if request.site_audit is not None:
+            ids.append(store.submit('site_audit', request.site_audit.model_dump()))
+        return [store.get(job_id) for job_id in ids]
+    
+    jobs = await run_in_threadpool(submit)
+    return Response(
+        content=dump_json({"jobs": [job_info(job) for job in jobs]}),
+        media_type="application/json",
+        status_code=202
+    )
+
+
+@app.get("/jobs/{job_id}", response_model=JobInfo)
+async def get_job(job_id: str, if_none_match: Annotated[Optional[str], Header()] = None):
+    """
+    Get the state of a job, with its result once it is done.
+    
+    The ETag changes with every state change, so pollers revalidating with
+    If-None-Match receive the (possibly large) result only once.
+    
+    Raises:
+        HTTPException: If the job is unknown or its result was purged
+    """
+    job = await run_in_threadpool(get_job_store().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    
+    etag = make_etag("job", job.id, job.status, job.attempts, job.updated)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return Response(content=dump_json(job_info(job)), media_type="application/json", headers={"ETag": etag})
+
+
+@app.get("/jobs/{job_id}/stream")
+async def stream_job(job_id: str, timeout: Annotated[float, Query(gt=0, le=600)] = 60.0):
+    """
+    Follow a job as newline-delimited JSON.
+    
+    A line with the job's state is sent whenever its status changes; the
+    last line of a finished job carries the result. The stream ends when
+    the job finishes or after `timeout` seconds.
+    
+    Raises:
+        HTTPException: If the job is unknown
+    """
+    store = get_job_store()
+    job = await run_in_threadpool(store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    
+    async def events():
+        current = job
+        status = None
+        deadline = Deadline(timeout * 1000)
+        while current is not None:
+            if current.status != status:
+                status = current.status
+                yield dump_json(job_info(current)) + b"\n"
+            if status in ("done", "failed") or deadline.expired():
+                break
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+            current = await run_in_threadpool(store.get, job_id)
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
 
 
 def test_api_example():
@@ -0,0 +1,218 @@
+"""
+Content-addressed memoization of per-paragraph analysis results.
+
+Templated documents repeat the same paragraphs (intros, disclaimers,
+footers), so the expensive stages cache their per-paragraph results under
+a hash of the paragraph text. Each stage has its own bounded cache with a
+configurable size and eviction policy (LRU, LFU or FIFO) and reports its
+hit rate.
+
+Stage caches are configured with MEMO_<STAGE>_SIZE and MEMO_<STAGE>_POLICY
+environment variables, e.g. MEMO_SHINGLES_SIZE=4096, MEMO_SHINGLES_POLICY=lru.
+A size of 0 disables a stage cache.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+POLICIES = ('lru', 'lfu', 'fifo')
+
+# Default (size, policy) per stage. Boilerplate paragraphs recur across
+# documents, so frequency-based eviction suits the larger per-sentence and
+# shingle entries; the cheap tallies use recency.
+STAGE_DEFAULTS: Dict[str, Tuple[int, str]] = {
+    'readability': (4096, 'lru'),
+    'keywords': (4096, 'lru'),
+    'shingles': (2048, 'lfu'),
+    'sentence_matches': (8192, 'lfu'),
+}
+
+PARAGRAPH_SEPARATOR = '\n\n'
+
+
+def content_key(text: str) -> bytes:
+    """128-bit BLAKE2 digest of a text, used as its cache key"""
+    return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """
+    Split a text into its paragraphs.
+
+    Paragraphs are separated by whitespace only, so whitespace-delimited
+    tokens never span two paragraphs and per-paragraph results combine
+    into the result of the whole text.
+    """
+    return text.split(PARAGRAPH_SEPARATOR)
+
+
+class StageCache:
+    """
+    Bounded, thread-safe cache of one analysis stage.
+
+    Args:
+        name: Stage name reported in the statistics
+        max_size: Maximum number of entries (0 disables caching)
+        policy: Eviction policy: 'lru', 'lfu' or 'fifo'
+    """
+
+    def __init__(self, name: str, max_size: int = 1024, policy: str = 'lru'):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown eviction policy '{policy}'. Supported: {', '.join(POLICIES)}")
+
+        self.name = name
+        self.max_size = max_size
+        self.policy = policy
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        # LFU bookkeeping: use count per key and keys per count in insertion order
+        self._counts: Dict[Hashable, int] = {}
+        self._buckets: Dict[int, 'OrderedDict[Hashable, None]'] = defaultdict(OrderedDict)
+        self._min_count = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for `key`, computing and storing it on a miss.
+
+        `compute` runs outside the lock; if two threads miss on the same
+        key at once, both compute it and the first stored value is kept.
+
+        Args:
+            key: Content key of the input
+            compute: Function producing the value on a miss
+
+        Returns:
+            Cached or freshly computed value (treat as read-only)
+        """
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._touch(key)
+                return self._entries[key]
+            self.misses += 1
+
+        value = compute()
+        if self.max_size <= 0:
+            return value
+
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key]
+            if len(self._entries) >= self.max_size:
+                self._evict()
+            self._entries[key] = value
+            if self.policy == 'lfu':
+                self._counts[key] = 1
+                self._buckets[1][key] = None
+                self._min_count = 1
+
+        return value
+
+    def _touch(self, key: Hashable) -> None:
+        if self.policy == 'lru':
+            self._entries.move_to_end(key)
+        elif self.policy == 'lfu':
+            count = self._counts[key]
+            bucket = self._buckets[count]
+            del bucket[key]
+            if not bucket:
+                del self._buckets[count]
+                if self._min_count == count:
+                    self._min_count = count + 1
+            self._counts[key] = count + 1
+            self._buckets[count + 1][key] = None
+
+    def _evict(self) -> None:
+        if self.policy == 'lfu':
+            # Least frequently used; ties go to the oldest entry
+            bucket = self._buckets[self._min_count]
+            key, _ = bucket.popitem(last=False)
+            if not bucket:
+                del self._buckets[self._min_count]
+            del self._counts[key]
+            del self._entries[key]
+        else:
+            # LRU keeps entries in recency order, FIFO in insertion order
+            self._entries.popitem(last=False)
+        self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry and reset the statistics"""
+        with self._lock:
+            self._entries.clear()
+            self._counts.clear()
+            self._buckets.clear()
+            self._min_count = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """
+        Report the cache state.
+
+        Returns:
+            dict: Size, policy, hit and miss counts, hit rate and evictions
+        """
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'policy': self.policy,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+        }
+
+
+# Stage caches, created lazily from STAGE_DEFAULTS and the environment
+_stage_caches: Dict[str, StageCache] = {}
+_stage_caches_lock = threading.Lock()
+
+
+def get_stage_cache(stage: str) -> StageCache:
+    """
+    Get the cache of an analysis stage, creating it on first use.
+
+    Args:
+        stage: Stage name (a key of STAGE_DEFAULTS)
+
+    Returns:
+        StageCache: Cache shared by all requests of this worker
+    """
+    cache = _stage_caches.get(stage)
+    if cache is not None:
+        return cache
+
+    default_size, default_policy = STAGE_DEFAULTS[stage]
+    prefix = f'MEMO_{stage.upper()}'
+    max_size = int(os.environ.get(f'{prefix}_SIZE') or default_size)
+    policy = (os.environ.get(f'{prefix}_POLICY') or default_policy).lower()
+
+    with _stage_caches_lock:
+        cache = _stage_caches.get(stage)
+        if cache is None:
+            cache = StageCache(stage, max_size, policy)
+            _stage_caches[stage] = cache
+    return cache
+
+
+def clear_stage_caches() -> None:
+    """Drop the entries of every stage cache (to free memory)"""
+    for cache in list(_stage_caches.values()):
+        cache.clear()
+
+
+def memo_stats() -> Dict[str, dict]:
+    """Statistics of every stage cache, for /metrics"""
+    return {stage: get_stage_cache(stage).stats() for stage in STAGE_DEFAULTS}
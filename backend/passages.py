@@ -0,0 +1,201 @@
+"""
+Passage-level plagiarism matching for the SEO Analyzer.
+
+Finds the copied passages behind a plagiarism score using seed-and-extend
+alignment: shared word shingles (rolling hashes over token IDs) act as
+seeds, and each seed is extended token by token along its diagonal.
+Nearby runs in the same source are then chained into passages, so the
+whole report costs about one pass over the input shingles instead of a
+full difflib alignment.
+"""
+
+import re
+import string
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from shingles import TokenVocabulary, rolling_hashes
+
+_TOKEN_RE = re.compile(r'\S+')
+_PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+
+
+@dataclass(slots=True)
+class PassageMatch:
+    """A copied passage located in both the input and a reference document"""
+    source: str
+    input_start: int
+    input_end: int
+    source_start: int
+    source_end: int
+    matched_tokens: int
+    strength: float
+
+
+def tokenize_with_offsets(text: str) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """
+    Tokenize text the same way `clean_text` does, keeping character offsets.
+
+    Args:
+        text: Raw text to tokenize
+
+    Returns:
+        Tuple containing:
+            - List of normalized tokens (lowercase, punctuation removed)
+            - List of (start, end) character offsets of each token in `text`
+    """
+    tokens = []
+    offsets = []
+
+    for match in _TOKEN_RE.finditer(text):
+        token = match.group().lower().translate(_PUNCTUATION_TABLE)
+        if token:
+            tokens.append(token)
+            offsets.append(match.span())
+
+    return tokens, offsets
+
+
+class PassageIndex:
+    """
+    Shingle index over the reference documents used for passage matching.
+
+    Args:
+        documents: Mapping of document name to raw document text
+        n: Shingle size in words (seed length)
+        vocabulary: Token vocabulary shared with other shingle indexes
+    """
+
+    def __init__(self, documents: Dict[str, str], n: int = 5, vocabulary: TokenVocabulary = None):
+        self.n = n
+        self.vocabulary = vocabulary if vocabulary is not None else TokenVocabulary()
+        self.documents: Dict[str, Tuple[List[int], List[Tuple[int, int]]]] = {}
+        self.shingles: Dict[int, List[Tuple[str, int]]] = {}
+
+        for name, text in documents.items():
+            tokens, offsets = tokenize_with_offsets(text)
+            ids = self.vocabulary.encode(tokens, grow=True)
+            self.documents[name] = (ids.tolist(), offsets)
+
+            for i, shingle in enumerate(rolling_hashes(ids, n).tolist()):
+                self.shingles.setdefault(shingle, []).append((name, i))
+
+    def find_passages(
+        self,
+        text: str,
+        max_gap: int = 3,
+        min_tokens: int = None
+    ) -> List[PassageMatch]:
+        """
+        Locate passages of `text` copied from the indexed documents.
+
+        Args:
+            text: Input text to check
+            max_gap: Largest number of differing tokens bridged between two
+                runs when chaining them into a single passage
+            min_tokens: Minimum matched tokens for a passage to be reported
+                (defaults to the shingle size)
+
+        Returns:
+            List of PassageMatch objects ordered by position in the input
+        """
+        n = self.n
+        min_tokens = n if min_tokens is None else min_tokens
+        words, offsets = tokenize_with_offsets(text)
+        encoded = self.vocabulary.encode(words)
+        tokens = encoded.tolist()
+
+        # Seed and extend: each diagonal (source, j - i) is extended once,
+        # later seeds falling inside an extended run are skipped
+        runs: Dict[str, List[Tuple[int, int, int]]] = {}
+        covered: Dict[Tuple[str, int], int] = {}
+
+        for i, shingle in enumerate(rolling_hashes(encoded, n).tolist()):
+            hits = self.shingles.get(shingle)
+            if not hits:
+                continue
+
+            for name, j in hits:
+                diagonal = (name, j - i)
+                if covered.get(diagonal, -1) > i:
+                    continue
+
+                source_tokens = self.documents[name][0]
+                if source_tokens[j:j + n] != tokens[i:i + n]:
+                    continue  # Hash collision, not a real seed
+
+                start_i, start_j = i, j
+                while start_i > 0 and start_j > 0 and tokens[start_i - 1] == source_tokens[start_j - 1]:
+                    start_i -= 1
+                    start_j -= 1
+
+                end_i, end_j = i + n, j + n
+                while end_i < len(tokens) and end_j < len(source_tokens) and tokens[end_i] == source_tokens[end_j]:
+                    end_i += 1
+                    end_j += 1
+
+                covered[diagonal] = end_i
+                runs.setdefault(name, []).append((start_i, start_j, end_i - start_i))
+
+        passages = []
+        for name, source_runs in runs.items():
+            source_offsets = self.documents[name][1]
+
+            for chain in _chain_runs(source_runs, max_gap):
+                in_start, src_start = chain[0][0], chain[0][1]
+                in_end = max(run[0] + run[2] for run in chain)
+                src_end = max(run[1] + run[2] for run in chain)
+                matched = _covered_tokens(chain)
+
+                if matched < min_tokens:
+                    continue
+
+                span = max(in_end - in_start, src_end - src_start)
+                passages.append(PassageMatch(
+                    source=name,
+                    input_start=offsets[in_start][0],
+                    input_end=offsets[in_end - 1][1],
+                    source_start=source_offsets[src_start][0],
+                    source_end=source_offsets[src_end - 1][1],
+                    matched_tokens=matched,
+                    strength=round(matched / span, 4)
+                ))
+
+        passages.sort(key=lambda p: (p.input_start, -p.strength, p.source))
+        return passages
+
+
+def _chain_runs(
+    runs: List[Tuple[int, int, int]],
+    max_gap: int
+) -> List[List[Tuple[int, int, int]]]:
+    """Group runs that follow each other in both texts within `max_gap` tokens"""
+    chains = []
+
+    for run in sorted(runs):
+        start_i, start_j, _ = run
+        for chain in chains:
+            last_i, last_j, last_len = chain[-1]
+            gap_i = start_i - (last_i + last_len)
+            gap_j = start_j - (last_j + last_len)
+            if -last_len < gap_i <= max_gap and -last_len < gap_j <= max_gap:
+                chain.append(run)
+                break
+        else:
+            chains.append([run])
+
+    return chains
+
+
+def _covered_tokens(chain: List[Tuple[int, int, int]]) -> int:
+    """Count input tokens covered by a chain of (possibly overlapping) runs"""
+    covered = 0
+    reached = -1
+
+    for start, _, length in chain:
+        end = start + length
+        if end > reached:
+            covered += end - max(start, reached)
+            reached = end
+
+    return covered
@@ -0,0 +1,446 @@
+"""
+Opt-in profiling of slow analysis requests for the SEO Analyzer.
+
+Two kinds of capture are kept in a bounded in-memory ring buffer:
+
+- Sampled requests (PROFILE_SAMPLE_RATE) run under cProfile, giving
+  exact call statistics. tracemalloc is process-wide: it sees every
+  thread's allocations, so per-stage memory peaks are only collected when
+  the sampled request starts with no other request in flight. Requests arriving while it runs still add to its peaks, so the
+  numbers are an upper bound under load.
+- When a latency trigger is set (PROFILE_SLOW_MS, or PROFILE_SLOW_FACTOR
+  times the rolling median), every other request runs under a stack
+  sampler. It costs a few frame walks per interval, so it can stay on; the
+  capture is only kept when the request turns out to be slow, because a
+  slow request cannot be profiled after the fact.
+
+Stages mark themselves with `profile_stage(name)`, which is free when the
+current request is not being profiled.
+
+The /admin/profiles endpoints are only served while profiling is enabled,
+and only to callers sending PROFILE_ADMIN_TOKEN.
+
+Configuration (environment):
+    PROFILE_SAMPLE_RATE          Fraction of requests profiled with cProfile (0)
+    PROFILE_SLOW_MS              Keep captures of requests slower than this
+    PROFILE_SLOW_FACTOR          Keep captures slower than factor x median latency
+    PROFILE_BUFFER_SIZE          Captures kept (32)
+    PROFILE_SAMPLE_INTERVAL_MS   Stack sampler interval (5)
+    PROFILE_ADMIN_TOKEN          Token required by the /admin/profiles endpoints
+"""
+
+import cProfile
+import contextvars
+import hmac
+import itertools
+import marshal
+import os
+import pstats
+import random
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from typing import Any, Callable, Dict, List, Optional
+
+# Latencies kept for the rolling median, and the minimum before it is used
+LATENCY_WINDOW = 256
+MIN_LATENCY_SAMPLES = 20
+
+# Rows of cProfile statistics and sampled stacks kept per capture
+TOP_FUNCTIONS = 30
+TOP_STACKS = 20
+MAX_STACK_DEPTH = 40
+
+_active_capture: contextvars.ContextVar = contextvars.ContextVar('active_capture', default=None)
+
+# tracemalloc is process-wide, so only one capture traces memory at a time
+_tracemalloc_lock = threading.Lock()
+
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+def input_stats(text: str) -> Dict[str, int]:
+    """Size statistics of an analyzed text (the text itself is not kept)"""
+    paragraphs = [p for p in text.split('\n\n') if p.strip()]
+    return {
+        'chars': len(text),
+        'words': len(text.split()),
+        'sentences': max(1, text.count('.') + text.count('!') + text.count('?')),
+        'paragraphs': len(paragraphs),
+        'longest_paragraph_chars': max((len(p) for p in paragraphs), default=0),
+    }
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    def __init__(self, capture: 'Capture', name: str):
+        self.capture = capture
+        self.name = name
+
+    def __enter__(self):
+        if self.capture.tracing:
+            tracemalloc.reset_peak()
+            self.baseline = tracemalloc.get_traced_memory()[0]
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed_ms = (time.perf_counter() - self.started) * 1000
+        stage = self.capture.stages.setdefault(self.name, {'ms': 0.0})
+        stage['ms'] = round(stage['ms'] + elapsed_ms, 3)
+        if self.capture.tracing:
+            peak_kb = (tracemalloc.get_traced_memory()[1] - self.baseline) / 1024
+            stage['peak_kb'] = round(max(stage.get('peak_kb', 0.0), peak_kb), 1)
+        return False
+
+
+def profile_stage(name: str):
+    """
+    Context manager timing one analysis stage of the profiled request.
+
+    Records the stage's duration, and its peak traced memory above the
+    stage's starting point when tracemalloc is on. Does nothing when the
+    current request is not being profiled.
+
+    Args:
+        name: Stage name
+    """
+    capture = _active_capture.get()
+    if capture is None:
+        return _NULL_STAGE
+    return _Stage(capture, name)
+
+
+class StackSampler:
+    """
+    Background thread sampling the stacks of registered threads.
+
+    One sampler serves every request being watched; it is started on first
+    use and sleeps while no thread is registered.
+
+    Args:
+        interval_ms: Milliseconds between samples
+    """
+
+    def __init__(self, interval_ms: float = 5.0):
+        self.interval = interval_ms / 1000
+        self._targets: Dict[int, 'Capture'] = {}
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def register(self, capture: 'Capture') -> None:
+        with self._condition:
+            self._targets[threading.get_ident()] = capture
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def unregister(self) -> None:
+        with self._condition:
+            self._targets.pop(threading.get_ident(), None)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._targets:
+                    self._condition.wait()
+                targets = dict(self._targets)
+
+            frames = sys._current_frames()
+            for thread_id, capture in targets.items():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    capture.add_sample(frame)
+            del frames
+            time.sleep(self.interval)
+
+
+class Capture:
+    """
+    Profile of one request, filled in by the worker thread running it.
+
+    Args:
+        profiler: RequestProfiler that keeps the capture
+        mode: 'cprofile' (sampled) or 'sampler' (kept only when slow)
+        text: Analyzed text, summarized by input_stats() if kept
+        labels: Extra fields stored with the capture (endpoint, language...)
+    """
+
+    def __init__(self, profiler: 'RequestProfiler', mode: str, text: str, labels: Dict[str, Any]):
+        self.profiler = profiler
+        self.mode = mode
+        self.text = text
+        self.labels = labels
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.stacks: Counter = Counter()
+        self.tracing = False
+        self.stats: Optional[pstats.Stats] = None
+        self.elapsed_ms = 0.0
+        self.error: Optional[str] = None
+
+    def add_sample(self, frame) -> None:
+        """Count the stack of `frame` down to this capture's run()"""
+        labels = []
+        while frame is not None and frame.f_code is not _RUN_CODE and len(labels) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            labels.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        if labels:
+            self.stacks[';'.join(reversed(labels))] += 1
+
+    def run(self, func: Callable, *args, **kwargs):
+        """Call `func` under this capture's profiler, in the current thread"""
+        token = _active_capture.set(self)
+        profiler = None
+        started_tracing = False
+        alone = self.profiler.enter() == 1
+
+        if self.mode == 'cprofile':
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler is active in this interpreter
+                profiler = None
+                self.mode = 'sampler'
+            # Memory is traced only for a request running alone, since
+            # tracemalloc counts the allocations of every thread
+            if profiler is not None and alone and _tracemalloc_lock.acquire(blocking=False):
+                self.tracing = True
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    started_tracing = True
+        if self.mode == 'sampler':
+            self.profiler.sampler.register(self)
+
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception as exc:
+            self.error = type(exc).__name__
+            raise
+        finally:
+            self.profiler.leave()
+            self.elapsed_ms = (time.perf_counter() - started) * 1000
+            if profiler is not None:
+                profiler.disable()
+                self.stats = pstats.Stats(profiler)
+            if self.tracing:
+                if started_tracing:
+                    tracemalloc.stop()
+                _tracemalloc_lock.release()
+            if self.mode == 'sampler':
+                self.profiler.sampler.unregister()
+            _active_capture.reset(token)
+            self.profiler.finish(self)
+
+
+_RUN_CODE = Capture.run.__code__
+
+
+def _call(func: Callable, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+def _counted(profiler: 'RequestProfiler') -> Callable:
+    def call(func: Callable, *args, **kwargs):
+        profiler.enter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.leave()
+    return call
+
+
+class RequestProfiler:
+    """
+    Decide which requests to profile and keep the interesting captures.
+
+    Args:
+        sample_rate: Fraction of requests profiled with cProfile and tracemalloc
+        slow_ms: Keep a sampler capture of requests slower than this
+        slow_factor: Keep a sampler capture of requests slower than this
+            multiple of the rolling median latency
+        buffer_size: Number of captures kept (oldest dropped first)
+        sample_interval_ms: Stack sampler interval
+        admin_token: Token the admin endpoints require (they are closed without one)
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        slow_ms: Optional[float] = None,
+        slow_factor: Optional[float] = None,
+        buffer_size: int = 32,
+        sample_interval_ms: float = 5.0,
+        admin_token: Optional[str] = None
+    ):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.slow_factor = slow_factor
+        self.captures: deque = deque(maxlen=buffer_size)
+        self.sampler = StackSampler(sample_interval_ms)
+        self.admin_token = admin_token
+        self._in_flight = 0
+        self._latencies: deque = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    @classmethod
+    def from_env(cls) -> 'RequestProfiler':
+        """Create a profiler configured from PROFILE_* environment variables"""
+        return cls(
+            sample_rate=_env_float('PROFILE_SAMPLE_RATE', 0.0),
+            slow_ms=_env_float('PROFILE_SLOW_MS', None),
+            slow_factor=_env_float('PROFILE_SLOW_FACTOR', None),
+            buffer_size=int(_env_float('PROFILE_BUFFER_SIZE', 32)),
+            sample_interval_ms=_env_float('PROFILE_SAMPLE_INTERVAL_MS', 5.0),
+            admin_token=os.environ.get('PROFILE_ADMIN_TOKEN') or None
+        )
+
+    @property
+    def watches_latency(self) -> bool:
+        return self.slow_ms is not None or self.slow_factor is not None
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 or self.watches_latency
+
+    def authorized(self, token: Optional[str]) -> bool:
+        """Whether `token` opens the admin endpoints (never without a configured token)"""
+        if not self.admin_token or token is None:
+            return False
+        return hmac.compare_digest(token.encode(), self.admin_token.encode())
+
+    def enter(self) -> int:
+        """Count a request starting; returns the number now in flight"""
+        with self._lock:
+            self._in_flight += 1
+            return self._in_flight
+
+    def leave(self) -> None:
+        """Count a request finishing"""
+        with self._lock:
+            self._in_flight -= 1
+
+    def runner(self, text: str, **labels) -> Callable:
+        """
+        Get the function that runs a request's work, profiled or not.
+
+        Usage: `runner(text, endpoint='/analyze')(func, *args)`, typically
+        through run_in_threadpool so profiling happens in the worker thread.
+
+        Args:
+            text: Text the request analyzes
+            **labels: Fields stored with a kept capture
+
+        Returns:
+            Callable taking (func, *args, **kwargs)
+        """
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return Capture(self, 'cprofile', text, labels).run
+        if self.watches_latency:
+            return Capture(self, 'sampler', text, labels).run
+        # Unprofiled requests are still counted, so memory is traced only when alone
+        return _counted(self) if self.enabled else _call
+
+    def _slow_threshold_ms(self) -> Optional[float]:
+        thresholds = []
+        if self.slow_ms is not None:
+            thresholds.append(self.slow_ms)
+        if self.slow_factor is not None and len(self._latencies) >= MIN_LATENCY_SAMPLES:
+            thresholds.append(self.slow_factor * statistics.median(self._latencies))
+        return min(thresholds) if thresholds else None
+
+    def finish(self, capture: Capture) -> None:
+        """Record the latency of a finished capture and keep it if it qualifies"""
+        with self._lock:
+            threshold = self._slow_threshold_ms()
+            # cProfile inflates latencies, so only unprofiled runs feed the median
+            if capture.mode == 'sampler':
+                self._latencies.append(capture.elapsed_ms)
+
+        slow = threshold is not None and capture.elapsed_ms >= threshold
+        if capture.mode == 'sampler' and not slow:
+            return
+
+        record = {
+            'id': next(self._ids),
+            'timestamp': time.time(),
+            'mode': capture.mode,
+            'reason': 'sampled' if capture.stats is not None else 'slow',
+            'elapsed_ms': round(capture.elapsed_ms, 3),
+            'slow_threshold_ms': round(threshold, 3) if threshold is not None else None,
+            'error': capture.error,
+            **capture.labels,
+            'input': input_stats(capture.text),
+            'stages': capture.stages,
+        }
+        if capture.stats is not None:
+            record['functions'] = _top_functions(capture.stats)
+            record['pstats'] = marshal.dumps(capture.stats.stats)
+        else:
+            record['samples'] = sum(capture.stacks.values())
+            record['stacks'] = [
+                {'stack': stack, 'samples': count}
+                for stack, count in capture.stacks.most_common(TOP_STACKS)
+            ]
+        self.captures.append(record)
+
+    def list_captures(self) -> List[Dict[str, Any]]:
+        """Summaries of the kept captures, newest first"""
+        return [
+            {key: record[key] for key in ('id', 'timestamp', 'mode', 'reason', 'elapsed_ms', 'error', 'input')}
+            for record in reversed(self.captures)
+        ]
+
+    def get_capture(self, capture_id: int) -> Optional[Dict[str, Any]]:
+        """A kept capture by id, or None once it has left the buffer"""
+        for record in self.captures:
+            if record['id'] == capture_id:
+                return record
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Profiler configuration and buffer state"""
+        with self._lock:
+            median = statistics.median(self._latencies) if self._latencies else None
+        return {
+            'enabled': self.enabled,
+            'sample_rate': self.sample_rate,
+            'slow_ms': self.slow_ms,
+            'slow_factor': self.slow_factor,
+            'median_ms': round(median, 3) if median is not None else None,
+            'captures': len(self.captures),
+            'buffer_size': self.captures.maxlen,
+        }
+
+
+def _top_functions(stats: pstats.Stats) -> List[Dict[str, Any]]:
+    rows = []
+    for (filename, line, name), (_, calls, total, cumulative, _) in stats.stats.items():
+        rows.append({
+            'function': f"{name} ({os.path.basename(filename)}:{line})",
+            'calls': calls,
+            'total_ms': round(total * 1000, 3),
+            'cumulative_ms': round(cumulative * 1000, 3),
+        })
+    rows.sort(key=lambda row: row['cumulative_ms'], reverse=True)
+    return rows[:TOP_FUNCTIONS]
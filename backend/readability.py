@@ -0,0 +1,349 @@
+"""
+Incremental readability tallies for the SEO Analyzer.
+
+Reproduces textstat's Flesch Reading Ease (and its per-language variants)
+from running word, sentence and syllable counts, so readability can be
+computed one token at a time without holding the whole text in memory.
+
+`readability_breakdown` also records the counts per token, so the scores
+of every sentence and paragraph follow from segmented sums over those
+arrays in the same pass that yields the overall score.
+"""
+
+import math
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+from pyphen import Pyphen
+
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+_WORD_CHAR_RE = re.compile(r'\w')
+_TERMINATOR_SPLIT_RE = re.compile(r'([.!?]+)')
+_TOKEN_RE = re.compile(r'\S+')
+# A token that ends a sentence: terminators, then optional closing quotes or brackets
+_SENTENCE_END_RE = re.compile(r'[.!?]+[\'"\u2019\u201d)\]]*$')
+
+PARAGRAPH_SEPARATOR = '\n\n'
+
+# Hyphenation dictionary used by textstat for syllable counting
+_pyphen_cache = None
+
+
+def get_pyphen() -> Pyphen:
+    """
+    Load the en_US hyphenation dictionary used for syllable counts.
+    Caches the dictionary for subsequent calls.
+
+    Returns:
+        Pyphen: Hyphenation dictionary
+    """
+    global _pyphen_cache
+
+    if _pyphen_cache is None:
+        _pyphen_cache = Pyphen(lang='en_US')
+
+    return _pyphen_cache
+
+
+@dataclass(frozen=True)
+class ReadabilityFormula:
+    """
+    Flesch-style readability formula:
+    base - sentence_length * ASL - syllables_per_word * ASW
+
+    `syllable_interval` expresses ASW per that many words (the Spanish and
+    Italian variants use syllables per 100 words).
+    """
+    name: str
+    base: float
+    sentence_length: float
+    syllables_per_word: float
+    syllable_interval: Optional[int] = None
+
+
+FLESCH_READING_EASE = ReadabilityFormula('Flesch Reading Ease', 206.835, 1.015, 84.6)
+
+
+def legacy_round(number: float, points: int = 0) -> float:
+    """Round half away from zero, exactly like textstat does"""
+    p = 10 ** points
+    return float(math.floor((number * p) + math.copysign(0.5, number))) / p
+
+
+class ReadabilityTally:
+    """
+    Running counts behind the Flesch Reading Ease formula.
+
+    Feed whitespace-delimited tokens in document order with `add_token`;
+    the counts follow textstat's rules for words, sentences and syllables.
+    Tallies of consecutive parts of a text can be combined with `merge`.
+
+    Args:
+        pyphen: Hyphenation dictionary for syllable counts (en_US by default)
+    """
+
+    def __init__(self, pyphen: Pyphen = None):
+        self.pyphen = pyphen if pyphen is not None else get_pyphen()
+        self.words = 0
+        self.syllables = 0
+        self.sentences = 0
+        self._sentence_words = 0
+        # Words before the first terminator, which may continue the
+        # open sentence of a preceding part when tallies are merged
+        self._leading_words = 0
+        self._terminated = False
+
+    def add_token(self, token: str) -> None:
+        """
+        Count one raw whitespace-delimited token.
+
+        Args:
+            token: Token as it appears in the text, punctuation included
+        """
+        word = _NON_WORD_RE.sub('', token)
+        if word:
+            self.words += 1
+            self.syllables += len(self.pyphen.positions(word.lower())) + 1
+
+        # Sentence terminators can sit inside a token ("e.g.", "3.5")
+        pieces = _TERMINATOR_SPLIT_RE.split(token)
+        for index, piece in enumerate(pieces):
+            if index % 2:
+                self.end_sentence()
+            elif _WORD_CHAR_RE.search(piece):
+                self._sentence_words += 1
+
+    def end_sentence(self) -> None:
+        """Close the current sentence; sentences of two words or less are ignored"""
+        if not self._terminated:
+            self._leading_words = self._sentence_words
+            self._terminated = True
+        if self._sentence_words > 2:
+            self.sentences += 1
+        self._sentence_words = 0
+
+    def merge(self, other: 'ReadabilityTally') -> None:
+        """
+        Add the counts of the text that directly follows this one.
+
+        The first sentence of `other` continues this tally's open sentence,
+        so merging per-part tallies gives the same counts as tallying the
+        whole text token by token. `other` is left unchanged.
+
+        Args:
+            other: Tally of the following part of the text
+        """
+        self.words += other.words
+        self.syllables += other.syllables
+
+        if not other._terminated:
+            self._sentence_words += other._sentence_words
+            return
+
+        joined_words = self._sentence_words + other._leading_words
+        if not self._terminated:
+            self._leading_words = joined_words
+            self._terminated = True
+
+        # Replace the separately counted first sentence of `other` with the joined one
+        self.sentences += (
+            other.sentences
+            - (1 if other._leading_words > 2 else 0)
+            + (1 if joined_words > 2 else 0)
+        )
+        self._sentence_words = other._sentence_words
+
+    def flesch_reading_ease(self, formula: ReadabilityFormula = FLESCH_READING_EASE) -> float:
+        """
+        Compute Flesch Reading Ease from the counts gathered so far.
+
+        Args:
+            formula: Language variant of the formula (English by default)
+
+        Returns:
+            float: Unclamped Flesch Reading Ease score
+        """
+        sentences = max(1, self.sentences + (1 if self._sentence_words > 2 else 0))
+        sentence_length = legacy_round(self.words / sentences, 1)
+
+        syllables_per_word = 0.0
+        if self.words:
+            interval = formula.syllable_interval or 1
+            syllables_per_word = legacy_round(self.syllables * interval / self.words, 1)
+
+        flesch = (
+            formula.base
+            - formula.sentence_length * sentence_length
+            - formula.syllables_per_word * syllables_per_word
+        )
+        return legacy_round(flesch, 2)
+
+
+def flesch_scores(
+    words: np.ndarray,
+    syllables: np.ndarray,
+    sentences: np.ndarray,
+    formula: ReadabilityFormula = FLESCH_READING_EASE
+) -> np.ndarray:
+    """
+    Vectorized `ReadabilityTally.flesch_reading_ease` over many segments.
+
+    Args:
+        words: Word count per segment
+        syllables: Syllable count per segment
+        sentences: Sentence count per segment (at least 1)
+        formula: Language variant of the formula (English by default)
+
+    Returns:
+        np.ndarray: Unclamped Flesch Reading Ease score per segment
+    """
+    words = np.asarray(words, dtype=np.float64)
+    syllables = np.asarray(syllables, dtype=np.float64)
+    sentences = np.maximum(np.asarray(sentences, dtype=np.float64), 1.0)
+
+    sentence_length = _legacy_round_array(words / sentences, 1)
+    interval = formula.syllable_interval or 1
+    syllables_per_word = np.where(
+        words > 0, _legacy_round_array(syllables * interval / np.maximum(words, 1.0), 1), 0.0
+    )
+
+    flesch = (
+        formula.base
+        - formula.sentence_length * sentence_length
+        - formula.syllables_per_word * syllables_per_word
+    )
+    return _legacy_round_array(flesch, 2)
+
+
+def _legacy_round_array(numbers: np.ndarray, points: int = 0) -> np.ndarray:
+    """`legacy_round` for arrays"""
+    p = 10 ** points
+    return np.floor(numbers * p + np.copysign(0.5, numbers)) / p
+
+
+@dataclass
+class ReadabilityBreakdown:
+    """
+    Readability counts of a text per sentence and per paragraph.
+
+    Sentences end at tokens closed by a terminator (optionally followed by
+    closing quotes or brackets) and at paragraph breaks; unlike textstat's
+    sentence count, short fragments are kept so every word belongs to one.
+    Offsets are character positions in the text. `tally` holds the counts
+    of the whole text, exactly as `ReadabilityTally` gives them.
+    """
+    tally: ReadabilityTally
+    sentence_starts: np.ndarray
+    sentence_ends: np.ndarray
+    sentence_paragraphs: np.ndarray  # Paragraph index of each sentence
+    sentence_words: np.ndarray
+    sentence_syllables: np.ndarray
+    paragraph_starts: np.ndarray
+    paragraph_ends: np.ndarray
+    paragraph_sentences: np.ndarray  # Sentences of more than two words
+    paragraph_words: np.ndarray
+    paragraph_syllables: np.ndarray
+
+    def sentence_scores(self, formula: ReadabilityFormula = FLESCH_READING_EASE) -> np.ndarray:
+        """Flesch Reading Ease of each sentence, clamped to 0-100"""
+        scores = flesch_scores(self.sentence_words, self.sentence_syllables, np.ones(len(self.sentence_words)), formula)
+        return np.clip(scores, 0.0, 100.0)
+
+    def paragraph_scores(self, formula: ReadabilityFormula = FLESCH_READING_EASE) -> np.ndarray:
+        """Flesch Reading Ease of each paragraph, clamped to 0-100"""
+        scores = flesch_scores(self.paragraph_words, self.paragraph_syllables, self.paragraph_sentences, formula)
+        return np.clip(scores, 0.0, 100.0)
+
+    def hardest_sentences(
+        self,
+        scores: np.ndarray,
+        top_n: int = 5,
+        below: float = 60.0
+    ) -> List[int]:
+        """
+        Pick the sentences that hurt readability most.
+
+        Args:
+            scores: Sentence scores from `sentence_scores`
+            top_n: Maximum number of sentences returned
+            below: Only sentences scoring under this are returned
+
+        Returns:
+            list: Sentence indexes, hardest first (longer first on ties)
+        """
+        candidates = np.flatnonzero((scores < below) & (self.sentence_words > 2))
+        order = np.lexsort((candidates, -self.sentence_words[candidates], scores[candidates]))
+        return candidates[order[:top_n]].tolist()
+
+
+def readability_breakdown(text: str, pyphen: Pyphen = None) -> ReadabilityBreakdown:
+    """
+    Tally a text once and keep word and syllable counts per sentence and paragraph.
+
+    Each token's word and syllable counts go into arrays while the text is
+    tallied; sentence and paragraph counts are segmented sums over them.
+
+    Args:
+        text: Text to analyze
+        pyphen: Hyphenation dictionary for syllable counts (en_US by default)
+
+    Returns:
+        ReadabilityBreakdown: Whole-text tally and per-segment counts
+    """
+    tally = ReadabilityTally(pyphen)
+    starts, ends, words, syllables, sentence_ends, paragraph_breaks = [], [], [], [], [], []
+
+    previous_end = 0
+    for match in _TOKEN_RE.finditer(text):
+        token = match.group()
+        counted_words, counted_syllables = tally.words, tally.syllables
+        tally.add_token(token)
+
+        starts.append(match.start())
+        ends.append(match.end())
+        words.append(tally.words - counted_words)
+        syllables.append(tally.syllables - counted_syllables)
+        sentence_ends.append(_SENTENCE_END_RE.search(token) is not None)
+        paragraph_breaks.append(not previous_end or PARAGRAPH_SEPARATOR in text[previous_end:match.start()])
+        previous_end = match.end()
+
+    if not starts:
+        empty = np.zeros(0, dtype=np.int64)
+        return ReadabilityBreakdown(tally, *([empty] * 10))
+
+    starts = np.array(starts, dtype=np.int64)
+    ends = np.array(ends, dtype=np.int64)
+    words = np.array(words, dtype=np.int64)
+    syllables = np.array(syllables, dtype=np.int64)
+    paragraph_breaks = np.array(paragraph_breaks, dtype=bool)
+
+    # A sentence also ends before every paragraph break and at the end of the text
+    sentence_ends = np.array(sentence_ends, dtype=bool)
+    sentence_ends[:-1] |= paragraph_breaks[1:]
+    sentence_ends[-1] = True
+    last_tokens = np.flatnonzero(sentence_ends)
+    first_tokens = np.concatenate(([0], last_tokens[:-1] + 1))
+    sentence_paragraphs = np.cumsum(paragraph_breaks)[first_tokens] - 1
+    sentence_words = np.add.reduceat(words, first_tokens)
+
+    paragraph_first = np.flatnonzero(paragraph_breaks)
+    paragraph_last = np.concatenate((paragraph_first[1:] - 1, [len(starts) - 1]))
+    paragraph_sentences = np.bincount(
+        sentence_paragraphs, weights=sentence_words > 2, minlength=len(paragraph_first)
+    ).astype(np.int64)
+
+    return ReadabilityBreakdown(
+        tally=tally,
+        sentence_starts=starts[first_tokens],
+        sentence_ends=ends[last_tokens],
+        sentence_paragraphs=sentence_paragraphs,
+        sentence_words=sentence_words,
+        sentence_syllables=np.add.reduceat(syllables, first_tokens),
+        paragraph_starts=starts[paragraph_first],
+        paragraph_ends=ends[paragraph_last],
+        paragraph_sentences=paragraph_sentences,
+        paragraph_words=np.add.reduceat(words, paragraph_first),
+        paragraph_syllables=np.add.reduceat(syllables, paragraph_first),
+    )
@@ -0,0 +1,102 @@
+"""
+Internal result types of the analysis pipeline.
+
+The pipeline builds these lean __slots__ dataclasses instead of Pydantic
+models: the server constructs every value itself, so validating them again
+is wasted work. Their fields mirror the public response models in main.py
+name for name and in the same order; serialization.py encodes them straight
+to JSON against those models.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from language import DEFAULT_LANGUAGE
+from passages import PassageMatch
+from semantic import ParaphraseSimilarity
+from suffix import CopiedText
+
+
+@dataclass(slots=True)
+class SerpResult:
+    """SERP preview with CTR prediction (see SerpPreview)"""
+    meta_title: str
+    meta_description: str
+    url_slug: str
+    ctr_score: float
+    title_length: int
+    description_length: int
+    title_issues: List[str]
+    description_issues: List[str]
+
+
+@dataclass(slots=True)
+class StructureResult:
+    """Structure of an HTML or Markdown page (see DocumentStructure)"""
+    title: Optional[str]
+    meta_description: Optional[str]
+    headings: List[Tuple[int, str]]  # (level, text)
+    internal_links: int
+    external_links: int
+
+
+@dataclass(slots=True)
+class CoverageResult:
+    """Parts of the analysis computed before the deadline (see AnalysisCoverage)"""
+    complete: bool
+    plagiarism_tiers: List[str]
+    approximated: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    deadline_ms: Optional[float] = None
+    elapsed_ms: Optional[float] = None
+
+
+@dataclass(slots=True)
+class SentenceReadabilityResult:
+    """Readability of one sentence (see SentenceReadability)"""
+    start: int
+    end: int
+    paragraph: int
+    words: int
+    syllables: int
+    syllables_per_word: float
+    readability: float
+
+
+@dataclass(slots=True)
+class ParagraphReadabilityResult:
+    """Readability of one paragraph (see ParagraphReadability)"""
+    start: int
+    end: int
+    sentences: int
+    words: int
+    sentence_length: float
+    syllables_per_word: float
+    readability: float
+
+
+@dataclass(slots=True)
+class ReadabilityDetailsResult:
+    """Per-sentence and per-paragraph readability (see ReadabilityDetails)"""
+    sentences: List[SentenceReadabilityResult]
+    paragraphs: List[ParagraphReadabilityResult]
+    hardest_sentences: List[int]
+
+
+@dataclass(slots=True)
+class AnalysisResult:
+    """Result of analyzing one document (see AnalyzeResponse)"""
+    readability: float
+    top_keywords: List[Tuple[str, int]]
+    keyword_density: Dict[str, float]
+    plagiarism_score: float
+    final_score: float
+    suggestions: List[str]
+    serp_preview: SerpResult
+    plagiarism_matches: Optional[List[PassageMatch]] = None
+    language: str = DEFAULT_LANGUAGE
+    coverage: Optional[CoverageResult] = None
+    structure: Optional[StructureResult] = None
+    readability_details: Optional[ReadabilityDetailsResult] = None
+    copied_text: Optional[CopiedText] = None
+    paraphrase: Optional[ParaphraseSimilarity] = None
@@ -0,0 +1,399 @@
+"""
+Paraphrase-aware similarity with hashed features and random projection.
+
+Rewording defeats the exact 5-gram and difflib tiers of check_plagiarism:
+a sentence with swapped word order, changed inflections or a few
+replaced words shares almost no 5-gram and a low difflib ratio with its
+source. This module compares texts by overlapping vocabulary instead,
+without any model download:
+
+1. Every sentence is hashed into a sparse TF-IDF vector of word
+   unigrams, word bigrams and character 3-5-grams (feature hashing into
+   FEATURES buckets; IDF from the reference sentences).
+2. A seeded sparse random projection (NONZEROS entries of +/-1 per
+   bucket) maps the sparse vectors to dense DIMENSIONS-wide sketches
+   whose dot products approximate the cosine similarity of the sparse
+   vectors.
+3. Reference sentence and document sketches are computed once; an input
+   costs one batched matrix product per batch of sentences.
+
+The projection is linear, so a document's sketch is the sum of its
+sentence sketches and streamed input can be matched sentence by
+sentence. The index can be saved (`python semantic.py --out index.npz`)
+and loaded by the server through SEMANTIC_INDEX.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bloom import mix64
+from streaming import normalize_word
+
+# Hash buckets of the sparse feature vectors
+FEATURES = 1 << 15
+
+# Width of the dense sketches
+DIMENSIONS = 512
+
+# Nonzero entries per bucket in the projection; dense projections cost
+# DIMENSIONS multiply-adds per feature, sparse ones NONZEROS
+NONZEROS = 32
+
+# Seed of the random projection; an index only matches sketches of its own seed
+DEFAULT_SEED = 1
+
+# Character n-gram sizes (over UTF-8 bytes, word boundaries marked by spaces)
+CHAR_NGRAMS = (3, 4, 5)
+
+# Sentences with fewer words are too short to call paraphrases
+MIN_SENTENCE_WORDS = 3
+
+# Sketch cosine from which an input sentence counts as a paraphrase
+DEFAULT_THRESHOLD = 0.35
+
+# Input sentences sketched per batch, and reference sketches per product
+BATCH_SENTENCES = 256
+REFERENCE_BLOCK = 8192
+
+_UNIGRAM_TAG = np.uint64(1 << 56)
+_BIGRAM_TAG = np.uint64(2 << 56)
+
+
+def paraphrase_weight() -> float:
+    """
+    Share of the originality component scored by paraphrased sentences (PARAPHRASE_WEIGHT).
+
+    Returns:
+        float: Weight between 0 (default: scores unchanged) and 1
+    """
+    value = os.environ.get('PARAPHRASE_WEIGHT')
+    return min(1.0, max(0.0, float(value))) if value else 0.0
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into cleaned sentences the way check_plagiarism does"""
+    sentences = (' '.join(normalize_word(sentence).split()) for sentence in text.split('.'))
+    return [sentence for sentence in sentences if sentence]
+
+
+def hashed_features(sentences: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Hash the features of cleaned sentences into buckets.
+
+    Args:
+        sentences: Cleaned sentences (lowercase, no punctuation, single spaces)
+
+    Returns:
+        Tuple of (sentence index, feature bucket) arrays, one entry per
+        feature occurrence
+    """
+    segments, keys = [], []
+
+    # Character n-grams: up to 8 bytes pack exactly into one uint64 key
+    encoded = [f' {sentence} '.encode('utf-8') for sentence in sentences]
+    data = np.frombuffer(b''.join(encoded), dtype=np.uint8).astype(np.uint64)
+    owner = np.repeat(np.arange(len(encoded)), [len(chunk) for chunk in encoded])
+    for n in CHAR_NGRAMS:
+        count = len(data) - n + 1
+        if count <= 0:
+            continue
+        packed = np.full(count, n << 56, dtype=np.uint64)
+        for offset in range(n):
+            packed |= data[offset:offset + count] << np.uint64(8 * offset)
+        inside = owner[:count] == owner[n - 1:n - 1 + count]
+        segments.append(owner[:count][inside])
+        keys.append(packed[inside])
+
+    # Word unigrams and bigrams
+    words = [sentence.split() for sentence in sentences]
+    word_owner = np.repeat(np.arange(len(words)), [len(sentence_words) for sentence_words in words])
+    word_hashes = np.fromiter(
+        (zlib.crc32(word.encode('utf-8')) for sentence_words in words for word in sentence_words),
+        dtype=np.uint64, count=len(word_owner)
+    )
+    segments.append(word_owner)
+    keys.append(word_hashes | _UNIGRAM_TAG)
+    same = word_owner[:-1] == word_owner[1:]
+    segments.append(word_owner[:-1][same])
+    keys.append(mix64(word_hashes[:-1][same] | _BIGRAM_TAG) ^ word_hashes[1:][same])
+
+    buckets = (mix64(np.concatenate(keys)) % np.uint64(FEATURES)).astype(np.int64)
+    return np.concatenate(segments).astype(np.int64), buckets
+
+
+def _term_counts(sentences: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Distinct (sentence, bucket) pairs, sorted by sentence, with their counts"""
+    segments, buckets = hashed_features(sentences)
+    pairs, counts = np.unique(segments * FEATURES + buckets, return_counts=True)
+    return pairs // FEATURES, pairs % FEATURES, counts
+
+
+def _normalize(sketches: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(sketches, axis=-1, keepdims=True)
+    return sketches / np.where(norms > 0, norms, 1)
+
+
+@dataclass(slots=True)
+class ParaphraseSimilarity:
+    """Reworded overlap between an input and the reference documents"""
+    max_similarity: float  # Sketch cosine of the input and its closest reference document
+    closest_source: Optional[str]  # Closest reference document
+    paraphrased_sentences: int  # Input sentences close to a reference sentence, reworded or not
+    compared_sentences: int  # Input sentences of at least MIN_SENTENCE_WORDS words
+    paraphrased_fraction: float  # paraphrased_sentences / compared_sentences
+
+
+class SemanticIndex:
+    """
+    Sentence and document sketches of a reference corpus.
+
+    Args:
+        documents: Mapping of document name to raw text
+        threshold: Sketch cosine from which a sentence counts as a paraphrase
+        seed: Seed of the random projection
+    """
+
+    def __init__(
+        self,
+        documents: Optional[Dict[str, str]] = None,
+        threshold: float = DEFAULT_THRESHOLD,
+        seed: int = DEFAULT_SEED
+    ):
+        self.threshold = threshold
+        self.seed = seed
+        # Sparse projection: each bucket adds +/-1 to one cell in each of
+        # NONZEROS equal slices of the sketch
+        rng = np.random.default_rng(seed)
+        width = DIMENSIONS // NONZEROS
+        self.positions = (np.arange(NONZEROS) * width + rng.integers(0, width, size=(FEATURES, NONZEROS))).astype(np.int16)
+        self.signs = rng.choice(np.array([-1, 1], dtype=np.int8), size=(FEATURES, NONZEROS))
+
+        self.names: List[str] = []
+        sentences, owners = [], []
+        for name, text in (documents or {}).items():
+            document_sentences = split_sentences(text)
+            sentences.extend(document_sentences)
+            owners.extend([len(self.names)] * len(document_sentences))
+            self.names.append(name)
+        owners = np.array(owners, dtype=np.int64)
+
+        # Smoothed inverse document frequency over the reference sentences
+        frequency = np.zeros(FEATURES, dtype=np.int64)
+        for start in range(0, len(sentences), BATCH_SENTENCES):
+            _, buckets, _ = _term_counts(sentences[start:start + BATCH_SENTENCES])
+            frequency += np.bincount(buckets, minlength=FEATURES)
+        self.idf = (np.log((1 + len(sentences)) / (1 + frequency)) + 1).astype(np.float32)
+
+        raw = self.sketch(sentences)
+        documents_raw = np.zeros((len(self.names), DIMENSIONS), dtype=np.float32)
+        np.add.at(documents_raw, owners, raw)
+        self.document_sketches = _normalize(documents_raw)
+
+        compared = np.array([len(sentence.split()) >= MIN_SENTENCE_WORDS for sentence in sentences], dtype=bool)
+        self.sentence_sketches = _normalize(raw[compared])
+        self.sentence_owners = owners[compared]
+
+    @classmethod
+    def from_env(cls, documents: Dict[str, str]) -> 'SemanticIndex':
+        """
+        Load the index saved at SEMANTIC_INDEX, or index `documents`.
+
+        PARAPHRASE_THRESHOLD overrides the sketch cosine from which a
+        sentence counts as a paraphrase.
+        """
+        value = os.environ.get('PARAPHRASE_THRESHOLD')
+        threshold = float(value) if value else DEFAULT_THRESHOLD
+        path = os.environ.get('SEMANTIC_INDEX')
+        if path:
+            return cls.load(path, threshold=threshold)
+        return cls(documents, threshold=threshold)
+
+    def _project(self, sentences: Sequence[str]) -> np.ndarray:
+        """Raw (unnormalized) sketches of one batch of sentences"""
+        segments, buckets, counts = _term_counts(sentences)
+        n_rows = len(sentences)
+        weights = counts * self.idf[buckets]
+        cells = segments[:, None] * DIMENSIONS + self.positions[buckets]
+        sketches = np.bincount(
+            cells.ravel(), weights=(self.signs[buckets] * weights[:, None]).ravel(), minlength=n_rows * DIMENSIONS
+        )
+        return (sketches / math.sqrt(NONZEROS)).astype(np.float32).reshape(n_rows, DIMENSIONS)
+
+    def sketch(self, sentences: Sequence[str]) -> np.ndarray:
+        """
+        Raw sketches of cleaned sentences.
+
+        Returns:
+            np.ndarray: (len(sentences), DIMENSIONS) float32; sum rows for a
+            document sketch and normalize rows before comparing
+        """
+        batches = [
+            self._project(sentences[start:start + BATCH_SENTENCES])
+            for start in range(0, len(sentences), BATCH_SENTENCES)
+        ]
+        return np.concatenate(batches) if batches else np.zeros((0, DIMENSIONS), dtype=np.float32)
+
+    def best_sentence_matches(self, sketches: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Closest reference sentence of each normalized sketch.
+
+        Returns:
+            Tuple of (cosine, reference document index) per sketch
+        """
+        best = np.zeros(len(sketches), dtype=np.float32)
+        owners = np.full(len(sketches), -1, dtype=np.int64)
+        for start in range(0, len(self.sentence_sketches), REFERENCE_BLOCK):
+            block = self.sentence_sketches[start:start + REFERENCE_BLOCK]
+            similarities = sketches @ block.T
+            closest = similarities.argmax(axis=1)
+            scores = similarities[np.arange(len(sketches)), closest]
+            better = scores > best
+            best[better] = scores[better]
+            owners[better] = self.sentence_owners[start + closest[better]]
+        return best, owners
+
+    def matcher(self) -> 'ParaphraseMatcher':
+        """Start matching an input fed one sentence at a time"""
+        return ParaphraseMatcher(self)
+
+    def detect(self, text: str) -> ParaphraseSimilarity:
+        """
+        Measure the reworded overlap of `text` with the references.
+
+        Args:
+            text: Input text
+
+        Returns:
+            ParaphraseSimilarity: Closest document and paraphrased sentences
+        """
+        matcher = self.matcher()
+        for sentence in split_sentences(text):
+            matcher.push(sentence)
+        return matcher.result()
+
+    def save(self, path) -> None:
+        """Save the index as a NumPy .npz archive (loadable without pickle)"""
+        np.savez_compressed(
+            path,
+            names=np.array(json.dumps(self.names)),
+            seed=np.array(self.seed),
+            idf=self.idf,
+            document_sketches=self.document_sketches,
+            sentence_sketches=self.sentence_sketches,
+            sentence_owners=self.sentence_owners
+        )
+
+    @classmethod
+    def load(cls, path, threshold: float = DEFAULT_THRESHOLD) -> 'SemanticIndex':
+        """Load an index written by `save`"""
+        with np.load(path, allow_pickle=False) as archive:
+            arrays = dict(archive)
+        index = cls(threshold=threshold, seed=int(arrays['seed']))
+        index.names = json.loads(str(arrays['names']))
+        index.idf = arrays['idf']
+        index.document_sketches = arrays['document_sketches']
+        index.sentence_sketches = arrays['sentence_sketches']
+        index.sentence_owners = arrays['sentence_owners']
+        return index
+
+
+class ParaphraseMatcher:
+    """
+    Incremental paraphrase matching for streamed input.
+
+    Feed cleaned sentences in document order with `push`; they are
+    sketched and compared in batches of BATCH_SENTENCES, and only the
+    running document sketch is kept.
+
+    Args:
+        index: Sketches of the reference corpus
+    """
+
+    def __init__(self, index: SemanticIndex):
+        self.index = index
+        self.compared_sentences = 0
+        self.paraphrased_sentences = 0
+        self._document = np.zeros(DIMENSIONS, dtype=np.float64)
+        self._pending: List[str] = []
+
+    def push(self, sentence: str) -> None:
+        """Queue the next cleaned sentence"""
+        if not sentence:
+            return
+        self._pending.append(sentence)
+        if len(self._pending) >= BATCH_SENTENCES:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        sentences = self._pending
+        self._pending = []
+
+        raw = self.index.sketch(sentences)
+        self._document += raw.sum(axis=0, dtype=np.float64)
+        compared = np.array([len(sentence.split()) >= MIN_SENTENCE_WORDS for sentence in sentences], dtype=bool)
+        if compared.any():
+            best, _ = self.index.best_sentence_matches(_normalize(raw[compared]))
+            self.compared_sentences += int(compared.sum())
+            self.paraphrased_sentences += int(np.count_nonzero(best >= self.index.threshold))
+
+    def result(self) -> ParaphraseSimilarity:
+        """Paraphrase similarity of the sentences pushed so far"""
+        self._flush()
+        max_similarity, closest_source = 0.0, None
+        if self.index.names and self._document.any():
+            similarities = self.index.document_sketches @ _normalize(self._document).astype(np.float32)
+            closest = int(similarities.argmax())
+            max_similarity = max(0.0, float(similarities[closest]))
+            closest_source = self.index.names[closest] if max_similarity > 0 else None
+        return ParaphraseSimilarity(
+            max_similarity=round(max_similarity, 4),
+            closest_source=closest_source,
+            paraphrased_sentences=self.paraphrased_sentences,
+            compared_sentences=self.compared_sentences,
+            paraphrased_fraction=(
+                round(self.paraphrased_sentences / self.compared_sentences, 4) if self.compared_sentences else 0.0
+            )
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Build a paraphrase index from the command line"""
+    parser = argparse.ArgumentParser(description="Build the sentence and document sketches of a reference corpus.")
+    parser.add_argument('--corpus', type=Path,
+                        help="Directory of .txt/.md files or JSONL of {url, text} (default: the sample texts)")
+    parser.add_argument('--out', type=Path, required=True, help="Index file to write (.npz), for SEMANTIC_INDEX")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help="Seed of the random projection")
+    args = parser.parse_args(argv)
+
+    if args.corpus is not None:
+        from site_audit import load_pages
+        documents = dict(load_pages(args.corpus))
+    else:
+        from main import SAMPLE_TEXTS
+        documents = SAMPLE_TEXTS
+
+    index = SemanticIndex(documents, seed=args.seed)
+    index.save(args.out)
+    json.dump({
+        'documents': len(index.names),
+        'sentences': len(index.sentence_sketches),
+        'dimensions': DIMENSIONS,
+        'out': str(args.out),
+    }, sys.stdout, indent=2)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
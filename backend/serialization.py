@@ -0,0 +1,154 @@
+"""
+Fast JSON serialization of API responses.
+
+Endpoints keep declaring their Pydantic response models, so the OpenAPI
+schema and the JSON clients receive are unchanged. The results themselves
+are built by the server (see results.py) and need no validation, so
+instead of letting FastAPI construct, re-validate and dump a model, an
+encoder is compiled once per response model from its fields. It reads the
+result's attributes in schema order and applies only the coercions that
+change the JSON output (ints in float fields, tuples as arrays, and NaN or
+infinite floats as null, as Pydantic writes them).
+
+Python 3.10 or newer is required (types.UnionType here, and
+`dataclass(slots=True)` in results.py); vercel.json pins the runtime.
+
+orjson is used for the final dump when it is installed; otherwise the
+standard json module with Starlette's JSONResponse settings.
+"""
+
+import json
+import math
+import types
+import typing
+from typing import Any, Callable, Dict, Optional, Type
+
+from fastapi import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # Optional dependency
+    orjson = None
+
+Encoder = Callable[[Any], Any]
+
+# Global cache of compiled encoders per response model
+_encoders: Dict[Type[BaseModel], Encoder] = {}
+
+
+def _float(value: Any) -> Optional[float]:
+    """A float field value, with NaN and infinities as None (JSON null) like Pydantic"""
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def _compile(annotation: Any) -> Optional[Encoder]:
+    """Converter for values of `annotation`, or None when they pass through as they are"""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return get_encoder(annotation)
+    if annotation is float:
+        return _float
+
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+
+    if origin in (typing.Union, types.UnionType):
+        members = [arg for arg in args if arg is not type(None)]
+        if len(members) != 1:
+            return None
+        inner = _compile(members[0])
+        if inner is None:
+            return None
+        return lambda value: None if value is None else inner(value)
+
+    if origin in (list, tuple, set, frozenset):
+        if origin is tuple and args and args[-1] is not Ellipsis:
+            converters = [_compile(arg) for arg in args]
+            if not any(converters):
+                return list
+            return lambda value: [
+                converter(item) if converter else item
+                for converter, item in zip(converters, value)
+            ]
+        item = _compile(args[0]) if args else None
+        if item is None:
+            return list
+        return lambda value: [item(element) for element in value]
+
+    if origin is dict:
+        item = _compile(args[1]) if len(args) == 2 else None
+        if item is None:
+            return dict
+        return lambda value: {key: item(element) for key, element in value.items()}
+
+    return None
+
+
+def get_encoder(model: Type[BaseModel]) -> Encoder:
+    """
+    Get the encoder of a response model, compiling it on first use.
+    Encoders are cached per model for subsequent calls.
+
+    The encoder accepts any object with the model's field names as
+    attributes (results.py dataclasses, Pydantic models) or a tuple of the
+    field values in model order, and returns plain JSON-ready data.
+
+    Args:
+        model: Pydantic response model
+
+    Returns:
+        Encoder: Callable converting a result to dicts, lists and scalars
+    """
+    encoder = _encoders.get(model)
+    if encoder is not None:
+        return encoder
+
+    fields = []  # (name, converter or None), in model order
+
+    def encode(result: Any) -> Dict[str, Any]:
+        if isinstance(result, tuple):
+            values = result
+        else:
+            values = [getattr(result, name) for name, _ in fields]
+        data = {}
+        for (name, converter), value in zip(fields, values):
+            data[name] = value if converter is None or value is None else converter(value)
+        return data
+
+    # Registered before compiling the fields so recursive models resolve
+    _encoders[model] = encode
+    fields.extend((name, _compile(info.annotation)) for name, info in model.model_fields.items())
+    return encode
+
+
+def dump_json(content: Any) -> bytes:
+    """Serialize JSON-ready data to UTF-8 bytes"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(',', ':'),
+    ).encode('utf-8')
+
+
+def json_response(model: Type[BaseModel], result: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Encode a server-built result as a JSON response of `model`'s schema.
+
+    Args:
+        model: Response model the endpoint declares
+        result: Result object with the model's fields
+        headers: Optional extra response headers
+
+    Returns:
+        Response whose body is the encoded JSON
+    """
+    return Response(
+        content=dump_json(get_encoder(model)(result)),
+        media_type='application/json',
+        headers=headers
+    )
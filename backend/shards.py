@@ -0,0 +1,453 @@
+"""
+Sharded reference index with scatter-gather plagiarism queries.
+
+When the reference corpus no longer fits one process, it is partitioned by
+document name into N shards, each served by its own worker process (a
+local stand-in for a node). A query is scattered to every shard at once;
+each shard scores the input against its own documents with the same
+tiers as check_plagiarism and returns its best documents. The coordinator
+merges these per-document maxima.
+
+Shards answer independently, so the coordinator can stop waiting at a
+deadline: shards that have not answered by then are reported as missing
+and the merged result is a lower bound computed from the shards that did.
+
+Protocol (multiprocessing pipes):
+    shard -> coordinator   ('ready', stats) once the index is built
+    coordinator -> shard   ('query', request_id, text, weights, top_k)
+    shard -> coordinator   ('result', request_id, [(document, similarity), ...])
+    shard -> coordinator   ('error', request_id, message) if the query raised;
+                           the shard keeps serving and the coordinator
+                           reports it missing for that query
+    coordinator -> shard   None to stop
+"""
+
+import hashlib
+import heapq
+import itertools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, wait
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from memo import StageCache, content_key
+from shingles import jaccard_similarity, shingle_set
+from streaming import StreamingReference, normalize_word
+
+# Order in which tier scores are added up, as in check_plagiarism, so
+# sharded and local scores agree to the last bit
+COMBINE_ORDER = ('ngram', 'sentence', 'sequence')
+
+# Seconds to wait for a shard process to build its index
+STARTUP_TIMEOUT = 120.0
+
+# Default seconds to wait for shard answers before returning a partial result
+DEFAULT_QUERY_TIMEOUT = 2.0
+
+
+class ShardUnavailable(Exception):
+    """Raised for queries to a shard whose process has stopped"""
+
+
+class ShardQueryError(Exception):
+    """Raised for queries a shard failed to answer (the shard keeps serving)"""
+
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+def shard_of(name: str, n_shards: int) -> int:
+    """Shard a document belongs to (stable across processes and runs)"""
+    digest = hashlib.blake2b(name.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % n_shards
+
+
+def partition(documents: Dict[str, str], n_shards: int) -> List[Dict[str, str]]:
+    """Split documents into `n_shards` partitions by name"""
+    partitions = [{} for _ in range(n_shards)]
+    for name, text in documents.items():
+        partitions[shard_of(name, n_shards)][name] = text
+    return partitions
+
+
+def load_partition(corpus: str, shard: int, n_shards: int) -> Dict[str, str]:
+    """
+    Load only the documents of one shard from a corpus on disk.
+
+    Args:
+        corpus: Directory of .txt/.md files or JSONL of {"url", "text"}
+            (the format site_audit.load_pages reads)
+        shard: Shard index
+        n_shards: Number of shards
+
+    Returns:
+        dict: Mapping of document name to text for this shard
+    """
+    from site_audit import load_pages
+
+    return {
+        name: text for name, text in load_pages(Path(corpus))
+        if shard_of(name, n_shards) == shard
+    }
+
+
+class ShardIndex:
+    """
+    Plagiarism index over the documents of one shard.
+
+    Args:
+        documents: Mapping of document name to raw text
+        n: Shingle size in words
+    """
+
+    def __init__(self, documents: Dict[str, str], n: int = 5):
+        # Shards never take the Bloom fast path (see tier_scores), so no filter
+        self.reference = StreamingReference(documents, n=n, with_filter=False)
+        self.sentence_matches = StageCache('shard_sentence_matches', 8192, 'lfu')
+
+    def stats(self) -> Dict[str, int]:
+        """Document and sentence counts, used to estimate query cost"""
+        return {
+            'documents': len(self.reference.cleaned),
+            'sentences': sum(len(sentences) for sentences in self.reference.sentences.values()),
+            'chars': sum(len(cleaned) for cleaned in self.reference.cleaned.values()),
+        }
+
+    def _best_sentence_matches(self, cleaned_sentence: str) -> Dict[str, float]:
+        def compute() -> Dict[str, float]:
+            return {
+                name: max(
+                    (SequenceMatcher(None, cleaned_sentence, sentence).ratio() for sentence in sentences),
+                    default=0.0
+                )
+                for name, sentences in self.reference.sentences.items()
+            }
+
+        return self.sentence_matches.get_or_compute(content_key(cleaned_sentence), compute)
+
+    def tier_scores(self, text: str, tiers: Sequence[str]) -> Dict[str, Dict[str, float]]:
+        """
+        Score `text` against every document of the shard, as check_plagiarism does.
+
+        Shards always compute the requested tiers: the Bloom-filter fast path
+        of check_plagiarism would be decided per shard, on hit rates that
+        differ from the whole corpus', and sharded scores would no longer
+        match local ones.
+
+        Args:
+            text: Input text
+            tiers: Tiers to compute ('ngram', 'sequence', 'sentence')
+
+        Returns:
+            dict: Similarity (0-1) per tier and document
+        """
+        reference = self.reference
+        words = [word for word in (normalize_word(raw) for raw in text.split()) if word]
+        scores = {}
+
+        if 'ngram' in tiers:
+            input_shingles = shingle_set(reference.vocabulary.encode(words), reference.n)
+            scores['ngram'] = {
+                name: jaccard_similarity(input_shingles, shingles)
+                for name, shingles in reference.shingles.items()
+            }
+
+        if 'sequence' in tiers:
+            cleaned_input = ' '.join(words)
+            scores['sequence'] = {
+                name: SequenceMatcher(None, cleaned_input, cleaned).ratio()
+                for name, cleaned in reference.cleaned.items()
+            }
+
+        if 'sentence' in tiers:
+            input_sentences = [s.strip() for s in text.split('.') if s.strip()]
+            best_matches = []
+            for sentence in input_sentences:
+                cleaned_sentence = ' '.join(normalize_word(sentence).split())
+                if len(cleaned_sentence.split()) >= 3:  # Skip very short sentences
+                    best_matches.append(self._best_sentence_matches(cleaned_sentence))
+            scores['sentence'] = {}
+            for name in reference.sentences:
+                significant = [matches[name] for matches in best_matches if matches[name] > 0.5]
+                scores['sentence'][name] = sum(significant) / len(input_sentences) if significant else 0.0
+
+        return scores
+
+    def top_documents(self, text: str, weights: Dict[str, float], top_k: int = 5) -> List[Tuple[str, float]]:
+        """
+        The shard's most similar documents by weighted tier similarity.
+
+        Args:
+            text: Input text
+            weights: Weight per tier to compute (in PLAGIARISM_TIERS order)
+            top_k: Number of documents returned
+
+        Returns:
+            List of (document name, similarity 0-1), most similar first
+        """
+        scores = self.tier_scores(text, list(weights))
+        total_weight = sum(weights.values())
+        combined = []
+        for name in self.reference.cleaned:
+            similarity = 0.0
+            for tier in COMBINE_ORDER:
+                if tier in scores:
+                    similarity += scores[tier][name] * weights[tier]
+            combined.append((name, similarity / total_weight))
+        return heapq.nlargest(top_k, combined, key=lambda item: item[1])
+
+
+def serve_shard(connection, documents: Optional[Dict[str, str]], corpus: Optional[str], shard: int, n_shards: int) -> None:
+    """Entry point of a shard process: build the index, then answer queries"""
+    if documents is None:
+        documents = load_partition(corpus, shard, n_shards)
+    index = ShardIndex(documents)
+    connection.send(('ready', index.stats()))
+
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        _, request_id, text, weights, top_k = message
+        try:
+            matches = index.top_documents(text, weights, top_k)
+        except Exception as exc:
+            connection.send(('error', request_id, f"{type(exc).__name__}: {exc}"))
+            continue
+        connection.send(('result', request_id, matches))
+
+
+@dataclass(slots=True)
+class ShardedResult:
+    """Merged answer of a scatter-gather query"""
+    matches: List[Tuple[str, float]]  # (document, similarity 0-1), most similar first
+    shards: int
+    answered: List[int] = field(default_factory=list)
+    missing: List[int] = field(default_factory=list)  # Shards that missed the deadline, failed or are down
+
+    @property
+    def complete(self) -> bool:
+        return not self.missing
+
+    @property
+    def max_similarity(self) -> float:
+        return self.matches[0][1] if self.matches else 0.0
+
+
+class _Shard:
+    """Coordinator-side handle of one shard process"""
+
+    def __init__(self, index: int, process, connection):
+        self.index = index
+        self.process = process
+        self.connection = connection
+        self.stats: Dict[str, int] = {}
+        self.alive = True
+        self._pending: Dict[int, Future] = {}
+        self._send_lock = threading.Lock()
+        self._reader = None
+
+    def start_reader(self) -> None:
+        self._reader = threading.Thread(target=self._read, name=f'shard-{self.index}-reader', daemon=True)
+        self._reader.start()
+
+    def _read(self) -> None:
+        while True:
+            try:
+                kind, request_id, payload = self.connection.recv()
+            except (EOFError, OSError):
+                break
+            future = self._pending.pop(request_id, None)
+            if future is None:
+                continue
+            if kind == 'error':
+                future.set_exception(ShardQueryError(f"Shard {self.index}: {payload}"))
+            else:
+                future.set_result(payload)
+
+        self.alive = False
+        for request_id in list(self._pending):
+            future = self._pending.pop(request_id, None)
+            if future is not None and not future.done():
+                future.set_exception(ShardUnavailable(f"Shard {self.index} stopped"))
+
+    def submit(self, request_id: int, text: str, weights: Dict[str, float], top_k: int) -> Future:
+        future = Future()
+        if not self.alive:
+            future.set_exception(ShardUnavailable(f"Shard {self.index} stopped"))
+            return future
+        self._pending[request_id] = future
+        try:
+            with self._send_lock:
+                self.connection.send(('query', request_id, text, weights, top_k))
+        except (OSError, ValueError):
+            self._pending.pop(request_id, None)
+            self.alive = False
+            future.set_exception(ShardUnavailable(f"Shard {self.index} stopped"))
+        return future
+
+    def forget(self, request_id: int) -> None:
+        """Drop a request whose answer is no longer awaited"""
+        self._pending.pop(request_id, None)
+
+
+class ShardCoordinator:
+    """
+    Scatter plagiarism queries over shard processes and gather the results.
+
+    Build with `start()`; the shard processes are spawned, build their
+    partition's index and then serve queries until `close()`.
+
+    Args:
+        shards: Handles of ready shard processes
+        timeout: Default seconds to wait for shard answers
+    """
+
+    def __init__(self, shards: List[_Shard], timeout: float = DEFAULT_QUERY_TIMEOUT):
+        self.shards = shards
+        self.timeout = timeout
+        self._request_ids = itertools.count(1)
+
+    @classmethod
+    def start(
+        cls,
+        n_shards: int,
+        documents: Optional[Dict[str, str]] = None,
+        corpus: Optional[str] = None,
+        timeout: float = DEFAULT_QUERY_TIMEOUT
+    ) -> 'ShardCoordinator':
+        """
+        Start `n_shards` shard processes over a corpus.
+
+        Args:
+            n_shards: Number of shards (processes)
+            documents: Corpus as a mapping of name to text, partitioned here
+            corpus: Path of a corpus on disk; each shard loads only its own
+                partition, so no process ever holds the whole corpus
+            timeout: Default seconds to wait for shard answers
+
+        Returns:
+            ShardCoordinator with every shard ready
+        """
+        if (documents is None) == (corpus is None):
+            raise ValueError("Give either documents or corpus")
+
+        context = multiprocessing.get_context('spawn')
+        partitions = partition(documents, n_shards) if documents is not None else [None] * n_shards
+        shards = []
+        for index in range(n_shards):
+            parent, child = context.Pipe()
+            process = context.Process(
+                target=serve_shard,
+                args=(child, partitions[index], corpus, index, n_shards),
+                name=f'plagiarism-shard-{index}',
+                daemon=True
+            )
+            process.start()
+            child.close()
+            shards.append(_Shard(index, process, parent))
+
+        for shard in shards:
+            if not shard.connection.poll(STARTUP_TIMEOUT):
+                raise ShardUnavailable(f"Shard {shard.index} did not start")
+            _, shard.stats = shard.connection.recv()
+            shard.start_reader()
+        return cls(shards, timeout=timeout)
+
+    @classmethod
+    def from_env(cls, documents: Dict[str, str]) -> Optional['ShardCoordinator']:
+        """
+        Start the shards configured by environment variables.
+
+        PLAGIARISM_SHARDS is the number of shard processes (0, the default,
+        keeps the index in the serving process), PLAGIARISM_CORPUS an
+        optional corpus path used instead of `documents`, and
+        PLAGIARISM_SHARD_TIMEOUT_MS the default wait for shard answers.
+
+        Returns:
+            ShardCoordinator, or None when sharding is off
+        """
+        n_shards = int(_env_float('PLAGIARISM_SHARDS', 0))
+        if n_shards <= 0:
+            return None
+        corpus = os.environ.get('PLAGIARISM_CORPUS') or None
+        return cls.start(
+            n_shards,
+            documents=None if corpus else documents,
+            corpus=corpus,
+            timeout=_env_float('PLAGIARISM_SHARD_TIMEOUT_MS', DEFAULT_QUERY_TIMEOUT * 1000) / 1000
+        )
+
+    def stats(self) -> Dict[str, int]:
+        """Corpus totals and the largest shard's sizes (which bound query latency)"""
+        return {
+            'shards': len(self.shards),
+            'alive': sum(shard.alive for shard in self.shards),
+            'documents': sum(shard.stats['documents'] for shard in self.shards),
+            'max_shard_documents': max(shard.stats['documents'] for shard in self.shards),
+            'max_shard_sentences': max(shard.stats['sentences'] for shard in self.shards),
+        }
+
+    def query(
+        self,
+        text: str,
+        weights: Dict[str, float],
+        top_k: int = 5,
+        timeout: Optional[float] = None
+    ) -> ShardedResult:
+        """
+        Query every shard concurrently and merge their best documents.
+
+        Args:
+            text: Input text
+            weights: Weight per tier to compute
+            top_k: Documents returned
+            timeout: Seconds to wait for shards (default: the coordinator's);
+                late or failing shards are reported as missing and the result is partial
+
+        Returns:
+            ShardedResult with the overall most similar documents
+        """
+        request_id = next(self._request_ids)
+        futures = {
+            shard.index: shard.submit(request_id, text, weights, top_k)
+            for shard in self.shards
+        }
+        wait(futures.values(), timeout=self.timeout if timeout is None else timeout)
+
+        result = ShardedResult(matches=[], shards=len(self.shards))
+        candidates = []
+        for shard in self.shards:
+            future = futures[shard.index]
+            if future.done() and future.exception() is None:
+                result.answered.append(shard.index)
+                candidates.extend(future.result())
+            else:
+                shard.forget(request_id)
+                result.missing.append(shard.index)
+
+        # Ties are broken by name so the merge does not depend on arrival order
+        result.matches = sorted(candidates, key=lambda item: (-item[1], item[0]))[:top_k]
+        return result
+
+    def close(self) -> None:
+        """Stop the shard processes"""
+        for shard in self.shards:
+            try:
+                shard.connection.send(None)
+            except (OSError, ValueError):
+                pass
+        for shard in self.shards:
+            shard.process.join(timeout=5)
+            if shard.process.is_alive():
+                shard.process.terminate()
+            shard.connection.close()
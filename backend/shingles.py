@@ -0,0 +1,215 @@
+"""
+Rolling-hash shingling engine for the SEO Analyzer.
+
+Tokens are mapped to integer IDs, and word n-grams are hashed with a
+Rabin-Karp polynomial hash (mod 2^64) over the ID stream instead of being
+joined into strings. Shingle sets are stored as sorted, de-duplicated
+uint64 NumPy buffers, so overlaps between two texts are computed as
+vectorized merges rather than Python set operations on long strings.
+"""
+
+import hashlib
+from functools import lru_cache
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+# Odd 64-bit multiplier for the polynomial hash (golden-ratio constant)
+HASH_BASE = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+_UNKNOWN_BIT = 1 << 63
+
+# Key of the digest giving IDs to tokens outside the vocabulary
+_UNKNOWN_KEY = b'seo-analyzer-unknown-token'
+
+EMPTY_SHINGLES = np.empty(0, dtype=np.uint64)
+
+
+@lru_cache(maxsize=65536)
+def unknown_token_id(token: str) -> int:
+    """ID of a token outside the vocabulary (stable across processes and runs)"""
+    digest = hashlib.blake2b(token.encode('utf-8', 'surrogatepass'), digest_size=8, key=_UNKNOWN_KEY).digest()
+    return int.from_bytes(digest, 'big') | _UNKNOWN_BIT
+
+
+class TokenVocabulary:
+    """
+    Maps tokens to integer IDs.
+
+    Reference tokens are added with `add` and get small sequential IDs.
+    Other tokens are looked up without growing the vocabulary: they get an
+    ID from a keyed BLAKE2 digest with the top bit set, which is the same in
+    every process and run (unlike the salted built-in `hash`) and can never
+    collide with an assigned ID.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, token: str) -> int:
+        """Return the ID of `token`, assigning the next free ID if needed"""
+        token_id = self._ids.get(token)
+        if token_id is None:
+            token_id = len(self._ids) + 1
+            self._ids[token] = token_id
+        return token_id
+
+    def tokens(self) -> List[str]:
+        """Tokens in ID order, so `encode(tokens, grow=True)` rebuilds the vocabulary"""
+        return list(self._ids)
+
+    def lookup(self, token: str) -> int:
+        """Return the ID of `token` without adding it to the vocabulary"""
+        token_id = self._ids.get(token)
+        if token_id is None:
+            token_id = unknown_token_id(token)
+        return token_id
+
+    def encode(self, tokens: Iterable[str], grow: bool = False) -> np.ndarray:
+        """
+        Convert tokens to a uint64 ID array.
+
+        Args:
+            tokens: Normalized tokens
+            grow: Add unseen tokens to the vocabulary (use for reference texts)
+
+        Returns:
+            np.ndarray: Token IDs as uint64
+        """
+        convert = self.add if grow else self.lookup
+        return np.fromiter((convert(token) for token in tokens), dtype=np.uint64)
+
+
+def rolling_hashes(ids: np.ndarray, n: int = 5) -> np.ndarray:
+    """
+    Hash every n-gram of an ID array.
+
+    The hash of the n-gram starting at i is
+    ids[i] * B^(n-1) + ids[i+1] * B^(n-2) + ... + ids[i+n-1]  (mod 2^64),
+    evaluated with Horner's rule over shifted views of the array, which
+    gives the same values as the sequential Rabin-Karp rolling update.
+
+    Args:
+        ids: Token IDs as uint64
+        n: Shingle size
+
+    Returns:
+        np.ndarray: One uint64 hash per n-gram position
+    """
+    count = len(ids) - n + 1
+    if count <= 0:
+        return EMPTY_SHINGLES.copy()
+
+    base = np.uint64(HASH_BASE)
+    hashes = ids[0:count].copy()
+    for k in range(1, n):
+        hashes *= base
+        hashes += ids[k:k + count]
+    return hashes
+
+
+def shingle_set(ids: np.ndarray, n: int = 5) -> np.ndarray:
+    """Return the sorted, de-duplicated n-gram hashes of an ID array"""
+    return np.unique(rolling_hashes(ids, n))
+
+
+def intersection_size(shingles1: np.ndarray, shingles2: np.ndarray) -> int:
+    """Count hashes present in both sorted, de-duplicated shingle sets"""
+    if not len(shingles1) or not len(shingles2):
+        return 0
+    return int(np.intersect1d(shingles1, shingles2, assume_unique=True).size)
+
+
+def jaccard_similarity(shingles1: np.ndarray, shingles2: np.ndarray) -> float:
+    """
+    Jaccard similarity of two sorted, de-duplicated shingle sets.
+
+    Returns:
+        float: Similarity score (0-1)
+    """
+    if not len(shingles1) or not len(shingles2):
+        return 0.0
+
+    intersection = intersection_size(shingles1, shingles2)
+    union = len(shingles1) + len(shingles2) - intersection
+
+    return intersection / union if union > 0 else 0.0
+
+
+class RollingHasher:
+    """
+    Sequential Rabin-Karp hasher over a stream of token IDs.
+
+    Produces the same values as `rolling_hashes`, one position at a time,
+    for pipelines that see the tokens incrementally.
+
+    Args:
+        n: Shingle size
+    """
+
+    def __init__(self, n: int = 5):
+        self.n = n
+        self._window: List[int] = []
+        self._hash = 0
+        self._drop_factor = pow(HASH_BASE, n - 1, 1 << 64)
+
+    def push(self, token_id: int):
+        """
+        Add a token ID and return the hash of the n-gram ending at it.
+
+        Returns:
+            int or None: Shingle hash, or None until `n` IDs have been seen
+        """
+        if len(self._window) == self.n:
+            outgoing = self._window.pop(0)
+            self._hash = (self._hash - outgoing * self._drop_factor) & _MASK64
+
+        self._window.append(token_id)
+        self._hash = (self._hash * HASH_BASE + token_id) & _MASK64
+
+        return self._hash if len(self._window) == self.n else None
+
+
+class ShingleEngine:
+    """
+    Shingles texts into integer hash sets using a shared vocabulary.
+
+    Args:
+        n: Shingle size in words
+        vocabulary: Vocabulary shared with other engines or indexes
+    """
+
+    def __init__(self, n: int = 5, vocabulary: TokenVocabulary = None):
+        self.n = n
+        self.vocabulary = vocabulary if vocabulary is not None else TokenVocabulary()
+
+    def encode(self, words: List[str], grow: bool = False) -> np.ndarray:
+        """Convert normalized words to token IDs"""
+        return self.vocabulary.encode(words, grow=grow)
+
+    def shingles(self, words: List[str], grow: bool = False) -> np.ndarray:
+        """
+        Build the shingle set of a list of normalized words.
+
+        Args:
+            words: Normalized words (e.g. `clean_text(text).split()`)
+            grow: Add unseen words to the vocabulary (use for reference texts)
+
+        Returns:
+            np.ndarray: Sorted, de-duplicated uint64 shingle hashes
+        """
+        return shingle_set(self.encode(words, grow=grow), self.n)
+
+    def similarity(self, words1: List[str], words2: List[str]) -> float:
+        """
+        Jaccard similarity of the n-gram sets of two word lists.
+
+        Returns:
+            float: Similarity score (0-1)
+        """
+        if len(words1) < self.n or len(words2) < self.n:
+            return 0.0
+        return jaccard_similarity(self.shingles(words1), self.shingles(words2))
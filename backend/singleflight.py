@@ -0,0 +1,273 @@
+"""
+Single-flight request coalescing and superseded-revision cancellation.
+
+Identical analysis requests that arrive while one is already running
+(double clicks, the same draft open in several tabs) wait for that one
+computation instead of starting their own: `SingleFlight.run` keys the
+in-flight work and shares its result with every waiter.
+
+Clients can also tag requests with a session ID and a revision number.
+When a newer revision of a session arrives, the session's older requests
+are answered with `Superseded` at once, and a computation nobody waits
+for any more is cancelled: cancellation removes it from the admission
+queue if it is still waiting there, and makes the analysis stop at its
+next stage boundary (`check_cancelled`) if it is already running in a
+worker thread. Work shared with other clients keeps running for them.
+"""
+
+import asyncio
+import contextvars
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+# Sessions whose latest revision is remembered (least recently used are dropped)
+DEFAULT_MAX_SESSIONS = 4096
+
+_active_token: contextvars.ContextVar = contextvars.ContextVar('active_cancel_token', default=None)
+
+
+class Superseded(Exception):
+    """Raised when a newer revision of the same session makes a request obsolete"""
+
+    def __init__(self, session: str, revision: int, latest: int):
+        super().__init__(f"Revision {revision} of session '{session}' was superseded by revision {latest}")
+        self.session = session
+        self.revision = revision
+        self.latest = latest
+
+
+class Cancelled(Exception):
+    """Raised inside a computation that no request waits for any more"""
+
+
+class CancelToken:
+    """Cancellation flag shared by a computation's task and its worker thread"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """Flag the computation and cancel its task (call from the event loop)"""
+        self._event.set()
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+
+
+def check_cancelled() -> None:
+    """
+    Stop the current computation if it was cancelled.
+
+    Call between stages of long synchronous work; outside a cancellable
+    computation this does nothing.
+
+    Raises:
+        Cancelled: If the computation's token was cancelled
+    """
+    token = _active_token.get()
+    if token is not None and token.cancelled:
+        raise Cancelled()
+
+
+def cancellable(token: CancelToken, func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Wrap a function run in a worker thread so `check_cancelled` sees `token`.
+
+    Usage: `await run_in_threadpool(cancellable(token, func), *args)`
+    """
+    def run(*args, **kwargs):
+        reset = _active_token.set(token)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _active_token.reset(reset)
+
+    return run
+
+
+class Ticket:
+    """A request's place in its session, superseded by newer revisions"""
+
+    def __init__(self, session: str, revision: int):
+        self.session = session
+        self.revision = revision
+        self.latest = revision
+        self.superseded = asyncio.Event()
+
+    def supersede(self, latest: int) -> None:
+        self.latest = latest
+        self.superseded.set()
+
+    def check(self) -> None:
+        """
+        Raises:
+            Superseded: If a newer revision of the session arrived
+        """
+        if self.superseded.is_set():
+            raise Superseded(self.session, self.revision, self.latest)
+
+
+class RevisionTracker:
+    """
+    Latest revision per session, superseding the session's older requests.
+
+    Args:
+        max_sessions: Sessions remembered; older ones are forgotten
+    """
+
+    def __init__(self, max_sessions: int = DEFAULT_MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self._latest: OrderedDict = OrderedDict()  # session -> latest revision
+        self._active: Dict[str, List[Ticket]] = {}
+
+    def begin(self, session: str, revision: Optional[int] = None) -> Ticket:
+        """
+        Register a request of a session.
+
+        Args:
+            session: Client session ID
+            revision: Client revision number; requests without one are
+                numbered by arrival, so each supersedes the previous
+
+        Returns:
+            Ticket to pass to SingleFlight.run and to `end`
+
+        Raises:
+            Superseded: If the session already has a newer revision
+        """
+        if revision is None:
+            revision = self._latest.get(session, 0) + 1
+
+        latest = self._latest.get(session)
+        if latest is not None and revision < latest:
+            raise Superseded(session, revision, latest)
+
+        self._latest[session] = revision
+        self._latest.move_to_end(session)
+        while len(self._latest) > self.max_sessions:
+            self._latest.popitem(last=False)
+
+        active = self._active.setdefault(session, [])
+        for ticket in active:
+            if ticket.revision < revision:
+                ticket.supersede(revision)
+        ticket = Ticket(session, revision)
+        active.append(ticket)
+        return ticket
+
+    def end(self, ticket: Ticket) -> None:
+        """Forget a finished request"""
+        active = self._active.get(ticket.session)
+        if active is None:
+            return
+        if ticket in active:
+            active.remove(ticket)
+        if not active:
+            del self._active[ticket.session]
+
+
+def _retrieve_exception(task: asyncio.Task) -> None:
+    # Cancelled computations end with nobody awaiting them; mark their
+    # exception retrieved so asyncio does not log it
+    if not task.cancelled():
+        task.exception()
+
+
+class _Flight:
+    def __init__(self):
+        self.token = CancelToken()
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent computations with the same key.
+
+    The first caller of a key starts the computation as its own task;
+    callers arriving while it runs wait for the same result (or error).
+    Once it finishes, the key is free again, so results are not cached.
+    When every waiter has gone (superseded or disconnected), the
+    computation is cancelled.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.started = 0
+        self.coalesced = 0
+        self.cancelled = 0
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def run(
+        self,
+        key: Hashable,
+        compute: Callable[[CancelToken], Awaitable[Any]],
+        ticket: Optional[Ticket] = None
+    ) -> Any:
+        """
+        Run `compute(token)` once for all concurrent callers of `key`.
+
+        Args:
+            key: Identity of the computation (equal keys give equal results)
+            compute: Coroutine function; it should run blocking work through
+                `cancellable(token, ...)` so it can be stopped early
+            ticket: Optional session ticket; the caller stops waiting as
+                soon as it is superseded
+
+        Returns:
+            The computation's result
+
+        Raises:
+            Superseded: If `ticket` was superseded before the result arrived
+        """
+        if ticket is not None:
+            ticket.check()
+
+        flight = self._flights.get(key)
+        if flight is None or flight.token.cancelled:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.token.task = asyncio.ensure_future(self._execute(key, flight, compute))
+            flight.token.task.add_done_callback(_retrieve_exception)
+            self.started += 1
+        else:
+            self.coalesced += 1
+
+        task = flight.token.task
+        flight.waiters += 1
+        superseded = asyncio.ensure_future(ticket.superseded.wait()) if ticket is not None else None
+        try:
+            waits = {task} if superseded is None else {task, superseded}
+            await asyncio.wait(waits, return_when=asyncio.FIRST_COMPLETED)
+            if not task.done():
+                raise Superseded(ticket.session, ticket.revision, ticket.latest)
+            return task.result()
+        finally:
+            if superseded is not None:
+                superseded.cancel()
+            flight.waiters -= 1
+            if flight.waiters == 0 and not task.done():
+                self.cancelled += 1
+                flight.token.cancel()
+
+    async def _execute(self, key: Hashable, flight: _Flight, compute: Callable[[CancelToken], Awaitable[Any]]) -> Any:
+        try:
+            return await compute(flight.token)
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for /metrics"""
+        return {
+            'in_flight': len(self._flights),
+            'started': self.started,
+            'coalesced': self.coalesced,
+            'cancelled': self.cancelled,
+        }
@@ -0,0 +1,288 @@
+"""
+Site-wide keyword cannibalization audit for the SEO Analyzer.
+
+Pages that compete for the same keywords are found by comparing TF-IDF
+vectors of their keyword counts. The vectors are stored as a sparse
+page-by-term matrix (CSR rows plus a CSC inverted index), and cosine
+similarities are computed block by block as sparse matrix products: each
+block of pages only touches the posting lists of its own terms, and only
+the top-k pairs are kept, so the full N x N matrix never exists.
+
+Command line usage:
+    python site_audit.py PAGES [--top-k 50] [--min-similarity 0.2] [--language en]
+
+PAGES is a directory of .txt/.md files or a JSONL file with one
+{"url": ..., "text": ...} object per line. The report is printed as JSON.
+"""
+
+import argparse
+import json
+import sys
+from collections import Counter
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Terms on more than this share of pages are site-wide boilerplate
+# (navigation, brand name); the limit only applies to larger sites
+MAX_DOCUMENT_FREQUENCY = 0.5
+MIN_PAGES_FOR_MAX_DF = 20
+
+# Pages per block of the blocked similarity product
+BLOCK_SIZE = 256
+
+
+@dataclass
+class PagePair:
+    """Two pages competing for the same keywords"""
+    page_a: str
+    page_b: str
+    similarity: float  # Cosine similarity of the TF-IDF vectors (0-1)
+    shared_keywords: List[str]
+
+
+class SparseTfidf:
+    """
+    L2-normalized TF-IDF vectors of a set of pages as a sparse matrix.
+
+    Term frequencies are sublinear (1 + log count), so repeating a keyword
+    does not dominate the vector; IDF is smoothed as in scikit-learn.
+
+    Args:
+        counts: Keyword counts per page
+        max_df: Ignore terms that occur on more than this share of pages
+            (only for sites of MIN_PAGES_FOR_MAX_DF pages or more)
+    """
+
+    def __init__(self, counts: Sequence[Counter], max_df: float = MAX_DOCUMENT_FREQUENCY):
+        self.n_pages = len(counts)
+
+        document_frequency = Counter()
+        for page_counts in counts:
+            document_frequency.update(page_counts.keys())
+
+        max_pages = max_df * self.n_pages if self.n_pages >= MIN_PAGES_FOR_MAX_DF else self.n_pages
+        self.terms = sorted(term for term, df in document_frequency.items() if df <= max_pages)
+        self.vocabulary = {term: index for index, term in enumerate(self.terms)}
+
+        idf = np.array([
+            np.log((1 + self.n_pages) / (1 + document_frequency[term])) + 1
+            for term in self.terms
+        ])
+
+        # CSR rows: term indices (sorted) and weights per page
+        indptr = [0]
+        indices = []
+        data = []
+        for page_counts in counts:
+            row = sorted(
+                (self.vocabulary[term], count)
+                for term, count in page_counts.items()
+                if term in self.vocabulary
+            )
+            indices.extend(index for index, _ in row)
+            data.extend(1 + np.log(count) for _, count in row)
+            indptr.append(len(indices))
+
+        self.indptr = np.array(indptr, dtype=np.int64)
+        self.indices = np.array(indices, dtype=np.int64)
+        self.data = np.array(data, dtype=np.float64)
+        if len(self.indices):
+            self.data *= idf[self.indices]
+
+        # L2-normalize the rows so dot products are cosine similarities
+        rows = np.repeat(np.arange(self.n_pages), np.diff(self.indptr))
+        norms = np.sqrt(np.bincount(rows, weights=self.data ** 2, minlength=self.n_pages))
+        norms[norms == 0] = 1.0
+        self.data /= norms[rows]
+
+        # CSC inverted index: pages (sorted) and weights per term
+        order = np.argsort(self.indices, kind='stable')
+        self.postings_pages = rows[order]
+        self.postings_data = self.data[order]
+        self.postings_indptr = np.zeros(len(self.terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.indices, minlength=len(self.terms)), out=self.postings_indptr[1:])
+
+    def row(self, page: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Term indices and weights of one page"""
+        start, end = self.indptr[page], self.indptr[page + 1]
+        return self.indices[start:end], self.data[start:end]
+
+    def block_similarities(self, start: int, end: int) -> np.ndarray:
+        """
+        Cosine similarities of pages [start, end) with every page.
+
+        Computed as the sparse product of the block's rows with the
+        inverted index: every non-zero (page, term) of the block is
+        expanded over the posting list of its term and accumulated.
+
+        Returns:
+            np.ndarray: Dense (end - start) x n_pages similarity block
+        """
+        lo, hi = self.indptr[start], self.indptr[end]
+        terms = self.indices[lo:hi]
+        weights = self.data[lo:hi]
+        block_rows = np.repeat(np.arange(end - start), np.diff(self.indptr[start:end + 1]))
+
+        posting_starts = self.postings_indptr[terms]
+        lengths = self.postings_indptr[terms + 1] - posting_starts
+        total = int(lengths.sum())
+
+        # Positions of every posting entry touched by the block
+        source = np.repeat(np.arange(len(terms)), lengths)
+        offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        gathered = posting_starts[source] + offsets
+
+        flat = block_rows[source] * self.n_pages + self.postings_pages[gathered]
+        products = weights[source] * self.postings_data[gathered]
+
+        block = np.bincount(flat, weights=products, minlength=(end - start) * self.n_pages)
+        return block.reshape(end - start, self.n_pages)
+
+    def shared_terms(self, page_a: int, page_b: int, limit: int = 5) -> List[str]:
+        """Terms contributing most to the similarity of two pages"""
+        indices_a, weights_a = self.row(page_a)
+        indices_b, weights_b = self.row(page_b)
+        common, position_a, position_b = np.intersect1d(
+            indices_a, indices_b, assume_unique=True, return_indices=True
+        )
+        contribution = weights_a[position_a] * weights_b[position_b]
+        ranked = np.argsort(-contribution, kind='stable')[:limit]
+        return [self.terms[common[i]] for i in ranked]
+
+
+def top_similar_pairs(
+    matrix: SparseTfidf,
+    top_k: int = 50,
+    min_similarity: float = 0.2,
+    block_size: int = BLOCK_SIZE
+) -> List[Tuple[int, int, float]]:
+    """
+    Find the most similar page pairs with a blocked sparse product.
+
+    Args:
+        matrix: TF-IDF vectors of the pages
+        top_k: Number of pairs to return
+        min_similarity: Ignore pairs below this cosine similarity
+        block_size: Pages compared per block (bounds memory to
+            block_size x pages similarities)
+
+    Returns:
+        List of (page_a, page_b, similarity) with page_a < page_b, most
+        similar first
+    """
+    candidates_a = np.empty(0, dtype=np.int64)
+    candidates_b = np.empty(0, dtype=np.int64)
+    candidates_score = np.empty(0, dtype=np.float64)
+
+    for start in range(0, matrix.n_pages, block_size):
+        end = min(start + block_size, matrix.n_pages)
+        block = matrix.block_similarities(start, end)
+
+        # Each pair once: only pages after the block row
+        rows, columns = np.nonzero(block >= min_similarity)
+        rows_global = rows + start
+        keep = columns > rows_global
+
+        candidates_a = np.concatenate([candidates_a, rows_global[keep]])
+        candidates_b = np.concatenate([candidates_b, columns[keep]])
+        candidates_score = np.concatenate([candidates_score, block[rows[keep], columns[keep]]])
+
+        # Keep the running top-k only
+        if len(candidates_score) > top_k:
+            best = np.argpartition(-candidates_score, top_k - 1)[:top_k]
+            candidates_a = candidates_a[best]
+            candidates_b = candidates_b[best]
+            candidates_score = candidates_score[best]
+
+    order = np.lexsort((candidates_b, candidates_a, -candidates_score))
+    return [
+        (int(candidates_a[i]), int(candidates_b[i]), float(candidates_score[i]))
+        for i in order
+    ]
+
+
+def audit_site(
+    pages: Sequence[Tuple[str, Counter]],
+    top_k: int = 50,
+    min_similarity: float = 0.2,
+    shared_keywords: int = 5
+) -> Tuple[SparseTfidf, List[PagePair]]:
+    """
+    Find pages of a site that compete for the same keywords.
+
+    Args:
+        pages: (url, keyword counts) per page
+        top_k: Number of page pairs to report
+        min_similarity: Minimum cosine similarity of a reported pair
+        shared_keywords: Number of shared keywords listed per pair
+
+    Returns:
+        Tuple of (TF-IDF matrix, page pairs, most similar first)
+    """
+    urls = [url for url, _ in pages]
+    matrix = SparseTfidf([counts for _, counts in pages])
+
+    pairs = [
+        PagePair(
+            page_a=urls[a],
+            page_b=urls[b],
+            similarity=round(similarity, 4),
+            shared_keywords=matrix.shared_terms(a, b, shared_keywords)
+        )
+        for a, b, similarity in top_similar_pairs(matrix, top_k, min_similarity)
+    ]
+    return matrix, pairs
+
+
+def load_pages(path: Path) -> List[Tuple[str, str]]:
+    """
+    Read pages from a directory of .txt/.md files or a JSONL file.
+
+    Returns:
+        List of (url, text); files are named by their relative path
+    """
+    if path.is_dir():
+        files = sorted(p for p in path.rglob('*') if p.suffix in ('.txt', '.md') and p.is_file())
+        return [(str(p.relative_to(path)), p.read_text(encoding='utf-8')) for p in files]
+
+    pages = []
+    with path.open(encoding='utf-8') as handle:
+        for line in handle:
+            if line.strip():
+                record = json.loads(line)
+                pages.append((record['url'], record['text']))
+    return pages
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the audit from the command line"""
+    parser = argparse.ArgumentParser(description="Find pages competing for the same keywords.")
+    parser.add_argument('pages', type=Path, help="Directory of .txt/.md files or a JSONL file of {url, text}")
+    parser.add_argument('--top-k', type=int, default=50, help="Number of page pairs to report")
+    parser.add_argument('--min-similarity', type=float, default=0.2, help="Minimum cosine similarity")
+    parser.add_argument('--language', help="ISO 639-1 code for all pages (detected per page by default)")
+    args = parser.parse_args(argv)
+
+    # Imported here so the module itself stays free of the API's startup cost
+    from main import site_keyword_counts
+
+    pages = load_pages(args.pages)
+    counts = site_keyword_counts([text for _, text in pages], args.language)
+    matrix, pairs = audit_site(
+        list(zip([url for url, _ in pages], counts)), args.top_k, args.min_similarity
+    )
+
+    json.dump({
+        'pages': matrix.n_pages,
+        'terms': len(matrix.terms),
+        'pairs': [asdict(pair) for pair in pairs],
+    }, sys.stdout, indent=2, ensure_ascii=False)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
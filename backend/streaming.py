@@ -0,0 +1,520 @@
+"""
+Memory-bounded streaming analysis for very large documents.
+
+The body is consumed in chunks through a generator pipeline: chunks are
+decoded and split into words incrementally, and keyword counts,
+readability tallies, rolling shingle hashes and sentence matches are
+updated as each chunk arrives. Nothing holds the full document, so peak
+memory follows the chunk size (plus the fixed-size reference data) rather
+than the document size. The two structures that grow with the input are
+capped: distinct shingle hashes are tracked exactly up to
+MAX_DISTINCT_SHINGLES, and keyword counts keep at most
+MAX_KEYWORD_VOCABULARY words. Past either cap the affected result is
+listed in `StreamingResult.approximated`.
+
+With a deadline, the sentence and sequence tiers are checked against it
+like in check_plagiarism_tiers: a tier that no longer fits is skipped (the
+sentence tier for the rest of the stream), the similarity is renormalized
+over the computed tiers and the tier is listed as approximated.
+"""
+
+import codecs
+import string
+from collections import Counter
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from typing import TYPE_CHECKING, AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from admission import COST_PER_SENTENCE_PAIR, COST_PER_SEQUENCE_CHAR
+from bloom import ReferenceFilter, sentence_hashes
+from language import DETECTION_CHARS, detect_language, get_language_resources
+from readability import ReadabilityTally
+from shingles import EMPTY_SHINGLES, RollingHasher, TokenVocabulary, shingle_set
+from singleflight import check_cancelled
+
+if TYPE_CHECKING:
+    from deadline import Deadline
+    from semantic import ParaphraseMatcher, ParaphraseSimilarity
+    from suffix import CopiedText, CopyMatcher
+
+_PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+
+# Distinct input shingles tracked for the exact n-gram Jaccard (8 bytes each);
+# beyond this the shingle position count stands in for the distinct count
+MAX_DISTINCT_SHINGLES = 1 << 21
+
+# Distinct keywords counted; past this the rarest are dropped, keeping the top
+# ones (the response only reports the ten most frequent)
+MAX_KEYWORD_VOCABULARY = 100000
+
+# Weight of each similarity tier, as PLAGIARISM_TIERS in main
+TIER_WEIGHTS = {'ngram': 0.5, 'sentence': 0.3, 'sequence': 0.2}
+
+
+def iter_text_chunks(text: str, chunk_size: int = 65536) -> Iterator[str]:
+    """Yield successive `chunk_size` slices of an in-memory string"""
+    for start in range(0, len(text), chunk_size):
+        yield text[start:start + chunk_size]
+
+
+def iter_decoded_chunks(byte_chunks: Iterable[bytes], encoding: str = 'utf-8') -> Iterator[str]:
+    """Decode byte chunks incrementally, so multi-byte characters may span chunks"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+
+    for chunk in byte_chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+async def aiter_decoded_chunks(
+    byte_chunks: AsyncIterable[bytes],
+    encoding: str = 'utf-8',
+    chunk_size: int = 65536
+) -> AsyncIterator[str]:
+    """
+    Decode an async byte stream (e.g. a request body) into text chunks.
+
+    Incoming chunks larger than `chunk_size` bytes are split first, so every
+    downstream stage works on bounded slices.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+
+    async for chunk in byte_chunks:
+        for start in range(0, len(chunk), chunk_size):
+            text = decoder.decode(chunk[start:start + chunk_size])
+            if text:
+                yield text
+
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def normalize_word(word: str) -> str:
+    """Normalize one word the way `clean_text` does (lowercase, no punctuation)"""
+    return word.lower().translate(_PUNCTUATION_TABLE)
+
+
+class StreamingReference:
+    """
+    Reference documents preprocessed once for streaming plagiarism checks.
+
+    `filter` holds every shingle and sentence hash, so checks can skip the
+    costly tiers for text that shares (almost) nothing with the references.
+
+    Args:
+        documents: Mapping of document name to raw document text
+        n: Shingle size in words
+        vocabulary: Token vocabulary shared with other shingle indexes
+        with_filter: Build `filter` (None otherwise, for indexes that are
+            queried directly and never by a StreamingAnalyzer)
+    """
+
+    def __init__(
+        self,
+        documents: Dict[str, str],
+        n: int = 5,
+        vocabulary: TokenVocabulary = None,
+        with_filter: bool = True
+    ):
+        self.n = n
+        self.vocabulary = vocabulary if vocabulary is not None else TokenVocabulary()
+        self.cleaned: Dict[str, str] = {}
+        self.shingles: Dict[str, np.ndarray] = {}
+        self.sentences: Dict[str, List[str]] = {}
+
+        for name, text in documents.items():
+            words = [w for w in (normalize_word(raw) for raw in text.split()) if w]
+            self.cleaned[name] = ' '.join(words)
+            self.shingles[name] = shingle_set(self.vocabulary.encode(words, grow=True), n)
+
+            sentences = []
+            for sentence in text.split('.'):
+                cleaned = ' '.join(normalize_word(sentence).split())
+                if sentence.strip() and len(cleaned.split()) >= 3:
+                    sentences.append(cleaned)
+            self.sentences[name] = sentences
+
+        self.filter: Optional[ReferenceFilter] = None
+        if with_filter:
+            keys = list(self.shingles.values())
+            keys.extend(sentence_hashes(sentences) for sentences in self.sentences.values())
+            self.filter = ReferenceFilter.from_env(np.concatenate(keys) if keys else EMPTY_SHINGLES)
+
+
+@dataclass
+class StreamingResult:
+    """Aggregates produced by a StreamingAnalyzer once the stream ends"""
+    flesch_reading_ease: float
+    keyword_counts: Counter
+    keyword_total: int
+    similarities: Dict[str, float]
+    head: str
+    char_count: int
+    word_count: int
+    has_paragraph_breaks: bool
+    language: str
+    approximated: List[str] = field(default_factory=list)  # sequence_similarity, ngram_similarity, sentence_similarity, keyword_counts
+    tiers: List[str] = field(default_factory=lambda: list(TIER_WEIGHTS))  # Similarity tiers that were computed
+    copied_text: Optional['CopiedText'] = None
+    paraphrase: Optional['ParaphraseSimilarity'] = None
+
+
+class StreamingAnalyzer:
+    """
+    Incremental analysis pipeline fed one chunk at a time.
+
+    Args:
+        reference: Preprocessed reference documents for plagiarism checks
+        language: ISO 639-1 language code; when omitted, the first
+            DETECTION_CHARS characters are buffered and the language is
+            detected from them before any stage runs
+        head_chars: Leading characters kept for the SERP preview
+        max_sentence_chars: Longest sentence buffered for sentence matching
+        sequence_window: Leading cleaned characters used for the
+            whole-document sequence similarity
+        copy_matcher: Optional matcher of verbatim copied runs
+        paraphrase_matcher: Optional matcher of reworded sentences
+        deadline: Optional latency budget for the sentence and sequence tiers
+    """
+
+    def __init__(
+        self,
+        reference: StreamingReference,
+        language: str = None,
+        head_chars: int = 10000,
+        max_sentence_chars: int = 10000,
+        sequence_window: int = 20000,
+        copy_matcher: Optional['CopyMatcher'] = None,
+        paraphrase_matcher: Optional['ParaphraseMatcher'] = None,
+        deadline: Optional['Deadline'] = None
+    ):
+        self.reference = reference
+        self.head_chars = head_chars
+        self.max_sentence_chars = max_sentence_chars
+        self.sequence_window = sequence_window
+        self.copy_matcher = copy_matcher
+        self.paraphrase_matcher = paraphrase_matcher
+        self.deadline = deadline
+
+        self.language = None
+        self.stopwords = None
+        self.readability = None
+        self._detection_buffer: List[str] = []
+        self._detection_chars = 0
+        if language is not None:
+            self._set_language(language)
+
+        self.keyword_counts = Counter()
+        self.keyword_total = 0
+        self.hasher = RollingHasher(reference.n)
+        self.shingle_positions = 0
+        # Sorted distinct shingles, plus per-chunk uniques not merged in yet
+        self.distinct_shingles = EMPTY_SHINGLES
+        self._pending_shingles: List[np.ndarray] = []
+        self._pending_count = 0
+        self.distinct_overflow = False
+        self.keywords_pruned = False
+        self.shingle_hits: Dict[str, np.ndarray] = {name: EMPTY_SHINGLES for name in reference.shingles}
+        self._chunk_shingles: List[int] = []
+        # Input shingle and sentence hashes looked up in the reference filter, and
+        # hits (only while its fast path is on)
+        self.filter_keys = 0
+        self.filter_hits = 0
+
+        self.sentence_count = 0
+        self.sentence_matches: Dict[str, float] = {name: 0.0 for name in reference.sentences}
+        self.sentence_pair_cost = sum(map(len, reference.sentences.values())) * COST_PER_SENTENCE_PAIR
+        self.sentence_tier_skipped = False
+        self._sentence_buffer = ''
+        self._sentence_truncated = False
+
+        self.head = ''
+        self.char_count = 0
+        self.word_count = 0
+        self.has_paragraph_breaks = False
+        self._last_char = ''
+
+        self._word_carry = ''
+        self._sequence_parts: List[str] = []
+        self._sequence_chars = 0
+        self.cleaned_length = -1
+
+    def consume(self, chunks: Iterable[str]) -> StreamingResult:
+        """
+        Run the pipeline over an iterable of chunks and return the result.
+
+        Args:
+            chunks: Document text in order, e.g. from `iter_decoded_chunks`
+
+        Returns:
+            StreamingResult: Aggregates for the whole document
+        """
+        for chunk in chunks:
+            self.feed(chunk)
+        return self.finish()
+
+    def _set_language(self, language: str) -> None:
+        self.language = get_language_resources(language)
+        self.stopwords = self.language.stopwords
+        self.readability = ReadabilityTally(self.language.pyphen)
+
+    def _detect_language(self) -> None:
+        buffered = self._detection_buffer
+        self._detection_buffer = []
+        self._set_language(detect_language(''.join(buffered)))
+
+        for chunk in buffered:
+            self._process(chunk)
+
+    def feed(self, chunk: str) -> None:
+        """
+        Consume the next chunk of the document.
+
+        Args:
+            chunk: Next slice of document text
+        """
+        if not chunk:
+            return
+
+        if self.language is None:
+            self._detection_buffer.append(chunk)
+            self._detection_chars += len(chunk)
+            if self._detection_chars >= DETECTION_CHARS:
+                self._detect_language()
+            return
+
+        self._process(chunk)
+
+    def _process(self, chunk: str) -> None:
+        self.char_count += len(chunk)
+        if len(self.head) < self.head_chars:
+            self.head += chunk[:self.head_chars - len(self.head)]
+        if not self.has_paragraph_breaks and '\n\n' in self._last_char + chunk:
+            self.has_paragraph_breaks = True
+        self._last_char = chunk[-1]
+
+        self._feed_sentences(chunk)
+        self._feed_words(chunk)
+
+    def _feed_words(self, chunk: str) -> None:
+        # The last word may continue in the next chunk, so it is carried over
+        data = self._word_carry + chunk
+        words = data.split()
+        self._word_carry = words.pop() if words and not data[-1].isspace() else ''
+
+        for raw in words:
+            self._add_word(raw)
+        self._flush_shingles()
+
+    def _flush_shingles(self) -> None:
+        # Shingles of a chunk are matched against the references in one merge
+        if not self._chunk_shingles:
+            return
+
+        chunk_shingles = np.unique(np.array(self._chunk_shingles, dtype=np.uint64))
+        self._chunk_shingles = []
+        if self.reference.filter.enabled:
+            self.filter_keys += len(chunk_shingles)
+            self.filter_hits += self.reference.filter.count_hits(chunk_shingles)
+        self._track_distinct(chunk_shingles)
+
+        for name, reference_shingles in self.reference.shingles.items():
+            hits = np.intersect1d(chunk_shingles, reference_shingles, assume_unique=True)
+            if hits.size:
+                self.shingle_hits[name] = np.union1d(self.shingle_hits[name], hits)
+
+    def _track_distinct(self, chunk_shingles: np.ndarray) -> None:
+        if self.distinct_overflow:
+            return
+        # Merging only once the pending uniques outgrow the merged set keeps
+        # the total work at O(n log n) however many chunks arrive
+        self._pending_shingles.append(chunk_shingles)
+        self._pending_count += len(chunk_shingles)
+        if self._pending_count >= len(self.distinct_shingles):
+            self._merge_distinct()
+
+    def _merge_distinct(self) -> None:
+        if self._pending_shingles:
+            self.distinct_shingles = np.unique(np.concatenate([self.distinct_shingles, *self._pending_shingles]))
+            self._pending_shingles = []
+            self._pending_count = 0
+        if len(self.distinct_shingles) > MAX_DISTINCT_SHINGLES:
+            self.distinct_overflow = True
+            self.distinct_shingles = EMPTY_SHINGLES
+
+    def _count_keyword(self, word: str) -> None:
+        self.keyword_counts[word] += 1
+        self.keyword_total += 1
+        if len(self.keyword_counts) > MAX_KEYWORD_VOCABULARY:
+            self.keyword_counts = Counter(dict(self.keyword_counts.most_common(MAX_KEYWORD_VOCABULARY // 2)))
+            self.keywords_pruned = True
+
+    def _add_word(self, raw: str) -> None:
+        self.word_count += 1
+        self.readability.add_token(raw)
+
+        word = normalize_word(raw)
+        if not word:
+            return
+        if self.copy_matcher is not None:
+            self.copy_matcher.push(word)
+
+        if word not in self.stopwords and len(word) > 2:
+            self._count_keyword(word)
+
+        shingle = self.hasher.push(self.reference.vocabulary.lookup(word))
+        if shingle is not None:
+            self.shingle_positions += 1
+            self._chunk_shingles.append(shingle)
+
+        self.cleaned_length += len(word) + 1
+        if self._sequence_chars < self.sequence_window:
+            self._sequence_parts.append(word)
+            self._sequence_chars += len(word) + 1
+
+    def _feed_sentences(self, chunk: str) -> None:
+        parts = chunk.split('.')
+        for part in parts[:-1]:
+            self._append_sentence_text(part)
+            self._score_sentence(self._sentence_buffer)
+            self._sentence_buffer = ''
+            self._sentence_truncated = False
+        self._append_sentence_text(parts[-1])
+
+    def _append_sentence_text(self, text: str) -> None:
+        if self._sentence_truncated:
+            return
+        room = self.max_sentence_chars - len(self._sentence_buffer)
+        if len(text) > room:
+            text = text[:room]
+            self._sentence_truncated = True
+        self._sentence_buffer += text
+
+    def _score_sentence(self, sentence: str) -> None:
+        if not sentence.strip():
+            return
+
+        self.sentence_count += 1
+        cleaned = ' '.join(normalize_word(sentence).split())
+        if self.paraphrase_matcher is not None:
+            self.paraphrase_matcher.push(cleaned)
+        if self.reference.filter.enabled:
+            self.filter_keys += 1
+            self.filter_hits += self.reference.filter.count_hits(sentence_hashes([cleaned]))
+        if len(cleaned.split()) < 3 or self.sentence_tier_skipped:
+            return
+
+        check_cancelled()
+        if self.deadline is not None and not self.deadline.allows(self.sentence_pair_cost):
+            self.sentence_tier_skipped = True
+            return
+
+        for name, reference_sentences in self.reference.sentences.items():
+            best_match = 0.0
+            for reference_sentence in reference_sentences:
+                best_match = max(best_match, SequenceMatcher(None, cleaned, reference_sentence).ratio())
+            if best_match > 0.5:
+                self.sentence_matches[name] += best_match
+
+    def finish(self) -> StreamingResult:
+        """
+        Flush buffered text and compute the final aggregates.
+
+        Returns:
+            StreamingResult: Readability, keyword counts, per-document
+            similarity and the fields needed for suggestions and SERP
+        """
+        if self.language is None:
+            self._detect_language()
+
+        if self._word_carry:
+            self._add_word(self._word_carry)
+            self._word_carry = ''
+        self._flush_shingles()
+        self._score_sentence(self._sentence_buffer)
+        self._sentence_buffer = ''
+
+        self._merge_distinct()
+
+        approximated = []
+        cleaned_length = max(self.cleaned_length, 0)
+        window = ' '.join(self._sequence_parts)[:self.sequence_window]
+        if cleaned_length > len(window):
+            approximated.append('sequence_similarity')
+        if self.distinct_overflow:
+            approximated.append('ngram_similarity')
+        if self.keywords_pruned:
+            approximated.append('keyword_counts')
+
+        # Original text: only the n-gram tier counts, as in check_plagiarism
+        reference_filter = self.reference.filter
+        original = reference_filter.enabled and reference_filter.is_original(self.filter_hits, self.filter_keys)
+
+        tiers = ['ngram']
+        if not self.sentence_tier_skipped and not original:
+            tiers.append('sentence')
+        else:
+            approximated.append('sentence_similarity')
+        check_cancelled()
+        sequence_cost = len(window) * len(self.reference.cleaned) * COST_PER_SEQUENCE_CHAR
+        if not original and (self.deadline is None or self.deadline.allows(sequence_cost)):
+            tiers.append('sequence')
+        elif 'sequence_similarity' not in approximated:
+            approximated.append('sequence_similarity')
+        total_weight = sum(TIER_WEIGHTS[tier] for tier in tiers)
+
+        # Past the cap, shingle positions bound the distinct count from above
+        input_shingles = self.shingle_positions if self.distinct_overflow else len(self.distinct_shingles)
+
+        similarities = {}
+        for name, cleaned_sample in self.reference.cleaned.items():
+            # N-gram Jaccard over distinct shingles, as in check_plagiarism
+            reference_shingles = self.reference.shingles[name]
+            hits = len(self.shingle_hits[name])
+            union = input_shingles + len(reference_shingles) - hits
+            ngram_similarity = hits / union if input_shingles and len(reference_shingles) and union > 0 else 0.0
+            if original:
+                similarities[name] = ngram_similarity * TIER_WEIGHTS['ngram']
+                continue
+
+            similarity = ngram_similarity * TIER_WEIGHTS['ngram']
+            if 'sentence' in tiers:
+                sentence_similarity = (
+                    self.sentence_matches[name] / self.sentence_count if self.sentence_count else 0.0
+                )
+                similarity += sentence_similarity * TIER_WEIGHTS['sentence']
+
+            if 'sequence' in tiers:
+                # Sequence ratio over the leading window, scaled to the full length
+                matcher = SequenceMatcher(None, window, cleaned_sample)
+                matched = sum(block.size for block in matcher.get_matching_blocks())
+                total = cleaned_length + len(cleaned_sample)
+                sequence_similarity = 2.0 * matched / total if total else 1.0
+                similarity += sequence_similarity * TIER_WEIGHTS['sequence']
+
+            # Renormalized over the computed tiers, as in check_plagiarism_tiers
+            similarities[name] = similarity / total_weight
+
+        return StreamingResult(
+            flesch_reading_ease=self.readability.flesch_reading_ease(self.language.readability),
+            keyword_counts=self.keyword_counts,
+            keyword_total=self.keyword_total,
+            similarities=similarities,
+            head=self.head,
+            char_count=self.char_count,
+            word_count=self.word_count,
+            has_paragraph_breaks=self.has_paragraph_breaks,
+            language=self.language.code,
+            approximated=approximated,
+            tiers=tiers,
+            copied_text=self.copy_matcher.result() if self.copy_matcher is not None else None,
+            paraphrase=self.paraphrase_matcher.result() if self.paraphrase_matcher is not None else None
+        )
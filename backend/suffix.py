@@ -0,0 +1,347 @@
+"""
+Copied-passage detection with a suffix automaton over reference tokens.
+
+The 5-gram Jaccard and difflib ratios of check_plagiarism are averages
+over the whole input, so one long copied paragraph inside a long original
+article barely moves them. A suffix automaton of the reference corpus'
+token-ID stream instead gives, for every input position, the length of
+the longest run of tokens ending there that occurs verbatim in some
+reference document. One left-to-right pass over the input (amortized
+constant work per token) yields the longest copied run and the number of
+input tokens covered by copied runs.
+
+The automaton is built once per corpus and can be saved to disk
+(`python suffix.py --out index.npz`) and loaded by the server through
+COPY_INDEX, so large corpora are not re-indexed at startup.
+"""
+
+import argparse
+import json
+import os
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from shingles import TokenVocabulary
+from streaming import normalize_word
+
+# Shortest token run counted as copied; shorter shared runs are common phrases
+DEFAULT_MIN_RUN = 8
+
+# Token between documents, so no run spans two of them. Vocabulary IDs are
+# small and unknown-token IDs have the top bit set, so it never occurs in input.
+SEPARATOR = 1 << 62
+
+
+def copied_text_weight() -> float:
+    """
+    Share of the originality component scored by copied text (COPIED_TEXT_WEIGHT).
+
+    Returns:
+        float: Weight between 0 (default: scores unchanged) and 1
+    """
+    value = os.environ.get('COPIED_TEXT_WEIGHT')
+    return min(1.0, max(0.0, float(value))) if value else 0.0
+
+
+class SuffixAutomaton:
+    """
+    Suffix automaton (DAWG) of a token-ID sequence.
+
+    Every substring of the sequence is a path from the initial state 0.
+    States store the length of their longest substring, their suffix link
+    and the end position of their first occurrence.
+
+    Args:
+        tokens: Token IDs; build over several documents by joining them
+            with SEPARATOR
+    """
+
+    def __init__(self, tokens: Sequence[int] = ()):
+        self.length: List[int] = [0]
+        self.link: List[int] = [-1]
+        self.first_end: List[int] = [-1]
+        self.next: List[Dict[int, int]] = [{}]
+        self._last = 0
+        for position, token in enumerate(tokens):
+            self._extend(int(token), position)
+
+    def __len__(self) -> int:
+        return len(self.length)
+
+    def _new_state(self, length: int, link: int, first_end: int, transitions: Dict[int, int]) -> int:
+        self.length.append(length)
+        self.link.append(link)
+        self.first_end.append(first_end)
+        self.next.append(transitions)
+        return len(self.length) - 1
+
+    def _extend(self, token: int, position: int) -> None:
+        current = self._new_state(self.length[self._last] + 1, -1, position, {})
+        state = self._last
+        while state != -1 and token not in self.next[state]:
+            self.next[state][token] = current
+            state = self.link[state]
+
+        if state == -1:
+            self.link[current] = 0
+        else:
+            target = self.next[state][token]
+            if self.length[state] + 1 == self.length[target]:
+                self.link[current] = target
+            else:
+                clone = self._new_state(
+                    self.length[state] + 1, self.link[target], self.first_end[target], dict(self.next[target])
+                )
+                while state != -1 and self.next[state].get(token) == target:
+                    self.next[state][token] = clone
+                    state = self.link[state]
+                self.link[target] = clone
+                self.link[current] = clone
+        self._last = current
+
+    def step(self, state: int, length: int, token: int) -> Tuple[int, int]:
+        """
+        Extend a match by one input token.
+
+        Args:
+            state: State of the match so far (0 for none)
+            length: Tokens in the match so far
+            token: Next input token ID
+
+        Returns:
+            Tuple of (state, length) of the longest match ending at `token`
+        """
+        while state and token not in self.next[state]:
+            state = self.link[state]
+            length = self.length[state]
+        target = self.next[state].get(token)
+        if target is None:
+            return 0, 0
+        return target, length + 1
+
+    def matching_lengths(self, tokens: Sequence[int]) -> np.ndarray:
+        """Longest run ending at each input position that occurs in the sequence"""
+        lengths = np.zeros(len(tokens), dtype=np.int64)
+        state, length = 0, 0
+        for position, token in enumerate(tokens):
+            state, length = self.step(state, length, int(token))
+            lengths[position] = length
+        return lengths
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Flatten the automaton (transitions as CSR arrays) for saving"""
+        counts = np.fromiter((len(transitions) for transitions in self.next), dtype=np.int64, count=len(self))
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        return {
+            'length': np.array(self.length, dtype=np.int64),
+            'link': np.array(self.link, dtype=np.int64),
+            'first_end': np.array(self.first_end, dtype=np.int64),
+            'offsets': offsets,
+            'labels': np.fromiter(
+                (token for transitions in self.next for token in transitions), dtype=np.uint64, count=offsets[-1]
+            ),
+            'targets': np.fromiter(
+                (target for transitions in self.next for target in transitions.values()), dtype=np.int64,
+                count=offsets[-1]
+            ),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> 'SuffixAutomaton':
+        """Rebuild an automaton flattened by `to_arrays`"""
+        automaton = cls()
+        automaton.length = arrays['length'].tolist()
+        automaton.link = arrays['link'].tolist()
+        automaton.first_end = arrays['first_end'].tolist()
+        offsets = arrays['offsets'].tolist()
+        labels = arrays['labels'].tolist()
+        targets = arrays['targets'].tolist()
+        automaton.next = [
+            dict(zip(labels[start:end], targets[start:end]))
+            for start, end in zip(offsets[:-1], offsets[1:])
+        ]
+        automaton._last = len(automaton.length) - 1
+        return automaton
+
+
+@dataclass(slots=True)
+class CopiedText:
+    """Verbatim runs of reference tokens found in an input"""
+    longest_run: int  # Tokens in the longest copied run
+    longest_run_source: Optional[str]  # Reference document of the longest run
+    copied_tokens: int  # Input tokens covered by runs of at least min_run tokens
+    input_tokens: int
+    copied_fraction: float  # copied_tokens / input_tokens
+
+
+class CopyDetector:
+    """
+    Longest and total copied token runs against a reference corpus.
+
+    Args:
+        documents: Mapping of document name to raw text
+        min_run: Shortest run of tokens counted as copied
+    """
+
+    def __init__(self, documents: Optional[Dict[str, str]] = None, min_run: int = DEFAULT_MIN_RUN):
+        self.min_run = min_run
+        self.vocabulary = TokenVocabulary()
+        self.names: List[str] = []
+        tokens: List[int] = []
+        ends = []
+        for name, text in (documents or {}).items():
+            self.names.append(name)
+            tokens.extend(self.vocabulary.encode(self._words(text), grow=True).tolist())
+            ends.append(len(tokens))
+            tokens.append(SEPARATOR)
+        # Position of each document's separator, to map run ends to documents
+        self.document_ends = np.array(ends, dtype=np.int64)
+        self.automaton = SuffixAutomaton(tokens)
+
+    @staticmethod
+    def _words(text: str) -> List[str]:
+        return [word for word in (normalize_word(raw) for raw in text.split()) if word]
+
+    @classmethod
+    def from_env(cls, documents: Dict[str, str]) -> 'CopyDetector':
+        """
+        Load the index saved at COPY_INDEX, or index `documents`.
+
+        COPY_MIN_RUN overrides the shortest run counted as copied.
+        """
+        min_run = int(os.environ.get('COPY_MIN_RUN') or DEFAULT_MIN_RUN)
+        path = os.environ.get('COPY_INDEX')
+        if path:
+            return cls.load(path, min_run=min_run)
+        return cls(documents, min_run=min_run)
+
+    def matcher(self) -> 'CopyMatcher':
+        """Start matching an input fed one word at a time"""
+        return CopyMatcher(self)
+
+    def detect(self, text: str) -> CopiedText:
+        """
+        Find the copied token runs of `text`.
+
+        Args:
+            text: Input text
+
+        Returns:
+            CopiedText: Longest run (with its source) and copied token count
+        """
+        matcher = self.matcher()
+        for word in self._words(text):
+            matcher.push(word)
+        return matcher.result()
+
+    def source_of(self, state: int) -> Optional[str]:
+        """Reference document where the match in `state` first occurs"""
+        if not state:
+            return None
+        first_end = self.automaton.first_end[state]
+        return self.names[int(np.searchsorted(self.document_ends, first_end))]
+
+    def save(self, path) -> None:
+        """Save the index as a NumPy .npz archive (loadable without pickle)"""
+        np.savez_compressed(
+            path,
+            names=np.array(json.dumps(self.names)),
+            vocabulary=np.array(json.dumps(self.vocabulary.tokens())),
+            document_ends=self.document_ends,
+            **self.automaton.to_arrays()
+        )
+
+    @classmethod
+    def load(cls, path, min_run: int = DEFAULT_MIN_RUN) -> 'CopyDetector':
+        """Load an index written by `save`"""
+        with np.load(path, allow_pickle=False) as archive:
+            arrays = dict(archive)
+        detector = cls(min_run=min_run)
+        detector.names = json.loads(str(arrays.pop('names')))
+        detector.vocabulary.encode(json.loads(str(arrays.pop('vocabulary'))), grow=True)
+        detector.document_ends = arrays.pop('document_ends')
+        detector.automaton = SuffixAutomaton.from_arrays(arrays)
+        return detector
+
+
+class CopyMatcher:
+    """
+    Incremental copied-run matching for streamed input.
+
+    Feed normalized words in document order with `push`; memory stays
+    constant however long the input is.
+
+    Args:
+        detector: Index of the reference corpus
+    """
+
+    def __init__(self, detector: CopyDetector):
+        self.detector = detector
+        self.tokens = 0
+        self.copied_tokens = 0
+        self.longest_run = 0
+        self._longest_state = 0
+        self._state = 0
+        self._length = 0
+        self._covered_end = -1  # Last input position inside a counted run
+
+    def push(self, word: str) -> None:
+        """Match the next normalized word"""
+        token = self.detector.vocabulary.lookup(word)
+        self._state, self._length = self.detector.automaton.step(self._state, self._length, token)
+        position = self.tokens
+        self.tokens += 1
+
+        if self._length > self.longest_run:
+            self.longest_run, self._longest_state = self._length, self._state
+
+        # Runs end at increasing positions, so their union grows at the right
+        if self._length >= self.detector.min_run:
+            start = max(position - self._length + 1, self._covered_end + 1)
+            self.copied_tokens += position - start + 1
+            self._covered_end = position
+
+    def result(self) -> CopiedText:
+        """Copied runs of the words pushed so far"""
+        return CopiedText(
+            longest_run=self.longest_run,
+            longest_run_source=self.detector.source_of(self._longest_state),
+            copied_tokens=self.copied_tokens,
+            input_tokens=self.tokens,
+            copied_fraction=round(self.copied_tokens / self.tokens, 4) if self.tokens else 0.0
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Build a copied-passage index from the command line"""
+    parser = argparse.ArgumentParser(description="Build the suffix-automaton index of a reference corpus.")
+    parser.add_argument('--corpus', type=Path,
+                        help="Directory of .txt/.md files or JSONL of {url, text} (default: the sample texts)")
+    parser.add_argument('--out', type=Path, required=True, help="Index file to write (.npz), for COPY_INDEX")
+    args = parser.parse_args(argv)
+
+    if args.corpus is not None:
+        from site_audit import load_pages
+        documents = dict(load_pages(args.corpus))
+    else:
+        from main import SAMPLE_TEXTS
+        documents = SAMPLE_TEXTS
+
+    detector = CopyDetector(documents)
+    detector.save(args.out)
+    json.dump({
+        'documents': len(detector.names),
+        'tokens': len(detector.vocabulary),
+        'states': len(detector.automaton),
+        'out': str(args.out),
+    }, sys.stdout, indent=2)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
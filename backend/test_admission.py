@@ -0,0 +1,177 @@
+"""
+Pytest tests for cost-based admission control.
+Run with: pytest test_admission.py -v
+"""
+
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+import main
+from main import app, estimate_analysis_cost
+from admission import AdmissionController, AdmissionRejected, count_sentences, estimate_cost
+
+# Create test client
+client = TestClient(app)
+
+
+class TestCostEstimate:
+    """Test suite for up-front cost estimation"""
+
+    def test_count_sentences(self):
+        """Test terminators are counted, with a minimum of one"""
+        assert count_sentences("One. Two! Three?") == 3
+        assert count_sentences("no terminators") == 1
+
+    def test_cost_grows_with_length_and_candidates(self):
+        """Test cost increases with length, sentences and candidates"""
+        small = estimate_cost(100, 1, 15)
+        assert estimate_cost(10000, 1, 15) > small
+        assert estimate_cost(100, 50, 15) > small
+        assert estimate_cost(100, 1, 100) > small
+
+    def test_unknown_sentences_estimated_from_length(self):
+        """Test sentence count is derived from length when not given"""
+        assert estimate_cost(1000, None, 10) == estimate_cost(1000, 10, 10)
+
+    def test_analysis_cost_uses_reference_candidates(self):
+        """Test the analysis cost accounts for the text's sentences"""
+        assert estimate_analysis_cost("One. Two. Three.") > estimate_analysis_cost("One sentence only")
+
+
+class TestAdmissionController:
+    """Test suite for the per-worker budget and queue"""
+
+    def test_admits_within_budget(self):
+        """Test requests that fit are admitted immediately"""
+        async def scenario():
+            controller = AdmissionController(budget=10)
+            first = await controller.acquire(4)
+            second = await controller.acquire(6)
+            assert controller.in_use == 10
+            controller.release(first)
+            controller.release(second)
+            return controller.snapshot()
+
+        snapshot = asyncio.run(scenario())
+        assert snapshot["admitted"] == 2
+        assert snapshot["in_use"] == 0
+
+    def test_queues_until_budget_frees(self):
+        """Test a request over budget waits and runs after a release"""
+        async def scenario():
+            controller = AdmissionController(budget=10)
+            held = await controller.acquire(8)
+            waiter = asyncio.ensure_future(controller.acquire(5))
+            await asyncio.sleep(0)
+            assert controller.snapshot()["queue_depth"] == 1
+            controller.release(held)
+            return await waiter, controller
+
+        granted, controller = asyncio.run(scenario())
+        assert granted == 5
+        assert controller.in_use == 5
+        assert controller.snapshot()["queued"] == 1
+
+    def test_small_requests_not_blocked_by_huge_one(self):
+        """Test first-fit admission lets small waiters past a huge one"""
+        async def scenario():
+            controller = AdmissionController(budget=10)
+            held = await controller.acquire(6)
+            huge = asyncio.ensure_future(controller.acquire(100))
+            await asyncio.sleep(0)
+            small = await asyncio.wait_for(controller.acquire(3), timeout=1)
+            state = (huge.done(), controller.in_use)
+
+            controller.release(held)
+            controller.release(small)
+            granted = await huge
+            return state, granted
+
+        (huge_done, in_use), granted = asyncio.run(scenario())
+        assert not huge_done
+        assert in_use == 9
+        # The huge request is clamped to the budget and runs alone afterwards
+        assert granted == 10
+
+    def test_rejects_when_queue_full(self):
+        """Test a full queue rejects with 429"""
+        async def scenario():
+            controller = AdmissionController(budget=1, max_queue=0)
+            await controller.acquire(1)
+            await controller.acquire(1)
+
+        with pytest.raises(AdmissionRejected) as exc:
+            asyncio.run(scenario())
+        assert exc.value.status_code == 429
+        assert exc.value.retry_after == 1
+
+    def test_rejects_after_queue_timeout(self):
+        """Test waiting past the queue timeout rejects with 503"""
+        controller = AdmissionController(budget=1, queue_timeout=0.01)
+
+        async def scenario():
+            await controller.acquire(1)
+            await controller.acquire(1)
+
+        with pytest.raises(AdmissionRejected) as exc:
+            asyncio.run(scenario())
+        assert exc.value.status_code == 503
+        assert controller.snapshot()["rejected"]["queue_timeout"] == 1
+        assert controller.snapshot()["queue_depth"] == 0
+
+    def test_rejects_too_expensive_request(self):
+        """Test requests above the per-request limit are rejected with 413"""
+        controller = AdmissionController(budget=100, max_request_cost=50)
+
+        with pytest.raises(AdmissionRejected) as exc:
+            asyncio.run(controller.acquire(51))
+        assert exc.value.status_code == 413
+
+    def test_cancelled_waiter_leaves_queue(self):
+        """Test a cancelled waiter does not leak budget or queue slots"""
+        async def scenario():
+            controller = AdmissionController(budget=10)
+            held = await controller.acquire(10)
+            waiter = asyncio.ensure_future(controller.acquire(5))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.sleep(0)
+            controller.release(held)
+            return controller.snapshot()
+
+        snapshot = asyncio.run(scenario())
+        assert snapshot["queue_depth"] == 0
+        assert snapshot["in_use"] == 0
+
+
+class TestAdmissionAPI:
+    """Test suite for admission control on the HTTP endpoints"""
+
+    def test_metrics_report_admission_state(self):
+        """Test /metrics exposes the queue state"""
+        client.post("/analyze", json={"text": "Search engine optimization matters for content."})
+        data = client.get("/metrics").json()
+
+        assert data["admission"]["admitted"] >= 1
+        assert data["admission"]["queue_depth"] == 0
+
+    def test_busy_worker_returns_429(self, monkeypatch):
+        """Test a saturated worker rejects with 429 and Retry-After"""
+        controller = AdmissionController(budget=10, max_queue=0)
+        controller.in_use = 10
+        monkeypatch.setattr(main, "admission_controller", controller)
+
+        response = client.post("/analyze", json={"text": "Search engine optimization matters for content."})
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "1"
+
+    def test_too_expensive_request_returns_413(self, monkeypatch):
+        """Test requests over the configured cost limit are rejected"""
+        monkeypatch.setattr(main, "admission_controller", AdmissionController(max_request_cost=1))
+
+        response = client.post("/analyze", json={"text": "Search engine optimization matters for content."})
+        assert response.status_code == 413
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,203 @@
+"""
+Pytest tests for the Bloom-filter fast path of plagiarism checks.
+Run with: pytest test_bloom.py -v
+"""
+
+from difflib import SequenceMatcher
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from main import (
+    app, SAMPLE_TEXTS, calculate_ngram_similarity, calculate_sentence_similarity, check_plagiarism, clean_text,
+    get_streaming_reference
+)
+from bloom import BlockedBloomFilter, ReferenceFilter, sentence_hashes
+from streaming import StreamingAnalyzer
+
+# Create test client
+client = TestClient(app)
+
+ORIGINAL = (
+    "Our bakery opens at seven every morning and sells sourdough loaves and fruit tarts. "
+    "Customers often ask about gluten free options, which we bake on Thursdays."
+)
+
+# article1, closely reworded: no shared 5-gram or sentence, but similar sentences
+REWORDED = (
+    "Search engine optimisation is vital for being visible online. Good content which "
+    "engages readers and provides real value is essential for success in SEO. Keywords ought to be used "
+    "naturally across the text. Content should be easy to read and well structured with good "
+    "headings and paragraphs. Frequent updates and new content help maintain strong search rankings."
+)
+
+
+@pytest.fixture
+def reference_filter(monkeypatch):
+    reference_filter = get_streaming_reference().filter
+    monkeypatch.setattr(reference_filter, "fast_path", 0)
+    return reference_filter
+
+
+@pytest.fixture
+def fast_path(reference_filter, monkeypatch):
+    """The reference filter with the opt-in fast path turned on"""
+    monkeypatch.setattr(reference_filter, "min_hit_rate", 0.05)
+    return reference_filter
+
+
+def full_tier_score(text):
+    """check_plagiarism with every tier, from the reference helpers"""
+    cleaned = clean_text(text)
+    sentences = [s.strip() for s in text.split('.') if s.strip()]
+    best = 0.0
+    for sample in SAMPLE_TEXTS.values():
+        reference = clean_text(sample)
+        similarity = (
+            calculate_ngram_similarity(cleaned, reference) * 0.5
+            + calculate_sentence_similarity(sentences, [s.strip() for s in sample.split('.') if s.strip()]) * 0.3
+            + SequenceMatcher(None, cleaned, reference).ratio() * 0.2
+        )
+        best = max(best, similarity)
+    return round(best * 100, 2)
+
+
+def random_keys(count, seed):
+    return np.random.default_rng(seed).integers(0, 2**63, count, dtype=np.uint64)
+
+
+class TestBlockedBloomFilter:
+    """Test suite for the blocked Bloom filter"""
+
+    def test_no_false_negatives(self):
+        """Test every inserted key is found"""
+        keys = random_keys(5000, seed=1)
+        bloom = BlockedBloomFilter(len(keys), 0.01)
+        bloom.add(keys)
+
+        assert bloom.contains(keys).all()
+        assert bloom.keys == 5000
+        assert bloom.contains(np.zeros(0, dtype=np.uint64)).size == 0
+
+    @pytest.mark.parametrize("rate", [0.05, 0.01, 0.001])
+    def test_false_positive_rate(self, rate):
+        """Test the measured and estimated rates stay near the target"""
+        bloom = BlockedBloomFilter(20000, rate)
+        bloom.add(random_keys(20000, seed=2))
+
+        measured = bloom.contains(random_keys(200000, seed=3)).mean()
+        assert measured < rate * 2
+        assert bloom.estimated_false_positive_rate() < rate * 2
+
+    def test_memory_follows_target_rate(self):
+        """Test lower false-positive rates cost more bits per key"""
+        loose = BlockedBloomFilter(10000, 0.05)
+        tight = BlockedBloomFilter(10000, 0.001)
+        assert loose.memory_bytes < tight.memory_bytes < 10000 * 3  # under 3 bytes per key
+        assert loose.n_hashes < tight.n_hashes
+
+    def test_invalid_rate(self):
+        """Test false-positive rates outside (0, 1) are rejected"""
+        with pytest.raises(ValueError):
+            BlockedBloomFilter(10, 0)
+
+
+class TestReferenceFilter:
+    """Test suite for the fast-path decision"""
+
+    def test_threshold(self):
+        """Test the full check runs from the minimum hit rate up"""
+        reference_filter = ReferenceFilter(random_keys(100, seed=4), min_hit_rate=0.1)
+
+        assert reference_filter.is_original(9, 100)
+        assert not reference_filter.is_original(10, 100)
+        assert not reference_filter.is_original(0, 0)
+        assert reference_filter.stats()["fast_path"] == 1
+        assert reference_filter.stats()["queries"] == 3
+
+    def test_disabled(self):
+        """Test a minimum hit rate of 0 turns the fast path off"""
+        reference_filter = ReferenceFilter(random_keys(100, seed=5), min_hit_rate=0)
+        assert not reference_filter.is_original(0, 100)
+
+    def test_sentence_hashes(self):
+        """Test sentences hash deterministically into uint64 keys"""
+        hashes = sentence_hashes(["a b c", "d e f", "a b c"])
+        assert hashes.dtype == np.uint64
+        assert hashes[0] == hashes[2] != hashes[1]
+
+
+class TestPlagiarismFastPath:
+    """Test suite for skipping plagiarism checks of original text"""
+
+    def test_off_by_default(self, reference_filter):
+        """Test the fast path is opt-in"""
+        assert ReferenceFilter(random_keys(100, seed=6)).min_hit_rate == 0
+        assert reference_filter.min_hit_rate == 0
+
+        check_plagiarism(ORIGINAL)
+        assert reference_filter.fast_path == 0
+
+    @pytest.mark.parametrize("text", [REWORDED, ORIGINAL])
+    def test_default_scores_use_every_tier(self, reference_filter, text):
+        """Test reworded and original text score exactly like the full check"""
+        assert check_plagiarism(text) == full_tier_score(text)
+        assert reference_filter.fast_path == 0
+
+    def test_reworded_text_keeps_its_score(self, reference_filter):
+        """Test a close rewording is still caught by the fuzzy tiers"""
+        assert check_plagiarism(REWORDED) > 20
+
+    def test_original_text_skips_costly_tiers(self, fast_path, monkeypatch):
+        """Test original text gets the near-zero n-gram score without the full check"""
+        assert check_plagiarism(ORIGINAL) == 0.0
+        assert fast_path.fast_path == 1
+
+        monkeypatch.setattr(fast_path, "min_hit_rate", 0)
+        assert 0 < check_plagiarism(ORIGINAL) < 5
+
+    def test_copied_text_gets_full_check(self, fast_path):
+        """Test copied text falls back to the full check"""
+        mixed = ORIGINAL + " " + SAMPLE_TEXTS["article1"]
+        assert check_plagiarism(mixed) > 30
+        assert fast_path.fast_path == 0
+
+    def test_fast_path_is_approximated(self, fast_path):
+        """Test a fast-path score is reported as approximated and gets no ETag"""
+        response = client.post("/analyze", json={"text": ORIGINAL + " Fast path check.", "language": "en"})
+        coverage = response.json()["coverage"]
+
+        assert fast_path.fast_path == 1
+        assert coverage["plagiarism_tiers"] == ["ngram"]
+        assert {"plagiarism_score", "final_score", "suggestions"} <= set(coverage["approximated"])
+        assert "ETag" not in response.headers
+
+    def test_streaming_agrees(self, fast_path):
+        """Test streamed analyses take the same fast path"""
+        analyzer = StreamingAnalyzer(get_streaming_reference(), language="en")
+        result = analyzer.consume([ORIGINAL[:50], ORIGINAL[50:]])
+
+        assert max(result.similarities.values()) == 0.0
+        assert fast_path.fast_path == 1
+        assert result.tiers == ["ngram"]
+
+    def test_no_lookups_when_off(self, reference_filter, monkeypatch):
+        """Test the filter is not queried while the fast path is off"""
+        def fail(keys):
+            raise AssertionError("reference filter queried")
+
+        monkeypatch.setattr(reference_filter, "count_hits", fail)
+        text = ORIGINAL + " Lookup check."
+        check_plagiarism(text)
+        StreamingAnalyzer(get_streaming_reference(), language="en").consume([text])
+
+    def test_metrics(self):
+        """Test /metrics reports the filter's size and accuracy"""
+        stats = client.get("/metrics").json()["plagiarism_filter"]
+        assert stats["keys"] > 0
+        assert stats["memory_bytes"] > 0
+        assert 0 <= stats["estimated_false_positive_rate"] <= stats["target_false_positive_rate"] * 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
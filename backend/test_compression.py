@@ -0,0 +1,101 @@
+"""
+Pytest tests for response compression.
+Run with: pytest test_compression.py -v
+"""
+
+import gzip
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+import compression
+from main import app, SAMPLE_TEXTS
+from compression import CompressionMiddleware, choose_encoding
+
+# Create test client
+client = TestClient(app)
+
+PAYLOAD = {"text": SAMPLE_TEXTS["article1"], "detailed_plagiarism": True}
+
+
+def raw_post(path, payload, accept_encoding):
+    """POST and return the response with its body still encoded"""
+    with client.stream("POST", path, json=payload, headers={"Accept-Encoding": accept_encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+class TestNegotiation:
+    """Test suite for choosing a content coding"""
+
+    @pytest.mark.parametrize("header, brotli_available, expected", [
+        (None, True, None),
+        ("identity", True, None),
+        ("gzip, deflate", True, "gzip"),
+        ("gzip, br", True, "br"),
+        ("gzip, br", False, "gzip"),
+        ("br;q=0.5, gzip;q=0.8", True, "gzip"),
+        ("gzip;q=0", True, None),
+        ("*", False, "gzip"),
+    ])
+    def test_choose_encoding(self, header, brotli_available, expected):
+        """Test q-values, wildcards and brotli availability"""
+        assert choose_encoding(header, brotli_available) == expected
+
+
+class TestCompression:
+    """Test suite for compressed responses"""
+
+    def test_gzip_analysis(self):
+        """Test large analysis responses are gzipped and decode to the same JSON"""
+        plain, plain_body = raw_post("/analyze", PAYLOAD, "identity")
+        zipped, zipped_body = raw_post("/analyze", PAYLOAD, "gzip")
+
+        assert "content-encoding" not in plain.headers
+        assert zipped.headers["content-encoding"] == "gzip"
+        assert "accept-encoding" in zipped.headers["vary"].lower()
+        assert int(zipped.headers["content-length"]) == len(zipped_body) < len(plain_body)
+        assert json.loads(gzip.decompress(zipped_body)) == json.loads(plain_body)
+
+    def test_small_responses_are_not_compressed(self):
+        """Test bodies under the threshold are sent as they are"""
+        response, body = raw_post("/analyze", {"text": "short"}, "gzip")
+        assert response.status_code == 400
+        assert "content-encoding" not in response.headers
+        assert json.loads(body)["detail"]
+
+    @pytest.mark.skipif(compression.brotli is None, reason="brotli not installed")
+    def test_brotli(self):
+        """Test brotli is preferred when installed and accepted"""
+        response, body = raw_post("/analyze", PAYLOAD, "gzip, br")
+        assert response.headers["content-encoding"] == "br"
+        assert json.loads(compression.brotli.decompress(body))["readability"]
+
+    def test_streams_pass_through(self):
+        """Test streamed and non-text responses are left alone"""
+        streamer = FastAPI()
+        streamer.add_middleware(CompressionMiddleware, minimum_size=1)
+
+        @streamer.get("/stream")
+        async def stream():
+            async def lines():
+                for i in range(3):
+                    yield json.dumps({"line": i}) + "\n"
+            return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+        @streamer.get("/text")
+        async def text():
+            return PlainTextResponse("x" * 10)
+
+        with TestClient(streamer).stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+            assert "content-encoding" not in response.headers
+            assert b"".join(response.iter_raw()).count(b"\n") == 3
+
+        with TestClient(streamer).stream("GET", "/text", headers={"Accept-Encoding": "gzip"}) as response:
+            assert response.headers["content-encoding"] == "gzip"
+            assert gzip.decompress(b"".join(response.iter_raw())) == b"x" * 10
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,112 @@
+"""
+Pytest tests for ETags and conditional analysis responses.
+Run with: pytest test_conditional.py -v
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+import jobs
+import main
+from main import app, SAMPLE_TEXTS, JOB_HANDLERS
+from conditional import etag_matches, make_etag
+from jobs import JobStore, run_worker
+
+# Create test client
+client = TestClient(app)
+
+PAYLOAD = {"text": SAMPLE_TEXTS["article1"]}
+
+
+class TestETags:
+    """Test suite for ETag computation and matching"""
+
+    def test_deterministic(self):
+        """Test equal inputs give equal weak ETags, regardless of key order"""
+        etag = make_etag("1", {"text": "a", "format": "text"})
+        assert etag == make_etag("1", {"format": "text", "text": "a"})
+        assert etag.startswith('W/"')
+        assert etag != make_etag("2", {"text": "a", "format": "text"})
+
+    def test_matching(self):
+        """Test If-None-Match lists, weak prefixes and wildcards"""
+        etag = 'W/"abc"'
+        assert etag_matches('"abc"', etag)
+        assert etag_matches('W/"xyz", W/"abc"', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"xyz"', etag)
+        assert not etag_matches(None, etag)
+
+
+class TestConditionalAnalysis:
+    """Test suite for 304 responses of /analyze"""
+
+    def test_etag_depends_on_request_and_version(self, monkeypatch):
+        """Test the ETag changes with the text, the options and the scoring version"""
+        etag = client.post("/analyze", json=PAYLOAD).headers["etag"]
+
+        assert client.post("/analyze", json=PAYLOAD).headers["etag"] == etag
+        assert client.post("/analyze", json={**PAYLOAD, "detailed_plagiarism": True}).headers["etag"] != etag
+        assert client.post("/analyze", json={"text": SAMPLE_TEXTS["article2"]}).headers["etag"] != etag
+
+        monkeypatch.setattr(main, "SCORING_VERSION", "test")
+        assert client.post("/analyze", json=PAYLOAD).headers["etag"] != etag
+
+    def test_not_modified_before_analysis(self, monkeypatch):
+        """Test a matching If-None-Match returns 304 without analyzing"""
+        etag = client.post("/analyze", json=PAYLOAD).headers["etag"]
+
+        def fail(*args, **kwargs):
+            raise AssertionError("analysis must not run")
+
+        monkeypatch.setattr(main, "prepare_analysis", fail)
+        monkeypatch.setattr(main, "run_analysis", fail)
+        response = client.post("/analyze", json=PAYLOAD, headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert response.content == b""
+
+    def test_stale_etag_gets_full_response(self):
+        """Test a non-matching If-None-Match gets a fresh analysis"""
+        response = client.post("/analyze", json=PAYLOAD, headers={"If-None-Match": 'W/"stale"'})
+        assert response.status_code == 200
+        assert "readability" in response.json()
+
+    def test_approximated_results_have_no_etag(self):
+        """Test deadline-limited results cannot be revalidated"""
+        response = client.post("/analyze?deadline_ms=0", json={"text": SAMPLE_TEXTS["article3"]})
+        assert not response.json()["coverage"]["complete"]
+        assert "etag" not in response.headers
+
+
+class TestConditionalBatches:
+    """Test suite for ETags of site audits and jobs"""
+
+    def test_site_audit(self):
+        """Test unchanged site audits are answered with 304"""
+        payload = {"pages": [{"url": f"/{name}", "text": text} for name, text in SAMPLE_TEXTS.items()]}
+        response = client.post("/site-audit", json=payload)
+        assert response.status_code == 200
+
+        etag = response.headers["etag"]
+        assert client.post("/site-audit", json=payload, headers={"If-None-Match": etag}).status_code == 304
+        assert client.post("/site-audit", json={**payload, "top_k": 1}, headers={"If-None-Match": etag}).status_code == 200
+
+    def test_job_etag_changes_with_state(self, tmp_path, monkeypatch):
+        """Test job polls get 304 until the job changes"""
+        store = JobStore(str(tmp_path / "jobs.sqlite3"))
+        monkeypatch.setattr(jobs, "_job_store_cache", store)
+        job_id = client.post("/jobs", json={"documents": [PAYLOAD]}).json()["jobs"][0]["id"]
+
+        queued = client.get(f"/jobs/{job_id}").headers["etag"]
+        assert client.get(f"/jobs/{job_id}", headers={"If-None-Match": queued}).status_code == 304
+
+        run_worker(store, JOB_HANDLERS, drain=True)
+        response = client.get(f"/jobs/{job_id}", headers={"If-None-Match": queued})
+        assert response.status_code == 200
+        assert response.json()["status"] == "done"
+        assert client.get(f"/jobs/{job_id}", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
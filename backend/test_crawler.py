@@ -0,0 +1,355 @@
+"""
+Pytest tests for the concurrent sitemap crawler.
+Run with: pytest test_crawler.py -v
+
+Pages are served by a local HTTP/1.1 server; no real network is used.
+"""
+
+import asyncio
+import gzip
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from main import app, SAMPLE_TEXTS
+from crawler import (
+    BlockedURL, Crawler, SitemapTooLarge, ValidatorStore, check_public_url, page_format, parse_sitemap
+)
+
+# Create test client
+client = TestClient(app)
+
+LAST_MODIFIED = "Mon, 05 Oct 2026 10:00:00 GMT"
+
+PAGES = {
+    "/article1.html": ("text/html; charset=utf-8", f"<html><head><title>Content Marketing</title></head>"
+                                                   f"<body><p>{SAMPLE_TEXTS['article1']}</p></body></html>"),
+    "/article2.md": ("text/markdown", f"# Technical SEO\n\n{SAMPLE_TEXTS['article2']}"),
+    "/article3.txt": ("text/plain", SAMPLE_TEXTS["article3"]),
+    "/logo.png": ("image/png", "not an image"),
+}
+
+# Served but not listed in the sitemap: takes about a second to analyze
+LONG_PAGE = ("text/plain", " ".join(SAMPLE_TEXTS.values()) * 20)
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    """Serves PAGES and a sitemap, honouring conditional requests"""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def send_body(self, content_type, body, headers=()):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.connections.add(self.client_address)
+            server.requests.append((self.path, dict(self.headers)))
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            time.sleep(server.delay)
+            self.respond()
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def respond(self):
+        base = f"http://127.0.0.1:{self.server.server_port}"
+        if self.path == "/sitemap.xml":
+            body = (
+                '<?xml version="1.0" encoding="UTF-8"?>'
+                '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                f'<sitemap><loc>{base}/pages.xml.gz</loc></sitemap>'
+                '</sitemapindex>'
+            )
+            self.send_body("application/xml", body.encode())
+        elif self.path == "/pages.xml.gz":
+            body = (
+                '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                + "".join(f"<url><loc>{base}{path}</loc></url>" for path in PAGES)
+                + '</urlset>'
+            )
+            self.send_body("application/gzip", gzip.compress(body.encode()))
+        elif self.path == "/long.txt":
+            content_type, text = LONG_PAGE
+            self.send_body(content_type, text.encode())
+        elif self.path in PAGES:
+            etag = f'"{self.path.strip("/")}-v1"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            content_type, text = PAGES[self.path]
+            self.send_body(content_type, text.encode(), [("ETag", etag), ("Last-Modified", LAST_MODIFIED)])
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+
+@pytest.fixture
+def site():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = set()
+    server.requests = []
+    server.in_flight = 0
+    server.max_in_flight = 0
+    server.delay = 0.0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def allow_private(monkeypatch):
+    # The local test site lives on loopback, which /crawl refuses by default
+    monkeypatch.setenv("CRAWL_ALLOW_PRIVATE", "1")
+
+
+def base_url(server):
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+async def collect_text(page):
+    return "".join([chunk async for chunk in page.chunks])
+
+
+class TestSitemapParsing:
+    """Test suite for sitemap and content type parsing"""
+
+    def test_urlset_and_index(self):
+        """Test page and nested sitemap entries are told apart"""
+        urlset = b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"><url><loc> /a </loc></url><url><loc>/b</loc></url></urlset>'
+        index = b'<sitemapindex><sitemap><loc>/s1.xml</loc></sitemap></sitemapindex>'
+
+        assert parse_sitemap(urlset) == (["/a", "/b"], [])
+        assert parse_sitemap(gzip.compress(index)) == ([], ["/s1.xml"])
+
+    def test_page_format(self):
+        """Test content types map to analyzer formats"""
+        assert page_format("text/html; charset=utf-8") == "html"
+        assert page_format("text/markdown") == "markdown"
+        assert page_format("TEXT/PLAIN") == "text"
+        assert page_format("image/png") is None
+
+    def test_size_limit_before_and_after_decompression(self):
+        """Test oversized sitemaps and gzip bombs are rejected without inflating in full"""
+        urlset = b'<urlset><url><loc>/a</loc></url></urlset>'
+        bomb = gzip.compress(urlset + b' ' * (4 * 1024 * 1024))
+        assert len(bomb) < 64 * 1024
+
+        with pytest.raises(SitemapTooLarge):
+            parse_sitemap(bomb, max_bytes=1024 * 1024)
+        with pytest.raises(SitemapTooLarge):
+            parse_sitemap(urlset, max_bytes=16)
+        assert parse_sitemap(bomb, max_bytes=8 * 1024 * 1024) == (["/a"], [])
+
+
+class TestURLChecks:
+    """Test suite for refusing non-public hosts"""
+
+    @pytest.mark.parametrize("url", [
+        "http://127.0.0.1/admin",
+        "http://localhost:8000/",
+        "http://10.1.2.3/",
+        "http://192.168.0.1/",
+        "http://169.254.169.254/latest/meta-data/",
+        "http://[::1]/",
+        "http://[::ffff:127.0.0.1]/",
+        "http://0.0.0.0/",
+        "file:///etc/passwd",
+    ])
+    def test_non_public_urls_blocked(self, url):
+        """Test loopback, private, link-local and non-http URLs are refused"""
+        with pytest.raises(BlockedURL):
+            asyncio.run(check_public_url(url))
+
+    def test_public_address_allowed(self):
+        """Test a global address passes"""
+        asyncio.run(check_public_url("http://93.184.216.34/page"))
+
+    def test_redirect_hops_are_checked(self):
+        """Test a public page redirecting to a link-local address is not followed"""
+        requested = []
+
+        def handler(request):
+            requested.append(str(request.url))
+            return httpx.Response(302, headers={"Location": "http://169.254.169.254/latest/meta-data/"})
+
+        crawler = Crawler(collect_text, transport=httpx.MockTransport(handler))
+        results = asyncio.run(crawler.crawl(urls=["http://93.184.216.34/page"]))
+
+        assert results[0].status == "error"
+        assert "BlockedURL" in results[0].detail
+        assert requested == ["http://93.184.216.34/page"]
+
+    def test_private_hosts_blocked_by_default(self, site):
+        """Test the crawler does not contact loopback hosts unless allowed"""
+        results = asyncio.run(Crawler(collect_text).crawl(urls=[base_url(site) + "/article3.txt"]))
+        assert results[0].status == "error"
+        assert site.requests == []
+
+
+class TestCrawler:
+    """Test suite for the crawler against a local server"""
+
+    def test_sitemap_crawl_streams_bodies(self, site):
+        """Test every sitemap page is fetched and streamed to the callback"""
+        crawler = Crawler(collect_text, allow_private=True)
+        results = asyncio.run(crawler.crawl(sitemap_url=base_url(site) + "/sitemap.xml"))
+
+        by_path = {result.url.replace(base_url(site), ""): result for result in results}
+        assert list(by_path) == list(PAGES)
+        assert by_path["/article3.txt"].status == "analyzed"
+        assert by_path["/article3.txt"].analysis == SAMPLE_TEXTS["article3"]
+        assert by_path["/logo.png"].status == "skipped"
+        assert crawler.stats.analyzed == 3
+
+    def test_per_host_limit_and_connection_reuse(self, site):
+        """Test concurrency stays within the per-host limit over pooled connections"""
+        site.delay = 0.05
+        urls = [f"{base_url(site)}/article3.txt?page={i}" for i in range(12)]
+        PAGES.update({f"/article3.txt?page={i}": PAGES["/article3.txt"] for i in range(12)})
+        try:
+            crawler = Crawler(collect_text, per_host=3, allow_private=True)
+            results = asyncio.run(crawler.crawl(urls=urls))
+        finally:
+            for i in range(12):
+                del PAGES[f"/article3.txt?page={i}"]
+
+        assert all(result.status == "analyzed" for result in results)
+        assert site.max_in_flight <= 3
+        assert crawler.stats.max_in_flight[f"127.0.0.1:{site.server_port}"] == 3
+        # Keep-alive: 12 requests over no more connections than the limit
+        assert len(site.connections) <= 3
+
+    def test_conditional_get_skips_unchanged_pages(self, site, tmp_path):
+        """Test a second crawl sends validators and skips 304 pages"""
+        state = tmp_path / "validators.json"
+        urls = [base_url(site) + "/article1.html", base_url(site) + "/article2.md"]
+
+        first = asyncio.run(Crawler(collect_text, validators=ValidatorStore(state), allow_private=True).crawl(urls=urls))
+        assert [result.status for result in first] == ["analyzed", "analyzed"]
+
+        # Validators survive in the state file
+        second = asyncio.run(Crawler(collect_text, validators=ValidatorStore(state), allow_private=True).crawl(urls=urls))
+        assert [result.status for result in second] == ["not_modified", "not_modified"]
+        assert all(result.analysis is None for result in second)
+
+        headers = site.requests[-1][1]
+        assert headers["If-None-Match"] == '"article2.md-v1"'
+        assert headers["If-Modified-Since"] == LAST_MODIFIED
+
+    def test_validator_store_is_bounded(self):
+        """Test the least recently updated validators are evicted first"""
+        store = ValidatorStore(max_entries=2)
+        for url in ("/a", "/b", "/a", "/c"):
+            store.update(url, httpx.Response(200, headers={"ETag": f'"{url}"'}))
+
+        assert len(store) == 2
+        assert store.conditional_headers("/b") == {}
+        assert store.conditional_headers("/a") == {"If-None-Match": '"/a"'}
+
+    def test_errors_are_per_page(self, site):
+        """Test missing pages and failing callbacks do not abort the crawl"""
+        async def failing(page):
+            raise ValueError("boom")
+
+        results = asyncio.run(Crawler(failing, allow_private=True).crawl(urls=[
+            base_url(site) + "/missing", base_url(site) + "/article3.txt"
+        ]))
+
+        assert [result.status for result in results] == ["error", "error"]
+        assert results[0].http_status == 404
+        assert "boom" in results[1].detail
+
+
+class TestCrawlAPI:
+    """Test suite for the /crawl endpoint"""
+
+    def test_crawl_analyzes_pages(self, site, allow_private):
+        """Test crawled pages get full analyses, and a recrawl is conditional on request"""
+        payload = {"sitemap_url": base_url(site) + "/sitemap.xml", "conditional": True}
+        response = client.post("/crawl", json=payload)
+        assert response.status_code == 200
+
+        data = response.json()
+        assert (data["analyzed"], data["skipped"], data["errors"]) == (3, 1, 0)
+        html_page = data["pages"][0]
+        assert html_page["analysis"]["serp_preview"]["meta_title"] == "Content Marketing"
+        assert html_page["analysis"]["structure"]["title"] == "Content Marketing"
+
+        # Matches a direct streaming analysis of the same document
+        _, text = PAGES["/article3.txt"]
+        expected = client.post("/analyze/stream", content=text.encode()).json()
+        assert data["pages"][2]["analysis"]["final_score"] == expected["final_score"]
+
+        recrawl = client.post("/crawl", json=payload).json()
+        assert recrawl["not_modified"] == 3
+
+        # Without opting in, earlier validators are not used
+        unconditional = client.post("/crawl", json={"sitemap_url": payload["sitemap_url"]}).json()
+        assert unconditional["analyzed"] == 3
+
+    def test_api_answers_during_crawl_analysis(self, site, allow_private):
+        """Test the event loop serves other requests while crawled pages are analyzed"""
+        async def scenario():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as api:
+                crawl = asyncio.ensure_future(
+                    api.post("/crawl", json={"urls": [base_url(site) + "/long.txt"]}, timeout=60)
+                )
+                while not site.requests:
+                    await asyncio.sleep(0.01)
+                await asyncio.sleep(0.1)
+
+                started = time.perf_counter()
+                health = await api.get("/")
+                latency = time.perf_counter() - started
+                crawling = not crawl.done()
+                return health, latency, crawling, await crawl
+
+        health, latency, crawling, crawl = asyncio.run(scenario())
+        assert health.status_code == 200
+        assert crawling and latency < 0.3
+        assert crawl.json()["analyzed"] == 1
+
+    def test_needs_a_source(self):
+        """Test a crawl without sitemap or URLs is rejected"""
+        assert client.post("/crawl", json={}).status_code == 400
+        assert client.post("/crawl", json={"urls": ["http://x"], "max_pages": 0}).status_code == 400
+        assert client.post("/crawl", json={"urls": ["http://x"], "max_pages": 10 ** 6}).status_code == 400
+
+    def test_private_sitemap_rejected(self, site):
+        """Test a sitemap on a loopback host is refused without being fetched"""
+        response = client.post("/crawl", json={"sitemap_url": base_url(site) + "/sitemap.xml"})
+        assert response.status_code == 400
+        assert site.requests == []
+
+    def test_unreachable_sitemap(self, site, allow_private):
+        """Test a missing sitemap is reported as a bad gateway"""
+        response = client.post("/crawl", json={"sitemap_url": base_url(site) + "/nope.xml"})
+        assert response.status_code == 502
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
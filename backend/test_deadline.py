@@ -0,0 +1,112 @@
+"""
+Pytest tests for deadline-aware degraded analysis.
+Run with: pytest test_deadline.py -v
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app, SAMPLE_TEXTS, PLAGIARISM_TIERS, check_plagiarism, check_plagiarism_tiers
+from deadline import Deadline
+
+# Create test client
+client = TestClient(app)
+
+ARTICLE = SAMPLE_TEXTS["article1"]
+
+
+class TestDeadline:
+    """Test suite for the latency budget"""
+
+    def test_tightest_explicit_deadline_wins(self):
+        """Test the smaller of header and query budgets is used"""
+        assert Deadline.from_sources(500, 200, 10000).budget_ms == 200
+        assert Deadline.from_sources(None, 300, 10000).budget_ms == 300
+
+    def test_server_default(self):
+        """Test the default applies only when the request sets no budget"""
+        assert Deadline.from_sources(None, None, 1500).budget_ms == 1500
+        assert Deadline.from_sources(None, None, None) is None
+
+    def test_remaining_budget(self):
+        """Test a zero budget is expired and only allows free stages"""
+        assert Deadline(0).expired()
+        assert not Deadline(0).allows(1)
+        assert Deadline(60000).allows(1)
+        assert Deadline(60000).remaining_ms() <= 60000
+
+
+class TestTieredPlagiarism:
+    """Test suite for plagiarism tiers under a deadline"""
+
+    def test_all_tiers_without_deadline(self):
+        """Test every tier runs and the score matches check_plagiarism"""
+        score, tiers = check_plagiarism_tiers(ARTICLE)
+
+        assert tiers == list(PLAGIARISM_TIERS)
+        assert score == check_plagiarism(ARTICLE)
+
+    def test_expired_deadline_keeps_ngram_tier(self):
+        """Test only the cheapest tier runs once the budget is used up"""
+        score, tiers = check_plagiarism_tiers(ARTICLE, Deadline(0))
+
+        assert tiers == ["ngram"]
+        # An exact copy has identical shingles
+        assert score == 100.0
+
+    def test_generous_deadline_runs_all_tiers(self):
+        """Test a generous deadline changes nothing"""
+        assert check_plagiarism_tiers(ARTICLE, Deadline(60000)) == check_plagiarism_tiers(ARTICLE)
+
+
+class TestDeadlineAPI:
+    """Test suite for deadlines on /analyze"""
+
+    def test_complete_without_deadline(self):
+        """Test the coverage reports a complete analysis by default"""
+        coverage = client.post("/analyze", json={"text": ARTICLE}).json()["coverage"]
+
+        assert coverage["complete"] is True
+        assert coverage["plagiarism_tiers"] == list(PLAGIARISM_TIERS)
+        assert coverage["deadline_ms"] is None
+
+    def test_header_deadline_degrades(self):
+        """Test an exhausted header budget returns a partial answer"""
+        response = client.post(
+            "/analyze",
+            json={"text": ARTICLE, "detailed_plagiarism": True},
+            headers={"X-Deadline-Ms": "0"}
+        )
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["coverage"]["complete"] is False
+        assert data["coverage"]["plagiarism_tiers"] == ["ngram"]
+        assert "plagiarism_score" in data["coverage"]["approximated"]
+        assert data["coverage"]["skipped"] == ["copied_text", "plagiarism_matches"]
+        assert data["plagiarism_matches"] is None
+        assert data["readability"] > 0
+
+    def test_query_deadline(self):
+        """Test a generous query budget keeps the full analysis"""
+        response = client.post("/analyze?deadline_ms=60000", json={"text": ARTICLE})
+        coverage = response.json()["coverage"]
+
+        assert coverage["complete"] is True
+        assert coverage["deadline_ms"] == 60000
+
+    def test_server_default_deadline(self, monkeypatch):
+        """Test ANALYZE_DEADLINE_MS applies when the request sets none"""
+        monkeypatch.setenv("ANALYZE_DEADLINE_MS", "0")
+        coverage = client.post("/analyze", json={"text": ARTICLE}).json()["coverage"]
+
+        assert coverage["complete"] is False
+        assert coverage["deadline_ms"] == 0
+
+    def test_negative_deadline_rejected(self):
+        """Test negative budgets are invalid"""
+        response = client.post("/analyze?deadline_ms=-5", json={"text": ARTICLE})
+        assert response.status_code == 422
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,134 @@
+"""
+Pytest tests for the golden-equivalence harness.
+Run with: pytest test_golden.py -v
+"""
+
+import json
+import math
+
+import pytest
+import golden
+from main import SAMPLE_TEXTS, calculate_sentence_similarity, clean_text
+from golden import (
+    EDGE_CASES, Engine, build_corpus, compare, default_engines, field_delta,
+    generate_corpus, reference_sentence_similarity
+)
+
+
+def off_by_a_little(text1, text2, n=5):
+    return golden.reference_ngram_similarity(text1, text2, n) + 0.001
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    return build_corpus(10, seed=1)
+
+
+class TestCorpus:
+    """Test suite for the generated and fixture corpus"""
+
+    def test_generation_is_deterministic(self):
+        """Test the same seed gives the same documents"""
+        sources = list(SAMPLE_TEXTS.values())
+        assert generate_corpus(sources, 5, seed=3) == generate_corpus(sources, 5, seed=3)
+        assert generate_corpus(sources, 5, seed=3) != generate_corpus(sources, 5, seed=4)
+
+    def test_corpus_contents(self, corpus):
+        """Test fixtures and edge cases come before the generated documents"""
+        assert corpus[:len(SAMPLE_TEXTS)] == list(SAMPLE_TEXTS.values())
+        assert all(case in corpus for case in EDGE_CASES)
+        assert len(corpus) == len(SAMPLE_TEXTS) + len(EDGE_CASES) + 10
+
+    def test_corpus_files(self, tmp_path):
+        """Test extra fixture corpora are read like site audits"""
+        (tmp_path / "page.txt").write_text("A fixture page about keyword research and rankings.")
+        corpus = build_corpus(0, paths=[tmp_path])
+        assert corpus[-1] == "A fixture page about keyword research and rankings."
+
+
+class TestComparison:
+    """Test suite for per-field deltas and speedups"""
+
+    @pytest.mark.parametrize("name", ["ngram", "sentence", "readability", "serp"])
+    def test_engines_match_references(self, corpus, name):
+        """Test every optimized engine reproduces its reference exactly"""
+        report = compare(default_engines()[name], corpus)
+
+        assert report.passed, report.to_dict()
+        assert report.cases >= len(corpus)
+        assert report.reference_seconds > 0 and report.candidate_seconds > 0
+
+    def test_sentence_engine_skips_nothing_that_counts(self):
+        """Test pruned and duplicate sentences give the exact original score"""
+        copied = SAMPLE_TEXTS["article1"].split(".")
+        sentences = copied[:3] * 4 + ["Unrelated words about cooking pasta at home"]
+        for candidates in (copied, copied[::-1], [clean_text(s) for s in copied]):
+            assert calculate_sentence_similarity(sentences, candidates) == reference_sentence_similarity(sentences, candidates)
+
+    def test_deltas_and_tolerances(self, corpus):
+        """Test changed scores are reported per field and checked against tolerances"""
+        engine = default_engines()["ngram"]
+        engine.candidate = off_by_a_little
+
+        report = compare(engine, corpus)
+        score, = report.fields
+        assert not report.passed
+        assert score.max_delta == pytest.approx(0.001)
+        assert score.failures == report.cases
+        assert score.worst_case is not None
+
+        assert compare(engine, corpus, tolerances={"ngram.score": 0.01}).passed
+        assert compare(engine, corpus, tolerances={"ngram": 0.01}).passed
+
+    def test_structured_results(self):
+        """Test dataclass results are compared field by field"""
+        engine = default_engines()["serp"]
+        engine.candidate = lambda text: engine.reference("A Different Page Title\n" + text)
+
+        report = compare(engine, list(SAMPLE_TEXTS.values()))
+        failed = {field.name for field in report.fields if not field.passed}
+        assert {"meta_title", "url_slug"} <= failed
+        assert "description_issues" not in failed
+        assert len(report.fields) == 8
+
+    def test_field_delta(self):
+        """Test numbers differ by their distance and other values by equality"""
+        assert field_delta(1, 1.5) == 0.5
+        assert field_delta(["a"], ["a"]) == 0.0
+        assert math.isinf(field_delta("a", "b"))
+        assert math.isinf(field_delta(True, 1.0))
+
+    def test_speedup(self):
+        """Test the speedup is the reference time over the candidate time"""
+        engine = Engine("sum", sum, sum, lambda corpus: [(list(range(len(text))),) for text in corpus])
+        report = compare(engine, ["abc", "de"], repeat=2)
+        assert report.speedup == pytest.approx(report.reference_seconds / report.candidate_seconds)
+
+
+class TestCommandLine:
+    """Test suite for the harness CLI"""
+
+    def test_report(self, capsys):
+        """Test the JSON report and a passing exit status"""
+        assert golden.main(["--documents", "3", "--engine", "ngram", "--engine", "serp"]) == 0
+
+        report = json.loads(capsys.readouterr().out)
+        assert report["passed"]
+        assert [engine["engine"] for engine in report["engines"]] == ["ngram", "serp"]
+        assert report["engines"][0]["speedup"] > 0
+
+    def test_replaced_candidate_fails(self, capsys):
+        """Test a candidate given by reference is checked and can fail the run"""
+        assert golden.main([
+            "--documents", "3", "--engine", "ngram", "--candidate", "ngram=test_golden:off_by_a_little"
+        ]) == 1
+        capsys.readouterr()
+
+        assert golden.main([
+            "--documents", "3", "--engine", "ngram", "--candidate", "ngram=test_golden:off_by_a_little",
+            "--tolerance", "ngram.score=0.01"
+        ]) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
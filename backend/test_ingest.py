@@ -0,0 +1,194 @@
+"""
+Pytest tests for streaming HTML and Markdown ingestion.
+Run with: pytest test_ingest.py -v
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app, simulate_serp
+from ingest import create_extractor, extract_document
+
+# Create test client
+client = TestClient(app)
+
+HTML_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+  <title>How to Do Keyword Research: The Complete 2024 Guide</title>
+  <meta name="description" content="Learn how to find keywords your audience searches for. Discover free tools and a proven process.">
+  <style>body { font-family: sans-serif; }</style>
+  <script>var tracking = "<p>not text</p>";</script>
+</head>
+<body>
+  <nav><a href="/">Home</a> <a href="/blog">Blog</a> <a href="#main">Skip</a></nav>
+  <h1>Keyword Research Guide</h1>
+  <p>Keyword research shows what your audience searches for. It helps you plan
+  content that ranks &amp; converts.</p>
+  <h2>Free <em>tools</em></h2>
+  <ul><li>Search console data</li><li>Autocomplete suggestions</li></ul>
+  <p>Read the <a href="https://example.com/study">original study</a> for details.</p>
+</body>
+</html>"""
+
+MARKDOWN_PAGE = """---
+title: Markdown SEO Checklist
+description: A short checklist for publishing Markdown posts that rank.
+---
+# Checklist
+
+Write a clear introduction that explains the topic. Link to a [related post](/posts/related)
+and to an [external source](https://example.org).
+
+Setext Section
+--------------
+
+- Use **descriptive** headings
+- Keep paragraphs short
+
+```python
+print("code is not prose")
+```
+"""
+
+
+def stream(raw, document_format, chunk_size):
+    extractor = create_extractor(document_format)
+    parts = []
+    for i in range(0, len(raw), chunk_size):
+        extractor.feed(raw[i:i + chunk_size])
+        parts.append(extractor.take_text())
+    extractor.close()
+    parts.append(extractor.take_text())
+    return "".join(parts), extractor.outline
+
+
+class TestHtmlExtraction:
+    """Test suite for the incremental HTML extractor"""
+
+    def test_outline(self):
+        """Test title, description, headings and links are extracted"""
+        _, outline = extract_document(HTML_PAGE, "html")
+
+        assert outline.title == "How to Do Keyword Research: The Complete 2024 Guide"
+        assert outline.meta_description.startswith("Learn how to find keywords")
+        assert outline.headings == [(1, "Keyword Research Guide"), (2, "Free tools")]
+        assert outline.internal_links == 2
+        assert outline.external_links == 1
+
+    def test_body_text(self):
+        """Test scripts and styles are dropped and blocks become paragraphs"""
+        text, _ = extract_document(HTML_PAGE, "html")
+
+        assert "not text" not in text
+        assert "font-family" not in text
+        assert "content that ranks & converts." in text
+        assert "Keyword Research Guide\n\nKeyword research shows" in text
+        assert "Search console data\n\nAutocomplete suggestions" in text
+
+    @pytest.mark.parametrize("chunk_size", [1, 13, 4096])
+    def test_chunked_parsing_matches_whole_document(self, chunk_size):
+        """Test any chunking gives the same text and outline"""
+        assert stream(HTML_PAGE, "html", chunk_size) == extract_document(HTML_PAGE, "html")
+
+    def test_open_graph_description_fallback(self):
+        """Test og:description is used without a meta description"""
+        _, outline = extract_document('<meta property="og:description" content="From OG."><p>Body</p>', "html")
+        assert outline.meta_description == "From OG."
+
+
+class TestMarkdownExtraction:
+    """Test suite for the incremental Markdown extractor"""
+
+    def test_outline(self):
+        """Test front matter, headings and links are extracted"""
+        _, outline = extract_document(MARKDOWN_PAGE, "markdown")
+
+        assert outline.title == "Markdown SEO Checklist"
+        assert outline.meta_description.startswith("A short checklist")
+        assert outline.headings == [(1, "Checklist"), (2, "Setext Section")]
+        assert (outline.internal_links, outline.external_links) == (1, 1)
+
+    def test_body_text(self):
+        """Test markup, front matter and code are removed"""
+        text, _ = extract_document(MARKDOWN_PAGE, "markdown")
+
+        assert "related post" in text
+        assert "](" not in text and "**" not in text
+        assert "code is not prose" not in text
+        assert "title:" not in text
+        assert "Use descriptive headings\n\nKeep paragraphs short" in text
+
+    @pytest.mark.parametrize("chunk_size", [1, 9, 4096])
+    def test_chunked_parsing_matches_whole_document(self, chunk_size):
+        """Test lines split across chunks are parsed the same way"""
+        assert stream(MARKDOWN_PAGE, "markdown", chunk_size) == extract_document(MARKDOWN_PAGE, "markdown")
+
+    def test_first_heading_is_serp_title(self):
+        """Test the first H1 stands in for a missing title"""
+        _, outline = extract_document("# Ultimate Guide to Meta Tags\n\nBody text here.", "markdown")
+        assert outline.serp_title == "Ultimate Guide to Meta Tags"
+
+
+class TestSerpFromStructure:
+    """Test suite for SERP previews built from extracted structure"""
+
+    def test_page_title_and_description_used(self):
+        """Test extracted metadata replaces the heuristics"""
+        serp = simulate_serp("Some body text that is long enough.", "Best SEO Tips", "Short.")
+
+        assert serp.meta_title == "Best SEO Tips"
+        # A page's own short description is reported, not replaced
+        assert serp.meta_description == "Short."
+        assert serp.description_length == 6
+
+
+class TestIngestAPI:
+    """Test suite for HTML and Markdown input on the API"""
+
+    def test_analyze_html(self):
+        """Test HTML input is analyzed from its body text and metadata"""
+        response = client.post("/analyze", json={"text": HTML_PAGE, "format": "html"})
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["serp_preview"]["meta_title"].startswith("How to Do Keyword Research")
+        assert data["serp_preview"]["meta_description"].startswith("Learn how to find keywords")
+        assert data["structure"]["headings"][0] == {"level": 1, "text": "Keyword Research Guide"}
+        keywords = [word for word, _ in data["top_keywords"]]
+        assert "keyword" in keywords
+        assert "font" not in keywords
+
+    def test_analyze_markdown(self):
+        """Test Markdown input reports its structure"""
+        response = client.post("/analyze", json={"text": MARKDOWN_PAGE, "format": "markdown"})
+        assert response.status_code == 200
+        assert response.json()["structure"]["title"] == "Markdown SEO Checklist"
+
+    def test_plain_text_has_no_structure(self):
+        """Test plain text responses are unchanged"""
+        response = client.post("/analyze", json={"text": "Plain text content about search engines."})
+        assert response.json()["structure"] is None
+
+    def test_unsupported_format(self):
+        """Test unknown formats are rejected"""
+        response = client.post("/analyze", json={"text": HTML_PAGE, "format": "pdf"})
+        assert response.status_code == 400
+
+    def test_markup_without_text(self):
+        """Test pages without body text are rejected like short text"""
+        response = client.post("/analyze", json={"text": "<html><script>x()</script></html>", "format": "html"})
+        assert response.status_code == 400
+
+    def test_stream_html(self):
+        """Test streaming HTML matches the in-memory analysis"""
+        expected = client.post("/analyze", json={"text": HTML_PAGE, "format": "html"}).json()
+        response = client.post("/analyze/stream?format=html", content=HTML_PAGE.encode("utf-8"))
+
+        assert response.status_code == 200
+        assert response.json()["structure"] == expected["structure"]
+        assert response.json()["serp_preview"] == expected["serp_preview"]
+        assert response.json()["final_score"] == expected["final_score"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
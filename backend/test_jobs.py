@@ -0,0 +1,219 @@
+"""
+Pytest tests for the asynchronous job queue.
+Run with: pytest test_jobs.py -v
+"""
+
+import json
+import os
+import sqlite3
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+import jobs
+from main import app, SAMPLE_TEXTS, JOB_HANDLERS
+from jobs import JobStore, run_worker, start_workers
+
+# Create test client
+client = TestClient(app)
+
+
+def slow_echo(payload):
+    time.sleep(payload["seconds"])
+    return json.dumps({"pid": os.getpid(), "n": payload["n"]}).encode()
+
+
+# Handlers used by the worker process test (imported by reference)
+SLOW_HANDLERS = {"analyze": slow_echo}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.sqlite3"), lease_seconds=60)
+
+
+@pytest.fixture
+def api_store(tmp_path, monkeypatch):
+    store = JobStore(str(tmp_path / "api-jobs.sqlite3"))
+    monkeypatch.setattr(jobs, "_job_store_cache", store)
+    return store
+
+
+class TestJobStore:
+    """Test suite for claiming, leases and retention"""
+
+    def test_wal_mode(self, store):
+        """Test the database runs in WAL mode"""
+        assert store._connect().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def test_batch_claim_oldest_first(self, store):
+        """Test claims take batches in submission order without overlap"""
+        ids = store.submit_many("analyze", [{"n": i} for i in range(5)])
+
+        first = store.claim("worker-a", batch_size=3)
+        second = store.claim("worker-b", batch_size=3)
+
+        assert [job.id for job in first] == ids[:3]
+        assert [job.id for job in second] == ids[3:]
+        assert all(job.status == "running" and job.attempts == 1 for job in first + second)
+        assert store.claim("worker-c") == []
+
+    def test_expired_lease_is_retried_then_failed(self, store):
+        """Test work of a crashed worker is claimed again up to max_attempts"""
+        store.lease_seconds = 0
+        store.max_attempts = 2
+        job_id = store.submit("analyze", {})
+
+        assert store.claim("crashed-1")[0].attempts == 1
+        time.sleep(0.01)
+        assert store.claim("crashed-2")[0].attempts == 2
+        time.sleep(0.01)
+        assert store.claim("worker") == []
+
+        job = store.get(job_id)
+        assert job.status == "failed"
+        assert "2 attempts" in job.error
+
+    def test_stale_worker_cannot_finish(self, store):
+        """Test a worker whose job was reclaimed cannot overwrite it"""
+        store.lease_seconds = 0
+        job_id = store.submit("analyze", {})
+        store.claim("slow-worker")
+        time.sleep(0.01)
+        store.lease_seconds = 60
+        store.claim("new-worker")
+
+        assert not store.complete(job_id, "slow-worker", b"{}")
+        assert store.complete(job_id, "new-worker", b'{"ok":true}')
+        assert store.get(job_id).result == b'{"ok":true}'
+
+    def test_purge_enforces_retention(self, store):
+        """Test finished jobs are deleted by age and by count"""
+        ids = store.submit_many("analyze", [{}] * 4)
+        for job in store.claim("worker", batch_size=4):
+            store.complete(job.id, "worker", b"{}")
+        store._connect().execute("UPDATE jobs SET finished = 0 WHERE id = ?", (ids[0],))
+        store.max_finished = 2
+
+        assert store.purge() == 2
+        assert store.get(ids[0]) is None
+        assert store.counts()["done"] == 2
+
+    def test_unknown_kind(self, store):
+        """Test only known job kinds are accepted"""
+        with pytest.raises(ValueError):
+            store.submit("render", {})
+
+
+class TestWorkers:
+    """Test suite for job workers"""
+
+    def test_worker_runs_analysis(self, store):
+        """Test a worker stores the same response /analyze returns"""
+        job_id = store.submit("analyze", {"text": SAMPLE_TEXTS["article1"]})
+        assert run_worker(store, JOB_HANDLERS, drain=True) == 1
+
+        expected = client.post("/analyze", json={"text": SAMPLE_TEXTS["article1"]}).json()
+        assert json.loads(store.get(job_id).result) == expected
+
+    def test_invalid_document_fails_job(self, store):
+        """Test handler errors fail the job without retries"""
+        job_id = store.submit("analyze", {"text": "short"})
+        run_worker(store, JOB_HANDLERS, drain=True)
+
+        job = store.get(job_id)
+        assert (job.status, job.attempts) == ("failed", 1)
+        assert "at least 10 characters" in job.error
+
+    def test_heartbeat_outlives_the_lease(self, store):
+        """Test a handler running past the lease keeps its job and the rest of the batch"""
+        store.lease_seconds = 0.3
+        ids = store.submit_many("analyze", [{"n": 0}, {"n": 1}])
+        stolen = []
+
+        def slow(payload):
+            time.sleep(1.0)
+            # Another worker finds nothing to take over while this one is alive
+            stolen.extend(store.claim("other-worker", batch_size=2))
+            return json.dumps(payload).encode()
+
+        assert run_worker(store, {"analyze": slow}, batch_size=2, drain=True) == 2
+
+        assert stolen == []
+        for n, job_id in enumerate(ids):
+            job = store.get(job_id)
+            assert (job.status, job.attempts) == ("done", 1)
+            assert json.loads(job.result) == {"n": n}
+
+    def test_worker_processes_share_the_queue(self, tmp_path):
+        """Test several worker processes drain one queue, each job once"""
+        path = str(tmp_path / "pool.sqlite3")
+        store = JobStore(path)
+        ids = store.submit_many("analyze", [{"n": i, "seconds": 0.05} for i in range(40)])
+
+        workers = start_workers(2, path, handlers_ref="test_jobs:SLOW_HANDLERS", batch_size=1, drain=True)
+        for worker in workers:
+            worker.join(timeout=60)
+
+        results = [json.loads(store.get(job_id).result) for job_id in ids]
+        assert sorted(result["n"] for result in results) == list(range(40))
+        assert len({result["pid"] for result in results}) == 2
+
+
+class TestJobsAPI:
+    """Test suite for the /jobs endpoints"""
+
+    def test_submit_and_poll(self, api_store):
+        """Test documents are queued, run by a worker and returned"""
+        response = client.post("/jobs", json={"documents": [
+            {"text": SAMPLE_TEXTS["article2"]},
+            {"text": SAMPLE_TEXTS["article3"], "detailed_plagiarism": True},
+        ]})
+        assert response.status_code == 202
+        submitted = response.json()["jobs"]
+        assert [job["status"] for job in submitted] == ["queued", "queued"]
+
+        run_worker(api_store, JOB_HANDLERS, drain=True)
+
+        job = client.get(f"/jobs/{submitted[1]['id']}").json()
+        assert job["status"] == "done"
+        assert job["result"]["plagiarism_matches"]
+        assert job["result"]["final_score"] == client.post("/analyze", json={
+            "text": SAMPLE_TEXTS["article3"], "detailed_plagiarism": True
+        }).json()["final_score"]
+
+    def test_site_audit_job(self, api_store):
+        """Test a bulk site audit runs as a job"""
+        pages = [{"url": f"/{name}", "text": text} for name, text in SAMPLE_TEXTS.items()]
+        job_id = client.post("/jobs", json={"site_audit": {"pages": pages, "min_similarity": 0}}).json()["jobs"][0]["id"]
+        run_worker(api_store, JOB_HANDLERS, drain=True)
+
+        job = client.get(f"/jobs/{job_id}").json()
+        assert job["kind"] == "site_audit"
+        assert job["result"]["pages"] == 3
+
+    def test_stream_ends_with_result(self, api_store):
+        """Test the job stream's last line carries the result"""
+        job_id = client.post("/jobs", json={"documents": [{"text": SAMPLE_TEXTS["article1"]}]}).json()["jobs"][0]["id"]
+        run_worker(api_store, JOB_HANDLERS, drain=True)
+
+        lines = client.get(f"/jobs/{job_id}/stream").text.strip().split("\n")
+        last = json.loads(lines[-1])
+        assert last["status"] == "done"
+        assert "readability" in last["result"]
+
+    def test_invalid_submissions(self, api_store):
+        """Test empty and invalid submissions are rejected"""
+        assert client.post("/jobs", json={}).status_code == 400
+        assert client.post("/jobs", json={"documents": [{"text": "x" * 20, "format": "pdf"}]}).status_code == 400
+        assert client.post("/jobs", json={"site_audit": {"pages": []}}).status_code == 400
+        assert api_store.counts()["queued"] == 0
+
+    def test_unknown_job(self, api_store):
+        """Test unknown ids are not found"""
+        assert client.get("/jobs/missing").status_code == 404
+        assert client.get("/jobs/missing/stream").status_code == 404
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,139 @@
+"""
+Pytest tests for language detection and per-language resources.
+Run with: pytest test_language.py -v
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from textstat.textstat import textstatistics
+from main import app, calc_readability, calculate_keyword_stats, get_stopwords
+from language import LanguageResources, detect_language, get_language_resources
+
+# Create test client
+client = TestClient(app)
+
+SPANISH_TEXT = """
+Las estrategias de marketing digital han evolucionado mucho durante los últimos años.
+Las redes sociales tienen un papel fundamental para la marca y para la relación con
+los clientes. El marketing de contenidos busca crear información valiosa para atraer
+a una audiencia definida, y el correo electrónico sigue siendo un canal eficaz.
+"""
+
+GERMAN_TEXT = """
+Künstliche Intelligenz verändert die Art und Weise, wie Unternehmen arbeiten. Die
+Automatisierung hilft dabei, Kosten zu senken und die Effizienz zu steigern, während
+Datenanalysen wertvolle Erkenntnisse für bessere Entscheidungen liefern.
+"""
+
+
+class TestLanguageDetection:
+    """Test suite for character n-gram language detection"""
+
+    @pytest.mark.parametrize("text,expected", [
+        ("Quality content engages readers and provides value for search engine success.", "en"),
+        (SPANISH_TEXT, "es"),
+        ("Le contenu de qualité attire les lecteurs et leur apporte une vraie valeur ajoutée.", "fr"),
+        (GERMAN_TEXT, "de"),
+        ("Un contenuto di qualità coinvolge i lettori e offre un valore reale nel tempo.", "it"),
+        ("Um conteúdo de qualidade envolve os leitores e oferece um valor verdadeiro.", "pt"),
+        ("Goede inhoud boeit de lezers en biedt hun een echte toegevoegde waarde.", "nl"),
+    ])
+    def test_detects_language(self, text, expected):
+        """Test each shipped profile is recognized"""
+        assert detect_language(text) == expected
+
+    @pytest.mark.parametrize("text", [
+        "Information technology management solutions",
+        "Cloud computing infrastructure automation pipeline deployment",
+        "Machine learning model evaluation and data pipeline monitoring",
+        "Enterprise resource planning integration consulting services",
+        "Marketing digital e SEO para empresas",
+        "Pizza pasta espresso cappuccino tiramisu risotto lasagna",
+        "Pizza pasta espresso and more: the best Italian restaurants in New York",
+    ])
+    def test_short_english_stays_english(self, text):
+        """Test titles and technical phrases do not switch on weak evidence"""
+        assert detect_language(text) == "en"
+
+    def test_weak_evidence_keeps_given_default(self):
+        """Test the margin applies to whichever default is given"""
+        assert detect_language("Information technology management solutions", default="de") == "de"
+        assert detect_language(SPANISH_TEXT, default="de") == "es"
+
+    def test_short_text_uses_default(self):
+        """Test texts with too few letters fall back to the default"""
+        assert detect_language("Hi 123!") == "en"
+        assert detect_language("Hola", default="es") == "es"
+
+
+class TestLanguageResources:
+    """Test suite for lazily loaded per-language resources"""
+
+    def test_resources_are_cached_per_language(self):
+        """Test resources are created once and reused"""
+        assert get_language_resources("fr") is get_language_resources("fr")
+        assert get_language_resources("fr") is not get_language_resources("de")
+
+    def test_resources_load_lazily(self):
+        """Test nothing heavy is loaded until first use"""
+        resources = LanguageResources("nl")
+        assert resources._stopwords is None
+        assert resources._pyphen is None
+
+        assert "het" in resources.stopwords
+        assert resources._pyphen is None
+
+    def test_unsupported_language(self):
+        """Test unknown language codes are rejected"""
+        with pytest.raises(ValueError):
+            get_language_resources("xx")
+
+    def test_stopwords_per_language(self):
+        """Test stopword sets differ per language"""
+        assert "the" in get_stopwords()
+        assert "para" in get_stopwords("es")
+        assert "und" in get_stopwords("de")
+
+    @pytest.mark.parametrize("code,locale,text", [
+        ("es", "es", SPANISH_TEXT),
+        ("de", "de_DE", GERMAN_TEXT),
+    ])
+    def test_readability_formula_matches_textstat(self, code, locale, text):
+        """Test per-language readability equals textstat's language variant"""
+        reference = textstatistics()
+        reference.set_lang(locale)
+        expected = max(0.0, min(100.0, reference.flesch_reading_ease(text)))
+
+        assert calc_readability(text, code) == expected
+
+    def test_keyword_stats_use_language_stopwords(self):
+        """Test Spanish stopwords are filtered from Spanish keywords"""
+        top_keywords, _ = calculate_keyword_stats(SPANISH_TEXT, top_n=10, language="es")
+        keywords = [word for word, _ in top_keywords]
+
+        assert "marketing" in keywords
+        assert "para" not in keywords
+
+
+class TestLanguageAPI:
+    """Test suite for language handling in /analyze"""
+
+    def test_analyze_detects_language(self):
+        """Test the detected language is reported"""
+        response = client.post("/analyze", json={"text": SPANISH_TEXT})
+        assert response.status_code == 200
+        assert response.json()["language"] == "es"
+
+    def test_analyze_explicit_language(self):
+        """Test an explicit language overrides detection"""
+        response = client.post("/analyze", json={"text": SPANISH_TEXT, "language": "en"})
+        assert response.json()["language"] == "en"
+
+    def test_analyze_unsupported_language(self):
+        """Test unsupported languages are rejected"""
+        response = client.post("/analyze", json={"text": SPANISH_TEXT, "language": "xx"})
+        assert response.status_code == 400
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,157 @@
+"""
+Pytest tests for per-paragraph stage memoization.
+Run with: pytest test_memo.py -v
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+import memo
+from main import app, SAMPLE_TEXTS, calculate_keyword_stats, clean_text, input_shingle_set, tally_readability
+from memo import StageCache, get_stage_cache, split_paragraphs
+from shingles import TokenVocabulary, shingle_set
+import main
+
+# Create test client
+client = TestClient(app)
+
+BOILERPLATE = "About us: we write helpful guides. All content is reviewed by editors before publishing."
+
+
+class TestStageCache:
+    """Test suite for bounded caches and their eviction policies"""
+
+    def fill(self, cache, keys):
+        for key in keys:
+            cache.get_or_compute(key, lambda: key.upper())
+
+    def test_hits_and_misses(self):
+        """Test repeated keys are served from the cache"""
+        cache = StageCache("test", max_size=4)
+        self.fill(cache, ["a", "b", "a", "a"])
+
+        stats = cache.stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 2
+        assert stats["hit_rate"] == 0.5
+
+    def test_lru_evicts_least_recently_used(self):
+        """Test LRU keeps recently read entries"""
+        cache = StageCache("test", max_size=2, policy="lru")
+        self.fill(cache, ["a", "b", "a", "c"])
+
+        assert set(cache._entries) == {"a", "c"}
+        assert cache.stats()["evictions"] == 1
+
+    def test_lfu_evicts_least_frequently_used(self):
+        """Test LFU keeps frequently read entries"""
+        cache = StageCache("test", max_size=2, policy="lfu")
+        self.fill(cache, ["a", "a", "a", "b", "b", "c", "d"])
+
+        # "a" is used most; "c" is evicted by "d" as the newest single-use entry
+        assert set(cache._entries) == {"a", "d"}
+
+    def test_fifo_evicts_oldest(self):
+        """Test FIFO ignores reads"""
+        cache = StageCache("test", max_size=2, policy="fifo")
+        self.fill(cache, ["a", "b", "a", "c"])
+
+        assert set(cache._entries) == {"b", "c"}
+
+    def test_zero_size_disables_cache(self):
+        """Test a size of 0 never stores anything"""
+        cache = StageCache("test", max_size=0)
+        self.fill(cache, ["a", "a"])
+
+        assert len(cache) == 0
+        assert cache.stats()["hits"] == 0
+
+    def test_unknown_policy(self):
+        """Test invalid eviction policies are rejected"""
+        with pytest.raises(ValueError):
+            StageCache("test", policy="random")
+
+    def test_configured_from_environment(self, monkeypatch):
+        """Test stage size and policy come from MEMO_* variables"""
+        monkeypatch.setattr(memo, "_stage_caches", {})
+        monkeypatch.setenv("MEMO_SHINGLES_SIZE", "16")
+        monkeypatch.setenv("MEMO_SHINGLES_POLICY", "FIFO")
+
+        cache = get_stage_cache("shingles")
+        assert cache.max_size == 16
+        assert cache.policy == "fifo"
+
+
+class TestParagraphResults:
+    """Test suite for combining memoized paragraph results"""
+
+    TEXT = (
+        "Search engines reward helpful content. Write for readers first.\n\n"
+        + BOILERPLATE + "\n\n"
+        + "Short\n\n"
+        + "Keywords should appear naturally, e.g. in headings and the first paragraph."
+    )
+
+    def test_merged_readability_tallies(self):
+        """Test merged paragraph tallies equal the whole-text tally"""
+        whole = tally_readability(self.TEXT)
+        merged = tally_readability("")
+        for paragraph in split_paragraphs(self.TEXT):
+            merged.merge(tally_readability(paragraph))
+
+        assert (merged.words, merged.syllables) == (whole.words, whole.syllables)
+        assert merged.flesch_reading_ease() == whole.flesch_reading_ease()
+
+    def test_sentences_continue_across_paragraphs(self):
+        """Test a sentence split by a paragraph break is counted once"""
+        merged = tally_readability("One two")
+        merged.merge(tally_readability("three four. Five six seven."))
+
+        whole = tally_readability("One two three four. Five six seven.")
+        assert merged.flesch_reading_ease() == whole.flesch_reading_ease()
+        assert merged.sentences == whole.sentences == 2
+
+    def test_shingles_include_paragraph_boundaries(self):
+        """Test the memoized shingle set equals shingling the whole text"""
+        words = clean_text(self.TEXT.lower()).split()
+        expected = shingle_set(main._shingle_vocabulary.encode(words), n=5)
+
+        assert input_shingle_set(self.TEXT).tolist() == expected.tolist()
+        # Served from the cache the second time
+        assert input_shingle_set(self.TEXT).tolist() == expected.tolist()
+
+    def test_keyword_stats_unchanged_by_memoization(self):
+        """Test repeated paragraphs are counted every time they occur"""
+        text = "\n\n".join([BOILERPLATE, SAMPLE_TEXTS["article2"], BOILERPLATE])
+        top_keywords, _ = calculate_keyword_stats(text)
+
+        assert ("content", 4) in top_keywords
+
+    def test_vocabulary_growth_invalidates_shingles(self, monkeypatch):
+        """Test cached token IDs are not reused after the vocabulary grows"""
+        vocabulary = TokenVocabulary()
+        monkeypatch.setattr(main, "_shingle_vocabulary", vocabulary)
+        before = input_shingle_set(BOILERPLATE)
+
+        vocabulary.encode(clean_text(BOILERPLATE).split(), grow=True)
+        after = input_shingle_set(BOILERPLATE)
+
+        assert before.tolist() != after.tolist()
+
+
+class TestMemoAPI:
+    """Test suite for memoization in the API"""
+
+    def test_metrics_report_hit_rates(self):
+        """Test repeated paragraphs show up as cache hits in /metrics"""
+        text = BOILERPLATE + "\n\n" + SAMPLE_TEXTS["article3"]
+        client.post("/analyze", json={"text": text})
+        client.post("/analyze", json={"text": text})
+
+        stats = client.get("/metrics").json()["memo"]
+        for stage in ("readability", "keywords", "shingles", "sentence_matches"):
+            assert stats[stage]["hits"] > 0
+            assert 0 < stats[stage]["hit_rate"] <= 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,88 @@
+"""
+Pytest tests for passage-level plagiarism matching.
+Run with: pytest test_passages.py -v
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app, SAMPLE_TEXTS, check_plagiarism, check_plagiarism_report
+from passages import PassageIndex, tokenize_with_offsets
+
+# Create test client
+client = TestClient(app)
+
+
+class TestPassageIndex:
+    """Test suite for seed-and-extend passage matching"""
+
+    def test_tokenize_with_offsets(self):
+        """Test tokens match clean_text and offsets point into the original"""
+        text = "Hello, World!  This is A TEST."
+        tokens, offsets = tokenize_with_offsets(text)
+
+        assert tokens == ["hello", "world", "this", "is", "a", "test"]
+        assert text[offsets[1][0]:offsets[1][1]] == "World!"
+
+    def test_finds_copied_passage_with_offsets(self):
+        """Test a copied passage is reported with offsets in both texts"""
+        source = "Alpha beta gamma delta epsilon zeta eta theta iota kappa lambda mu."
+        index = PassageIndex({"greek": source}, n=5)
+        text = "Intro words here. Gamma delta epsilon zeta eta theta iota! The end."
+
+        passages = index.find_passages(text)
+
+        assert len(passages) == 1
+        passage = passages[0]
+        assert passage.source == "greek"
+        assert passage.matched_tokens == 7
+        assert passage.strength == 1.0
+        assert text[passage.input_start:passage.input_end] == "Gamma delta epsilon zeta eta theta iota!"
+        assert source[passage.source_start:passage.source_end] == "gamma delta epsilon zeta eta theta iota"
+
+    def test_chains_runs_across_small_edits(self):
+        """Test runs separated by a reworded token become one weaker passage"""
+        source = "one two three four five six seven eight nine ten eleven twelve thirteen"
+        index = PassageIndex({"numbers": source}, n=3)
+        text = "one two three four five sixty seven eight nine ten eleven twelve thirteen"
+
+        passages = index.find_passages(text)
+
+        assert len(passages) == 1
+        assert passages[0].matched_tokens == 12
+        assert 0.9 < passages[0].strength < 1.0
+
+    def test_no_passages_for_original_text(self):
+        """Test original text yields no passages"""
+        index = PassageIndex(SAMPLE_TEXTS, n=5)
+        passages = index.find_passages("Quantum computing and blockchain ledgers are unrelated topics here.")
+        assert passages == []
+
+
+class TestPlagiarismReport:
+    """Test suite for the detailed plagiarism mode"""
+
+    def test_report_score_matches_check_plagiarism(self):
+        """Test the detailed report keeps the same score as the float check"""
+        text = SAMPLE_TEXTS["article2"]
+        report = check_plagiarism_report(text)
+
+        assert report.score == check_plagiarism(text)
+        assert report.matches
+        assert report.matches[0].source == "article2"
+
+    def test_analyze_detailed_plagiarism(self):
+        """Test /analyze returns matched passages only when requested"""
+        text = "Intro sentence here. " + SAMPLE_TEXTS["article1"].strip()
+
+        plain = client.post("/analyze", json={"text": text}).json()
+        assert plain["plagiarism_matches"] is None
+
+        detailed = client.post("/analyze", json={"text": text, "detailed_plagiarism": True}).json()
+        matches = detailed["plagiarism_matches"]
+        assert detailed["plagiarism_score"] == plain["plagiarism_score"]
+        assert matches[0]["source"] == "article1"
+        assert text[matches[0]["input_start"]:].startswith("Search engine optimization")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
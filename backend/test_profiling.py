@@ -0,0 +1,166 @@
+"""
+Pytest tests for the slow-request profiler.
+Run with: pytest test_profiling.py -v
+"""
+
+import marshal
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+import main
+from main import app, SAMPLE_TEXTS
+from profiling import RequestProfiler, input_stats, profile_stage
+
+# Create test client
+client = TestClient(app)
+
+ADMIN = {"X-Admin-Token": "secret"}
+
+
+def staged_work(seconds):
+    with profile_stage('prepare'):
+        data = [bytearray(1024) for _ in range(256)]
+    with profile_stage('compute'):
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            sum(range(100))
+    return len(data)
+
+
+class TestRequestProfiler:
+    """Test suite for capture selection and the ring buffer"""
+
+    def test_disabled_by_default(self):
+        """Test nothing is profiled or kept without configuration"""
+        profiler = RequestProfiler()
+        assert not profiler.enabled
+        assert profiler.runner("text")(staged_work, 0) == 256
+        assert len(profiler.captures) == 0
+
+    def test_sampled_request_has_cprofile_and_memory_peaks(self):
+        """Test a sampled request keeps call statistics and per-stage peaks"""
+        profiler = RequestProfiler(sample_rate=1.0)
+        profiler.runner("Some text.\n\nMore text here.", endpoint="/test")(staged_work, 0.01)
+
+        record = profiler.captures[0]
+        assert record['reason'] == 'sampled'
+        assert record['endpoint'] == "/test"
+        assert record['input'] == input_stats("Some text.\n\nMore text here.")
+        assert set(record['stages']) == {'prepare', 'compute'}
+        assert record['stages']['prepare']['peak_kb'] >= 256
+        assert any('staged_work' in row['function'] for row in record['functions'])
+        assert isinstance(marshal.loads(record['pstats']), dict)
+
+    def test_sampler_capture_kept_only_when_slow(self):
+        """Test fast requests are dropped and slow ones keep sampled stacks"""
+        profiler = RequestProfiler(slow_ms=50, sample_interval_ms=1)
+        profiler.runner("fast")(staged_work, 0)
+        assert len(profiler.captures) == 0
+
+        profiler.runner("slow")(staged_work, 0.1)
+        record = profiler.captures[0]
+        assert record['reason'] == 'slow'
+        assert record['elapsed_ms'] >= 50
+        assert record['samples'] > 0
+        assert 'staged_work' in record['stacks'][0]['stack']
+        assert 'peak_kb' not in record['stages']['compute']
+
+    def test_relative_threshold_uses_median(self):
+        """Test requests are slow relative to the rolling median"""
+        profiler = RequestProfiler(slow_factor=10, sample_interval_ms=1)
+        for _ in range(20):
+            profiler.runner("x")(staged_work, 0.001)
+        assert len(profiler.captures) == 0
+
+        profiler.runner("x")(staged_work, 0.05)
+        assert len(profiler.captures) == 1
+        assert profiler.captures[0]['slow_threshold_ms'] < 50
+
+    def test_ring_buffer_is_bounded(self):
+        """Test only the newest captures are kept"""
+        profiler = RequestProfiler(sample_rate=1.0, buffer_size=3)
+        for _ in range(5):
+            profiler.runner("x")(staged_work, 0)
+
+        assert [summary['id'] for summary in profiler.list_captures()] == [5, 4, 3]
+        assert profiler.get_capture(1) is None
+
+    def test_failing_request_is_recorded(self):
+        """Test an exception is re-raised and noted in the capture"""
+        profiler = RequestProfiler(sample_rate=1.0)
+        with pytest.raises(ZeroDivisionError):
+            profiler.runner("x")(lambda: 1 / 0)
+        assert profiler.captures[0]['error'] == 'ZeroDivisionError'
+
+    def test_memory_traced_only_when_alone(self):
+        """Test a sampled request overlapping another keeps timings but no memory peaks"""
+        profiler = RequestProfiler(sample_rate=1.0)
+        profiler.enter()
+        try:
+            profiler.runner("x")(staged_work, 0)
+        finally:
+            profiler.leave()
+
+        record = profiler.captures[0]
+        assert 'ms' in record['stages']['prepare']
+        assert 'peak_kb' not in record['stages']['prepare']
+        assert profiler._in_flight == 0
+
+    def test_admin_token(self):
+        """Test only the configured token is accepted"""
+        assert not RequestProfiler(sample_rate=1.0).authorized("anything")
+        profiler = RequestProfiler(sample_rate=1.0, admin_token="secret")
+        assert profiler.authorized("secret")
+        assert not profiler.authorized("wrong")
+        assert not profiler.authorized(None)
+
+
+class TestProfilesAPI:
+    """Test suite for the admin profile endpoints"""
+
+    @pytest.fixture
+    def sampling(self, monkeypatch):
+        profiler = RequestProfiler(sample_rate=1.0, admin_token="secret")
+        monkeypatch.setattr(main, "request_profiler", profiler)
+        return profiler
+
+    def test_analyze_request_is_captured(self, sampling):
+        """Test a sampled /analyze request shows up with its stages"""
+        assert client.post("/analyze", json={"text": SAMPLE_TEXTS["article1"]}).status_code == 200
+
+        listing = client.get("/admin/profiles", headers=ADMIN).json()
+        assert listing["profiler"]["enabled"] is True
+        assert len(listing["captures"]) == 1
+
+        capture_id = listing["captures"][0]["id"]
+        detail = client.get(f"/admin/profiles/{capture_id}", headers=ADMIN).json()
+        assert detail["endpoint"] == "/analyze"
+        assert detail["language"] == "en"
+        assert {"readability", "keywords", "plagiarism", "scoring", "serp"} <= set(detail["stages"])
+        assert "pstats" not in detail
+
+        download = client.get(f"/admin/profiles/{capture_id}/pstats", headers=ADMIN)
+        assert download.status_code == 200
+        assert isinstance(marshal.loads(download.content), dict)
+
+    def test_unknown_profile(self, sampling):
+        """Test unknown ids are not found"""
+        assert client.get("/admin/profiles/999", headers=ADMIN).status_code == 404
+        assert client.get("/admin/profiles/999/pstats", headers=ADMIN).status_code == 404
+
+    def test_token_required(self, sampling):
+        """Test the endpoints refuse callers without the admin token"""
+        assert client.get("/admin/profiles").status_code == 403
+        assert client.get("/admin/profiles", headers={"X-Admin-Token": "wrong"}).status_code == 403
+        assert client.get("/admin/profiles/1/pstats").status_code == 403
+
+    def test_absent_while_disabled(self, monkeypatch):
+        """Test the endpoints do not exist unless profiling is enabled"""
+        monkeypatch.setattr(main, "request_profiler", RequestProfiler(admin_token="secret"))
+        assert client.get("/admin/profiles", headers=ADMIN).status_code == 404
+        assert client.get("/admin/profiles/1", headers=ADMIN).status_code == 404
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,124 @@
+"""
+Pytest tests for per-sentence and per-paragraph readability.
+Run with: pytest test_readability.py -v
+"""
+
+import numpy as np
+import pytest
+import textstat
+from fastapi.testclient import TestClient
+from main import app, SAMPLE_TEXTS, calc_readability, calc_readability_details
+from readability import ReadabilityTally, flesch_scores, readability_breakdown
+
+# Create test client
+client = TestClient(app)
+
+HARD_SENTENCE = (
+    "Notwithstanding considerable organizational reconfiguration, multidimensional "
+    "optimization methodologies systematically underperformed expectations."
+)
+
+ARTICLE = (
+    "Good content is easy to read. Short sentences help a lot.\n\n"
+    f"{HARD_SENTENCE} Readers leave quickly!\n\n"
+    "\"Is link building still useful?\" It is... mostly. " + SAMPLE_TEXTS["article1"]
+)
+
+
+class TestBreakdown:
+    """Test suite for segmented readability counts"""
+
+    def test_totals_match_whole_text(self):
+        """Test sentence and paragraph counts add up to the whole-text tally"""
+        breakdown = readability_breakdown(ARTICLE)
+
+        assert breakdown.sentence_words.sum() == breakdown.paragraph_words.sum() == breakdown.tally.words
+        assert breakdown.sentence_syllables.sum() == breakdown.paragraph_syllables.sum() == breakdown.tally.syllables
+        assert breakdown.tally.flesch_reading_ease() == textstat.flesch_reading_ease(ARTICLE)
+
+    def test_segments(self):
+        """Test sentences end at terminators and paragraph breaks, with text offsets"""
+        breakdown = readability_breakdown(ARTICLE)
+        sentences = [ARTICLE[start:end] for start, end in zip(breakdown.sentence_starts, breakdown.sentence_ends)]
+        paragraphs = [ARTICLE[start:end] for start, end in zip(breakdown.paragraph_starts, breakdown.paragraph_ends)]
+
+        assert sentences[:5] == [
+            "Good content is easy to read.", "Short sentences help a lot.",
+            HARD_SENTENCE, "Readers leave quickly!", "\"Is link building still useful?\""
+        ]
+        assert paragraphs == [part.strip() for part in ARTICLE.split("\n\n")]
+        assert breakdown.sentence_paragraphs.tolist()[:5] == [0, 0, 1, 1, 2]
+        assert breakdown.paragraph_sentences.tolist()[:2] == [2, 2]
+
+    def test_scores_match_the_scalar_formula(self):
+        """Test vectorized scores equal a tally of each sentence on its own"""
+        breakdown = readability_breakdown(ARTICLE)
+        scores = breakdown.sentence_scores()
+
+        for start, end, score in zip(breakdown.sentence_starts, breakdown.sentence_ends, scores):
+            tally = ReadabilityTally()
+            for token in ARTICLE[start:end].split():
+                tally.add_token(token)
+            single = _counts(tally.words, tally.syllables, 1).flesch_reading_ease()
+            assert score == max(0.0, min(100.0, single))
+
+        assert flesch_scores(np.array([10, 0]), np.array([15, 0]), np.array([2, 0])).tolist() == [
+            _counts(10, 15, 2).flesch_reading_ease(), _counts(0, 0, 0).flesch_reading_ease()
+        ]
+
+    def test_hardest_sentences(self):
+        """Test the hardest sentences come first and easy ones are left out"""
+        breakdown = readability_breakdown(ARTICLE)
+        scores = breakdown.sentence_scores()
+        hardest = breakdown.hardest_sentences(scores, top_n=3)
+
+        assert hardest[0] == 2
+        assert len(hardest) <= 3
+        assert all(scores[index] < 60 for index in hardest)
+        assert scores[hardest].tolist() == sorted(scores[hardest].tolist())
+        assert 0 not in hardest
+
+    def test_empty_text(self):
+        """Test text without tokens gives empty segments"""
+        breakdown = readability_breakdown("   \n\n ")
+        assert len(breakdown.sentence_words) == len(breakdown.paragraph_words) == 0
+        assert breakdown.hardest_sentences(breakdown.sentence_scores()) == []
+
+
+def _counts(words, syllables, sentences):
+    tally = ReadabilityTally()
+    tally.words, tally.syllables, tally.sentences = words, syllables, sentences
+    return tally
+
+
+class TestReadabilityDetails:
+    """Test suite for the readability heatmap of /analyze"""
+
+    @pytest.mark.parametrize("language, text", [("en", ARTICLE), ("de", SAMPLE_TEXTS["article2"])])
+    def test_score_matches_calc_readability(self, language, text):
+        """Test the detailed mode keeps the overall score unchanged"""
+        score, details = calc_readability_details(text, language)
+
+        assert score == calc_readability(text, language)
+        assert sum(sentence.words for sentence in details.sentences) == sum(p.words for p in details.paragraphs)
+
+    def test_endpoint(self):
+        """Test details are returned only when requested"""
+        response = client.post("/analyze", json={"text": ARTICLE, "language": "en"})
+        assert response.status_code == 200
+        assert response.json()["readability_details"] is None
+
+        response = client.post("/analyze", json={"text": ARTICLE, "language": "en", "readability_details": True})
+        assert response.status_code == 200
+        data = response.json()
+        details = data["readability_details"]
+
+        assert len(details["paragraphs"]) == 3
+        hardest = details["sentences"][details["hardest_sentences"][0]]
+        assert ARTICLE[hardest["start"]:hardest["end"]] == HARD_SENTENCE
+        assert hardest["readability"] < 30
+        assert details["paragraphs"][1]["sentence_length"] == (hardest["words"] + 3) / 2  # with "Readers leave quickly!"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
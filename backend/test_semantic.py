@@ -0,0 +1,195 @@
+"""
+Pytest tests for paraphrase detection with hashed features and random projection.
+Run with: pytest test_semantic.py -v
+"""
+
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+import main
+import semantic
+from main import app, SAMPLE_TEXTS, check_plagiarism, compute_final_score
+from semantic import SemanticIndex, hashed_features, split_sentences
+from streaming import StreamingAnalyzer, StreamingReference
+
+# Create test client
+client = TestClient(app)
+
+# Sentences of the sample texts, reworded
+PARAPHRASED = (
+    "Optimizing for search engines is critical to being visible online. "
+    "Content of high quality that engages its readers and gives them value is key to success in SEO. "
+    "Social media platforms are playing an important role in customer engagement and brand awareness. "
+    "Automation lets companies reduce their operational costs and improve efficiency."
+)
+UNRELATED = (
+    "The cat sat on the mat all afternoon. My grandmother bakes bread every Sunday morning. "
+    "The train to Boston was delayed by two hours. Rivers flood when heavy rain falls in the mountains. "
+    "He plays the violin in a small orchestra."
+)
+
+KEYWORD_STATS = ([("content", 5), ("seo", 4), ("marketing", 3)], {"content": 10.0, "seo": 8.0, "marketing": 6.0})
+
+
+@pytest.fixture(scope="module")
+def index():
+    return SemanticIndex(SAMPLE_TEXTS)
+
+
+class TestFeatures:
+    """Test suite for feature hashing"""
+
+    def test_split_sentences_cleans(self):
+        """Test sentences are split on periods and cleaned like check_plagiarism"""
+        assert split_sentences("Hello, World!  Again. . Done") == ["hello world again", "done"]
+
+    def test_features_stay_in_their_sentence(self):
+        """Test no n-gram spans two sentences and buckets are in range"""
+        segments, buckets = hashed_features(["ab cd", "ef"])
+        assert set(segments.tolist()) == {0, 1}
+        assert buckets.min() >= 0 and buckets.max() < semantic.FEATURES
+
+        # ' ab cd ' has 5+4+3 character n-grams, 2 words and 1 bigram
+        assert np.count_nonzero(segments == 0) == 5 + 4 + 3 + 2 + 1
+
+    def test_sketches_are_linear(self, index):
+        """Test a document's sketch is the sum of its sentence sketches"""
+        sentences = ["search engine optimization matters", "content should be readable"]
+        both = index.sketch(sentences).sum(axis=0)
+        separately = index.sketch(sentences[:1])[0] + index.sketch(sentences[1:])[0]
+        assert np.allclose(both, separately, atol=1e-4)
+
+
+class TestSemanticIndex:
+    """Test suite for paraphrase similarity"""
+
+    def test_verbatim_sentence_matches_itself(self, index):
+        """Test a reference sentence has cosine 1 with its own sketch"""
+        best, owners = index.best_sentence_matches(
+            semantic._normalize(index.sketch(["search engine optimization is crucial for online visibility"]))
+        )
+        assert best[0] == pytest.approx(1.0, abs=1e-4)
+        assert index.names[owners[0]] == "article1"
+
+    def test_paraphrases_detected(self, index):
+        """Test reworded sentences are found although the exact tiers miss them"""
+        paraphrase = index.detect(PARAPHRASED)
+        assert paraphrase.compared_sentences == 4
+        assert paraphrase.paraphrased_sentences == 4
+        assert paraphrase.paraphrased_fraction == 1.0
+        assert check_plagiarism(PARAPHRASED) < 10
+
+    def test_unrelated_text_is_not_paraphrase(self, index):
+        """Test unrelated sentences stay below the threshold"""
+        paraphrase = index.detect(UNRELATED)
+        assert paraphrase.compared_sentences == 5
+        assert paraphrase.paraphrased_sentences == 0
+        assert paraphrase.max_similarity < index.threshold
+
+    def test_closest_document(self, index):
+        """Test the document-level sketch picks the source of the text"""
+        for name, text in SAMPLE_TEXTS.items():
+            paraphrase = index.detect(text)
+            assert paraphrase.closest_source == name
+            assert paraphrase.max_similarity == pytest.approx(1.0, abs=1e-3)
+
+    def test_short_sentences_not_compared(self, index):
+        """Test sentences under MIN_SENTENCE_WORDS words are skipped"""
+        paraphrase = index.detect("Search engine. Quality content.")
+        assert paraphrase.compared_sentences == 0
+        assert paraphrase.paraphrased_fraction == 0.0
+
+    def test_empty_input(self, index):
+        """Test text without sentences has no similarity"""
+        paraphrase = index.detect("... !!")
+        assert (paraphrase.max_similarity, paraphrase.closest_source, paraphrase.compared_sentences) == (0.0, None, 0)
+
+    def test_batches_match_single_pass(self, index, monkeypatch):
+        """Test matching in small batches gives the same result"""
+        text = PARAPHRASED + " " + UNRELATED
+        expected = index.detect(text)
+        monkeypatch.setattr(semantic, "BATCH_SENTENCES", 2)
+        assert index.detect(text) == expected
+
+    def test_streaming_matches_in_memory(self, index):
+        """Test sentences fed by the streaming analyzer give the same result"""
+        text = PARAPHRASED + " " + UNRELATED
+        analyzer = StreamingAnalyzer(StreamingReference(SAMPLE_TEXTS), language="en", paraphrase_matcher=index.matcher())
+        chunks = [text[i:i + 37] for i in range(0, len(text), 37)]
+        assert analyzer.consume(chunks).paraphrase == index.detect(text)
+
+    def test_saved_index(self, tmp_path, monkeypatch, capsys):
+        """Test an index built offline loads through SEMANTIC_INDEX and gives equal results"""
+        (tmp_path / "pages").mkdir()
+        (tmp_path / "pages" / "guide.txt").write_text(SAMPLE_TEXTS["article2"])
+        out = tmp_path / "index.npz"
+
+        assert semantic.main(["--corpus", str(tmp_path / "pages"), "--out", str(out)]) == 0
+        assert json.loads(capsys.readouterr().out)["documents"] == 1
+
+        monkeypatch.setenv("SEMANTIC_INDEX", str(out))
+        loaded = SemanticIndex.from_env(SAMPLE_TEXTS)
+        built = SemanticIndex({"guide.txt": SAMPLE_TEXTS["article2"]})
+        assert loaded.detect(PARAPHRASED) == built.detect(PARAPHRASED)
+        assert loaded.detect(PARAPHRASED).closest_source == "guide.txt"
+
+
+class TestScoring:
+    """Test suite for weighting paraphrases in the final score"""
+
+    def test_weight(self, monkeypatch):
+        """Test paraphrased sentences only count when weighted"""
+        base = compute_final_score(60.0, 10.0, KEYWORD_STATS)
+        assert compute_final_score(60.0, 10.0, KEYWORD_STATS, paraphrased_fraction=0.5) == base
+
+        weighted = compute_final_score(60.0, 10.0, KEYWORD_STATS, paraphrased_fraction=0.5, paraphrase_share=1.0)
+        assert weighted == pytest.approx(base - (90 - 50) * 0.3)
+
+        monkeypatch.setenv("PARAPHRASE_WEIGHT", "1")
+        assert compute_final_score(60.0, 10.0, KEYWORD_STATS, paraphrased_fraction=0.5) == weighted
+        assert compute_final_score(60.0, 10.0, KEYWORD_STATS) == base
+
+    def test_analyze_reports_paraphrase(self):
+        """Test /analyze returns the paraphrase similarity on request"""
+        response = client.post("/analyze", json={"text": PARAPHRASED, "language": "en", "paraphrase": True})
+        assert response.status_code == 200
+
+        paraphrase = response.json()["paraphrase"]
+        assert paraphrase["paraphrased_sentences"] == 4
+        assert paraphrase["closest_source"] in SAMPLE_TEXTS
+
+        streamed = client.post("/analyze/stream?paraphrase=true", content=PARAPHRASED.encode()).json()
+        assert streamed["paraphrase"] == paraphrase
+
+    def test_skipped_when_unweighted_and_not_requested(self, monkeypatch):
+        """Test detection does not run unless weighted or requested"""
+        def fail(text):
+            raise AssertionError("paraphrase detection ran")
+
+        monkeypatch.setattr(main.get_semantic_index(), "detect", fail)
+        data = client.post("/analyze", json={"text": PARAPHRASED, "language": "en"}).json()
+        assert data["paraphrase"] is None
+        assert data["coverage"]["complete"] is True
+
+    def test_weighted_paraphrase_runs_by_default(self, monkeypatch):
+        """Test a paraphrase weight makes detection part of every analysis"""
+        monkeypatch.setenv("PARAPHRASE_WEIGHT", "0.5")
+        data = client.post("/analyze", json={"text": PARAPHRASED, "language": "en"}).json()
+        assert data["paraphrase"]["paraphrased_sentences"] == 4
+
+    def test_deadline_skips_paraphrase(self, monkeypatch):
+        """Test a spent budget skips detection and marks a weighted score approximated"""
+        payload = {"text": PARAPHRASED, "language": "en", "paraphrase": True}
+        coverage = client.post("/analyze", json=payload, headers={"X-Deadline-Ms": "0"}).json()["coverage"]
+        assert "paraphrase" in coverage["skipped"]
+
+        monkeypatch.setenv("PARAPHRASE_WEIGHT", "1")
+        data = client.post("/analyze", json=payload, headers={"X-Deadline-Ms": "0"}).json()
+        assert data["paraphrase"] is None
+        assert "final_score" in data["coverage"]["approximated"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
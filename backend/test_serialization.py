@@ -0,0 +1,148 @@
+"""
+Pytest tests for lean result types and fast JSON serialization.
+Run with: pytest test_serialization.py -v
+"""
+
+import json
+from dataclasses import fields
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+from main import (
+    app, SAMPLE_TEXTS, AnalysisCoverage, AnalyzeResponse, CopiedRuns, DocumentStructure,
+    ParagraphReadability, ParaphraseMatches, PlagiarismMatch, ReadabilityDetails, SentenceReadability,
+    SerpPreview, run_analysis
+)
+from passages import PassageMatch
+from semantic import ParaphraseSimilarity
+from suffix import CopiedText
+from results import (
+    AnalysisResult, CoverageResult, ParagraphReadabilityResult, ReadabilityDetailsResult,
+    SentenceReadabilityResult, SerpResult, StructureResult
+)
+from serialization import dump_json, get_encoder
+
+# Create test client
+client = TestClient(app)
+
+HTML_PAGE = (
+    "<html><head><title>Keyword Guide</title></head><body><h1>Research</h1>"
+    f"<p>{SAMPLE_TEXTS['article1']}</p><a href='/more'>more</a></body></html>"
+)
+
+
+def pydantic_json(body: bytes) -> str:
+    """The JSON Pydantic itself produces for a response body, type-strict"""
+    return json.dumps(AnalyzeResponse.model_validate_json(body).model_dump(mode="json"))
+
+
+class Sample(BaseModel):
+    score: float
+    pairs: List[Tuple[str, int]]
+    weights: Dict[str, float]
+    limit: Optional[float] = None
+
+
+class TestResultTypes:
+    """Test suite for the internal result dataclasses"""
+
+    @pytest.mark.parametrize("result_type, model", [
+        (AnalysisResult, AnalyzeResponse),
+        (SerpResult, SerpPreview),
+        (CoverageResult, AnalysisCoverage),
+        (StructureResult, DocumentStructure),
+        (PassageMatch, PlagiarismMatch),
+        (ReadabilityDetailsResult, ReadabilityDetails),
+        (SentenceReadabilityResult, SentenceReadability),
+        (ParagraphReadabilityResult, ParagraphReadability),
+        (CopiedText, CopiedRuns),
+        (ParaphraseSimilarity, ParaphraseMatches),
+    ])
+    def test_fields_mirror_response_models(self, result_type, model):
+        """Test every result type has its model's fields, in order, and slots"""
+        assert [f.name for f in fields(result_type)] == list(model.model_fields)
+        assert "__slots__" in vars(result_type)
+
+    def test_pipeline_returns_result_types(self):
+        """Test the analysis pipeline builds no Pydantic models"""
+        result = run_analysis(SAMPLE_TEXTS["article2"], "en", detailed_plagiarism=True)
+
+        assert isinstance(result, AnalysisResult)
+        assert isinstance(result.serp_preview, SerpResult)
+        assert all(isinstance(match, PassageMatch) for match in result.plagiarism_matches)
+
+
+class TestEncoder:
+    """Test suite for compiled response encoders"""
+
+    def test_coercions(self):
+        """Test ints in float fields become floats and tuples become arrays"""
+        encoded = get_encoder(Sample)(Sample.model_construct(score=50, pairs=[("seo", 3)], weights={"seo": 1}))
+
+        assert dump_json(encoded) == b'{"score":50.0,"pairs":[["seo",3]],"weights":{"seo":1.0},"limit":null}'
+
+    def test_non_finite_floats_are_null(self):
+        """Test NaN and infinities are written as null, as Pydantic does"""
+        sample = Sample.model_construct(
+            score=float("nan"), pairs=[], weights={"seo": float("inf"), "ok": 2.5}, limit=float("-inf")
+        )
+        encoded = dump_json(get_encoder(Sample)(sample))
+
+        assert encoded == b'{"score":null,"pairs":[],"weights":{"seo":null,"ok":2.5},"limit":null}'
+        assert json.loads(encoded) == json.loads(sample.model_dump_json())
+
+    def test_tuple_input(self):
+        """Test field values may be given as a tuple in model order"""
+        assert get_encoder(Sample)((1, [], {}, 2)) == {"score": 1.0, "pairs": [], "weights": {}, "limit": 2.0}
+
+    def test_encoders_are_cached(self):
+        """Test an encoder is compiled once per model"""
+        assert get_encoder(AnalyzeResponse) is get_encoder(AnalyzeResponse)
+
+
+class TestWireFormat:
+    """Test suite checking responses are unchanged on the wire"""
+
+    @pytest.mark.parametrize("payload", [
+        {"text": SAMPLE_TEXTS["article1"]},
+        {"text": SAMPLE_TEXTS["article2"], "detailed_plagiarism": True},
+        {"text": HTML_PAGE, "format": "html"},
+        {"text": "Das ist ein kurzer deutscher Text über Suchmaschinen und Inhalte."},
+    ])
+    def test_analyze_matches_pydantic_serialization(self, payload):
+        """Test the fast encoder emits exactly what the response model would"""
+        response = client.post("/analyze", json=payload)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+
+        assert json.dumps(response.json()) == pydantic_json(response.content)
+
+    def test_deadline_coverage(self):
+        """Test optional float fields are encoded like the model's"""
+        response = client.post("/analyze?deadline_ms=0", json={"text": SAMPLE_TEXTS["article3"]})
+        assert response.json()["coverage"]["deadline_ms"] == 0.0
+        assert json.dumps(response.json()) == pydantic_json(response.content)
+
+    def test_stream_matches_pydantic_serialization(self):
+        """Test streaming responses are encoded like the model's"""
+        response = client.post("/analyze/stream?format=html", content=HTML_PAGE.encode("utf-8"))
+        assert response.status_code == 200
+        assert json.dumps(response.json()) == pydantic_json(response.content)
+
+    @pytest.mark.parametrize("path, model", [
+        ("/analyze", "AnalyzeResponse"),
+        ("/analyze/stream", "AnalyzeResponse"),
+        ("/crawl", "CrawlResponse"),
+    ])
+    def test_openapi_schema_unchanged(self, path, model):
+        """Test endpoints still publish their response models"""
+        schema = app.openapi()
+        content = schema["paths"][path]["post"]["responses"]["200"]["content"]
+        assert content["application/json"]["schema"] == {"$ref": f"#/components/schemas/{model}"}
+        assert list(schema["components"]["schemas"]["AnalyzeResponse"]["properties"]) == list(AnalyzeResponse.model_fields)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,171 @@
+"""
+Pytest tests for the sharded plagiarism index.
+Run with: pytest test_shards.py -v
+"""
+
+import os
+import signal
+import threading
+import time
+
+import pytest
+import main
+from main import SAMPLE_TEXTS, PLAGIARISM_TIERS, check_plagiarism, check_plagiarism_sharded, run_analysis
+from deadline import Deadline
+from shards import ShardCoordinator, ShardIndex, partition, shard_of
+
+# Inputs with different amounts of copied text
+COPIED = SAMPLE_TEXTS["article1"]
+MIXED = (
+    SAMPLE_TEXTS["article2"][:400]
+    + " Completely unrelated sentences about gardening follow here. Tomatoes need sun and water every day."
+)
+ORIGINAL = "Our bakery opened a second shop downtown. Fresh bread is baked every morning before sunrise."
+
+# A larger corpus so every shard holds several documents
+CORPUS = {
+    **SAMPLE_TEXTS,
+    **{f"variant{i}": text.replace(".", f" variant {i}.") for i, text in enumerate(SAMPLE_TEXTS.values())},
+    **{f"filler{i}": f"Filler document {i} covers topic {i} in plain words. It has nothing else." for i in range(6)},
+}
+
+
+@pytest.fixture(scope="module")
+def coordinator():
+    coordinator = ShardCoordinator.start(3, documents=SAMPLE_TEXTS, timeout=30)
+    yield coordinator
+    coordinator.close()
+
+
+class TestPartitioning:
+    """Test suite for assigning documents to shards"""
+
+    def test_partition_is_stable_and_complete(self):
+        """Test every document lands in exactly one shard, the same one every time"""
+        partitions = partition(CORPUS, 3)
+
+        assert sorted(name for part in partitions for name in part) == sorted(CORPUS)
+        for index, part in enumerate(partitions):
+            assert all(shard_of(name, 3) == index for name in part)
+        assert partition(CORPUS, 3) == partitions
+
+    def test_shard_index_matches_local_scores(self):
+        """Test one shard holding everything scores like check_plagiarism"""
+        index = ShardIndex(SAMPLE_TEXTS)
+        assert index.reference.filter is None
+        for text in (COPIED, MIXED, ORIGINAL):
+            (_, similarity), = index.top_documents(text, PLAGIARISM_TIERS, top_k=1)
+            assert round(similarity * 100, 2) == check_plagiarism(text)
+
+
+class TestScatterGather:
+    """Test suite for queries over shard processes"""
+
+    def test_sharded_score_equals_local(self, coordinator):
+        """Test merged per-document maxima give exactly the local score"""
+        for text in (COPIED, MIXED, ORIGINAL):
+            score, tiers, missing = check_plagiarism_sharded(coordinator, text)
+            assert score == check_plagiarism(text)
+            assert tiers == list(PLAGIARISM_TIERS)
+            assert missing == []
+
+    def test_merge_across_shards(self):
+        """Test the top documents are merged from all shards"""
+        coordinator = ShardCoordinator.start(3, documents=CORPUS, timeout=30)
+        try:
+            local = ShardIndex(CORPUS).top_documents(MIXED, PLAGIARISM_TIERS, top_k=4)
+            result = coordinator.query(MIXED, PLAGIARISM_TIERS, top_k=4)
+        finally:
+            coordinator.close()
+
+        assert result.complete and sorted(result.answered) == [0, 1, 2]
+        assert [name for name, _ in result.matches] == [name for name, _ in local]
+        assert result.matches == pytest.approx(local)
+
+    def test_slow_shard_gives_partial_result(self, coordinator):
+        """Test a shard that misses the deadline is reported, not waited for"""
+        slow = coordinator.shards[0]
+        os.kill(slow.process.pid, signal.SIGSTOP)
+        try:
+            started = time.perf_counter()
+            result = coordinator.query(COPIED, PLAGIARISM_TIERS, timeout=0.5)
+            elapsed = time.perf_counter() - started
+        finally:
+            os.kill(slow.process.pid, signal.SIGCONT)
+
+        assert elapsed < 5
+        assert result.missing == [0] and not result.complete
+        assert sorted(result.answered) == [1, 2]
+        assert all(name in SAMPLE_TEXTS and shard_of(name, 3) != 0 for name, _ in result.matches)
+
+        # The late answer is dropped and the shard serves the next query
+        assert coordinator.query(COPIED, PLAGIARISM_TIERS).complete
+
+    def test_failed_query_keeps_shard_serving(self, coordinator):
+        """Test a query that raises in a shard reports it missing and the shard answers the next one"""
+        result = coordinator.query(COPIED, {"ngram": 0.0})
+        assert result.missing and not result.complete
+        assert coordinator.stats()["alive"] == 3
+        assert coordinator.query(COPIED, PLAGIARISM_TIERS).complete
+
+    def test_analysis_marks_missing_shards(self, coordinator, monkeypatch):
+        """Test analyses without every shard mark the plagiarism score approximated"""
+        monkeypatch.setattr(main, "_shard_coordinator_cache", coordinator)
+        monkeypatch.setattr(coordinator, "timeout", 0.2)
+        os.kill(coordinator.shards[1].process.pid, signal.SIGSTOP)
+        try:
+            result = run_analysis(COPIED, "en")
+        finally:
+            os.kill(coordinator.shards[1].process.pid, signal.SIGCONT)
+
+        assert not result.coverage.complete
+        assert "plagiarism_score" in result.coverage.approximated
+
+    def test_deadline_skips_costly_tiers(self, coordinator):
+        """Test tiers are chosen from the deadline like the local check"""
+        score, tiers, missing = check_plagiarism_sharded(coordinator, COPIED, Deadline(0))
+        assert tiers == ["ngram"]
+        assert 0 <= score <= 100
+        assert set(missing) <= {0, 1, 2}
+
+    def test_concurrent_first_requests_start_one_coordinator(self, monkeypatch):
+        """Test requests racing to start the shards share a single coordinator"""
+        started = []
+
+        def start(documents):
+            time.sleep(0.1)
+            started.append(object())
+            return started[-1]
+
+        monkeypatch.setattr(main, "_shard_coordinator_cache", None)
+        monkeypatch.setattr(ShardCoordinator, "from_env", start)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(main.get_shard_coordinator())) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(started) == 1
+        assert results == started * 4
+
+    def test_stopped_shard_is_skipped(self):
+        """Test queries go on without a shard whose process died"""
+        coordinator = ShardCoordinator.start(2, documents=CORPUS, timeout=30)
+        try:
+            coordinator.shards[1].process.terminate()
+            coordinator.shards[1].process.join(timeout=10)
+            time.sleep(0.1)
+
+            started = time.perf_counter()
+            result = coordinator.query(COPIED, PLAGIARISM_TIERS)
+            assert time.perf_counter() - started < 5
+            assert coordinator.stats()["alive"] == 1
+        finally:
+            coordinator.close()
+
+        assert result.missing == [1]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,119 @@
+"""
+Pytest tests for the rolling-hash shingling engine.
+Run with: pytest test_shingles.py -v
+"""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from main import calculate_ngram_similarity
+from shingles import (
+    RollingHasher, ShingleEngine, TokenVocabulary,
+    intersection_size, jaccard_similarity, rolling_hashes, shingle_set
+)
+
+
+def string_ngram_similarity(text1, text2, n=5):
+    """Reference implementation using joined-string n-gram sets"""
+    words1, words2 = text1.split(), text2.split()
+    if len(words1) < n or len(words2) < n:
+        return 0.0
+    ngrams1 = set(' '.join(words1[i:i + n]) for i in range(len(words1) - n + 1))
+    ngrams2 = set(' '.join(words2[i:i + n]) for i in range(len(words2) - n + 1))
+    return len(ngrams1 & ngrams2) / len(ngrams1 | ngrams2)
+
+
+class TestTokenVocabulary:
+    """Test suite for token ID mapping"""
+
+    def test_add_and_lookup(self):
+        """Test reference tokens get sequential IDs and lookups do not grow"""
+        vocabulary = TokenVocabulary()
+        assert vocabulary.add("seo") == 1
+        assert vocabulary.add("content") == 2
+        assert vocabulary.add("seo") == 1
+
+        unknown = vocabulary.lookup("ranking")
+        assert unknown == vocabulary.lookup("ranking")
+        assert unknown >= 1 << 63
+        assert len(vocabulary) == 2
+
+    def test_unknown_ids_stable_across_processes(self):
+        """Test unknown-token IDs do not depend on the per-process hash seed"""
+        code = "from shingles import TokenVocabulary; print(TokenVocabulary().lookup('ranking'))"
+        ids = set()
+        for seed in ("1", "2"):
+            env = dict(os.environ, PYTHONHASHSEED=seed)
+            output = subprocess.run(
+                [sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True,
+                cwd=os.path.dirname(os.path.abspath(__file__))
+            ).stdout
+            ids.add(int(output))
+        assert ids == {TokenVocabulary().lookup("ranking")}
+
+    def test_encode_dtype(self):
+        """Test encoded IDs are uint64 arrays"""
+        ids = TokenVocabulary().encode(["a", "b", "a"], grow=True)
+        assert ids.dtype == np.uint64
+        assert ids.tolist() == [1, 2, 1]
+
+
+class TestRollingHashes:
+    """Test suite for Rabin-Karp shingle hashing"""
+
+    def test_vectorized_matches_sequential(self):
+        """Test array hashing equals the one-at-a-time rolling update"""
+        ids = np.array([5, 1, 9, 2, 7, 3, 1 << 63 | 11, 4], dtype=np.uint64)
+        hasher = RollingHasher(n=3)
+        sequential = [h for h in (hasher.push(int(i)) for i in ids) if h is not None]
+
+        assert rolling_hashes(ids, n=3).tolist() == sequential
+
+    def test_shingle_set_sorted_unique(self):
+        """Test shingle sets are sorted and de-duplicated"""
+        ids = TokenVocabulary().encode("a b a b a b".split(), grow=True)
+        shingles = shingle_set(ids, n=2)
+
+        assert len(shingles) == 2
+        assert shingles.tolist() == sorted(shingles.tolist())
+
+    def test_short_input_has_no_shingles(self):
+        """Test inputs shorter than n produce empty sets"""
+        ids = TokenVocabulary().encode(["a", "b"], grow=True)
+        assert len(shingle_set(ids, n=5)) == 0
+        assert jaccard_similarity(shingle_set(ids, n=5), shingle_set(ids, n=1)) == 0.0
+
+    def test_intersection_and_jaccard(self):
+        """Test merge-based overlap counts"""
+        a = np.array([1, 3, 5, 7], dtype=np.uint64)
+        b = np.array([3, 4, 5], dtype=np.uint64)
+
+        assert intersection_size(a, b) == 2
+        assert jaccard_similarity(a, b) == 2 / 5
+
+
+class TestShingleEngine:
+    """Test suite for n-gram similarity through the engine"""
+
+    @pytest.mark.parametrize("n", [1, 2, 3, 5])
+    def test_matches_string_ngrams(self, n):
+        """Test integer shingles give the same Jaccard as string n-grams"""
+        text1 = "quality content that engages readers and provides value is essential for seo success"
+        text2 = "content that engages readers and provides value matters more than seo tricks and value"
+
+        assert calculate_ngram_similarity(text1, text2, n=n) == pytest.approx(string_ngram_similarity(text1, text2, n))
+
+    def test_engine_similarity(self):
+        """Test identical texts are fully similar and disjoint texts are not"""
+        engine = ShingleEngine(n=2)
+        words = "one two three four".split()
+
+        assert engine.similarity(words, words) == 1.0
+        assert engine.similarity(words, "five six seven eight".split()) == 0.0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
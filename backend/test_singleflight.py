@@ -0,0 +1,230 @@
+"""
+Pytest tests for request coalescing and superseded-revision cancellation.
+Run with: pytest test_singleflight.py -v
+"""
+
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+import main
+from main import app, SAMPLE_TEXTS
+from fastapi.concurrency import run_in_threadpool
+from singleflight import (
+    Cancelled, RevisionTracker, SingleFlight, Superseded, cancellable, check_cancelled
+)
+
+PAYLOAD = {"text": SAMPLE_TEXTS["article1"]}
+
+
+def slow_work(seconds, events):
+    """Blocking work that checks for cancellation every few milliseconds"""
+    events.append("started")
+    deadline = time.perf_counter() + seconds
+    try:
+        while time.perf_counter() < deadline:
+            check_cancelled()
+            time.sleep(0.005)
+    except Cancelled:
+        events.append("cancelled")
+        raise
+    return "done"
+
+
+async def wait_for(events, event):
+    """Poll until a slow_work event was recorded"""
+    for _ in range(200):
+        if event in events:
+            return
+        await asyncio.sleep(0.01)
+
+
+async def post_all(*requests):
+    """Send requests to the app concurrently"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(
+            client.post("/analyze", json=payload, headers=headers) for payload, headers in requests
+        ))
+
+
+class TestSingleFlight:
+    """Test suite for coalescing identical computations"""
+
+    def test_concurrent_calls_share_one_computation(self):
+        """Test callers of one key get the result of a single computation"""
+        flights = SingleFlight()
+        calls = []
+
+        async def compute(token):
+            calls.append(token)
+            await asyncio.sleep(0.05)
+            return object()
+
+        async def scenario():
+            results = await asyncio.gather(*(flights.run("key", compute) for _ in range(5)))
+            after = await flights.run("key", compute)
+            return results, after
+
+        results, after = asyncio.run(scenario())
+        assert len(calls) == 2
+        assert all(result is results[0] for result in results)
+        assert after is not results[0]
+        assert flights.stats() == {"in_flight": 0, "started": 2, "coalesced": 4, "cancelled": 0}
+
+    def test_errors_reach_every_waiter(self):
+        """Test a failed computation fails all of its waiters"""
+        flights = SingleFlight()
+
+        async def compute(token):
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        async def scenario():
+            return await asyncio.gather(*(flights.run("key", compute) for _ in range(3)), return_exceptions=True)
+
+        assert all(isinstance(result, ValueError) for result in asyncio.run(scenario()))
+
+
+class TestRevisions:
+    """Test suite for session revisions"""
+
+    def test_newer_revision_supersedes_and_cancels(self):
+        """Test a newer revision ends the old request and stops its thread"""
+        flights = SingleFlight()
+        revisions = RevisionTracker()
+        events = []
+
+        async def compute(token):
+            return await run_in_threadpool(cancellable(token, slow_work), 5.0, events)
+
+        async def scenario():
+            old = revisions.begin("editor", 1)
+            old_request = asyncio.ensure_future(flights.run(("draft", 1), compute, old))
+            await wait_for(events, "started")
+
+            started = time.perf_counter()
+            new = revisions.begin("editor", 2)
+            with pytest.raises(Superseded):
+                await old_request
+            waited = time.perf_counter() - started
+
+            # The worker thread notices at its next check
+            await wait_for(events, "cancelled")
+            revisions.end(old)
+            revisions.end(new)
+            return waited
+
+        assert asyncio.run(scenario()) < 1
+        assert events == ["started", "cancelled"]
+        assert flights.stats()["cancelled"] == 1
+
+    def test_shared_computation_keeps_running(self):
+        """Test work another client waits for is not cancelled"""
+        flights = SingleFlight()
+        revisions = RevisionTracker()
+        events = []
+
+        async def compute(token):
+            return await run_in_threadpool(cancellable(token, slow_work), 0.2, events)
+
+        async def scenario():
+            old = revisions.begin("editor", 1)
+            superseded = asyncio.ensure_future(flights.run("same text", compute, old))
+            other_tab = asyncio.ensure_future(flights.run("same text", compute))
+            await wait_for(events, "started")
+            revisions.begin("editor", 2)
+            with pytest.raises(Superseded):
+                await superseded
+            return await other_tab
+
+        assert asyncio.run(scenario()) == "done"
+        assert events == ["started"]
+
+    def test_stale_and_implicit_revisions(self):
+        """Test stale revisions are rejected and missing ones count up"""
+        async def scenario():
+            revisions = RevisionTracker(max_sessions=2)
+            revisions.begin("a", 5)
+            with pytest.raises(Superseded):
+                revisions.begin("a", 4)
+            same = revisions.begin("a", 5)
+            assert not same.superseded.is_set()
+
+            first = revisions.begin("b")
+            second = revisions.begin("b")
+            assert (first.revision, second.revision) == (1, 2)
+            assert first.superseded.is_set()
+
+            revisions.begin("c", 1)
+            revisions.begin("a", 1)  # "a" was forgotten (least recently used)
+
+        asyncio.run(scenario())
+
+    def test_check_cancelled_outside_computation(self):
+        """Test the cancellation check is a no-op for ordinary calls"""
+        check_cancelled()
+        assert threading.current_thread() is threading.main_thread()
+
+
+class TestAnalyzeEndpoint:
+    """Test suite for coalescing and revisions on /analyze"""
+
+    def test_duplicate_requests_are_coalesced(self, monkeypatch):
+        """Test concurrent identical analyses run the pipeline once"""
+        calls = []
+        run_analysis = main.run_analysis
+
+        def counting(*args):
+            calls.append(args[0])
+            time.sleep(0.1)
+            return run_analysis(*args)
+
+        monkeypatch.setattr(main, "run_analysis", counting)
+        responses = asyncio.run(post_all(*[(PAYLOAD, {})] * 3, ({"text": SAMPLE_TEXTS["article2"]}, {})))
+
+        assert [response.status_code for response in responses] == [200] * 4
+        assert len(calls) == 2
+        assert responses[0].content == responses[1].content == responses[2].content
+
+    def test_superseded_revision_gets_409(self, monkeypatch):
+        """Test the older draft of a session is answered with 409 and dropped"""
+        events = []
+        run_analysis = main.run_analysis
+
+        def slow_drafts(text, *args):
+            if text == PAYLOAD["text"]:
+                slow_work(5.0, events)
+            return run_analysis(text, *args)
+
+        monkeypatch.setattr(main, "run_analysis", slow_drafts)
+
+        async def scenario():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                old = asyncio.ensure_future(client.post(
+                    "/analyze", json=PAYLOAD, headers={"X-Session-Id": "tab-1", "X-Revision": "1"}
+                ))
+                await wait_for(events, "started")
+                new = await client.post(
+                    "/analyze", json={"text": SAMPLE_TEXTS["article2"]},
+                    headers={"X-Session-Id": "tab-1", "X-Revision": "2"}
+                )
+                old = await old
+                await wait_for(events, "cancelled")
+                return old, new
+
+        started = time.perf_counter()
+        old, new = asyncio.run(scenario())
+
+        assert time.perf_counter() - started < 4
+        assert old.status_code == 409
+        assert "superseded by revision 2" in old.json()["detail"]
+        assert new.status_code == 200
+        assert events == ["started", "cancelled"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
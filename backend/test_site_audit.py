@@ -0,0 +1,154 @@
+"""
+Pytest tests for the site-wide keyword cannibalization audit.
+Run with: pytest test_site_audit.py -v
+"""
+
+import json
+from collections import Counter
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from main import app, SAMPLE_TEXTS
+from site_audit import SparseTfidf, audit_site, load_pages, main as audit_main, top_similar_pairs
+
+# Create test client
+client = TestClient(app)
+
+SEO_GUIDE = "SEO keyword research guide. Keyword research finds search terms for content ranking."
+SEO_TIPS = "Keyword research tips for SEO. Research search terms before writing content for ranking."
+RECIPE = "Chocolate cake recipe with butter, flour, sugar and cocoa. Bake the cake for forty minutes."
+
+
+def dense_similarities(matrix):
+    dense = np.zeros((matrix.n_pages, len(matrix.terms)))
+    for page in range(matrix.n_pages):
+        indices, weights = matrix.row(page)
+        dense[page, indices] = weights
+    return dense @ dense.T
+
+
+class TestSparseTfidf:
+    """Test suite for sparse TF-IDF vectors"""
+
+    def test_rows_are_normalized(self):
+        """Test every non-empty page vector has unit length"""
+        matrix = SparseTfidf([Counter(a=3, b=1), Counter(b=2, c=5), Counter()])
+        similarities = dense_similarities(matrix)
+
+        assert similarities[0, 0] == pytest.approx(1.0)
+        assert similarities[1, 1] == pytest.approx(1.0)
+        assert similarities[2, 2] == 0.0
+
+    def test_block_product_matches_dense_product(self):
+        """Test the blocked sparse product equals the dense matrix product"""
+        rng = np.random.default_rng(7)
+        counts = [
+            Counter({f"t{term}": int(rng.integers(1, 4)) for term in rng.choice(60, size=8, replace=False)})
+            for _ in range(50)
+        ]
+        matrix = SparseTfidf(counts)
+        expected = dense_similarities(matrix)
+
+        assert np.allclose(matrix.block_similarities(0, 50), expected)
+        assert np.allclose(matrix.block_similarities(10, 17), expected[10:17])
+
+    def test_site_wide_terms_ignored_on_large_sites(self):
+        """Test boilerplate terms on most pages are dropped"""
+        counts = [Counter({"brand": 1, f"topic{i}": 1}) for i in range(30)]
+        assert "brand" not in SparseTfidf(counts).vocabulary
+        assert "brand" in SparseTfidf(counts[:2]).vocabulary
+
+
+class TestTopPairs:
+    """Test suite for blocked top-k pair search"""
+
+    def test_top_pairs_match_brute_force(self):
+        """Test blocked top-k returns the same pairs as a full comparison"""
+        rng = np.random.default_rng(3)
+        counts = [
+            Counter({f"t{term}": 1 for term in rng.choice(40, size=6, replace=False)})
+            for _ in range(80)
+        ]
+        matrix = SparseTfidf(counts)
+        similarities = dense_similarities(matrix)
+        rows, columns = np.triu_indices(80, 1)
+        best = np.argsort(-similarities[rows, columns], kind="stable")[:10]
+
+        pairs = top_similar_pairs(matrix, top_k=10, min_similarity=0.0, block_size=16)
+        assert [score for _, _, score in pairs] == pytest.approx(
+            [similarities[rows[i], columns[i]] for i in best]
+        )
+        assert all(a < b for a, b, _ in pairs)
+
+    def test_min_similarity_filters_pairs(self):
+        """Test unrelated pages are not reported"""
+        _, pairs = audit_site([
+            ("/a", Counter(seo=2, keyword=1)),
+            ("/b", Counter(seo=1, keyword=2)),
+            ("/c", Counter(cake=3)),
+        ], min_similarity=0.5)
+
+        assert [(pair.page_a, pair.page_b) for pair in pairs] == [("/a", "/b")]
+        assert set(pairs[0].shared_keywords) == {"seo", "keyword"}
+
+
+class TestSiteAuditAPI:
+    """Test suite for the /site-audit endpoint"""
+
+    def test_finds_competing_pages(self):
+        """Test the two SEO pages are reported as competitors"""
+        response = client.post("/site-audit", json={"pages": [
+            {"url": "/guide", "text": SEO_GUIDE},
+            {"url": "/tips", "text": SEO_TIPS},
+            {"url": "/cake", "text": RECIPE},
+        ]})
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["pages"] == 3
+        assert data["pairs"][0]["page_a"] == "/guide"
+        assert data["pairs"][0]["page_b"] == "/tips"
+        assert "research" in data["pairs"][0]["shared_keywords"]
+        assert all("/cake" not in (pair["page_a"], pair["page_b"]) for pair in data["pairs"])
+
+    def test_needs_two_pages(self):
+        """Test a single page is rejected"""
+        response = client.post("/site-audit", json={"pages": [{"url": "/a", "text": SEO_GUIDE}]})
+        assert response.status_code == 400
+
+    def test_invalid_options(self):
+        """Test non-positive top_k is rejected"""
+        pages = [{"url": "/a", "text": SEO_GUIDE}, {"url": "/b", "text": SEO_TIPS}]
+        response = client.post("/site-audit", json={"pages": pages, "top_k": 0})
+        assert response.status_code == 400
+
+
+class TestSiteAuditCLI:
+    """Test suite for the command line interface"""
+
+    def test_directory_audit(self, tmp_path, capsys):
+        """Test auditing a directory of text files"""
+        (tmp_path / "guide.txt").write_text(SEO_GUIDE)
+        (tmp_path / "tips.md").write_text(SEO_TIPS)
+        (tmp_path / "cake.txt").write_text(RECIPE)
+
+        assert audit_main([str(tmp_path), "--top-k", "1"]) == 0
+        report = json.loads(capsys.readouterr().out)
+
+        assert report["pages"] == 3
+        assert len(report["pairs"]) == 1
+        assert {report["pairs"][0]["page_a"], report["pairs"][0]["page_b"]} == {"guide.txt", "tips.md"}
+
+    def test_jsonl_pages(self, tmp_path):
+        """Test JSONL input keeps the given URLs"""
+        path = tmp_path / "pages.jsonl"
+        path.write_text("\n".join(
+            json.dumps({"url": f"/{name}", "text": text}) for name, text in SAMPLE_TEXTS.items()
+        ))
+
+        assert [url for url, _ in load_pages(path)] == ["/article1", "/article2", "/article3"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
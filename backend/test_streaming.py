@@ -0,0 +1,217 @@
+"""
+Pytest tests for memory-bounded streaming analysis.
+Run with: pytest test_streaming.py -v
+"""
+
+import asyncio
+import json
+import time
+import pytest
+import textstat
+from fastapi.testclient import TestClient
+import main
+import streaming
+from admission import AdmissionController
+from deadline import Deadline
+from main import (
+    app, SAMPLE_TEXTS, AnalyzeRequest, AnalyzeResponse, analyze_chunks, analyze_text,
+    build_streaming_response, get_streaming_reference
+)
+from readability import ReadabilityTally
+from serialization import get_encoder
+from streaming import StreamingAnalyzer, iter_decoded_chunks, iter_text_chunks
+
+# Create test client
+client = TestClient(app)
+
+ARTICLE = """
+Content marketing is essential for modern businesses. Quality content helps
+improve search engine rankings and attracts organic traffic. SEO best practices
+include keyword research, on-page optimization, e.g. creating engaging content.
+
+Regular content updates and proper formatting with headings and paragraphs
+improve readability!! Is link building still useful? It is... mostly.
+""" + SAMPLE_TEXTS["article1"]
+
+# Copied sentences repeated many times, so shingle positions far exceed distinct shingles
+REPEATED = (SAMPLE_TEXTS["article1"] + " ") * 6 + "Our own closing thoughts about writing for people first."
+
+
+def analyze_stream(text, chunk_size):
+    """Analyze `text` through the streaming pipeline in chunks of `chunk_size`"""
+    async def chunks():
+        for chunk in iter_text_chunks(text, chunk_size):
+            yield chunk
+
+    result, outline = asyncio.run(analyze_chunks(chunks(), len(text.encode("utf-8"))))
+    return build_streaming_response(result, outline)
+
+
+class TestStreamingPipeline:
+    """Test suite for the chunked analysis pipeline"""
+
+    def test_readability_tally_matches_textstat(self):
+        """Test incremental tallies reproduce textstat's Flesch score"""
+        tally = ReadabilityTally()
+        for token in ARTICLE.split():
+            tally.add_token(token)
+
+        assert tally.flesch_reading_ease() == textstat.flesch_reading_ease(ARTICLE)
+
+    def test_decoder_handles_split_multibyte_characters(self):
+        """Test UTF-8 characters split across byte chunks decode intact"""
+        data = "Café naïve résumé".encode("utf-8")
+        byte_chunks = [data[i:i + 1] for i in range(len(data))]
+
+        assert "".join(iter_decoded_chunks(byte_chunks)) == "Café naïve résumé"
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 64, 100000])
+    def test_stream_matches_full_analysis(self, chunk_size):
+        """Test streaming results equal the in-memory analysis for any chunk size"""
+        expected = asyncio.run(analyze_text(AnalyzeRequest(text=ARTICLE)))
+        streamed = analyze_stream(ARTICLE, chunk_size)
+
+        assert get_encoder(AnalyzeResponse)(streamed) == json.loads(expected.body)
+
+    def test_large_document_keeps_bounded_buffers(self):
+        """Test only bounded slices of a large document are retained"""
+        analyzer = StreamingAnalyzer(
+            get_streaming_reference(), language="en", head_chars=1000, sequence_window=2000
+        )
+        paragraph = SAMPLE_TEXTS["article3"] * 10
+        for _ in range(5):
+            analyzer.feed(paragraph)
+        result = analyzer.finish()
+
+        assert result.char_count == len(paragraph) * 5
+        assert len(result.head) == 1000
+        assert "sequence_similarity" in result.approximated
+        assert 0 < result.similarities["article3"] <= 1
+
+    @pytest.mark.parametrize("chunk_size", [13, 100000])
+    def test_repeated_phrases_match_full_analysis(self, chunk_size):
+        """Test the n-gram Jaccard counts distinct shingles, not positions"""
+        expected = asyncio.run(analyze_text(AnalyzeRequest(text=REPEATED)))
+        streamed = analyze_stream(REPEATED, chunk_size)
+
+        assert get_encoder(AnalyzeResponse)(streamed) == json.loads(expected.body)
+
+    def test_distinct_shingle_cap(self, monkeypatch):
+        """Test past the distinct-shingle cap the similarity is marked approximated"""
+        monkeypatch.setattr(streaming, "MAX_DISTINCT_SHINGLES", 16)
+        analyzer = StreamingAnalyzer(get_streaming_reference(), language="en")
+        result = analyzer.consume(iter_text_chunks(REPEATED, 64))
+
+        assert analyzer.distinct_overflow
+        assert result.approximated == ["ngram_similarity"]
+        assert "plagiarism_score" in build_streaming_response(result).coverage.approximated
+
+    def test_deadline_skips_costly_tiers(self):
+        """Test a spent budget leaves only the n-gram tier and marks the score approximated"""
+        analyzer = StreamingAnalyzer(get_streaming_reference(), language="en", deadline=Deadline(0))
+        result = analyzer.consume(iter_text_chunks(ARTICLE, 100))
+
+        assert result.tiers == ["ngram"]
+        assert {"sentence_similarity", "sequence_similarity"} <= set(result.approximated)
+        assert not any(analyzer.sentence_matches.values())
+
+        coverage = build_streaming_response(result, deadline=Deadline(0)).coverage
+        assert coverage.plagiarism_tiers == ["ngram"]
+        assert "plagiarism_score" in coverage.approximated
+        assert coverage.deadline_ms == 0
+
+    def test_keyword_vocabulary_is_bounded(self, monkeypatch):
+        """Test the keyword counter keeps the most frequent words within its cap"""
+        monkeypatch.setattr(streaming, "MAX_KEYWORD_VOCABULARY", 20)
+        rare = " ".join(f"word{i}" for i in range(200))
+        analyzer = StreamingAnalyzer(get_streaming_reference(), language="en")
+        result = analyzer.consume(["content marketing " * 30, rare, " content"])
+
+        assert len(result.keyword_counts) <= 20
+        assert result.keyword_counts.most_common(2) == [("content", 31), ("marketing", 30)]
+        assert result.keyword_total == 261
+        assert "keyword_counts" in result.approximated
+        assert "top_keywords" in build_streaming_response(result).coverage.approximated
+
+
+class TestStreamingAPI:
+    """Test suite for the /analyze/stream endpoint"""
+
+    def test_stream_endpoint(self):
+        """Test raw text bodies are analyzed like /analyze"""
+        expected = client.post("/analyze", json={"text": ARTICLE}).json()
+
+        response = client.post(
+            "/analyze/stream",
+            content=ARTICLE.encode("utf-8"),
+            headers={"Content-Type": "text/plain; charset=utf-8"}
+        )
+
+        assert response.status_code == 200
+        assert response.json()["final_score"] == expected["final_score"]
+        assert response.json()["top_keywords"] == expected["top_keywords"]
+
+    def test_stream_endpoint_repeated_phrases(self):
+        """Test repeated copied phrases score like /analyze"""
+        expected = client.post("/analyze", json={"text": REPEATED}).json()
+        response = client.post("/analyze/stream", content=REPEATED.encode("utf-8")).json()
+
+        assert response["plagiarism_score"] == expected["plagiarism_score"]
+        assert response["final_score"] == expected["final_score"]
+
+    def test_stream_endpoint_deadline(self):
+        """Test the X-Deadline-Ms header applies to streamed bodies"""
+        response = client.post("/analyze/stream", content=ARTICLE.encode("utf-8"), headers={"X-Deadline-Ms": "0"})
+        coverage = response.json()["coverage"]
+
+        assert response.status_code == 200
+        assert coverage["plagiarism_tiers"] == ["ngram"]
+        assert coverage["complete"] is False
+
+    def test_event_loop_stays_responsive(self):
+        """Test other coroutines keep running while a large chunk is scored"""
+        text = " ".join(SAMPLE_TEXTS.values()) * 10
+
+        async def scenario():
+            async def chunks():
+                yield text
+
+            task = asyncio.ensure_future(analyze_chunks(chunks(), len(text)))
+            gaps = []
+            last = time.perf_counter()
+            while not task.done():
+                await asyncio.sleep(0.01)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+            await task
+            return gaps
+
+        gaps = asyncio.run(scenario())
+        assert len(gaps) > 5
+        assert max(gaps) < 0.2
+
+    def test_unknown_length_holds_no_budget_between_chunks(self, monkeypatch):
+        """Test bodies without Content-Length are admitted per chunk, not for the whole upload"""
+        controller = AdmissionController()
+        monkeypatch.setattr(main, "admission_controller", controller)
+        in_use = []
+
+        async def chunks():
+            for chunk in iter_text_chunks(ARTICLE, 200):
+                in_use.append(controller.in_use)
+                yield chunk
+
+        result, _ = asyncio.run(analyze_chunks(chunks(), None))
+        assert result.char_count == len(ARTICLE)
+        assert in_use == [0.0] * len(in_use)
+        assert controller.in_use == 0 and controller.admitted > 1
+
+    def test_stream_endpoint_short_text(self):
+        """Test too short streamed bodies are rejected"""
+        response = client.post("/analyze/stream", content=b"Short")
+        assert response.status_code == 400
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,151 @@
+"""
+Pytest tests for the suffix-automaton copied-passage detector.
+Run with: pytest test_suffix.py -v
+"""
+
+import json
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+import suffix
+from main import app, SAMPLE_TEXTS, check_plagiarism, compute_final_score
+from suffix import CopyDetector, SuffixAutomaton
+
+# Create test client
+client = TestClient(app)
+
+ORIGINAL = " ".join(
+    f"Our bakery number {i} opens early and sells sourdough loaves with seasonal fruit tarts."
+    for i in range(40)
+)
+COPIED_PARAGRAPH = SAMPLE_TEXTS["article2"][:400]
+ARTICLE = ORIGINAL + "\n\n" + COPIED_PARAGRAPH + "\n\n" + ORIGINAL
+
+KEYWORD_STATS = ([("content", 5), ("seo", 4), ("marketing", 3)], {"content": 10.0, "seo": 8.0, "marketing": 6.0})
+
+
+def longest_occurring_suffix(reference, prefix):
+    """Brute force: longest suffix of `prefix` that occurs in `reference`"""
+    for length in range(len(prefix), 0, -1):
+        run = prefix[len(prefix) - length:]
+        if any(reference[i:i + length] == run for i in range(len(reference) - length + 1)):
+            return length
+    return 0
+
+
+class TestSuffixAutomaton:
+    """Test suite for matching statistics of the automaton"""
+
+    def test_matches_brute_force(self):
+        """Test every position gets the longest run that occurs in the reference"""
+        rng = random.Random(7)
+        for _ in range(20):
+            reference = [rng.randint(1, 3) for _ in range(rng.randint(1, 40))]
+            query = [rng.randint(1, 4) for _ in range(30)]
+            lengths = SuffixAutomaton(reference).matching_lengths(query)
+            assert lengths.tolist() == [
+                longest_occurring_suffix(reference, query[:end + 1]) for end in range(len(query))
+            ]
+
+    def test_array_round_trip(self):
+        """Test a flattened automaton matches like the original"""
+        automaton = SuffixAutomaton([1, 2, 1, 2, 3, 1, 2])
+        restored = SuffixAutomaton.from_arrays(automaton.to_arrays())
+        query = [2, 1, 2, 3, 3, 1, 2, 1]
+        assert restored.matching_lengths(query).tolist() == automaton.matching_lengths(query).tolist()
+
+
+class TestCopyDetector:
+    """Test suite for copied-run detection"""
+
+    def test_copied_paragraph_in_long_article(self):
+        """Test one copied paragraph stands out although the averaged score barely moves"""
+        copied = CopyDetector(SAMPLE_TEXTS).detect(ARTICLE)
+        paragraph_words = len(COPIED_PARAGRAPH.split())
+
+        assert copied.longest_run_source == "article2"
+        assert paragraph_words - 1 <= copied.longest_run <= paragraph_words
+        assert copied.copied_tokens == copied.longest_run
+        assert copied.copied_fraction == round(copied.copied_tokens / copied.input_tokens, 4)
+        assert check_plagiarism(ARTICLE) < 15
+
+    def test_short_shared_phrases_are_not_copied(self):
+        """Test runs shorter than min_run count towards the longest run only"""
+        text = "Some words then quality content helps improve search and nothing else"
+        copied = CopyDetector(SAMPLE_TEXTS).detect(text)
+        assert 0 < copied.longest_run < suffix.DEFAULT_MIN_RUN
+        assert copied.copied_tokens == 0
+
+        assert CopyDetector(SAMPLE_TEXTS, min_run=2).detect(text).copied_tokens == copied.longest_run
+
+    def test_runs_do_not_span_documents(self):
+        """Test the end of one document and the start of the next are no run"""
+        detector = CopyDetector({"a": "one two three four", "b": "five six seven eight"}, min_run=2)
+        copied = detector.detect("three four five six")
+        assert copied.longest_run == 2
+        assert copied.copied_tokens == 4
+
+    def test_empty_input(self):
+        """Test text without words has no runs"""
+        copied = CopyDetector(SAMPLE_TEXTS).detect("... !!")
+        assert (copied.longest_run, copied.longest_run_source, copied.input_tokens) == (0, None, 0)
+
+    def test_saved_index(self, tmp_path, monkeypatch, capsys):
+        """Test an index built offline loads through COPY_INDEX and gives equal results"""
+        (tmp_path / "pages").mkdir()
+        (tmp_path / "pages" / "guide.txt").write_text(COPIED_PARAGRAPH)
+        out = tmp_path / "index.npz"
+
+        assert suffix.main(["--corpus", str(tmp_path / "pages"), "--out", str(out)]) == 0
+        assert json.loads(capsys.readouterr().out)["documents"] == 1
+
+        monkeypatch.setenv("COPY_INDEX", str(out))
+        loaded = CopyDetector.from_env(SAMPLE_TEXTS)
+        built = CopyDetector({"guide.txt": COPIED_PARAGRAPH})
+        assert loaded.detect(ARTICLE) == built.detect(ARTICLE)
+        assert loaded.detect(ARTICLE).longest_run_source == "guide.txt"
+
+
+class TestScoring:
+    """Test suite for weighting copied text in the final score"""
+
+    def test_weight(self, monkeypatch):
+        """Test copied text only counts when weighted"""
+        base = compute_final_score(60.0, 10.0, KEYWORD_STATS)
+        assert compute_final_score(60.0, 10.0, KEYWORD_STATS, copied_fraction=0.5) == base
+
+        weighted = compute_final_score(60.0, 10.0, KEYWORD_STATS, copied_fraction=0.5, copied_weight=1.0)
+        assert weighted == pytest.approx(base - (90 - 50) * 0.3)
+
+        monkeypatch.setenv("COPIED_TEXT_WEIGHT", "1")
+        assert compute_final_score(60.0, 10.0, KEYWORD_STATS, copied_fraction=0.5) == weighted
+        assert compute_final_score(60.0, 10.0, KEYWORD_STATS) == base
+
+    def test_analyze_reports_copied_text(self):
+        """Test /analyze returns the copied runs"""
+        response = client.post("/analyze", json={"text": ARTICLE, "language": "en"})
+        assert response.status_code == 200
+
+        copied = response.json()["copied_text"]
+        assert copied["longest_run_source"] == "article2"
+        assert copied["input_tokens"] == len(ARTICLE.split())
+        assert 0 < copied["copied_fraction"] < 0.2
+
+    def test_deadline_skips_copied_text(self, monkeypatch):
+        """Test copied-run detection is skipped when the budget is spent"""
+        response = client.post("/analyze", json={"text": ARTICLE, "language": "en"}, headers={"X-Deadline-Ms": "0"})
+        data = response.json()
+        assert data["copied_text"] is None
+        assert "copied_text" in data["coverage"]["skipped"]
+
+        # Only a weighted copied share makes the final score an approximation
+        monkeypatch.setenv("COPIED_TEXT_WEIGHT", "1")
+        coverage = client.post(
+            "/analyze", json={"text": ORIGINAL, "language": "en"}, headers={"X-Deadline-Ms": "0"}
+        ).json()["coverage"]
+        assert coverage["approximated"].count("final_score") == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,198 @@
+"""
+Pytest tests for worker memory watermarks.
+Run with: pytest test_watermark.py -v
+"""
+
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+import main
+from main import app
+from admission import AdmissionController, AdmissionRejected
+from memo import get_stage_cache
+from watermark import MemoryWatermarks, current_rss, trim_memory
+
+# Create test client
+client = TestClient(app)
+
+MB = 1024 * 1024
+
+
+class FakeWorker:
+    """RSS samples and restart/drain calls recorded for assertions"""
+
+    def __init__(self, *samples):
+        self.samples = list(samples)
+        self.restarts = 0
+        self.drains = 0
+        self.trims = 0
+
+    def sample(self):
+        return self.samples.pop(0) if len(self.samples) > 1 else self.samples[0]
+
+    def restart(self):
+        self.restarts += 1
+
+    def drain(self):
+        self.drains += 1
+
+    def trim(self):
+        self.trims += 1
+
+    def watermarks(self, soft_mb=None, hard_mb=None):
+        return MemoryWatermarks(
+            soft_bytes=soft_mb and soft_mb * MB,
+            hard_bytes=hard_mb and hard_mb * MB,
+            trim=self.trim,
+            drain=self.drain,
+            restart=self.restart,
+            sample=self.sample
+        )
+
+
+class TestWatermarks:
+    """Test suite for the soft and hard watermark state machine"""
+
+    def test_below_watermarks_stays_ok(self):
+        """Test nothing happens under both marks"""
+        worker = FakeWorker(100 * MB)
+        watermarks = worker.watermarks(soft_mb=200, hard_mb=300)
+        assert watermarks.check(in_flight=3) == 'ok'
+        assert not watermarks.draining
+        assert (worker.drains, worker.trims, worker.restarts) == (0, 0, 0)
+
+    def test_soft_mark_drains_then_restarts_when_idle(self):
+        """Test the soft mark stops admission and restarts after in-flight work"""
+        worker = FakeWorker(250 * MB)
+        watermarks = worker.watermarks(soft_mb=200, hard_mb=300)
+
+        assert watermarks.check(in_flight=2) == 'draining'
+        assert watermarks.draining
+        assert worker.drains == 1
+        assert watermarks.check(in_flight=1) == 'draining'
+        assert worker.restarts == 0
+
+        assert watermarks.check(in_flight=0) == 'restarting'
+        assert worker.restarts == 1
+        assert worker.drains == 1
+        assert watermarks.counts['soft'] == 1
+        assert watermarks.counts['restart'] == 1
+
+        # Restarting is final
+        assert watermarks.check(in_flight=0) == 'restarting'
+        assert worker.restarts == 1
+
+    def test_hard_mark_trim_avoids_restart(self):
+        """Test a trim that frees enough memory keeps the worker running"""
+        worker = FakeWorker(350 * MB, 120 * MB)
+        watermarks = worker.watermarks(soft_mb=200, hard_mb=300)
+        assert watermarks.check(in_flight=5) == 'ok'
+        assert worker.trims == 1
+        assert worker.restarts == 0
+        assert watermarks.counts['hard'] == 1
+        assert watermarks.peak_rss == 350 * MB
+
+    def test_hard_mark_restarts_without_waiting(self):
+        """Test a failed trim restarts at once, in-flight requests or not"""
+        worker = FakeWorker(350 * MB, 340 * MB)
+        watermarks = worker.watermarks(soft_mb=200, hard_mb=300)
+        assert watermarks.check(in_flight=5) == 'restarting'
+        assert worker.trims == 1
+        assert worker.drains == 1
+        assert worker.restarts == 1
+        assert [event['event'] for event in watermarks.events] == ['hard', 'trim', 'restart']
+
+    def test_disabled_without_marks(self):
+        """Test unset watermarks never act"""
+        worker = FakeWorker(10 ** 12)
+        watermarks = worker.watermarks()
+        assert not watermarks.enabled
+        assert watermarks.check(in_flight=0) == 'ok'
+
+    def test_run_restarts_after_last_request(self):
+        """Test the monitoring loop follows in-flight work down to zero"""
+        worker = FakeWorker(250 * MB)
+        watermarks = worker.watermarks(soft_mb=200)
+        watermarks.check_interval = 0.01
+        in_flight = iter([2, 1, 0])
+
+        asyncio.run(asyncio.wait_for(watermarks.run(lambda: next(in_flight)), timeout=5))
+        assert watermarks.state == 'restarting'
+        assert worker.restarts == 1
+
+    def test_from_env(self, monkeypatch):
+        """Test watermarks are read in megabytes"""
+        monkeypatch.setenv('WORKER_RSS_SOFT_MB', '512')
+        monkeypatch.setenv('WORKER_RSS_HARD_MB', '1024')
+        monkeypatch.setenv('WORKER_RSS_CHECK_SECONDS', '2')
+        watermarks = MemoryWatermarks.from_env()
+        assert watermarks.soft_bytes == 512 * MB
+        assert watermarks.hard_bytes == 1024 * MB
+        assert watermarks.check_interval == 2.0
+
+        monkeypatch.delenv('WORKER_RSS_SOFT_MB')
+        monkeypatch.delenv('WORKER_RSS_HARD_MB')
+        assert not MemoryWatermarks.from_env().enabled
+
+
+class TestMemoryHelpers:
+    """Test suite for RSS sampling and trimming"""
+
+    def test_current_rss_is_positive(self):
+        """Test the process RSS can be read"""
+        assert current_rss() > 0
+
+    def test_trim_clears_stage_caches(self):
+        """Test trimming drops memoized stage results"""
+        cache = get_stage_cache('keywords')
+        cache.get_or_compute('watermark-test', lambda: 1)
+        assert len(cache) > 0
+        trim_memory()
+        assert len(cache) == 0
+
+
+class TestDraining:
+    """Test suite for a draining worker's API behaviour"""
+
+    def test_draining_controller_rejects(self):
+        """Test admission rejects new work once draining"""
+        controller = AdmissionController()
+        controller.drain()
+
+        async def scenario():
+            with pytest.raises(AdmissionRejected) as exc:
+                await controller.acquire(1)
+            return exc.value
+
+        rejected = asyncio.run(scenario())
+        assert rejected.status_code == 503
+        assert controller.rejected['draining'] == 1
+        assert controller.snapshot()['draining'] is True
+
+    def test_draining_worker_api(self, monkeypatch):
+        """Test analyses get 503 and the health check reports draining"""
+        controller = AdmissionController()
+        worker = FakeWorker(250 * MB)
+        watermarks = MemoryWatermarks(soft_bytes=200 * MB, drain=controller.drain,
+                                      restart=worker.restart, sample=worker.sample)
+        monkeypatch.setattr(main, "admission_controller", controller)
+        monkeypatch.setattr(main, "memory_watermarks", watermarks)
+        watermarks.check(in_flight=1)
+
+        response = client.post("/analyze", json={"text": "Some text to analyze.", "keywords": ["text"]})
+        assert response.status_code == 503
+
+        health = client.get("/")
+        assert health.status_code == 503
+        assert health.json()["status"] == "draining"
+
+    def test_metrics_report_memory(self):
+        """Test /metrics includes RSS and watermark state"""
+        memory = client.get("/metrics").json()["memory"]
+        assert memory["rss_bytes"] > 0
+        assert memory["state"] == "ok"
+        assert set(memory["counts"]) == {"soft", "hard", "trim", "restart"}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,223 @@
+"""
+Worker memory watermarks for the SEO Analyzer.
+
+Long-running workers accumulate memory: stage caches, language resources
+and the allocator's hold on freed request strings. A MemoryWatermarks
+monitor samples the worker's resident set size (RSS) periodically:
+
+- Above the soft watermark the worker drains: admission control rejects
+  new analyses with 503 (and the health check reports "draining"), so
+  load balancers route elsewhere, and once the in-flight requests are
+  done the worker restarts itself.
+- Above the hard watermark the caches are dropped and freed memory is
+  returned to the OS at once; if that does not bring RSS back under the
+  mark, the worker restarts without waiting for in-flight requests.
+
+Restarting sends SIGTERM to the worker, so uvicorn shuts down gracefully;
+run workers under a supervisor that starts a replacement (gunicorn with
+uvicorn workers, systemd, Kubernetes).
+
+Configuration (environment):
+    WORKER_RSS_SOFT_MB        Soft watermark (unset: off)
+    WORKER_RSS_HARD_MB        Hard watermark (unset: off)
+    WORKER_RSS_CHECK_SECONDS  Sampling interval (default 5)
+"""
+
+import asyncio
+import ctypes
+import gc
+import os
+import resource
+import signal
+import sys
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+
+from memo import clear_stage_caches
+
+# Seconds between RSS samples
+DEFAULT_CHECK_INTERVAL = 5.0
+
+# Recent watermark events kept for /metrics
+MAX_EVENTS = 50
+
+_MB = 1024 * 1024
+
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+def current_rss() -> int:
+    """
+    Resident set size of this process in bytes.
+
+    Reads /proc/self/statm on Linux; elsewhere falls back to the peak RSS
+    reported by getrusage, which only ever grows.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def trim_memory() -> None:
+    """Drop the stage caches, collect garbage and return free pages to the OS (glibc)"""
+    clear_stage_caches()
+    gc.collect()
+    try:
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def terminate_worker() -> None:
+    """Ask this worker to shut down gracefully"""
+    os.kill(os.getpid(), signal.SIGTERM)
+
+
+class MemoryWatermarks:
+    """
+    Soft and hard RSS watermarks of one worker.
+
+    Args:
+        soft_bytes: RSS above which the worker drains and restarts (None: off)
+        hard_bytes: RSS above which caches are dropped and the worker
+            restarts at once (None: off)
+        check_interval: Seconds between samples in `run`
+        trim: Frees memory at the hard watermark (default: `trim_memory`)
+        drain: Stops admitting new work (called when draining starts)
+        restart: Restarts the worker (default: SIGTERM to this process)
+        sample: Returns the current RSS in bytes
+    """
+
+    def __init__(
+        self,
+        soft_bytes: Optional[int] = None,
+        hard_bytes: Optional[int] = None,
+        check_interval: float = DEFAULT_CHECK_INTERVAL,
+        trim: Optional[Callable[[], None]] = trim_memory,
+        drain: Optional[Callable[[], None]] = None,
+        restart: Callable[[], None] = terminate_worker,
+        sample: Callable[[], int] = current_rss
+    ):
+        self.soft_bytes = soft_bytes
+        self.hard_bytes = hard_bytes
+        self.check_interval = check_interval
+        self.trim = trim
+        self.drain = drain
+        self.restart = restart
+        self.sample = sample
+
+        self.state = 'ok'  # ok, draining or restarting
+        self.rss = 0
+        self.peak_rss = 0
+        self.counts: Dict[str, int] = {'soft': 0, 'hard': 0, 'trim': 0, 'restart': 0}
+        self.events: Deque[dict] = deque(maxlen=MAX_EVENTS)
+
+    @classmethod
+    def from_env(cls, drain: Optional[Callable[[], None]] = None) -> 'MemoryWatermarks':
+        """Create watermarks configured from WORKER_RSS_* environment variables"""
+        soft = _env_float('WORKER_RSS_SOFT_MB', None)
+        hard = _env_float('WORKER_RSS_HARD_MB', None)
+        return cls(
+            soft_bytes=int(soft * _MB) if soft else None,
+            hard_bytes=int(hard * _MB) if hard else None,
+            check_interval=_env_float('WORKER_RSS_CHECK_SECONDS', DEFAULT_CHECK_INTERVAL),
+            drain=drain
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.soft_bytes is not None or self.hard_bytes is not None
+
+    @property
+    def draining(self) -> bool:
+        """True once the worker stopped accepting new work"""
+        return self.state != 'ok'
+
+    def _record(self, event: str) -> None:
+        self.counts[event] += 1
+        self.events.append({'event': event, 'time': time.time(), 'rss_bytes': self.rss})
+
+    def check(self, in_flight: int) -> str:
+        """
+        Sample RSS and act on crossed watermarks.
+
+        Args:
+            in_flight: Requests the worker is still serving
+
+        Returns:
+            str: State after the check ('ok', 'draining' or 'restarting')
+        """
+        if self.state == 'restarting':
+            return self.state
+
+        self.rss = self.sample()
+        self.peak_rss = max(self.peak_rss, self.rss)
+
+        if self.hard_bytes is not None and self.rss >= self.hard_bytes:
+            self._record('hard')
+            if self.trim is not None:
+                self.trim()
+                self.rss = self.sample()
+                self._record('trim')
+            if self.rss >= self.hard_bytes:
+                return self._restart()
+
+        if self.state == 'ok' and self.soft_bytes is not None and self.rss >= self.soft_bytes:
+            self.state = 'draining'
+            self._record('soft')
+            if self.drain is not None:
+                self.drain()
+
+        if self.state == 'draining' and in_flight <= 0:
+            return self._restart()
+        return self.state
+
+    def _restart(self) -> str:
+        if self.state == 'ok' and self.drain is not None:
+            self.drain()
+        self.state = 'restarting'
+        self._record('restart')
+        self.restart()
+        return self.state
+
+    async def run(self, in_flight: Callable[[], int]) -> None:
+        """
+        Check the watermarks every `check_interval` seconds until cancelled.
+
+        Args:
+            in_flight: Returns the number of requests in flight
+        """
+        while self.state != 'restarting':
+            self.check(in_flight())
+            # Drain checks run more often, so the restart follows the last request closely
+            interval = self.check_interval if self.state == 'ok' else min(self.check_interval, 0.1)
+            await asyncio.sleep(interval)
+
+    def snapshot(self) -> dict:
+        """
+        Report memory usage and watermark events.
+
+        Returns:
+            dict: Current and peak RSS, watermarks, state, event counts and
+            the most recent events
+        """
+        rss = self.sample()
+        self.peak_rss = max(self.peak_rss, rss)
+        return {
+            'enabled': self.enabled,
+            'rss_bytes': rss,
+            'peak_rss_bytes': self.peak_rss,
+            'soft_bytes': self.soft_bytes,
+            'hard_bytes': self.hard_bytes,
+            'state': self.state,
+            'counts': dict(self.counts),
+            'events': list(self.events),
+        }